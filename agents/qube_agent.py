@@ -63,21 +63,45 @@ class QubeSmartAgent:
     def aplan(self, input_data):
         raise NotImplementedError("Subclass must implement aplan method")
 
-    def process_qube(self, token_id):
-        try:
-            # Simulate web interface logging
-            self.web_interface.log_qube_processing(token_id)
-            
-            # Explicitly call decrypt and handle potential exceptions
-            try:
-                result = self.qube_handler.decrypt(token_id)
-            except Exception as decrypt_error:
-                # Re-raise the original exception
-                raise
-        except Exception as e:
-            # Log the error and re-raise
-            self.web_interface.log_qube_processing(token_id, error=str(e))
-            raise
+    def process_qube(self, token_id: str) -> Dict[str, Any]:
+        """
+        Decrypt one Qube token and log the result
+        
+        Goes through decrypt_many like process_qubes, so single tokens share
+        its CID deduplication and block cache.
+        
+        Args:
+            token_id: Qube token ID to process
+        
+        Returns:
+            Decrypted token result
+        
+        Raises:
+            RuntimeError: If the token could not be decrypted
+        """
+        result = self.process_qubes([token_id], max_workers=1)[0]
+        if 'error' in result:
+            raise RuntimeError(f"Failed to process Qube token {token_id}: {result['error']}")
+        return result
+
+    def process_qubes(self, token_ids: List[str], max_workers: int = 8) -> List[Dict[str, Any]]:
+        """
+        Decrypt a batch of Qube tokens concurrently and log each result
+        
+        Args:
+            token_ids: Qube token IDs to process
+            max_workers: Upper bound on concurrent IPFS fetches
+        
+        Returns:
+            One result per token, in order; failures carry an 'error' key
+        """
+        results = self.qube_handler.decrypt_many(token_ids, max_workers=max_workers)
+        for result in results:
+            if 'error' in result:
+                self.web_interface.log_qube_processing(token_id=result['token_id'], error=result['error'])
+            else:
+                self.web_interface.log_qube_processing(token_id=result['token_id'], data=result)
+        return results
 
     def plan_and_execute(self, objective):
         raise NotImplementedError("Subclass must implement plan_and_execute method")
@@ -372,22 +396,6 @@ class ConcreteQubeAgent(QubeSmartAgent):
     def aplan(self, input_data):
         return [{"action": "test_aplan", "details": input_data}]
 
-    def process_qube(self, token_id):
-        try:
-            # Simulate web interface logging
-            self.web_interface.log_qube_processing(token_id)
-            
-            # Explicitly call decrypt and handle potential exceptions
-            try:
-                result = self.qube_handler.decrypt(token_id)
-            except Exception as decrypt_error:
-                # Re-raise the original exception
-                raise
-        except Exception as e:
-            # Log the error and re-raise
-            self.web_interface.log_qube_processing(token_id, error=str(e))
-            raise
-
     def plan_and_execute(self, objective):
         try:
             # Simulate web interface update
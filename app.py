@@ -1,6 +1,8 @@
 from flask import Flask, request, jsonify, render_template, session, send_from_directory, make_response
 from flask_cors import CORS
 from agents.qube_agent import QubeAgent
+from qube_agent.utils.decryption import DecryptionService
+from qube_agent.utils.static_assets import IMMUTABLE, REVALIDATE, PageCache, StaticAssets, asset_response
 import os
 import json
 import logging
@@ -8,7 +10,6 @@ import sys
 from PIL import Image
 import io
 from datetime import datetime
-import base64
 from cryptography.fernet import Fernet
 
 # Configure logging
@@ -26,18 +27,33 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": ["https://qubeagent.iqube-staging.surge.sh", "http://localhost:5000", "http://localhost:3000"]}})
+CORS_ORIGINS = ["https://qubeagent.iqube-staging.surge.sh", "http://localhost:5000", "http://localhost:3000"]
+
+# Static files are served by send_static below, not by Flask's default route
+app = Flask(__name__, static_folder=None)
+CORS(app, resources={r"/*": {"origins": CORS_ORIGINS}})
 # Use a consistent secret key for development or load from environment
 app.secret_key = os.environ.get('SECRET_KEY', os.urandom(24))  # for session management
 
 # Initialize QubeAgent
 qube_agent = QubeAgent()
 
+# Static files, hashed and precompressed once at startup
+static_assets = StaticAssets(os.path.join(app.root_path, 'static'))
+app.jinja_env.globals['asset_url'] = static_assets.url
+
+# Rendered templates; bypassed in debug mode so template edits show up
+page_cache = PageCache()
+
 # Mock encryption key - in production this would be securely managed
 MOCK_KEY = Fernet.generate_key()
 fernet = Fernet(MOCK_KEY)
 
+# Memoised BlakQube decryption, keyed by (tokenQubeId, version)
+decryption_service = DecryptionService(
+    maxsize=int(os.environ.get('DECRYPTION_CACHE_SIZE', 1024))
+)
+
 def get_mock_tokeqube_data(tokeqube_id):
     """Get mock TokenQube data that mimics blockchain structure."""
     return {
@@ -68,23 +84,20 @@ def get_mock_tokeqube_data(tokeqube_id):
         }
     }
 
-def decrypt_data(encrypted_data):
-    """Decrypt the encrypted data string."""
-    try:
-        # Remove the ENC prefix and extract the base64 data
-        if encrypted_data.startswith("ENC[AES256-GCM,data:"):
-            # Extract the base64 part
-            base64_data = encrypted_data[encrypted_data.index("data:") + 5:encrypted_data.index("]")]
-            # For mock purposes, just decode the base64 data
-            return base64.b64decode(base64_data).decode()
-    except Exception as e:
-        logger.error(f"Decryption error: {str(e)}")
-        return None
+def decrypt_blakqube(tokeqube_id):
+    """Decrypt a TokenQube's BlakQube, memoised under a version derived on the server."""
+    # Mock TokenQubes carry no on-chain version; the registry counter is bumped by
+    # /invalidate_iqube, and the BlakQube is only loaded on a cache miss
+    return decryption_service.get_or_decrypt(
+        tokeqube_id,
+        decryption_service.current_version(tokeqube_id),
+        lambda: get_mock_tokeqube_data(tokeqube_id).get('blakQube', {})
+    )
 
 @app.route('/')
 def index():
     """Main dashboard route"""
-    return render_template('index.html')
+    return cached_page('index.html')
 
 @app.route('/connect_wallet', methods=['POST'])
 def connect_wallet():
@@ -131,18 +144,8 @@ def share_iqube():
         tokeqube_id = data.get('tokenQubeId')
         iqube_type = data.get('iQubeType')
         
-        # Get the TokenQube data
-        tokeqube_data = get_mock_tokeqube_data(tokeqube_id)
-        
-        # Get BlakQube data
-        blakqube_data = tokeqube_data.get('blakQube', {})
-        
-        # Decrypt each field
-        decrypted_data = {}
-        for key, value in blakqube_data.items():
-            decrypted_value = decrypt_data(value)
-            if decrypted_value:
-                decrypted_data[key] = decrypted_value
+        # Decrypt the BlakQube only if this version isn't cached
+        decrypted_data = decrypt_blakqube(tokeqube_id)
         
         # Store decrypted data in agent's context
         agent_context = {
@@ -167,20 +170,72 @@ def share_iqube():
             'message': str(e)
         }), 500
 
+@app.route('/invalidate_iqube', methods=['POST'])
+def invalidate_iqube():
+    """Drop cached BlakQube decryptions for a TokenQube."""
+    if not session.get('wallet_address'):
+        return jsonify({
+            'status': 'error',
+            'message': 'Connect a wallet first'
+        }), 401
+    try:
+        data = request.json
+        tokeqube_id = data.get('tokenQubeId')
+        
+        if not tokeqube_id:
+            raise ValueError("No tokenQubeId provided")
+        
+        # Every cached version goes; versions are never taken from the client
+        removed = decryption_service.invalidate(tokeqube_id)
+        
+        return jsonify({
+            'status': 'success',
+            'invalidated': removed
+        })
+        
+    except Exception as e:
+        logger.error(f"Error invalidating iQube: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 def update_agent_context(context_data):
     """Update QubeAgent's context with new data."""
     try:
         # Here you would update your agent's context
         # For now, we'll just log it
-        logger.info(f"Updating agent context with: {context_data}")
+        logger.info("Updating agent context with: %s", context_data)
         return True
     except Exception as e:
         logger.error(f"Error updating agent context: {str(e)}")
         return False
 
+def _asset_response(asset, cache_control):
+    status, headers, body = asset_response(
+        asset,
+        cache_control,
+        request.headers.get('Accept-Encoding', ''),
+        request.headers.get('If-None-Match', '')
+    )
+    response = make_response(body, status)
+    response.headers.update(headers)
+    return response
+
+def cached_page(template_name):
+    """Serve a template rendered once, with ETag revalidation and compression."""
+    if app.debug:
+        return render_template(template_name)
+    page = page_cache.get_or_render(template_name, lambda: render_template(template_name))
+    return _asset_response(page, REVALIDATE)
+
 @app.route('/static/<path:path>')
 def send_static(path):
-    return send_from_directory('static', path)
+    asset, hashed = static_assets.lookup(path)
+    if asset is None:
+        # Files added after startup
+        return send_from_directory(os.path.join(app.root_path, 'static'), path)
+    return _asset_response(asset, IMMUTABLE if hashed else REVALIDATE)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,442 @@
+"""
+ASGI serving mode for the QubeAgent web app.
+
+Serves the routes of ``app.py`` (the index page, static assets and the JSON
+API) and the dashboard API of ``web_dashboard.py`` from an event loop.
+Handlers await the storage and reasoning layers, which run in a thread
+pool, so a slow IPFS, LLM or SQLite call no longer pins a worker; cheap
+in-memory work runs on the loop. The dashboard's server-sent events stream
+is an async generator, so idle subscribers cost no thread. The dashboard
+HTML page stays Flask-only.
+
+Run with any ASGI server, for example:
+
+    uvicorn asgi_app:application --workers 4
+"""
+import asyncio
+import functools
+import json
+import logging
+import mimetypes
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from flask import render_template
+from werkzeug.security import safe_join
+
+import app as qube_app
+import web_dashboard
+from qube_agent.utils.static_assets import IMMUTABLE, REVALIDATE, asset_response
+
+logger = logging.getLogger(__name__)
+
+
+class Response:
+    """
+    A response that is not a JSON body: a page, a static file or a stream.
+    """
+
+    def __init__(
+        self,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes = b"",
+        stream: Optional[AsyncIterator[bytes]] = None
+    ):
+        """
+        Initialize the response.
+
+        Args:
+            status: HTTP status
+            headers: Response headers
+            body: Complete body, unless stream is given
+            stream: Body chunks, sent as they are produced
+        """
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stream = stream
+
+
+Handler = Callable[["Request"], Awaitable[Union[Tuple[int, Any], Response]]]
+
+
+class Request:
+    """
+    Minimal view of an ASGI HTTP request.
+    """
+
+    def __init__(self, scope: Dict[str, Any], body: bytes, params: Dict[str, str]):
+        self.scope = scope
+        self.body = body
+        self.params = params
+        self.headers = {
+            key.decode("latin-1").lower(): value.decode("latin-1")
+            for key, value in scope.get("headers", [])
+        }
+        self.session_changes: Optional[Dict[str, Any]] = None
+
+    @property
+    def json(self) -> Any:
+        """Request body parsed as JSON, or None if empty."""
+        return json.loads(self.body) if self.body else None
+
+    def cookie(self, name: str) -> Optional[str]:
+        """
+        Read a cookie from the request.
+
+        Args:
+            name: Cookie name
+
+        Returns:
+            Cookie value, or None if absent
+        """
+        cookies = SimpleCookie(self.headers.get("cookie", ""))
+        morsel = cookies.get(name)
+        return morsel.value if morsel else None
+
+
+class QubeAgentASGI:
+    """
+    Dependency-free ASGI application exposing the QubeAgent routes.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the application.
+
+        Args:
+            max_workers: Threads available to blocking storage and reasoning calls
+        """
+        self.logger = logging.getLogger(__name__)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="qubeagent-asgi"
+        )
+        self.routes: List[Tuple[str, "re.Pattern[str]", Handler]] = []
+        self.route("GET", "/", self.index)
+        self.route("POST", "/connect_wallet", self.connect_wallet)
+        self.route("GET", "/retrieve_tokeqube/<tokeqube_id>", self.retrieve_tokeqube)
+        self.route("POST", "/share_iqube", self.share_iqube)
+        self.route("POST", "/invalidate_iqube", self.invalidate_iqube)
+        self.route("GET", "/static/<path:path>", self.send_static)
+        self.route("GET", "/api/dashboard", self.get_dashboard)
+        self.route("GET", "/api/dashboard/stream", self.stream_dashboard)
+
+        # Sign sessions exactly like the Flask app so cookies work across modes
+        self.session_serializer = qube_app.app.session_interface.get_signing_serializer(
+            qube_app.app
+        )
+        self.session_cookie = qube_app.app.config["SESSION_COOKIE_NAME"]
+
+    def route(self, method: str, path: str, handler: Handler) -> None:
+        """
+        Register a handler; ``<name>`` segments become path parameters, and
+        ``<path:name>`` ones may span several segments.
+
+        Args:
+            method: HTTP method
+            path: Path template
+            handler: Coroutine returning (status, JSON body) or a Response
+        """
+        pattern = re.sub(
+            r"<(path:)?(\w+)>",
+            lambda m: f"(?P<{m.group(2)}>{'.+' if m.group(1) else '[^/]+'})",
+            path
+        )
+        pattern = re.compile("^" + pattern + "$")
+        self.routes.append((method, pattern, handler))
+
+    async def run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Await a blocking call on the worker pool.
+
+        Args:
+            func: Callable to run
+            args: Positional arguments
+
+        Returns:
+            The callable's result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    def _asset(self, request: Request, asset, cache_control: str) -> Response:
+        status, headers, body = asset_response(
+            asset,
+            cache_control,
+            request.headers.get("accept-encoding", ""),
+            request.headers.get("if-none-match", "")
+        )
+        return Response(status, headers, body)
+
+    async def index(self, request: Request) -> Response:
+        """Main dashboard route"""
+        def render() -> str:
+            with qube_app.app.test_request_context("/"):
+                return render_template("index.html")
+
+        # Rendering touches the template loader, so only a miss leaves the loop
+        page = qube_app.page_cache.get("index.html")
+        if page is None:
+            page = await self.run_blocking(qube_app.page_cache.get_or_render, "index.html", render)
+        return self._asset(request, page, REVALIDATE)
+
+    async def send_static(self, request: Request) -> Union[Tuple[int, Any], Response]:
+        """Serve a static file, hashed and precompressed when known at startup."""
+        path = request.params["path"]
+        asset, hashed = qube_app.static_assets.lookup(path)
+        if asset is not None:
+            return self._asset(request, asset, IMMUTABLE if hashed else REVALIDATE)
+
+        # Files added after startup
+        filename = safe_join(os.path.join(qube_app.app.root_path, "static"), path)
+        if filename is None or not os.path.isfile(filename):
+            return 404, {"error": "Not Found"}
+        body = await self.run_blocking(_read_file, filename)
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return Response(200, {"Content-Type": content_type, "Cache-Control": "no-cache"}, body)
+
+    async def connect_wallet(self, request: Request) -> Tuple[int, Any]:
+        """Connect to user's Ethereum wallet."""
+        try:
+            data = request.json
+            wallet_address = data.get('address')
+
+            if not wallet_address:
+                raise ValueError("No wallet address provided")
+
+            request.session_changes = {'wallet_address': wallet_address}
+
+            return 200, {
+                "status": "success",
+                "message": "Wallet connected successfully",
+                "address": wallet_address
+            }
+
+        except Exception as e:
+            self.logger.error(f"Error connecting wallet: {str(e)}")
+            return 500, {"status": "error", "message": str(e)}
+
+    async def retrieve_tokeqube(self, request: Request) -> Tuple[int, Any]:
+        """Retrieve TokenQube data."""
+        tokeqube_id = request.params['tokeqube_id']
+        try:
+            return 200, await self.run_blocking(qube_app.get_mock_tokeqube_data, tokeqube_id)
+        except Exception as e:
+            self.logger.error(f"Error retrieving TokenQube {tokeqube_id}: {str(e)}")
+            return 500, {"error": str(e)}
+
+    async def share_iqube(self, request: Request) -> Tuple[int, Any]:
+        """Share iQube with QubeAgent by decrypting BlakQube data."""
+        try:
+            data = request.json
+            tokeqube_id = data.get('tokenQubeId')
+            iqube_type = data.get('iQubeType')
+
+            decrypted_data = await self.run_blocking(qube_app.decrypt_blakqube, tokeqube_id)
+
+            await self.run_blocking(qube_app.update_agent_context, {
+                'iQubeType': iqube_type,
+                'tokenQubeId': tokeqube_id,
+                'decryptedData': decrypted_data
+            })
+
+            return 200, {
+                'status': 'success',
+                'message': 'iQube shared successfully with QubeAgent',
+                'decryptedData': decrypted_data
+            }
+
+        except Exception as e:
+            self.logger.error(f"Error sharing iQube: {str(e)}")
+            return 500, {'status': 'error', 'message': str(e)}
+
+    async def invalidate_iqube(self, request: Request) -> Tuple[int, Any]:
+        """Drop cached BlakQube decryptions for a TokenQube."""
+        if not self._session(request).get('wallet_address'):
+            return 401, {'status': 'error', 'message': 'Connect a wallet first'}
+        try:
+            data = request.json
+            tokeqube_id = data.get('tokenQubeId')
+
+            if not tokeqube_id:
+                raise ValueError("No tokenQubeId provided")
+
+            # In-memory and cheap, so it runs on the loop
+            removed = qube_app.decryption_service.invalidate(tokeqube_id)
+
+            return 200, {'status': 'success', 'invalidated': removed}
+
+        except Exception as e:
+            self.logger.error(f"Error invalidating iQube: {str(e)}")
+            return 500, {'status': 'error', 'message': str(e)}
+
+    async def stream_dashboard(self, request: Request) -> Response:
+        """Server-sent events stream of live dashboard updates"""
+        bus = web_dashboard.web_interface.event_bus
+        subscription = bus.subscribe(agent_id=web_dashboard.AGENT_ID)
+        return Response(
+            200,
+            {
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            },
+            stream=bus.astream(subscription)
+        )
+
+    async def get_dashboard(self, request: Request) -> Tuple[int, Any]:
+        """API endpoint to get dashboard data"""
+        dashboard = await self.run_blocking(
+            web_dashboard.web_interface.get_agent_dashboard, web_dashboard.AGENT_ID
+        )
+        return 200, {
+            'config': dashboard.get('config', {}),
+            'status_history': dashboard.get('status_history', []),
+            'qube_logs': dashboard.get('qube_logs', [])
+        }
+
+    def _cors_headers(self, request: Request) -> List[Tuple[bytes, bytes]]:
+        origin = request.headers.get("origin")
+        if origin not in qube_app.CORS_ORIGINS:
+            return []
+        return [
+            (b"access-control-allow-origin", origin.encode("latin-1")),
+            (b"vary", b"Origin"),
+        ]
+
+    def _session(self, request: Request) -> Dict[str, Any]:
+        existing = request.cookie(self.session_cookie)
+        if not existing:
+            return {}
+        try:
+            return self.session_serializer.loads(existing)
+        except Exception:
+            return {}
+
+    def _session_cookie(self, request: Request) -> Optional[bytes]:
+        if request.session_changes is None:
+            return None
+        session = self._session(request)
+        session.update(request.session_changes)
+        value = self.session_serializer.dumps(session)
+        return f"{self.session_cookie}={value}; HttpOnly; Path=/".encode("latin-1")
+
+    async def _read_body(self, receive: Callable[[], Awaitable[Dict[str, Any]]]) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    self.executor.shutdown(wait=False)
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        method, path = scope["method"], scope["path"]
+        body = await self._read_body(receive)
+        request = Request(scope, body, {})
+        headers = self._cors_headers(request)
+
+        status, payload = 404, {"error": "Not Found"}
+        if method == "OPTIONS" and headers:
+            status, payload = 204, None
+            headers += [
+                (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+                (b"access-control-allow-headers", b"Content-Type"),
+            ]
+        else:
+            for route_method, pattern, handler in self.routes:
+                match = pattern.match(path)
+                if not match:
+                    continue
+                if route_method != method:
+                    status, payload = 405, {"error": "Method Not Allowed"}
+                    continue
+                request.params = match.groupdict()
+                try:
+                    result = await handler(request)
+                    if isinstance(result, Response):
+                        status, payload = result.status, result
+                    else:
+                        status, payload = result
+                except Exception as e:
+                    self.logger.error(f"Unhandled error on {method} {path}: {e}")
+                    status, payload = 500, {"error": str(e)}
+                break
+
+        cookie = self._session_cookie(request)
+        if cookie:
+            headers.append((b"set-cookie", cookie))
+
+        if isinstance(payload, Response):
+            headers += [
+                (key.lower().encode("latin-1"), value.encode("latin-1"))
+                for key, value in payload.headers.items()
+            ]
+            await send({"type": "http.response.start", "status": payload.status, "headers": headers})
+            if payload.stream is not None:
+                await self._send_stream(payload.stream, receive, send)
+            else:
+                await send({"type": "http.response.body", "body": payload.body})
+            return
+
+        content = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        headers.append((b"content-length", str(len(content)).encode()))
+        if payload is not None:
+            headers.append((b"content-type", b"application/json"))
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
+
+    async def _send_stream(self, stream: AsyncIterator[bytes], receive, send) -> None:
+        """Send chunks as they are produced until the stream ends or the client leaves."""
+        async def pump() -> None:
+            async for chunk in stream:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def disconnected() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        sending = asyncio.ensure_future(pump())
+        watching = asyncio.ensure_future(disconnected())
+        try:
+            await asyncio.wait({sending, watching}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (sending, watching):
+                task.cancel()
+            await asyncio.gather(sending, watching, return_exceptions=True)
+            # Runs the stream's cleanup, e.g. unsubscribing, if it never started
+            await stream.aclose()
+        if not sending.cancelled() and sending.exception() is not None:
+            raise sending.exception()
+
+
+def _read_file(filename: str) -> bytes:
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+application = QubeAgentASGI(
+    max_workers=int(os.environ.get('ASGI_BLOCKING_WORKERS', 32))
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(application, host="127.0.0.1", port=int(os.environ.get('PORT', 8000)))
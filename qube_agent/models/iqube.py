@@ -111,6 +111,10 @@ class MetaQube:
     accuracy_score: float = 0.0
     risk_score: float = 0.0
     
+    # Published payload, set when the content is uploaded to IPFS
+    content_cid: Optional[str] = None
+    content_size: int = 0
+    
     @property
     def trust_score(self) -> float:
         """
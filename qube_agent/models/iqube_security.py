@@ -1,6 +1,7 @@
 from __future__ import annotations
 import base64
 import hashlib
+import json
 import os
 from typing import Any, Dict, Optional, Union
 
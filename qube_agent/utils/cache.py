@@ -1,5 +1,5 @@
 from functools import lru_cache, wraps
-from typing import Callable, Any
+from typing import Callable
 from collections import OrderedDict
 
 class SimpleCache:
@@ -66,6 +66,38 @@ class SimpleCache:
         """
         return self._cache.get(key, default)
 
+    def pop(self, key, default=None):
+        """
+        Remove an item from the cache and return it.
+        
+        :param key: The key to remove
+        :param default: The value to return if key is not found
+        :return: The removed value or default
+        """
+        return self._cache.pop(key, default)
+
+    def clear(self):
+        """
+        Remove all items from the cache.
+        """
+        self._cache.clear()
+
+    def keys(self):
+        """
+        Snapshot of the cached keys, least recently used first.
+        
+        :return: List of keys
+        """
+        return list(self._cache)
+
+    def __len__(self):
+        """
+        Number of items currently cached.
+        
+        :return: Item count
+        """
+        return len(self._cache)
+
 def cached(maxsize=128):
     """
     A decorator that provides caching for functions.
@@ -0,0 +1,547 @@
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+HISTORY_KINDS = ("status_history", "qube_logs", "iqube_context_layers", "strategic_insights")
+
+
+class DashboardStore(ABC):
+    """
+    Storage backend for agent dashboards.
+
+    A dashboard is a config dict plus append-only histories, one per entry
+    in ``HISTORY_KINDS``.
+    """
+
+    @abstractmethod
+    def create_dashboard(self, agent_id: str, config: Dict[str, Any]) -> None:
+        """
+        Create a dashboard, or update the config of an existing one.
+
+        Args:
+            agent_id: Agent's unique identifier
+            config: Dashboard configuration
+        """
+
+    @abstractmethod
+    def has_dashboard(self, agent_id: str) -> bool:
+        """
+        Check whether a dashboard exists.
+
+        Args:
+            agent_id: Agent's unique identifier
+
+        Returns:
+            True if the dashboard exists
+        """
+
+    @abstractmethod
+    def agent_ids(self) -> List[str]:
+        """
+        List the agents that have dashboards.
+
+        Returns:
+            Agent identifiers
+        """
+
+    @abstractmethod
+    def append(self, agent_id: str, kind: str, entries: List[Dict[str, Any]]) -> None:
+        """
+        Append entries to one of a dashboard's histories.
+
+        Args:
+            agent_id: Agent's unique identifier
+            kind: History name, one of HISTORY_KINDS
+            entries: Entries to append, oldest first
+        """
+
+    @abstractmethod
+    def snapshot(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a dashboard without sharing state with the store.
+
+        Args:
+            agent_id: Agent's unique identifier
+
+        Returns:
+            Dashboard dict, or None if it does not exist
+        """
+
+    @abstractmethod
+    def compact(
+        self,
+        max_age_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ) -> int:
+        """
+        Apply retention to every history.
+
+        Args:
+            max_age_seconds: Drop entries older than this
+            max_entries: Keep at most this many entries per agent and history
+
+        Returns:
+            Number of entries removed
+        """
+
+    def flush(self) -> None:
+        """Persist any buffered appends."""
+
+    def close(self) -> None:
+        """Flush and release resources."""
+        self.flush()
+
+
+class InMemoryDashboardStore(DashboardStore):
+    """
+    Process-local dashboard store.
+
+    The dashboard mapping is replaced copy-on-write, and list appends are
+    atomic under the GIL, so readers never take a lock.
+    """
+
+    def __init__(self):
+        self.dashboards: Dict[str, Dict[str, Any]] = {}
+        # Append times, parallel to each history, for age-based retention
+        self._appended_at: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def create_dashboard(self, agent_id: str, config: Dict[str, Any]) -> None:
+        dashboard = {"config": config}
+        dashboard.update({kind: [] for kind in HISTORY_KINDS})
+        with self._lock:
+            for kind in HISTORY_KINDS:
+                self._appended_at[(agent_id, kind)] = []
+            dashboards = dict(self.dashboards)
+            dashboards[agent_id] = dashboard
+            self.dashboards = dashboards
+
+    def has_dashboard(self, agent_id: str) -> bool:
+        return agent_id in self.dashboards
+
+    def agent_ids(self) -> List[str]:
+        return list(self.dashboards)
+
+    def append(self, agent_id: str, kind: str, entries: List[Dict[str, Any]]) -> None:
+        dashboard = self.dashboards.get(agent_id)
+        if dashboard is None:
+            return
+        now = time.time()
+        dashboard[kind].extend(entries)
+        self._appended_at[(agent_id, kind)].extend([now] * len(entries))
+
+    def snapshot(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        stored = self.dashboards.get(agent_id)
+        if stored is None:
+            return None
+        # Copying a list is a single atomic step under the GIL, so each
+        # history is consistent even while writers append. The copied
+        # entries are then deep-copied so callers cannot edit stored ones.
+        return {
+            key: copy.deepcopy(list(value) if isinstance(value, list) else value)
+            for key, value in stored.items()
+        }
+
+    def compact(
+        self,
+        max_age_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ) -> int:
+        removed = 0
+        cutoff = time.time() - max_age_seconds if max_age_seconds is not None else None
+        with self._lock:
+            for agent_id, dashboard in self.dashboards.items():
+                for kind in HISTORY_KINDS:
+                    times = self._appended_at[(agent_id, kind)]
+                    drop = 0
+                    if cutoff is not None:
+                        while drop < len(times) and times[drop] < cutoff:
+                            drop += 1
+                    if max_entries is not None:
+                        drop = max(drop, len(times) - max_entries)
+                    if drop:
+                        # Prefix deletes are atomic under the GIL and stay
+                        # aligned with appends racing this compaction.
+                        del dashboard[kind][:drop]
+                        del times[:drop]
+                        removed += drop
+        return removed
+
+
+class SQLiteDashboardStore(DashboardStore):
+    """
+    Dashboard store backed by SQLite in WAL mode.
+
+    Several processes (e.g. gunicorn workers) can share one database file.
+    Appends are buffered and written in batches, either when the buffer
+    fills or on the flush interval; a failed write keeps its rows buffered
+    for the next flush. Reads borrow a connection from a small pool, so the
+    number of open connections follows concurrent reads, not the number of
+    threads, and never wait for writers: they return committed rows plus
+    this process's still-buffered appends. Other processes' buffered
+    appends become visible once they flush.
+
+    Only the stored dashboards are shared: live updates go through each
+    process's own DashboardEventBus, so an SSE client sees events from the
+    worker serving its stream only.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS dashboards (
+            agent_id TEXT PRIMARY KEY,
+            config TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS dashboard_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            agent_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            ts REAL NOT NULL,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_agent_kind_ts
+            ON dashboard_entries (agent_id, kind, ts);
+        CREATE INDEX IF NOT EXISTS idx_entries_ts
+            ON dashboard_entries (ts);
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 100,
+        flush_interval: Optional[float] = 0.5,
+        timeout: float = 30.0,
+        max_idle_readers: int = 4
+    ):
+        """
+        Open (or create) a dashboard database.
+
+        Args:
+            path: SQLite database file
+            batch_size: Buffered appends that trigger a write
+            flush_interval: Seconds between background flushes, None to disable
+            timeout: Seconds to wait on a locked database
+            max_idle_readers: Reader connections kept open between reads
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_idle_readers = max_idle_readers
+        self.logger = logging.getLogger(__name__)
+
+        self._buffer: List[Tuple[str, str, float, str]] = []
+        # Rows being written by flush(); with _flush_gen (odd while a flush is
+        # in progress) readers tell which buffered rows their read already saw
+        self._inflight: List[Tuple[str, str, float, str]] = []
+        self._flush_gen = 0
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._idle_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.executescript(self.SCHEMA)
+
+        self._stop = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, args=(flush_interval,), daemon=True
+            )
+            self._flusher.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        # Readers are separate from the writer: WAL readers never block it
+        with self._readers_lock:
+            conn = self._idle_readers.pop() if self._idle_readers else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._readers_lock:
+                keep = not self._closed and len(self._idle_readers) < self.max_idle_readers
+                if keep:
+                    self._idle_readers.append(conn)
+            if not keep:
+                conn.close()
+
+    def _flush_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Dashboard flush failed: {e}")
+
+    def create_dashboard(self, agent_id: str, config: Dict[str, Any]) -> None:
+        with self._write_lock:
+            self._writer.execute(
+                "INSERT INTO dashboards (agent_id, config, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(agent_id) DO UPDATE SET config = excluded.config",
+                (agent_id, json.dumps(config, default=str), time.time())
+            )
+
+    def has_dashboard(self, agent_id: str) -> bool:
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM dashboards WHERE agent_id = ?", (agent_id,)
+            ).fetchone()
+        return row is not None
+
+    def agent_ids(self) -> List[str]:
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT agent_id FROM dashboards ORDER BY created_at"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def append(self, agent_id: str, kind: str, entries: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        rows = [(agent_id, kind, now, json.dumps(e, default=str)) for e in entries]
+        with self._buffer_lock:
+            self._buffer.extend(rows)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._buffer_lock:
+                if not self._buffer:
+                    return
+                rows, self._buffer = self._buffer, []
+                self._inflight = rows
+                self._flush_gen += 1
+            try:
+                self._writer.execute("BEGIN IMMEDIATE")
+                self._writer.executemany(
+                    "INSERT INTO dashboard_entries (agent_id, kind, ts, payload) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._writer.execute("COMMIT")
+            except Exception:
+                if self._writer.in_transaction:
+                    self._writer.execute("ROLLBACK")
+                # Keep the rows, ahead of anything appended meanwhile
+                with self._buffer_lock:
+                    self._buffer[:0] = rows
+                    self._inflight = []
+                    self._flush_gen += 1
+                raise
+            with self._buffer_lock:
+                self._inflight = []
+                self._flush_gen += 1
+
+    def _read_with_buffered(
+        self, read: Callable[[sqlite3.Connection], Any]
+    ) -> Tuple[Any, List[Tuple[str, str, float, str]]]:
+        """
+        Run a read against committed rows without waiting for writers.
+
+        Args:
+            read: Reads from a pooled connection
+
+        Returns:
+            The read's result and the buffered rows it did not see
+        """
+        for _ in range(3):
+            with self._buffer_lock:
+                gen = self._flush_gen
+                buffered = self._inflight + self._buffer
+            if gen % 2:
+                # A flush is committing; its rows may or may not be visible yet
+                time.sleep(0)
+                continue
+            with self._reader() as conn:
+                result = read(conn)
+            with self._buffer_lock:
+                if self._flush_gen == gen:
+                    return result, buffered
+        # Flushes kept racing the read: hold them off for one read
+        with self._write_lock:
+            with self._buffer_lock:
+                buffered = list(self._buffer)
+            with self._reader() as conn:
+                return read(conn), buffered
+
+    def snapshot(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        def read(conn: sqlite3.Connection) -> Optional[Tuple[str, List[Tuple[str, float, str]]]]:
+            # One read transaction so config and histories come from the same view
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(
+                    "SELECT config FROM dashboards WHERE agent_id = ?", (agent_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                return row[0], conn.execute(
+                    "SELECT kind, ts, payload FROM dashboard_entries "
+                    "WHERE agent_id = ? ORDER BY ts, id",
+                    (agent_id,)
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+
+        result, buffered = self._read_with_buffered(read)
+        if result is None:
+            return None
+        config, rows = result
+        rows += [(kind, ts, payload) for agent, kind, ts, payload in buffered if agent == agent_id]
+        dashboard: Dict[str, Any] = {"config": json.loads(config)}
+        dashboard.update({kind: [] for kind in HISTORY_KINDS})
+        # Stable sort: buffered rows follow committed rows appended at the same time
+        for kind, _, payload in sorted(rows, key=lambda row: row[1]):
+            dashboard[kind].append(json.loads(payload))
+        return dashboard
+
+    def history_since(self, agent_id: str, kind: str, since: float) -> List[Dict[str, Any]]:
+        """
+        Read one history from a point in time, using the (agent, kind, ts) index.
+
+        Args:
+            agent_id: Agent's unique identifier
+            kind: History name, one of HISTORY_KINDS
+            since: Epoch seconds, inclusive
+
+        Returns:
+            Entries appended at or after ``since``, oldest first
+        """
+        def read(conn: sqlite3.Connection) -> List[Tuple[float, str]]:
+            return conn.execute(
+                "SELECT ts, payload FROM dashboard_entries "
+                "WHERE agent_id = ? AND kind = ? AND ts >= ? ORDER BY ts, id",
+                (agent_id, kind, since)
+            ).fetchall()
+
+        rows, buffered = self._read_with_buffered(read)
+        rows += [
+            (ts, payload) for agent, k, ts, payload in buffered
+            if agent == agent_id and k == kind and ts >= since
+        ]
+        return [json.loads(payload) for _, payload in sorted(rows, key=lambda row: row[0])]
+
+    def compact(
+        self,
+        max_age_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ) -> int:
+        self.flush()
+        removed = 0
+        with self._write_lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                if max_age_seconds is not None:
+                    removed += self._writer.execute(
+                        "DELETE FROM dashboard_entries WHERE ts < ?",
+                        (time.time() - max_age_seconds,)
+                    ).rowcount
+                if max_entries is not None:
+                    removed += self._writer.execute(
+                        "DELETE FROM dashboard_entries WHERE id IN ("
+                        " SELECT id FROM ("
+                        "  SELECT id, ROW_NUMBER() OVER ("
+                        "   PARTITION BY agent_id, kind ORDER BY ts DESC, id DESC"
+                        "  ) AS rn FROM dashboard_entries"
+                        " ) WHERE rn > ?"
+                        ")",
+                        (max_entries,)
+                    ).rowcount
+                self._writer.execute("COMMIT")
+            except Exception:
+                self._writer.execute("ROLLBACK")
+                raise
+            if removed:
+                self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        with self._readers_lock:
+            self._closed = True
+            idle, self._idle_readers = self._idle_readers, []
+        for conn in idle:
+            conn.close()
+        self._writer.close()
+
+
+class RetentionJob:
+    """
+    Background thread that periodically compacts a dashboard store.
+    """
+
+    def __init__(
+        self,
+        store: DashboardStore,
+        interval: float = 300.0,
+        max_age_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Configure the retention job.
+
+        Args:
+            store: Store to compact
+            interval: Seconds between compactions
+            max_age_seconds: Drop entries older than this
+            max_entries: Keep at most this many entries per agent and history
+        """
+        self.store = store
+        self.interval = interval
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """
+        Compact the store now.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = self.store.compact(
+            max_age_seconds=self.max_age_seconds, max_entries=self.max_entries
+        )
+        if removed:
+            self.logger.info(f"Dashboard retention removed {removed} entries")
+        return removed
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.warning(f"Dashboard retention failed: {e}")
+
+    def start(self) -> "RetentionJob":
+        """Start compacting in the background."""
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,194 @@
+import base64
+import binascii
+import hashlib
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from qube_agent.utils.cache import SimpleCache
+
+# ENC[AES256-GCM,data:<base64>] as stored in BlakQube fields
+ENCRYPTED_FIELD = re.compile(r"^ENC\[AES256-GCM,data:([^\]]*)\]$")
+
+
+def blakqube_version(blakqube: Dict[str, str]) -> str:
+    """
+    Derive a stable version tag from encrypted BlakQube contents.
+
+    Args:
+        blakqube: Encrypted BlakQube fields
+
+    Returns:
+        Short hex digest that changes whenever any field changes
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for key in sorted(blakqube):
+        digest.update(key.encode())
+        digest.update(b"\0")
+        digest.update(str(blakqube[key]).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class DecryptionService:
+    """
+    Decrypts BlakQube payloads and memoises the results.
+
+    Decrypted BlakQubes are cached in a bounded LRU keyed by
+    ``(token_id, version)``, so repeated shares of the same TokenQube skip
+    both loading and decryption until the entry is evicted or invalidated.
+
+    Callers without an on-chain version can use current_version(), a
+    per-token counter that invalidate() bumps, so looking up the version
+    never requires loading the BlakQube.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize the decryption service.
+
+        Args:
+            maxsize: Maximum number of decrypted BlakQubes to keep
+        """
+        self.logger = logging.getLogger(__name__)
+        self._cache = SimpleCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def decrypt_fields(self, blakqube: Dict[str, str]) -> Dict[str, str]:
+        """
+        Decrypt every field of a BlakQube in one pass.
+
+        Fields that are not in ENC[...] form, fail to decode or decrypt to
+        an empty string are skipped.
+
+        Args:
+            blakqube: Encrypted BlakQube fields
+
+        Returns:
+            Decrypted fields
+        """
+        decrypted = {}
+        failed = []
+        match = ENCRYPTED_FIELD.match
+        for key, value in blakqube.items():
+            m = match(value) if isinstance(value, str) else None
+            if m is None:
+                continue
+            try:
+                # For mock purposes the payload is plain base64
+                plaintext = base64.b64decode(m.group(1)).decode()
+            except (binascii.Error, UnicodeDecodeError):
+                failed.append(key)
+                continue
+            if plaintext:
+                decrypted[key] = plaintext
+        if failed:
+            self.logger.error(f"Decryption failed for fields: {', '.join(failed)}")
+        return decrypted
+
+    def current_version(self, token_id: str) -> str:
+        """
+        Return the server-side version of a token's BlakQube.
+
+        Args:
+            token_id: TokenQube identifier
+
+        Returns:
+            Version tag, changed by every full invalidate() of the token
+        """
+        with self._lock:
+            return str(self._versions.get(token_id, 0))
+
+    def get_or_decrypt(
+        self,
+        token_id: str,
+        version: str,
+        loader: Callable[[], Dict[str, str]]
+    ) -> Dict[str, str]:
+        """
+        Return decrypted BlakQube data, loading and decrypting on a miss.
+
+        Args:
+            token_id: TokenQube identifier
+            version: TokenQube version the caller expects
+            loader: Returns the encrypted BlakQube; only called on a miss
+
+        Returns:
+            Decrypted fields (a copy the caller may modify)
+        """
+        key = (token_id, version)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                return dict(self._cache[key])
+            self.misses += 1
+
+        decrypted = self.decrypt_fields(loader())
+
+        with self._lock:
+            self._cache[key] = decrypted
+        return dict(decrypted)
+
+    def decrypt(self, token_id: str, blakqube: Dict[str, str]) -> Dict[str, str]:
+        """
+        Decrypt an already loaded BlakQube, versioned by its contents.
+
+        Args:
+            token_id: TokenQube identifier
+            blakqube: Encrypted BlakQube fields
+
+        Returns:
+            Decrypted fields
+        """
+        return self.get_or_decrypt(token_id, blakqube_version(blakqube), lambda: blakqube)
+
+    def invalidate(self, token_id: str, version: Optional[str] = None) -> int:
+        """
+        Drop cached decryptions for a token.
+
+        Args:
+            token_id: TokenQube identifier
+            version: Only drop this version; all versions when omitted, which
+                also bumps current_version() so in-flight decryptions of the
+                old contents are never served
+
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        with self._lock:
+            if version is not None:
+                targets = [(token_id, version)]
+            else:
+                self._versions[token_id] = self._versions.get(token_id, 0) + 1
+                targets = [key for key in self._cache.keys() if key[0] == token_id]
+            for key in targets:
+                if self._cache.pop(key) is not None:
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """Drop every cached decryption and reset the hit counters."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise cache effectiveness.
+
+        Returns:
+            Hits, misses, hit rate and current size
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._cache),
+        }
@@ -0,0 +1,327 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from itertools import count
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+
+class DashboardEvent:
+    """
+    A single dashboard event, encoded once at publish time.
+
+    Every subscriber receives the same pre-encoded server-sent-events frame,
+    so fan-out cost does not grow with payload size.
+    """
+    __slots__ = ("event_id", "event_type", "agent_id", "payload", "frame")
+
+    def __init__(
+        self,
+        event_id: int,
+        event_type: str,
+        payload: Dict[str, Any],
+        agent_id: Optional[str] = None
+    ):
+        self.event_id = event_id
+        self.event_type = event_type
+        self.agent_id = agent_id
+        self.payload = payload
+        self.frame = (
+            f"id: {event_id}\n"
+            f"event: {event_type}\n"
+            f"data: {json.dumps(payload, default=str)}\n\n"
+        ).encode("utf-8")
+
+
+class DashboardSubscription:
+    """
+    A bounded per-client event queue.
+
+    When a client falls behind, the oldest events are dropped rather than
+    letting the queue grow. The next read then yields a ``resync`` event so
+    the client knows to refetch the full dashboard state, and discards the
+    events still queued: the refetched state already includes them.
+    """
+
+    def __init__(
+        self,
+        bus: "DashboardEventBus",
+        agent_id: Optional[str] = None,
+        maxsize: int = 256
+    ):
+        self.bus = bus
+        self.agent_id = agent_id
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._queue: Deque[DashboardEvent] = deque()
+        self._needs_resync = False
+        self._cond = threading.Condition(threading.Lock())
+        # Called after each enqueue, e.g. to wake an event loop
+        self.listener: Optional[Callable[[], None]] = None
+
+    def accepts(self, event: DashboardEvent) -> bool:
+        """
+        Check whether an event is addressed to this subscription.
+
+        Args:
+            event: Event to check
+
+        Returns:
+            True if the event is broadcast or matches the subscribed agent
+        """
+        return (
+            self.agent_id is None
+            or event.agent_id is None
+            or event.agent_id == self.agent_id
+        )
+
+    def offer(self, event: DashboardEvent) -> None:
+        """
+        Enqueue an event without blocking, dropping the oldest on overflow.
+
+        Args:
+            event: Event to enqueue
+        """
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+                self._needs_resync = True
+            self._queue.append(event)
+            self._cond.notify()
+        listener = self.listener
+        if listener is not None:
+            listener()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[DashboardEvent]:
+        """
+        Wait for the next event.
+
+        Args:
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            The next event, a resync event after drops, or None on timeout/close
+        """
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if self.closed or not self._queue:
+                return None
+            if self._needs_resync:
+                self._needs_resync = False
+                # Delivering these after the refetch would apply them twice
+                self.dropped += len(self._queue)
+                self._queue.clear()
+                return self.bus.make_event(
+                    "resync", {"dropped": self.dropped}, agent_id=self.agent_id
+                )
+            return self._queue.popleft()
+
+    def pending(self) -> int:
+        """Number of events waiting to be read."""
+        return len(self._queue)
+
+    def close(self) -> None:
+        """Detach from the bus and wake any blocked reader."""
+        self.bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._queue.clear()
+            self._cond.notify_all()
+
+
+class DashboardEventBus:
+    """
+    In-process publish/subscribe bus for live dashboard updates.
+
+    Publishing never blocks on slow subscribers: each subscription holds a
+    bounded queue and sheds its oldest events under backpressure.
+    """
+
+    def __init__(self, queue_size: int = 256, heartbeat_interval: float = 15.0):
+        """
+        Initialize the event bus.
+
+        Args:
+            queue_size: Default per-subscriber queue bound
+            heartbeat_interval: Seconds between keep-alive comments on idle streams
+        """
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.logger = logging.getLogger(__name__)
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        # Subscribers are swapped as a whole tuple so publish can iterate
+        # without holding the lock.
+        self._subscribers: tuple = ()
+        self.published = 0
+
+    def make_event(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        agent_id: Optional[str] = None
+    ) -> DashboardEvent:
+        """
+        Build an event with the next sequence id.
+
+        Args:
+            event_type: SSE event name
+            payload: JSON-serialisable payload
+            agent_id: Target agent, or None to broadcast
+
+        Returns:
+            Encoded dashboard event
+        """
+        return DashboardEvent(next(self._ids), event_type, payload, agent_id)
+
+    def subscribe(
+        self,
+        agent_id: Optional[str] = None,
+        maxsize: Optional[int] = None
+    ) -> DashboardSubscription:
+        """
+        Register a new subscriber.
+
+        Args:
+            agent_id: Only receive events for this agent (plus broadcasts)
+            maxsize: Queue bound, defaults to the bus setting
+
+        Returns:
+            Subscription to read events from
+        """
+        subscription = DashboardSubscription(
+            self, agent_id=agent_id, maxsize=maxsize or self.queue_size
+        )
+        with self._lock:
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: DashboardSubscription) -> None:
+        """
+        Remove a subscriber.
+
+        Args:
+            subscription: Subscription to remove
+        """
+        with self._lock:
+            self._subscribers = tuple(
+                s for s in self._subscribers if s is not subscription
+            )
+
+    def publish(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        agent_id: Optional[str] = None
+    ) -> DashboardEvent:
+        """
+        Publish an event to all matching subscribers.
+
+        Args:
+            event_type: SSE event name
+            payload: JSON-serialisable payload
+            agent_id: Target agent, or None to broadcast
+
+        Returns:
+            The published event
+        """
+        event = self.make_event(event_type, payload, agent_id)
+        for subscription in self._subscribers:
+            if subscription.accepts(event):
+                subscription.offer(event)
+        with self._lock:
+            self.published += 1
+        return event
+
+    def subscriber_count(self) -> int:
+        """Number of active subscribers."""
+        return len(self._subscribers)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise bus activity.
+
+        Returns:
+            Published count, subscriber count, queued and dropped totals
+        """
+        subscribers: List[DashboardSubscription] = list(self._subscribers)
+        return {
+            "published": self.published,
+            "subscribers": len(subscribers),
+            "queued": sum(s.pending() for s in subscribers),
+            "dropped": sum(s.dropped for s in subscribers),
+        }
+
+    def stream(self, subscription: DashboardSubscription):
+        """
+        Yield SSE frames for a subscription until it is closed.
+
+        Idle periods emit a comment line so proxies keep the connection open.
+
+        Args:
+            subscription: Subscription to drain
+
+        Yields:
+            Encoded SSE frames
+        """
+        yield b"retry: 3000\n\n"
+        try:
+            while not subscription.closed:
+                event = subscription.get(timeout=self.heartbeat_interval)
+                if event is None:
+                    if subscription.closed:
+                        break
+                    yield f": keep-alive {int(time.time())}\n\n".encode("utf-8")
+                    continue
+                yield event.frame
+        finally:
+            subscription.close()
+
+    async def astream(self, subscription: DashboardSubscription) -> AsyncIterator[bytes]:
+        """
+        Async version of stream() for ASGI servers.
+
+        Waits on the event loop rather than blocking a thread: publishers
+        wake the loop through the subscription's listener.
+
+        Args:
+            subscription: Subscription to drain
+
+        Yields:
+            Encoded SSE frames
+        """
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        def wake() -> None:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # The loop closed while a publisher was offering
+                pass
+
+        subscription.listener = wake
+        yield b"retry: 3000\n\n"
+        try:
+            while not subscription.closed:
+                event = subscription.get(timeout=0)
+                if event is not None:
+                    yield event.frame
+                    continue
+                ready.clear()
+                if subscription.pending():
+                    continue
+                try:
+                    await asyncio.wait_for(ready.wait(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield f": keep-alive {int(time.time())}\n\n".encode("utf-8")
+        finally:
+            subscription.listener = None
+            subscription.close()
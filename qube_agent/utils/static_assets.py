@@ -0,0 +1,287 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Hashed URLs never change content, so they can be cached for a year
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Unhashed URLs and pages are revalidated with their ETag on every use
+REVALIDATE = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml")
+
+
+@dataclass
+class Asset:
+    """
+    One response body with its precompressed variants.
+    """
+    content_type: str
+    digest: str
+    body: bytes
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+    def variant(self, accept_encoding: str) -> Tuple[Optional[str], bytes]:
+        """
+        Pick the smallest variant the client accepts.
+
+        Args:
+            accept_encoding: Accept-Encoding request header
+
+        Returns:
+            Content-Encoding (None for identity) and body
+        """
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.encoded and encoding in accepted:
+                return encoding, self.encoded[encoding]
+        return None, self.body
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _etag_matches(if_none_match: str, digest: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: any encoding of the same content is a match, including
+    # the W/ form proxies produce when they recompress a response
+    tags = [t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")]
+    return any(t.split("-")[0] == digest for t in tags)
+
+
+def build_asset(body: bytes, content_type: str, compress_min_size: int = 1024,
+                precompressed: Optional[Dict[str, bytes]] = None) -> Asset:
+    """
+    Hash a body and prepare its gzip and brotli variants.
+
+    Variants are only kept for compressible types at least compress_min_size
+    bytes long, and only when they are smaller than the original.
+
+    Args:
+        body: Uncompressed response body
+        content_type: Content-Type header value
+        compress_min_size: Smallest body worth compressing
+        precompressed: Ready-made variants by encoding, e.g. from .gz/.br files
+
+    Returns:
+        Asset
+    """
+    asset = Asset(content_type=content_type, digest=hashlib.sha256(body).hexdigest()[:16], body=body)
+    if len(body) < compress_min_size or not content_type.startswith(COMPRESSIBLE_TYPES):
+        return asset
+
+    encoded = dict(precompressed or {})
+    if "gzip" not in encoded:
+        encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+    if "br" not in encoded and brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=11)
+    asset.encoded = {name: data for name, data in encoded.items() if len(data) < len(body)}
+    return asset
+
+
+class StaticAssets:
+    """
+    In-memory static file pipeline with content-hashed URLs.
+
+    Every file under the static directory is read once, hashed, and
+    compressed ahead of time. url() maps a logical path such as
+    ``js/app.js`` to ``/static/js/app.<hash>.js``, which is served with a
+    far-future immutable Cache-Control. The logical path keeps working but
+    is revalidated through its ETag. Ready-made ``.gz`` and ``.br`` files
+    next to an asset are used instead of compressing at startup; brotli
+    variants are otherwise built only when the brotli package is installed.
+    """
+
+    def __init__(self, root: str, url_prefix: str = "/static", compress_min_size: int = 1024):
+        """
+        Load and hash the static directory.
+
+        Args:
+            root: Static files directory
+            url_prefix: URL path the directory is served under
+            compress_min_size: Smallest file worth compressing
+        """
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+        self.compress_min_size = compress_min_size
+        self.logger = logging.getLogger(__name__)
+        self._assets: Dict[str, Asset] = {}
+        self._urls: Dict[str, str] = {}
+        self._hashed: Dict[str, str] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        """Re-read the static directory."""
+        assets, urls, hashed = {}, {}, {}
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith((".gz", ".br")):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    body = f.read()
+                precompressed = {}
+                for suffix, encoding in ((".gz", "gzip"), (".br", "br")):
+                    if os.path.exists(path + suffix):
+                        with open(path + suffix, "rb") as f:
+                            precompressed[encoding] = f.read()
+                content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                asset = build_asset(body, content_type, self.compress_min_size, precompressed)
+                stem, ext = os.path.splitext(name)
+                hashed_name = f"{stem}.{asset.digest[:12]}{ext}"
+                assets[name] = asset
+                hashed[hashed_name] = name
+                urls[name] = f"{self.url_prefix}/{hashed_name}"
+        self._assets, self._urls, self._hashed = assets, urls, hashed
+        self.logger.info(f"Loaded {len(assets)} static assets from {self.root}")
+
+    def url(self, name: str) -> str:
+        """
+        Content-hashed URL for a static file.
+
+        Args:
+            name: Path relative to the static directory
+
+        Returns:
+            Hashed URL, or the plain URL for unknown files
+        """
+        return self._urls.get(name.lstrip("/"), f"{self.url_prefix}/{name.lstrip('/')}")
+
+    def lookup(self, path: str) -> Tuple[Optional[Asset], bool]:
+        """
+        Resolve a request path relative to the static directory.
+
+        Args:
+            path: Hashed or logical file path
+
+        Returns:
+            The asset (None if unknown), and whether the path was a hashed one
+        """
+        name = self._hashed.get(path)
+        if name is not None:
+            return self._assets[name], True
+        return self._assets.get(path), False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "assets": len(self._assets),
+            "bytes": sum(len(a.body) for a in self._assets.values()),
+            "gzip_bytes": sum(len(a.encoded.get("gzip", a.body)) for a in self._assets.values()),
+            "br_bytes": sum(len(a.encoded.get("br", a.body)) for a in self._assets.values()),
+        }
+
+
+class PageCache:
+    """
+    Rendered pages kept in memory as precompressed, ETagged assets.
+
+    Pages are rendered once per key. Their Cache-Control makes clients
+    revalidate on every load, which a matching ETag answers with a 304.
+    """
+
+    def __init__(self, compress_min_size: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            compress_min_size: Smallest page worth compressing
+        """
+        self.compress_min_size = compress_min_size
+        self._pages: Dict[str, Asset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Asset]:
+        """
+        Return a cached page without rendering it.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Asset, or None if the page has not been rendered yet
+        """
+        return self._pages.get(key)
+
+    def get_or_render(self, key: str, render: Callable[[], str],
+                      content_type: str = "text/html; charset=utf-8") -> Asset:
+        """
+        Return the cached page, rendering it on first use.
+
+        Args:
+            key: Cache key, e.g. the template name
+            render: Produces the page
+            content_type: Content-Type header value
+
+        Returns:
+            Asset
+        """
+        page = self._pages.get(key)
+        if page is None:
+            page = build_asset(render().encode("utf-8"), content_type, self.compress_min_size)
+            with self._lock:
+                page = self._pages.setdefault(key, page)
+        return page
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+
+def asset_response(asset: Asset, cache_control: str, accept_encoding: str = "",
+                   if_none_match: str = "") -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Build the response for an asset, honouring conditional requests.
+
+    Args:
+        asset: Asset to serve
+        cache_control: Cache-Control header value
+        accept_encoding: Accept-Encoding request header
+        if_none_match: If-None-Match request header
+
+    Returns:
+        Status code, headers and body
+    """
+    encoding, body = asset.variant(accept_encoding)
+    # Each encoding is a distinct representation, so it gets its own ETag
+    etag = asset.etag if encoding is None else f'"{asset.digest}-{encoding}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if asset.encoded:
+        headers["Vary"] = "Accept-Encoding"
+    if _etag_matches(if_none_match, asset.digest):
+        return 304, headers, b""
+
+    headers["Content-Type"] = asset.content_type
+    headers["Content-Length"] = str(len(body))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return 200, headers, body
@@ -1,20 +1,70 @@
 import uuid
 import logging
+import threading
+from contextlib import ExitStack
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 
+from qube_agent.utils.event_bus import DashboardEventBus
+from qube_agent.utils.dashboard_store import DashboardStore, InMemoryDashboardStore
+
 class WebInterfaceManager:
-    def __init__(self, debug: bool = False):
+    def __init__(
+        self, 
+        debug: bool = False, 
+        event_bus: Optional[DashboardEventBus] = None,
+        store: Optional[DashboardStore] = None
+    ):
         """
         Initialize web interface management for QubeAgent.
         
         Args:
             debug: Enable verbose logging
+            event_bus: Optional bus for pushing live dashboard updates
+            store: Dashboard storage backend, in-memory by default
         """
         self.debug = debug
         self.logger = logging.getLogger(__name__)
-        self.agent_dashboards = {}
+        self.store = store or InMemoryDashboardStore()
         self.iqube_context_registry = {}
+        self.event_bus = event_bus or DashboardEventBus()
+        self._registry_lock = threading.Lock()
+        # Replaced as a whole dict on insert, like the event bus's subscriber
+        # tuple, so lookups never need the registry lock
+        self._agent_locks: Dict[str, threading.Lock] = {}
+    
+    @property
+    def agent_dashboards(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Snapshot of every dashboard in the store.
+        
+        Returns:
+            Mapping of agent ID to dashboard
+        """
+        return {
+            agent_id: self.store.snapshot(agent_id) 
+            for agent_id in self.store.agent_ids()
+        }
+    
+    def _agent_lock(self, agent_id: str) -> threading.Lock:
+        """
+        Get the lock that orders writes to one agent's dashboard.
+        
+        Args:
+            agent_id: Agent's unique identifier
+        
+        Returns:
+            Per-agent lock, created on first use
+        """
+        lock = self._agent_locks.get(agent_id)
+        if lock is None:
+            # Dashboards created by another worker have no lock here yet
+            with self._registry_lock:
+                lock = self._agent_locks.get(agent_id)
+                if lock is None:
+                    lock = threading.Lock()
+                    self._agent_locks = {**self._agent_locks, agent_id: lock}
+        return lock
     
     def create_agent_dashboard(
         self, 
@@ -34,13 +84,10 @@ class WebInterfaceManager:
         agent_id = agent_id or str(uuid.uuid4())
         dashboard_config = initial_config or {}
         
-        self.agent_dashboards[agent_id] = {
-            "config": dashboard_config,
-            "status_history": [],
-            "qube_logs": [],
-            "iqube_context_layers": [],
-            "strategic_insights": []
-        }
+        with self._agent_lock(agent_id):
+            self.store.create_dashboard(agent_id, dashboard_config)
+        
+        self.event_bus.publish("config", dashboard_config, agent_id=agent_id)
         
         if self.debug:
             self.logger.info(f"Created dashboard for agent: {agent_id}")
@@ -63,7 +110,7 @@ class WebInterfaceManager:
             results: Execution results
             iqube_context: Optional iQube context layer
         """
-        if agent_id not in self.agent_dashboards:
+        if not self.store.has_dashboard(agent_id):
             self.logger.warning(f"No dashboard found for agent {agent_id}")
             return
         
@@ -73,18 +120,22 @@ class WebInterfaceManager:
             "timestamp": datetime.now().isoformat()
         }
         
-        self.agent_dashboards[agent_id]["status_history"].append(status_entry)
-        
-        # Track iQube context layers
-        if iqube_context:
-            context_layer_id = str(uuid.uuid4())
-            context_layer = {
-                "id": context_layer_id,
-                "context": iqube_context,
-                "timestamp": datetime.now().isoformat()
-            }
-            self.agent_dashboards[agent_id]["iqube_context_layers"].append(context_layer)
-            self.iqube_context_registry[context_layer_id] = context_layer
+        with self._agent_lock(agent_id):
+            self.store.append(agent_id, "status_history", [status_entry])
+            
+            # Track iQube context layers
+            if iqube_context:
+                context_layer_id = str(uuid.uuid4())
+                context_layer = {
+                    "id": context_layer_id,
+                    "context": iqube_context,
+                    "timestamp": datetime.now().isoformat()
+                }
+                self.store.append(agent_id, "iqube_context_layers", [context_layer])
+                self.iqube_context_registry[context_layer_id] = context_layer
+            
+            # Publish under the agent lock so stream order matches history order
+            self.event_bus.publish("status", status_entry, agent_id=agent_id)
         
         if self.debug:
             self.logger.info(f"Updated dashboard for agent: {agent_id}")
@@ -92,8 +143,9 @@ class WebInterfaceManager:
     def log_qube_processing(
         self, 
         token_id: str, 
-        data: Dict[str, Any],
-        strategic_insights: Optional[List[Dict[str, Any]]] = None
+        data: Optional[Dict[str, Any]] = None,
+        strategic_insights: Optional[List[Dict[str, Any]]] = None,
+        error: Optional[str] = None
     ):
         """
         Log Qube token processing with strategic insights.
@@ -102,18 +154,31 @@ class WebInterfaceManager:
             token_id: Processed Qube token ID
             data: Decrypted token data
             strategic_insights: Optional strategic insights derived from token
+            error: Why processing failed; the entry is logged with status "failed"
         """
-        for agent_id, dashboard in self.agent_dashboards.items():
-            qube_log = {
-                "token_id": token_id,
-                "data": data,
-                "timestamp": datetime.now().isoformat()
-            }
-            dashboard["qube_logs"].append(qube_log)
+        qube_log = {
+            "token_id": token_id,
+            "status": "failed" if error is not None else "processed",
+            "data": data,
+            "timestamp": datetime.now().isoformat()
+        }
+        if error is not None:
+            qube_log["error"] = error
+        agent_ids = sorted(self.store.agent_ids())
+        with ExitStack() as locks:
+            # Every dashboard's lock, taken in a fixed order so writers cannot deadlock
+            for agent_id in agent_ids:
+                locks.enter_context(self._agent_lock(agent_id))
+            for agent_id in agent_ids:
+                self.store.append(agent_id, "qube_logs", [dict(qube_log)])
+                
+                # Track strategic insights
+                if strategic_insights:
+                    self.store.append(agent_id, "strategic_insights", strategic_insights)
             
-            # Track strategic insights
-            if strategic_insights:
-                dashboard["strategic_insights"].extend(strategic_insights)
+            # Qube logs go to every dashboard, so broadcast once, under the
+            # locks so stream order matches history order
+            self.event_bus.publish("qube_log", qube_log)
         
         if self.debug:
             self.logger.info(f"Logged Qube token processing: {token_id}")
@@ -128,9 +193,10 @@ class WebInterfaceManager:
         Returns:
             Agent's dashboard with config, logs, context layers, and insights
         """
-        dashboard = self.agent_dashboards.get(agent_id, {})
+        # Reads take no lock; the store returns an independent snapshot
+        dashboard = self.store.snapshot(agent_id) or {}
         
-        # Enrich dashboard with context analysis
+        # Enrich the snapshot with context analysis
         dashboard['context_analysis'] = self._analyze_context_layers(
             dashboard.get('iqube_context_layers', [])
         )
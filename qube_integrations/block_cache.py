@@ -0,0 +1,224 @@
+import hashlib
+import logging
+import mmap
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+# Every cached block is stored as MAGIC + sha256(payload) + payload
+MAGIC = b"QCAS1\n"
+HEADER_SIZE = len(MAGIC) + hashlib.sha256().digest_size
+
+# CIDv0 (base58btc sha2-256 multihash) or CIDv1 in lowercase base32. Nothing
+# else can become a file name, so a CID cannot escape the cache root.
+CID_PATTERN = re.compile(r"Qm[1-9A-HJ-NP-Za-km-z]{44}|b[a-z2-7]{50,120}")
+
+
+def is_valid_cid(cid: str) -> bool:
+    """
+    Check that a string has the alphabet and length of a CIDv0 or base32 CIDv1.
+
+    Args:
+        cid: Content identifier
+
+    Returns:
+        True if the cache can store it
+    """
+    return isinstance(cid, str) and CID_PATTERN.fullmatch(cid) is not None
+
+
+class BlockCache:
+    """
+    On-disk content-addressed cache for IPFS blocks.
+
+    Blocks are keyed by CID and stored one file per block with a SHA-256
+    header that is checked on every read, so a truncated or corrupted file
+    is treated as a miss instead of being served. The header is the hash of
+    what was put, not the CID's multihash: `ipfs cat` returns file content
+    rather than the block the CID addresses, so the cache guards against
+    local corruption only and trusts the IPFS node for content addressing.
+    Only CIDv0 and base32 CIDv1 keys are accepted. Total size is bounded and
+    the least recently used blocks are evicted first. Reads are served from
+    a memory map rather than copied into the heap.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the block cache.
+
+        Args:
+            root: Directory holding cached blocks
+            max_bytes: Upper bound on cached payload bytes
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.corrupt = 0
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def _path(self, cid: str) -> str:
+        if not is_valid_cid(cid):
+            raise ValueError(f"Not a CIDv0 or base32 CIDv1: {cid!r}")
+        # Shard on the tail of the CID; the prefix is the same for every CIDv0
+        return os.path.join(self.root, cid[-2:], cid)
+
+    def _load_index(self) -> None:
+        entries = []
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not is_valid_cid(name):
+                    continue
+                st = os.stat(os.path.join(shard_dir, name))
+                entries.append((st.st_mtime, name, st.st_size - HEADER_SIZE))
+        # Oldest first, so existing files resume their LRU order
+        for _, cid, size in sorted(entries):
+            self._index[cid] = size
+            self.total_bytes += size
+
+    def __contains__(self, cid: str) -> bool:
+        return cid in self._index
+
+    def get(self, cid: str) -> Optional[memoryview]:
+        """
+        Read a block through a memory map.
+
+        Args:
+            cid: Content identifier
+
+        Returns:
+            Read-only view of the verified payload, or None on a miss
+        """
+        with self._lock:
+            if cid not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(cid)
+
+        path = self._path(cid)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._drop(cid)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        view = memoryview(mapped)
+        if view[:len(MAGIC)] != MAGIC or hashlib.sha256(view[HEADER_SIZE:]).digest() != view[len(MAGIC):HEADER_SIZE]:
+            view.release()
+            mapped.close()
+            self.logger.warning(f"Discarding corrupt cached block {cid}")
+            self._drop(cid)
+            with self._lock:
+                self.corrupt += 1
+                self.misses += 1
+            return None
+
+        # Refresh mtime so LRU order survives a restart
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return view[HEADER_SIZE:].toreadonly()
+
+    def get_bytes(self, cid: str) -> Optional[bytes]:
+        """
+        Read a block as bytes.
+
+        Args:
+            cid: Content identifier
+
+        Returns:
+            Verified payload, or None on a miss
+        """
+        view = self.get(cid)
+        return None if view is None else bytes(view)
+
+    def put(self, cid: str, content: Union[bytes, memoryview]) -> None:
+        """
+        Store a block, evicting least recently used blocks if over budget.
+
+        Args:
+            cid: Content identifier
+            content: Block payload
+
+        Raises:
+            ValueError: If cid is not a CIDv0 or base32 CIDv1
+        """
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        path = self._path(cid)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial block
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                f.write(hashlib.sha256(content).digest())
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            previous = self._index.pop(cid, None)
+            if previous is not None:
+                self.total_bytes -= previous
+            self._index[cid] = size
+            self.total_bytes += size
+            victims = []
+            while self.total_bytes > self.max_bytes and len(self._index) > 1:
+                victim, victim_size = self._index.popitem(last=False)
+                self.total_bytes -= victim_size
+                self.evictions += 1
+                victims.append(victim)
+        for victim in victims:
+            self._unlink(victim)
+
+    def _drop(self, cid: str) -> None:
+        with self._lock:
+            size = self._index.pop(cid, None)
+            if size is not None:
+                self.total_bytes -= size
+        self._unlink(cid)
+
+    def _unlink(self, cid: str) -> None:
+        try:
+            os.unlink(self._path(cid))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        """
+        Summarise cache activity.
+
+        Returns:
+            Hit/miss counts, evictions, corrupt reads and size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "corrupt": self.corrupt,
+            "blocks": len(self._index),
+            "bytes": self.total_bytes,
+        }
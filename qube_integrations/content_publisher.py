@@ -0,0 +1,304 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import stat
+import tempfile
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Union
+
+from cryptography.fernet import Fernet
+
+from qube_agent.models.iqube import ContentQube
+from qube_integrations.ipfs_pool import IPFSConnectionPool, get_pool
+
+MANIFEST_FORMAT = "qube-chunked-v1"
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+Source = Union[str, bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class PublishResult:
+    """Outcome of publishing a ContentQube payload"""
+    cid: str
+    size: int
+    chunks: int
+    resumed_chunks: int
+    encrypted: bool
+
+
+class ContentPublisher:
+    """
+    Streams ContentQube payloads to IPFS.
+
+    Payloads are split into fixed-size chunks, optionally encrypted one chunk
+    at a time, and each chunk is added (and pinned) as its own IPFS object,
+    so memory use is bounded by the chunk size rather than the payload. A
+    small JSON manifest listing the chunk CIDs is added last and its CID is
+    recorded in the MetaQube. Uploaded chunk CIDs are checkpointed to a state
+    file after every chunk, so an interrupted upload resumes where it stopped.
+
+    Checkpoints of encrypted uploads hold the content key, so they are only
+    written to, and read from, a directory owned by the current user and
+    closed to everyone else; with any other state_dir uploads still work but
+    cannot be resumed.
+    """
+
+    def __init__(
+        self,
+        ipfs_pool: Optional[IPFSConnectionPool] = None,
+        ipfs_host: str = "127.0.0.1",
+        ipfs_port: int = 5001,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        state_dir: Optional[str] = None
+    ):
+        """
+        Initialize the publisher.
+
+        Args:
+            ipfs_pool: IPFS client pool. Defaults to the process-wide pool for ipfs_host:ipfs_port
+            ipfs_host: IPFS API host
+            ipfs_port: IPFS API port
+            chunk_size: Plaintext bytes per uploaded chunk
+            state_dir: Directory for resumable upload checkpoints. Defaults to
+                QUBE_UPLOAD_STATE_DIR, or a per-user directory under the system
+                temp dir. Created with mode 0700 if missing
+        """
+        self.logger = logging.getLogger(__name__)
+        self.ipfs_pool = ipfs_pool or get_pool(ipfs_host, ipfs_port)
+        self.chunk_size = chunk_size
+        default_dir = f"qube-uploads-{os.getuid()}" if hasattr(os, "getuid") else "qube-uploads"
+        self.state_dir = state_dir or os.environ.get(
+            "QUBE_UPLOAD_STATE_DIR", os.path.join(tempfile.gettempdir(), default_dir)
+        )
+        os.makedirs(self.state_dir, mode=0o700, exist_ok=True)
+        self.checkpoints = _owned_and_private(os.lstat(self.state_dir), directory=True)
+        if not self.checkpoints:
+            self.logger.warning(
+                f"Upload checkpoints disabled: {self.state_dir} is not a directory private to this user"
+            )
+
+    def publish(
+        self,
+        qube: ContentQube,
+        source: Optional[Source] = None,
+        encrypt: bool = False,
+        upload_id: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> PublishResult:
+        """
+        Upload a ContentQube payload and record its CID in the MetaQube.
+
+        Args:
+            qube: ContentQube to publish
+            source: File path, in-memory or memory-mapped buffer, or binary file
+                object. Defaults to qube.content
+            encrypt: Encrypt each chunk with a fresh key, stored in the BlakQube
+                as 'content_key'
+            upload_id: Checkpoint name for resuming. Derived from the source when
+                it is a path or buffer; file objects are only resumable with one
+            progress: Called as progress(bytes_done, bytes_total) after each chunk
+
+        Returns:
+            PublishResult with the manifest CID
+        """
+        if source is None:
+            source = qube.content
+
+        with _ChunkReader(source, self.chunk_size) as reader:
+            if upload_id is None and reader.fingerprint is not None:
+                upload_id = hashlib.sha256(
+                    f"{reader.fingerprint}:{self.chunk_size}:{encrypt}".encode()
+                ).hexdigest()[:32]
+            source_id = {"fingerprint": reader.fingerprint, "size": reader.size}
+            state = self._load_state(upload_id, encrypt, source_id) or {
+                "chunk_size": self.chunk_size,
+                "encrypted": encrypt,
+                "source": source_id,
+                "key": Fernet.generate_key().decode() if encrypt else None,
+                "chunks": [],
+            }
+            fernet = Fernet(state["key"].encode()) if state["encrypted"] else None
+            chunks: List[Dict[str, Any]] = state["chunks"]
+            resumed = len(chunks)
+            done = sum(c["size"] for c in chunks)
+            if resumed:
+                self.logger.info(f"Resuming upload {upload_id} after {resumed} chunks ({done} bytes)")
+                reader.skip(resumed)
+                if progress:
+                    progress(done, reader.size)
+
+            for chunk in reader:
+                payload = fernet.encrypt(chunk) if fernet else chunk
+                cid = self.ipfs_pool.add_bytes(payload)
+                chunks.append({"cid": cid, "size": len(chunk)})
+                done += len(chunk)
+                self._save_state(upload_id, state)
+                if progress:
+                    progress(done, reader.size)
+
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "size": done,
+            "chunk_size": state["chunk_size"],
+            "content_type": qube.content_type,
+            "encrypted": state["encrypted"],
+            "chunks": chunks,
+        }
+        manifest_cid = self.ipfs_pool.add_bytes(json.dumps(manifest).encode())
+        self._clear_state(upload_id)
+
+        qube.meta.content_cid = manifest_cid
+        qube.meta.content_size = done
+        if state["encrypted"]:
+            qube.blak.add_entry("content_key", state["key"])
+        self.logger.info(f"Published {done} bytes in {len(chunks)} chunks as {manifest_cid}")
+        return PublishResult(
+            cid=manifest_cid,
+            size=done,
+            chunks=len(chunks),
+            resumed_chunks=resumed,
+            encrypted=state["encrypted"],
+        )
+
+    def iter_content(self, cid: str, key: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Stream a published payload back, one chunk at a time.
+
+        Args:
+            cid: Manifest CID from publish()
+            key: The 'content_key' for encrypted payloads
+
+        Yields:
+            Plaintext chunks in order
+        """
+        manifest = json.loads(self.ipfs_pool.cat(cid))
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"{cid} is not a {MANIFEST_FORMAT} manifest")
+        if manifest["encrypted"] and key is None:
+            raise ValueError(f"{cid} is encrypted and no key was given")
+        fernet = Fernet(key.encode()) if manifest["encrypted"] else None
+        for chunk in manifest["chunks"]:
+            payload = self.ipfs_pool.cat(chunk["cid"])
+            yield fernet.decrypt(payload) if fernet else payload
+
+    def _state_path(self, upload_id: str) -> str:
+        return os.path.join(self.state_dir, f"{upload_id}.json")
+
+    def _load_state(
+        self, upload_id: Optional[str], encrypt: bool, source_id: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        if upload_id is None or not self.checkpoints:
+            return None
+        path = self._state_path(upload_id)
+        try:
+            st = os.lstat(path)
+            if not _owned_and_private(st):
+                self.logger.warning(f"Ignoring upload checkpoint {upload_id}: not a private regular file")
+                return None
+            with open(path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable upload checkpoint {upload_id}: {e}")
+            return None
+        if state.get("chunk_size") != self.chunk_size:
+            return None
+        if state.get("encrypted") != encrypt or state.get("source") != source_id:
+            # A reused upload_id for a different payload or encryption setting
+            self.logger.warning(f"Ignoring upload checkpoint {upload_id}: it belongs to a different upload")
+            return None
+        return state
+
+    def _save_state(self, upload_id: Optional[str], state: Dict[str, Any]) -> None:
+        if upload_id is None or not self.checkpoints:
+            return
+        # The checkpoint can hold a content key, so keep it private to the owner
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path(upload_id))
+
+    def _clear_state(self, upload_id: Optional[str]) -> None:
+        if upload_id is None or not self.checkpoints:
+            return
+        try:
+            os.unlink(self._state_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+
+def _owned_and_private(st: os.stat_result, directory: bool = False) -> bool:
+    """Whether a checkpoint file, or its directory, belongs to us and is closed to everyone else."""
+    if not (stat.S_ISDIR(st.st_mode) if directory else stat.S_ISREG(st.st_mode)):
+        return False
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        return False
+    return not st.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+
+
+class _ChunkReader:
+    """Yields fixed-size chunks from a path, buffer or file object without reading it whole."""
+
+    def __init__(self, source: Source, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.fingerprint: Optional[str] = None
+        self._file: Optional[BinaryIO] = None
+        self._owned = False
+        self._mapped: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._offset = 0
+
+        if isinstance(source, str):
+            st = os.stat(source)
+            self.fingerprint = f"{os.path.abspath(source)}:{st.st_size}:{st.st_mtime_ns}"
+            self.size = st.st_size
+            self._file = open(source, "rb")
+            self._owned = True
+            if self.size:
+                self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mapped)
+        elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            self._view = memoryview(source).cast("B")
+            self.size = len(self._view)
+            self.fingerprint = hashlib.sha256(self._view).hexdigest()
+        else:
+            self._file = source
+            try:
+                self.size = os.fstat(source.fileno()).st_size - source.tell()
+            except (AttributeError, OSError, ValueError):
+                self.size = -1
+
+    def skip(self, chunks: int) -> None:
+        if self._view is not None:
+            self._offset = chunks * self.chunk_size
+        else:
+            self._file.seek(chunks * self.chunk_size, os.SEEK_CUR)
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._view is not None:
+            while self._offset < self.size:
+                chunk = bytes(self._view[self._offset:self._offset + self.chunk_size])
+                self._offset += len(chunk)
+                yield chunk
+            return
+        while True:
+            chunk = self._file.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __enter__(self) -> "_ChunkReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._view is not None:
+            self._view.release()
+        if self._mapped is not None:
+            self._mapped.close()
+        if self._owned:
+            self._file.close()
@@ -0,0 +1,283 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import ipfshttpclient
+
+try:
+    # Private to ipfshttpclient; without it the client's default pool is used
+    from ipfshttpclient.requests_wrapper import HTTPAdapter
+except ImportError:
+    HTTPAdapter = None
+
+
+class IPFSConnectionPool:
+    """
+    Shared, lazily connected IPFS API client.
+
+    Nothing touches the network until the first request. The underlying
+    client keeps a persistent HTTP session whose keep-alive pool is sized for
+    concurrent callers, so bursts of requests reuse warm connections instead
+    of opening one per call. Resizing that pool reaches into the client's
+    private session; if a client release changes it, the client is used
+    with its default pool instead. Failed connects back off exponentially;
+    while backing off, requests fail fast rather than waiting on a dead
+    daemon.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 5001,
+        pool_size: int = 32,
+        timeout: float = 30.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0
+    ):
+        """
+        Initialize the pool without connecting.
+
+        Args:
+            host: IPFS API host
+            port: IPFS API port
+            pool_size: Keep-alive connections held open for concurrent callers
+            timeout: Per-request timeout in seconds
+            backoff_base: Delay after the first failed connect
+            backoff_max: Upper bound on the reconnect delay
+        """
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._client = None
+        self._adapter: Optional[Any] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error: Optional[str] = None
+        self.connects = 0
+        self.connect_failures = 0
+        self.requests = 0
+        self.request_failures = 0
+
+    @property
+    def address(self) -> str:
+        return f"/ip4/{self.host}/tcp/{self.port}"
+
+    def _connect(self):
+        client = ipfshttpclient.connect(self.address, session=True, timeout=self.timeout)
+        # The client's session uses requests' default pool of 10 connections;
+        # swap in one sized for concurrent fetches so they all stay keep-alive
+        session = getattr(getattr(client, "_client", None), "_session", None)
+        adapters = getattr(session, "adapters", None)
+        if HTTPAdapter is None or not hasattr(session, "mount") or not isinstance(adapters, dict):
+            self.logger.warning(
+                f"Cannot resize the IPFS client's connection pool (ipfshttpclient {ipfshttpclient.__version__}); "
+                f"using its default"
+            )
+            return client, None
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        replaced = set()
+        for prefix, previous in list(adapters.items()):
+            session.mount(prefix, adapter)
+            replaced.add(previous)
+        for previous in replaced:
+            previous.close()
+        return client, adapter
+
+    def client(self):
+        """
+        Return the shared client, connecting on first use.
+
+        Returns:
+            A connected ipfshttpclient.Client
+
+        Raises:
+            ConnectionError: If the daemon is unreachable or still in backoff
+        """
+        client = self._client
+        if client is not None:
+            return client
+
+        with self._lock:
+            if self._client is not None:
+                return self._client
+            now = time.monotonic()
+            if now < self._retry_at:
+                raise ConnectionError(
+                    f"IPFS at {self.address} unavailable, retrying in {self._retry_at - now:.1f}s: "
+                    f"{self._last_error}"
+                )
+            try:
+                self._client, self._adapter = self._connect()
+            except Exception as e:
+                self._failures += 1
+                self.connect_failures += 1
+                self._last_error = str(e)
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+                self._retry_at = now + delay
+                self.logger.warning(f"Could not connect to IPFS at {self.address}: {e}; retrying in {delay:.1f}s")
+                raise ConnectionError(f"IPFS at {self.address} unavailable: {e}") from e
+            self._failures = 0
+            self._retry_at = 0.0
+            self.connects += 1
+            self.logger.info(f"Connected to IPFS at {self.address}")
+            return self._client
+
+    def _reset(self, client) -> None:
+        with self._lock:
+            if self._client is not client:
+                return
+            self._client = None
+            self._adapter = None
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        """
+        Invoke an ipfshttpclient method on the shared client.
+
+        A connection error drops the client and retries once on a fresh
+        connection, which covers daemon restarts and stale keep-alive sockets.
+
+        Args:
+            method: Client method name, e.g. "cat"
+            *args: Positional arguments for the method
+            **kwargs: Keyword arguments for the method
+
+        Returns:
+            The method's result
+        """
+        for attempt in (1, 2):
+            client = self.client()
+            try:
+                result = getattr(client, method)(*args, **kwargs)
+            except ipfshttpclient.exceptions.ConnectionError as e:
+                self._reset(client)
+                with self._lock:
+                    self.request_failures += 1
+                if attempt == 2:
+                    raise ConnectionError(f"IPFS request {method} failed: {e}") from e
+                self.logger.warning(f"IPFS connection lost during {method}, reconnecting: {e}")
+                continue
+            with self._lock:
+                self.requests += 1
+            return result
+
+    def cat(self, cid: str) -> bytes:
+        """
+        Fetch content by CID.
+
+        Args:
+            cid: IPFS content identifier
+
+        Returns:
+            The content
+        """
+        return self.call("cat", cid)
+
+    def add_bytes(self, data: bytes) -> str:
+        """
+        Add and pin content.
+
+        Args:
+            data: Content to add
+
+        Returns:
+            The content's CID
+        """
+        return self.call("add_bytes", data)
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Probe the daemon with a version request.
+
+        Returns:
+            {'healthy': bool, 'latency_ms': float, ...} with the daemon version
+            on success or the error on failure
+        """
+        start = time.perf_counter()
+        try:
+            version = self.call("version")
+        except Exception as e:
+            return {"healthy": False, "error": str(e), "latency_ms": (time.perf_counter() - start) * 1000}
+        return {
+            "healthy": True,
+            "version": version.get("Version"),
+            "latency_ms": (time.perf_counter() - start) * 1000,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise connection reuse.
+
+        Returns:
+            Requests served, TCP connections opened for them (None when the
+            client's own pool is used), and connect failures
+        """
+        opened: Optional[int] = 0
+        adapter = self._adapter
+        if adapter is None:
+            # Unknown while connected through the client's default pool
+            if self._client is not None:
+                opened = None
+        else:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                conn_pool = pools.get(key)
+                if conn_pool is not None:
+                    opened += conn_pool.num_connections
+        return {
+            "connected": self._client is not None,
+            "connects": self.connects,
+            "connect_failures": self.connect_failures,
+            "requests": self.requests,
+            "request_failures": self.request_failures,
+            "connections_opened": opened,
+            "pool_size": self.pool_size,
+        }
+
+    def close(self) -> None:
+        """Close the shared client and its keep-alive connections."""
+        client = self._client
+        if client is not None:
+            self._reset(client)
+
+
+_pools: Dict[Tuple[str, int], IPFSConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(host: str = "127.0.0.1", port: int = 5001, **kwargs) -> IPFSConnectionPool:
+    """
+    Return the process-wide pool for an IPFS endpoint, creating it if needed.
+
+    Args:
+        host: IPFS API host
+        port: IPFS API port
+        **kwargs: IPFSConnectionPool options, used only when the pool is created
+
+    Returns:
+        The shared IPFSConnectionPool
+    """
+    key = (host, port)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = IPFSConnectionPool(host, port, **kwargs)
+        return pool
+
+
+def close_pools() -> None:
+    """Close and forget every process-wide pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
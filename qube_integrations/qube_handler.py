@@ -1,15 +1,23 @@
+import json
 import logging
-from typing import Dict, Any, Optional
-import ipfshttpclient
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional
 import os
 
+from qube_agent.models.iqube_security import BlakQubeSecurityManager
+from qube_integrations.block_cache import BlockCache, is_valid_cid
+from qube_integrations.ipfs_pool import IPFSConnectionPool, get_pool
+
 class QubeHandler:
     def __init__(
         self,
         wallet_address: Optional[str] = None,
         ipfs_host: str = "127.0.0.1",  # Use localhost by default
         ipfs_port: int = 5001,
-        encryption_key: Optional[bytes] = None
+        encryption_key: Optional[bytes] = None,
+        block_cache: Optional[BlockCache] = None,
+        cid_resolver: Optional[Callable[[str], Optional[str]]] = None,
+        ipfs_pool: Optional[IPFSConnectionPool] = None
     ):
         """
         Initialize QubeHandler with optional wallet address and IPFS configuration.
@@ -19,33 +27,152 @@ class QubeHandler:
             ipfs_host (str, optional): IPFS host IP. Defaults to localhost.
             ipfs_port (int, optional): IPFS port. Defaults to 5001.
             encryption_key (Optional[bytes]): Optional encryption key for token processing.
+            block_cache (Optional[BlockCache]): Local content-addressed cache for IPFS blocks.
+                Defaults to a cache under QUBE_BLOCK_CACHE_DIR when that is set.
+            cid_resolver (Optional[Callable]): Maps a token ID to the CID of its
+                encrypted BlakQube payload.
+            ipfs_pool (Optional[IPFSConnectionPool]): IPFS client pool. Defaults to the
+                process-wide pool for ipfs_host:ipfs_port, connected on first use.
         """
         self.logger = logging.getLogger(__name__)
         self.wallet_address = wallet_address
+        self.ipfs_pool = ipfs_pool or get_pool(ipfs_host, ipfs_port)
+        
+        self._encryption_key = encryption_key or os.urandom(32)  # Generate random key if not provided
         
+        cache_dir = os.environ.get("QUBE_BLOCK_CACHE_DIR")
+        self.block_cache = block_cache or (BlockCache(cache_dir) if cache_dir else None)
+        self.token_cids: Dict[str, str] = {}
+        self._cid_resolver = cid_resolver or self.token_cids.get
+    
+    def register_token(self, qube_token_id: str, cid: str) -> None:
+        """
+        Record the CID holding a token's encrypted BlakQube payload.
+
+        Args:
+            qube_token_id (str): iQube token ID.
+            cid (str): IPFS content identifier.
+        """
+        self.token_cids[qube_token_id] = cid
+    
+    @property
+    def ipfs_client(self):
+        """
+        Shared IPFS client, connecting lazily.
+
+        Returns:
+            The pooled ipfshttpclient.Client, or None if IPFS is unreachable.
+        """
         try:
-            # Use a try-except block to handle potential IPFS connection issues
-            self.ipfs_client = ipfshttpclient.connect(f"/ip4/{ipfs_host}/tcp/{ipfs_port}")
-        except Exception as e:
-            self.logger.warning(f"Could not connect to IPFS: {e}")
-            self.ipfs_client = None
+            return self.ipfs_pool.client()
+        except ConnectionError:
+            return None
+    
+    def fetch(self, cid: str) -> memoryview:
+        """
+        Fetch IPFS content, serving it from the local block cache when present.
+
+        Cache hits are returned as a view of the cache's memory map, without
+        copying the block into the heap.
+
+        Args:
+            cid (str): IPFS content identifier.
+
+        Returns:
+            memoryview: Read-only view of the content.
+        """
+        # CIDs the cache cannot key (other multibases) go straight to IPFS
+        cache = self.block_cache if self.block_cache is not None and is_valid_cid(cid) else None
+        if cache is not None:
+            cached = cache.get(cid)
+            if cached is not None:
+                return cached
         
-        self._encryption_key = encryption_key or os.urandom(32)  # Generate random key if not provided
+        try:
+            content = self.ipfs_pool.cat(cid)
+        except ConnectionError as e:
+            raise ConnectionError(f"IPFS is unavailable and {cid} is not cached: {e}") from e
+        if cache is not None:
+            cache.put(cid, content)
+        return memoryview(content).toreadonly()
     
     def decrypt(self, qube_token_id: str) -> Dict[str, Any]:
         try:
-            # Placeholder for actual decryption logic
-            # In real implementation, this would interact with iQube protocol
             self.logger.info(f"Attempting to decrypt iQube with token ID: {qube_token_id}")
             
-            # Simulated decryption
-            decrypted_data = {
-                'token_id': qube_token_id,
-                'status': 'decryption_successful',
-                'data': 'Placeholder decrypted content'
-            }
+            cid = self._cid_resolver(qube_token_id)
+            if cid is None:
+                # Placeholder for tokens without a known payload
+                # In real implementation, this would interact with iQube protocol
+                return {
+                    'token_id': qube_token_id,
+                    'status': 'decryption_successful',
+                    'data': 'Placeholder decrypted content'
+                }
             
-            return decrypted_data
+            return self._decrypt_content(qube_token_id, cid, self.fetch(cid))
         except Exception as e:
             self.logger.error(f"Decryption failed for token {qube_token_id}: {e}")
             raise
+    
+    def _decrypt_content(self, qube_token_id: str, cid: str, content: memoryview) -> Dict[str, Any]:
+        # Decode straight from the view; json.loads would need a bytes copy first
+        payload = json.loads(str(content, "utf-8"))
+        return {
+            'token_id': qube_token_id,
+            'cid': cid,
+            'status': 'decryption_successful',
+            'data': BlakQubeSecurityManager.decrypt_data(payload)
+        }
+    
+    def decrypt_many(self, qube_token_ids: List[str], max_workers: int = 8) -> List[Dict[str, Any]]:
+        """
+        Decrypt a batch of tokens concurrently.
+
+        Duplicate token IDs and tokens sharing a CID are fetched once. IPFS
+        fetches and decryption run on a bounded thread pool.
+
+        Args:
+            qube_token_ids (List[str]): iQube token IDs, duplicates allowed.
+            max_workers (int, optional): Upper bound on concurrent fetches. Defaults to 8.
+
+        Returns:
+            List[Dict[str, Any]]: One result per input ID, in input order. Failed
+                items are returned as {'token_id': ..., 'error': ...} instead of raising.
+        """
+        unique_ids = list(dict.fromkeys(qube_token_ids))
+        if not unique_ids:
+            return []
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        cids: Dict[str, str] = {}
+        for token_id in unique_ids:
+            try:
+                cid = self._cid_resolver(token_id)
+            except Exception as e:
+                results[token_id] = {'token_id': token_id, 'error': str(e)}
+                continue
+            if cid is None:
+                results[token_id] = self.decrypt(token_id)
+            else:
+                cids[token_id] = cid
+        
+        unique_cids = list(dict.fromkeys(cids.values()))
+        workers = max(1, min(max_workers, len(unique_cids)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qube-decrypt") as pool:
+            fetches = {cid: pool.submit(self.fetch, cid) for cid in unique_cids}
+            
+            def decrypt_one(token_id: str) -> Dict[str, Any]:
+                cid = cids[token_id]
+                try:
+                    return self._decrypt_content(token_id, cid, fetches[cid].result())
+                except Exception as e:
+                    self.logger.error(f"Decryption failed for token {token_id}: {e}")
+                    return {'token_id': token_id, 'cid': cid, 'error': str(e)}
+            
+            # Decrypt each token as soon as its fetch lands
+            for token_id, result in zip(cids, pool.map(decrypt_one, list(cids))):
+                results[token_id] = result
+        
+        # Copies, so duplicate IDs don't alias one result dict
+        return [dict(results[token_id]) for token_id in qube_token_ids]
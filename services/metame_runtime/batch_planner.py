@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import gc
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from time import perf_counter_ns
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .models import SurfacePlanV0
+from .models.surface_plan import AuditRefs, DeviceContext, Intent, VerificationRefs
+from .matrix_selector import CompiledMatrix
+from .plan_cache import PlacementTemplate
+from .profile_compiler import _value, compile_profile
+from .plan_tracing import PlanTracer, get_tracer
+from .surface_selector import REASONING_TAGS, VALIDATE_PLANS, _coerce, _placement_templates, _stamp_plan
+
+# (device class, orientation, real estate, intent mode)
+PlanContext = Tuple[str, str, str, str]
+
+TABLE_COLUMNS = (
+    "plan_id", "session_id", "module_id", "module_type", "order",
+    "surface", "density", "region", "opens", "open_density",
+    "max_lines", "collapse_sections", "hide_media",
+)
+
+
+class PlanRequest(NamedTuple):
+    """One session to plan over the batch's module set."""
+    plan_id: str
+    session_id: str
+    intent: Intent
+    device_context: DeviceContext
+    audit: Optional[AuditRefs] = None
+    thread_id: Optional[str] = None
+
+
+def plan_context(request: PlanRequest) -> PlanContext:
+    """Return the inputs placement decisions depend on."""
+    device = _coerce(DeviceContext, request.device_context)
+    return (
+        _value(device.device_class),
+        _value(device.orientation),
+        _value(device.real_estate),
+        _coerce(Intent, request.intent).mode,
+    )
+
+
+class BatchSurfacePlanner:
+    """
+    Plans many sessions over one module set.
+
+    Placement decisions depend only on the module profiles and the
+    (device class, orientation, real estate, intent mode) context, of which
+    there are at most a few hundred. A batch is therefore planned column-
+    wise: requests are grouped by context, the compiled profiles make the
+    surface and density decisions once per distinct context, and each
+    request only has its ids stamped onto the shared skeleton.
+
+    Output is either SurfacePlanV0 objects or a columnar placements table
+    (one list per column in TABLE_COLUMNS, one row per placement), which
+    skips building Pydantic models altogether.
+    """
+
+    def __init__(
+        self,
+        *,
+        cartridge: str,
+        modules: List[Dict[str, Any]],
+        verification: VerificationRefs,
+        codex_id: Optional[str] = None,
+        capsule_id: Optional[str] = None,
+        validate: Optional[bool] = None,
+        matrix: Optional[CompiledMatrix] = None,
+        reasoning_tags: Optional[bool] = None,
+    ):
+        """
+        Initialize the planner and compile the module profiles.
+
+        Args:
+            cartridge: Cartridge every plan belongs to
+            modules: Modules as accepted by build_surface_plan_v0
+            verification: Verification refs copied into every plan
+            codex_id: Optional codex id for every plan
+            capsule_id: Optional capsule id for every plan
+            validate: Fully validate built plans. Defaults to VALIDATE_PLANS
+            matrix: Optional compiled surface decision matrix
+            reasoning_tags: Fill in placement reasoning_tags. Defaults to REASONING_TAGS
+        """
+        self.cartridge = cartridge
+        self.modules = modules
+        self.verification = _coerce(VerificationRefs, verification)
+        self.codex_id = codex_id
+        self.capsule_id = capsule_id
+        self.validate = VALIDATE_PLANS if validate is None else validate
+        self.matrix = matrix
+        self.reasoning_tags = REASONING_TAGS if reasoning_tags is None else reasoning_tags
+        self.compiled = [compile_profile(m["render_profile"]) for m in modules]
+        self._skeletons: Dict[PlanContext, Tuple[PlacementTemplate, ...]] = {}
+
+    def skeleton(self, context: PlanContext) -> Tuple[PlacementTemplate, ...]:
+        """
+        Return the placement skeleton for one context.
+
+        Args:
+            context: Device class, orientation, real estate and intent mode
+
+        Returns:
+            One PlacementTemplate per module
+        """
+        templates = self._skeletons.get(context)
+        if templates is None:
+            templates = _placement_templates(
+                self.compiled, *context, self.matrix, self.reasoning_tags, get_tracer()
+            )
+            self._skeletons[context] = templates
+        return templates
+
+    def decide(self, requests: Sequence[PlanRequest]) -> List[Tuple[PlacementTemplate, ...]]:
+        """
+        Make the placement decisions for a batch.
+
+        Args:
+            requests: Sessions to plan
+
+        Returns:
+            The skeleton for each request, in input order
+        """
+        contexts = [plan_context(r) for r in requests]
+        tracer = get_tracer()
+        if tracer is not None:
+            return [self._traced_skeleton(context, tracer) for context in contexts]
+        for context in set(contexts):
+            self.skeleton(context)
+        return [self._skeletons[context] for context in contexts]
+
+    def _traced_skeleton(self, context: PlanContext, tracer: PlanTracer) -> Tuple[PlacementTemplate, ...]:
+        started = perf_counter_ns()
+        cache_hit = context in self._skeletons
+        templates = self.skeleton(context)
+        tracer.on_plan(len(self.modules), cache_hit, perf_counter_ns() - started, context)
+        return templates
+
+    def plan(self, requests: Sequence[PlanRequest]) -> List[SurfacePlanV0]:
+        """
+        Plan a batch into SurfacePlanV0 objects.
+
+        Args:
+            requests: Sessions to plan
+
+        Returns:
+            One plan per request, in input order
+        """
+        skeletons = self.decide(requests)
+        # A batch keeps every model it builds alive, so cyclic GC passes
+        # rescan a growing heap and find nothing; pause them for the batch.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return [
+                _stamp_plan(
+                    templates,
+                    self.modules,
+                    plan_id=r.plan_id,
+                    session_id=r.session_id,
+                    cartridge=self.cartridge,
+                    intent=r.intent,
+                    device_context=r.device_context,
+                    verification=self.verification,
+                    audit=r.audit,
+                    codex_id=self.codex_id,
+                    capsule_id=self.capsule_id,
+                    thread_id=r.thread_id,
+                    validate=self.validate,
+                    matrix=self.matrix,
+                )
+                for r, templates in zip(requests, skeletons)
+            ]
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def table(self, requests: Sequence[PlanRequest]) -> Dict[str, List[Any]]:
+        """
+        Plan a batch into a columnar placements table.
+
+        Args:
+            requests: Sessions to plan
+
+        Returns:
+            Dict of TABLE_COLUMNS to equal-length lists, one row per placement
+        """
+        table: Dict[str, List[Any]] = {column: [] for column in TABLE_COLUMNS}
+        module_ids = [m["module_id"] for m in self.modules]
+        module_types = [m["module_type"] for m in self.modules]
+        orders = list(range(len(self.modules)))
+        count = len(self.modules)
+
+        for r, templates in zip(requests, self.decide(requests)):
+            table["plan_id"].extend([r.plan_id] * count)
+            table["session_id"].extend([r.session_id] * count)
+            table["module_id"].extend(module_ids)
+            table["module_type"].extend(module_types)
+            table["order"].extend(orders)
+            for t in templates:
+                table["surface"].append(t.surface.value)
+                table["density"].append(t.density.value)
+                table["region"].append(t.region)
+                table["opens"].append(t.opens.value if t.opens is not None else None)
+                table["open_density"].append(t.open_density.value if t.open_density is not None else None)
+                max_lines, collapse_sections, hide_media = t.overrides or (None, None, None)
+                table["max_lines"].append(max_lines)
+                table["collapse_sections"].append(collapse_sections)
+                table["hide_media"].append(hide_media)
+        return table
+
+
+# Set in each worker process by _init_worker
+_worker_planner: Optional[BatchSurfacePlanner] = None
+
+
+def _init_worker(kwargs: Dict[str, Any]) -> None:
+    global _worker_planner
+    _worker_planner = BatchSurfacePlanner(**kwargs)
+
+
+def _plan_chunk(requests: List[PlanRequest], output: str) -> Any:
+    if output == "table":
+        return _worker_planner.table(requests)
+    return _worker_planner.plan(requests)
+
+
+class BatchPlanningPool:
+    """
+    Spreads batch planning over worker processes.
+
+    Each worker compiles the module set once when it starts and keeps its
+    skeletons across chunks, so only requests and results cross the
+    process boundary. Prefer table(): plans have to be pickled back model
+    by model, which costs more than building them inline.
+    """
+
+    def __init__(
+        self,
+        *,
+        cartridge: str,
+        modules: List[Dict[str, Any]],
+        verification: VerificationRefs,
+        codex_id: Optional[str] = None,
+        capsule_id: Optional[str] = None,
+        validate: Optional[bool] = None,
+        matrix: Optional[CompiledMatrix] = None,
+        reasoning_tags: Optional[bool] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 512,
+        mp_context: str = "spawn",
+    ):
+        """
+        Start the worker processes.
+
+        Args:
+            cartridge: Cartridge every plan belongs to
+            modules: Modules as accepted by build_surface_plan_v0
+            verification: Verification refs copied into every plan
+            codex_id: Optional codex id for every plan
+            capsule_id: Optional capsule id for every plan
+            validate: Fully validate built plans. Defaults to VALIDATE_PLANS
+            matrix: Optional compiled surface decision matrix
+            reasoning_tags: Fill in placement reasoning_tags. Defaults to REASONING_TAGS
+            max_workers: Worker processes. Defaults to the number of CPUs
+            chunk_size: Most requests sent to one worker per task
+            mp_context: multiprocessing start method
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.logger = logging.getLogger(__name__)
+        kwargs = {
+            "cartridge": cartridge,
+            "modules": modules,
+            "verification": verification,
+            "codex_id": codex_id,
+            "capsule_id": capsule_id,
+            "validate": validate,
+            "matrix": matrix,
+            "reasoning_tags": reasoning_tags,
+        }
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(mp_context),
+            initializer=_init_worker,
+            initargs=(kwargs,),
+        )
+
+    def _chunks(self, requests: Sequence[PlanRequest]) -> List[List[PlanRequest]]:
+        size = max(1, min(self.chunk_size, math.ceil(len(requests) / self.max_workers)))
+        return [list(requests[i:i + size]) for i in range(0, len(requests), size)]
+
+    def plan(self, requests: Sequence[PlanRequest]) -> List[SurfacePlanV0]:
+        """
+        Plan a batch into SurfacePlanV0 objects across the workers.
+
+        Args:
+            requests: Sessions to plan
+
+        Returns:
+            One plan per request, in input order
+        """
+        plans: List[SurfacePlanV0] = []
+        for chunk in self._executor.map(_plan_chunk, self._chunks(requests), repeat("plans")):
+            plans.extend(chunk)
+        self.logger.debug(f"Planned {len(requests)} sessions")
+        return plans
+
+    def table(self, requests: Sequence[PlanRequest]) -> Dict[str, List[Any]]:
+        """
+        Plan a batch into a columnar placements table across the workers.
+
+        Args:
+            requests: Sessions to plan
+
+        Returns:
+            Dict of TABLE_COLUMNS to equal-length lists, one row per placement
+        """
+        table: Dict[str, List[Any]] = {column: [] for column in TABLE_COLUMNS}
+        for chunk in self._executor.map(_plan_chunk, self._chunks(requests), repeat("table")):
+            for column in TABLE_COLUMNS:
+                table[column].extend(chunk[column])
+        self.logger.debug(f"Planned {len(requests)} sessions into {len(table['plan_id'])} placements")
+        return table
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "BatchPlanningPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,449 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import threading
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import pydantic
+
+from .matrix_selector import CompiledMatrix
+from .models import ContentModuleRenderProfileV0, SurfaceDecisionMatrixV0, SurfacePlanV0
+from .plan_cache import default_plan_cache
+from .profile_compiler import CompiledProfile, register_compiled_profile
+from .surface_selector import build_surface_plan_v0
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs" / "qriptopian"
+DEFAULT_MATRIX_PATH = CONFIG_DIR / "surface_decision_matrix.v0.json"
+DEFAULT_PROFILES_PATH = CONFIG_DIR / "module_render_profiles.v0.json"
+
+# Bump when the pickled classes change shape in a way the code fingerprint misses
+SNAPSHOT_VERSION = 1
+
+# Sources whose changes make existing snapshots stale
+_COMPILER_SOURCES = (
+    Path(__file__),
+    Path(__file__).with_name("matrix_selector.py"),
+    Path(__file__).with_name("profile_compiler.py"),
+    Path(__file__).parent / "models" / "content_module_render_profile.py",
+    Path(__file__).parent / "models" / "surface_decision_matrix.py",
+)
+
+_UNSET = object()
+
+
+def default_snapshot_dir() -> Path:
+    """
+    Directory for catalogue snapshots.
+
+    METAME_SNAPSHOT_DIR if set, otherwise metame_runtime under the user's
+    cache directory. Snapshots are pickles, so they are only read from a
+    directory and file owned by the current user and not writable by
+    anyone else (see _snapshot_is_trusted).
+    """
+    configured = os.environ.get("METAME_SNAPSHOT_DIR")
+    if configured:
+        return Path(configured)
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "metame_runtime"
+
+
+def catalogue_digest(matrix_bytes: bytes, profiles_bytes: bytes) -> str:
+    """
+    Key a catalogue by its inputs and by the code that compiles them.
+
+    Args:
+        matrix_bytes: Raw decision matrix JSON
+        profiles_bytes: Raw render profile catalogue JSON
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{SNAPSHOT_VERSION}:pydantic {pydantic.VERSION}\0".encode())
+    for source in _COMPILER_SOURCES:
+        digest.update(hashlib.sha256(source.read_bytes()).digest())
+    for blob in (matrix_bytes, profiles_bytes):
+        digest.update(len(blob).to_bytes(8, "big"))
+        digest.update(blob)
+    return digest.hexdigest()
+
+
+class CompiledCatalogue:
+    """
+    Decision matrix and render profile catalogue, validated and compiled.
+
+    Built once per process by load_catalogue, which also keeps a pickled
+    copy on disk keyed by catalogue_digest so later processes skip JSON
+    parsing, Pydantic validation and profile compilation.
+    """
+
+    def __init__(self, matrix: CompiledMatrix, profiles: Dict[str, CompiledProfile], digest: str):
+        """
+        Assemble a catalogue from compiled parts.
+
+        Args:
+            matrix: Compiled surface decision matrix
+            profiles: Compiled render profiles by module type
+            digest: catalogue_digest of the source files
+        """
+        self.digest = digest
+        self.matrix = matrix
+        self.profiles = profiles
+
+    @property
+    def cartridge(self) -> str:
+        return self.matrix.cartridge
+
+    def render_profile(self, module_type: str) -> ContentModuleRenderProfileV0:
+        """
+        Look up a module type's render profile.
+
+        Args:
+            module_type: Module type, e.g. "KNYT.BadgePortal"
+
+        Returns:
+            ContentModuleRenderProfileV0
+
+        Raises:
+            KeyError: If the catalogue has no profile for the module type
+        """
+        return self.profiles[module_type].profile
+
+    def modules(self, modules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Attach render profiles to modules given by id and type.
+
+        Args:
+            modules: Dicts with module_id, module_type and optional source_refs
+
+        Returns:
+            Modules as accepted by build_surface_plan_v0
+        """
+        return [{**m, "render_profile": self.render_profile(m["module_type"])} for m in modules]
+
+    def plan(self, *, modules: List[Dict[str, Any]], **kwargs: Any) -> SurfacePlanV0:
+        """
+        Plan modules with this catalogue's profiles and decision matrix.
+
+        Args:
+            modules: Dicts with module_id, module_type and optional source_refs
+            **kwargs: Remaining build_surface_plan_v0 arguments; cartridge
+                defaults to the matrix's cartridge
+
+        Returns:
+            SurfacePlanV0
+        """
+        kwargs.setdefault("cartridge", self.cartridge)
+        return build_surface_plan_v0(modules=self.modules(modules), matrix=self.matrix, **kwargs)
+
+
+def _compile(matrix_bytes: bytes, profiles_bytes: bytes, digest: str) -> CompiledCatalogue:
+    matrix = CompiledMatrix(SurfaceDecisionMatrixV0.model_validate(json.loads(matrix_bytes)))
+    profiles = [ContentModuleRenderProfileV0.model_validate(p) for p in json.loads(profiles_bytes)]
+    return CompiledCatalogue(matrix, {p.module_type: CompiledProfile(p) for p in profiles}, digest)
+
+
+def _owned_and_private(st: os.stat_result) -> bool:
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        return False
+    return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _snapshot_is_trusted(path: Path) -> bool:
+    """Whether a snapshot may be unpickled: its directory and the file itself belong to us alone."""
+    try:
+        directory = os.stat(path.parent)
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    if not _owned_and_private(directory):
+        logger.warning(f"Ignoring catalogue snapshots in {path.parent}: not owned by us or writable by others")
+        return False
+    if not stat.S_ISREG(st.st_mode) or not _owned_and_private(st):
+        logger.warning(f"Ignoring catalogue snapshot {path}: not a private regular file")
+        return False
+    return True
+
+
+def _read_snapshot(path: Path, digest: str) -> Optional[CompiledCatalogue]:
+    if not _snapshot_is_trusted(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            catalogue = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable catalogue snapshot {path}: {e}")
+        return None
+    if not isinstance(catalogue, CompiledCatalogue) or catalogue.digest != digest:
+        logger.warning(f"Ignoring mismatched catalogue snapshot {path}")
+        return None
+    return catalogue
+
+
+def _write_snapshot(path: Path, catalogue: CompiledCatalogue) -> None:
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not _owned_and_private(os.stat(path.parent)):
+            # It would never be read back
+            return
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(catalogue, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not write catalogue snapshot {path}: {e}")
+
+
+def compile_catalogue(
+    matrix_path: Path = DEFAULT_MATRIX_PATH,
+    profiles_path: Path = DEFAULT_PROFILES_PATH,
+    snapshot_dir: Optional[Path] = _UNSET,
+) -> CompiledCatalogue:
+    """
+    Compile a catalogue, going through the snapshot cache.
+
+    Args:
+        matrix_path: Surface decision matrix JSON
+        profiles_path: Render profile catalogue JSON
+        snapshot_dir: Snapshot directory; defaults to default_snapshot_dir(),
+            None disables snapshots
+
+    Returns:
+        CompiledCatalogue
+    """
+    return _compile_catalogue(Path(matrix_path).read_bytes(), Path(profiles_path).read_bytes(), snapshot_dir)
+
+
+def _compile_catalogue(matrix_bytes: bytes, profiles_bytes: bytes, snapshot_dir: Optional[Path]) -> CompiledCatalogue:
+    digest = catalogue_digest(matrix_bytes, profiles_bytes)
+
+    if snapshot_dir is _UNSET:
+        snapshot_dir = default_snapshot_dir()
+    snapshot = Path(snapshot_dir) / f"catalogue-{digest}.pickle" if snapshot_dir is not None else None
+
+    catalogue = _read_snapshot(snapshot, digest) if snapshot is not None else None
+    if catalogue is None:
+        catalogue = _compile(matrix_bytes, profiles_bytes, digest)
+        if snapshot is not None:
+            _write_snapshot(snapshot, catalogue)
+        logger.info(f"Compiled catalogue {digest[:12]} ({len(catalogue.profiles)} profiles)")
+
+    for compiled in catalogue.profiles.values():
+        register_compiled_profile(compiled)
+    return catalogue
+
+
+_catalogues: Dict[Tuple[str, str], CompiledCatalogue] = {}
+_catalogues_lock = Lock()
+
+
+def load_catalogue(
+    matrix_path: Path = DEFAULT_MATRIX_PATH,
+    profiles_path: Path = DEFAULT_PROFILES_PATH,
+    snapshot_dir: Optional[Path] = _UNSET,
+) -> CompiledCatalogue:
+    """
+    Return the process-wide compiled catalogue for a pair of files.
+
+    The first call per (matrix, profiles) pair compiles it (see
+    compile_catalogue); later calls return the same object.
+
+    Args:
+        matrix_path: Surface decision matrix JSON
+        profiles_path: Render profile catalogue JSON
+        snapshot_dir: Snapshot directory; defaults to default_snapshot_dir(),
+            None disables snapshots
+
+    Returns:
+        CompiledCatalogue
+    """
+    key = (str(Path(matrix_path).resolve()), str(Path(profiles_path).resolve()))
+    with _catalogues_lock:
+        catalogue = _catalogues.get(key)
+        if catalogue is None:
+            catalogue = compile_catalogue(matrix_path, profiles_path, snapshot_dir)
+            _catalogues[key] = catalogue
+        return catalogue
+
+
+def clear_catalogues() -> None:
+    """Forget every process-wide catalogue."""
+    with _catalogues_lock:
+        _catalogues.clear()
+
+
+def _stat(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class ProfileCatalogue:
+    """
+    Hot-reloading catalogue service.
+
+    Holds the current CompiledCatalogue and replaces it as a whole when the
+    matrix or profile file changes, so a caller that takes .current once per
+    plan sees one consistent version even while a reload runs. Planning
+    only reads that reference: all file I/O happens in check(), called by
+    the watcher thread started with start() or by the caller.
+
+    Reloads are incremental. Profiles whose JSON is unchanged keep their
+    CompiledProfile object, so their plan-cache skeletons stay warm;
+    changed and removed module types are invalidated in the default plan
+    cache. A file that fails to parse or validate is logged and the
+    previous catalogue stays in place.
+    """
+
+    def __init__(
+        self,
+        matrix_path: Path = DEFAULT_MATRIX_PATH,
+        profiles_path: Path = DEFAULT_PROFILES_PATH,
+        snapshot_dir: Optional[Path] = _UNSET,
+    ):
+        """
+        Load the catalogue, from its snapshot when one exists.
+
+        Args:
+            matrix_path: Surface decision matrix JSON
+            profiles_path: Render profile catalogue JSON
+            snapshot_dir: Snapshot directory for the initial load; defaults
+                to default_snapshot_dir(), None disables snapshots
+        """
+        self.matrix_path = Path(matrix_path)
+        self.profiles_path = Path(profiles_path)
+        self.logger = logging.getLogger(__name__)
+        self.reloads = 0
+        self.failed_reloads = 0
+        self._reload_lock = Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = (_stat(self.matrix_path), _stat(self.profiles_path))
+        self._matrix_bytes = self.matrix_path.read_bytes()
+        profiles_bytes = self.profiles_path.read_bytes()
+        self._raw: Dict[str, Any] = {p["module_type"]: p for p in json.loads(profiles_bytes)}
+        self.current = _compile_catalogue(self._matrix_bytes, profiles_bytes, snapshot_dir)
+
+    def plan(self, **kwargs: Any) -> SurfacePlanV0:
+        """Plan with the current catalogue; see CompiledCatalogue.plan."""
+        return self.current.plan(**kwargs)
+
+    def check(self) -> bool:
+        """
+        Reload if either file changed since the last check.
+
+        Returns:
+            True if a new catalogue was swapped in
+        """
+        with self._reload_lock:
+            stats = (_stat(self.matrix_path), _stat(self.profiles_path))
+            if stats == self._stats:
+                return False
+            self._stats = stats
+            try:
+                return self._reload()
+            except Exception as e:
+                self.failed_reloads += 1
+                self.logger.error(f"Keeping catalogue {self.current.digest[:12]}, reload failed: {e}")
+                return False
+
+    def _reload(self) -> bool:
+        matrix_bytes = self.matrix_path.read_bytes()
+        profiles_bytes = self.profiles_path.read_bytes()
+        digest = catalogue_digest(matrix_bytes, profiles_bytes)
+        current = self.current
+        if digest == current.digest:
+            return False
+
+        matrix = current.matrix
+        if matrix_bytes != self._matrix_bytes:
+            # Keep the compiled matrix, and its cached skeletons, across formatting-only edits
+            candidate = CompiledMatrix(SurfaceDecisionMatrixV0.model_validate(json.loads(matrix_bytes)))
+            if candidate.matrix != current.matrix.matrix:
+                matrix = candidate
+
+        raw = {p["module_type"]: p for p in json.loads(profiles_bytes)}
+        profiles: Dict[str, CompiledProfile] = {}
+        changed: List[str] = []
+        for module_type, entry in raw.items():
+            previous = current.profiles.get(module_type)
+            if previous is not None and self._raw.get(module_type) == entry:
+                profiles[module_type] = previous
+            else:
+                profiles[module_type] = CompiledProfile(ContentModuleRenderProfileV0.model_validate(entry))
+                changed.append(module_type)
+        removed = [module_type for module_type in current.profiles if module_type not in raw]
+
+        for module_type in changed:
+            register_compiled_profile(profiles[module_type])
+        self.current = CompiledCatalogue(matrix, profiles, digest)
+        self._raw = raw
+        self._matrix_bytes = matrix_bytes
+        self.reloads += 1
+
+        if matrix is not current.matrix:
+            default_plan_cache.invalidate()
+        else:
+            for module_type in changed + removed:
+                default_plan_cache.invalidate(module_type)
+        self.logger.info(
+            f"Reloaded catalogue {digest[:12]}: {len(changed)} profiles recompiled, {len(removed)} removed, "
+            f"matrix {'recompiled' if matrix is not current.matrix else 'unchanged'}"
+        )
+        return True
+
+    def start(self, interval: float = 1.0) -> None:
+        """
+        Watch the files from a daemon thread.
+
+        Args:
+            interval: Seconds between checks
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def watch() -> None:
+            while not self._stop.wait(interval):
+                self.check()
+
+        self._thread = threading.Thread(target=watch, name="profile-catalogue-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the watcher thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise the catalogue.
+
+        Returns:
+            Digest, profile count, reloads and failed reloads
+        """
+        current = self.current
+        return {
+            "digest": current.digest,
+            "profiles": len(current.profiles),
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "watching": self._thread is not None,
+        }
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import SurfaceDecisionMatrixV0
+from .profile_compiler import (
+    DEVICE_CLASSES,
+    LADDER,
+    MODES,
+    REGIONS,
+    SURFACE_NAMES,
+    SURFACE_VALUES,
+    CompiledProfile,
+    DensityCode,
+    OverrideValues,
+    SurfaceCode,
+    _clamp_density,
+    _choose_surface,
+    _density_code,
+    _surface_code,
+    _value,
+)
+
+# Rules without a priority sort as if they had this one
+DEFAULT_PRIORITY = 1000
+
+
+def _resolve_allowed(target: int, compiled: CompiledProfile, fallback: int) -> int:
+    usable = compiled.usable_mask
+    if usable >> target & 1:
+        return target
+    if usable >> fallback & 1:
+        return fallback
+    for s in compiled.preferred:
+        if usable >> s & 1:
+            return s
+    for s in compiled.allowed:
+        if not compiled.disallowed_mask >> s & 1:
+            return s
+    return fallback
+
+
+class _MatrixRule:
+    __slots__ = (
+        "id", "device_class", "orientation", "real_estate", "mode",
+        "surface", "density", "region", "module_type", "action", "params",
+    )
+
+    def __init__(self, rule):
+        w = rule.when
+        self.id = rule.id
+        self.device_class = _value(w.device_class) if w is not None else None
+        self.orientation = _value(w.orientation) if w is not None else None
+        self.real_estate = _value(w.real_estate) if w is not None else None
+        self.mode = w.mode if w is not None else None
+        self.surface = _surface_code(w.surface) if w is not None and w.surface is not None else None
+        self.density = _density_code(w.density) if w is not None and w.density is not None else None
+        self.region = w.region if w is not None else None
+        self.module_type = w.module_type if w is not None else None
+        self.action = rule.then.action
+        self.params = rule.then.params or {}
+
+    def matches(self, context: Tuple[str, str, str, str], module_type: str, surface: int, density: int) -> bool:
+        device_class, orientation, real_estate, mode = context
+        if self.device_class is not None and self.device_class != device_class:
+            return False
+        if self.orientation is not None and self.orientation != orientation and self.orientation != "any":
+            return False
+        if self.real_estate is not None and self.real_estate != real_estate:
+            return False
+        if self.mode is not None and self.mode != mode:
+            return False
+        if self.surface is not None and self.surface != surface:
+            return False
+        if self.density is not None and self.density != density:
+            return False
+        if self.region is not None and self.region != REGIONS[surface]:
+            return False
+        if self.module_type is not None and self.module_type != module_type:
+            return False
+        return True
+
+
+class CompiledMatrix:
+    """
+    Surface decision matrix precompiled for the selector.
+
+    Port of applyMatrixRules in services/metame/surfaceSelector.ts, applied
+    while a placement skeleton is built rather than to a finished plan, so
+    with the plan cache it runs once per (module set, context) instead of
+    once per request. Surfaces and densities are SurfaceCode / DensityCode
+    integers; the ladder is a tuple of codes with a position lookup.
+
+    device_surface_bias replaces the selector's built-in fallback order
+    when no preferred surface is usable. density_policy.default_by_real_estate
+    is validated but, as in the TypeScript selector, not applied: every
+    profile carries its own preferred density.
+    """
+
+    __slots__ = (
+        "matrix", "cartridge", "ladder", "ladder_pos", "progression",
+        "default_surface", "bias", "rules", "overlay_density", "mobile_max_density",
+    )
+
+    def __init__(self, matrix: SurfaceDecisionMatrixV0):
+        self.matrix = matrix
+        self.cartridge = matrix.cartridge
+        ladder = matrix.fractal_ladder or LADDER
+        self.ladder: Tuple[SurfaceCode, ...] = tuple(_surface_code(s) for s in ladder)
+        positions = [-1] * len(SurfaceCode)
+        for i, s in enumerate(self.ladder):
+            positions[s] = i
+        self.ladder_pos: Tuple[int, ...] = tuple(positions)
+        self.progression = [SURFACE_VALUES[s] for s in self.ladder]
+
+        defaults = matrix.default_surface_by_mode
+        self.default_surface: Dict[str, Optional[SurfaceCode]] = {
+            mode: _surface_code(getattr(defaults, mode)) if defaults and getattr(defaults, mode) else None
+            for mode in MODES
+        }
+
+        bias = matrix.device_surface_bias or {}
+        unknown = set(bias) - set(DEVICE_CLASSES)
+        if unknown:
+            raise ValueError(f"device_surface_bias has unknown device classes: {sorted(unknown)}")
+        self.bias: Dict[str, Tuple[SurfaceCode, ...]] = {
+            device: tuple(_surface_code(s) for s in surfaces) for device, surfaces in bias.items()
+        }
+
+        indexed = list(enumerate(matrix.surface_rules))
+        # Higher numeric priority runs first, so the lowest number has the last word
+        indexed.sort(key=lambda item: (-(item[1].priority if item[1].priority is not None else DEFAULT_PRIORITY), item[0]))
+        self.rules = tuple(_MatrixRule(rule) for _, rule in indexed)
+
+        policy = matrix.density_policy
+        self.overlay_density = (
+            _density_code(policy.overlay_default_density) if policy and policy.overlay_default_density else None
+        )
+        self.mobile_max_density = (
+            _density_code(policy.mobile_max_density_unless_preferred)
+            if policy and policy.mobile_max_density_unless_preferred else None
+        )
+
+    def start_surface(self, compiled: CompiledProfile, device_class: str, mode: str) -> int:
+        """Starting surface with the matrix's device bias as the fallback order."""
+        bias = self.bias.get(device_class)
+        if bias is None:
+            return compiled.surfaces[(device_class, mode)]
+        return _choose_surface(compiled.preferred, compiled.usable_mask, device_class, mode, bias)
+
+    def opens(self, compiled: CompiledProfile, surface: int) -> Optional[int]:
+        """First allowed surface above this one on the matrix ladder."""
+        position = self.ladder_pos[surface]
+        if position < 0:
+            return None
+        for s in self.ladder[position + 1:]:
+            if compiled.allowed_mask >> s & 1:
+                return s
+        return None
+
+    def apply(
+        self,
+        compiled: CompiledProfile,
+        context: Tuple[str, str, str, str],
+        surface: int,
+        density: int,
+        overrides: Optional[OverrideValues],
+    ) -> Tuple[int, int, Optional[OverrideValues], List[str]]:
+        """
+        Apply the mode default, the surface rules and the density policy.
+
+        Args:
+            compiled: Compiled profile of the module
+            context: Device class, orientation, real estate and intent mode
+            surface: Surface code chosen by the profile
+            density: Density code chosen by the profile
+            overrides: Overrides from the profile's responsive rules
+
+        Returns:
+            Surface code, density code, overrides and the reasoning tags added
+        """
+        device_class, orientation, real_estate, mode = context
+        s, d = surface, density
+        values: Optional[List[Any]] = list(overrides) if overrides is not None else None
+        tags: List[str] = []
+
+        default = self.default_surface[mode]
+        if default is not None:
+            resolved = _resolve_allowed(default, compiled, s)
+            if resolved != s:
+                s = resolved
+                tags.append(f"matrix_default_surface:{mode}->{SURFACE_NAMES[s]}")
+
+        for rule in self.rules:
+            if not rule.matches(context, compiled.module_type, s, d):
+                continue
+            action = rule.action
+            params = rule.params
+            changed = False
+
+            if action == "force_surface_if_allowed" and params.get("surface") in LADDER:
+                resolved = _resolve_allowed(_surface_code(params["surface"]), compiled, s)
+                changed, s = resolved != s, resolved
+            elif action == "promote_one_step":
+                position = self.ladder_pos[s]
+                if position >= 0:
+                    target = self.ladder[min(position + 1, len(self.ladder) - 1)]
+                    resolved = _resolve_allowed(target, compiled, s)
+                    changed, s = resolved != s, resolved
+            elif action == "prefer_drawer_unless_surface_preferred" and device_class == "mobile":
+                if s == SurfaceCode.overlay and SurfaceCode.overlay not in compiled.preferred:
+                    resolved = _resolve_allowed(SurfaceCode.drawer, compiled, s)
+                    changed, s = resolved != s, resolved
+            elif action == "force_density" and params.get("density") in DensityCode.__members__:
+                target = _density_code(params["density"])
+                changed, d = target != d, target
+            elif action == "collapse_sections":
+                values = values or [None, None, None]
+                values[1] = True
+                changed = True
+            elif action == "hide_media":
+                values = values or [None, None, None]
+                values[2] = True
+                changed = True
+            elif action == "truncate_text":
+                max_lines = params.get("max_lines")
+                values = values or [None, None, None]
+                values[0] = int(max_lines) if isinstance(max_lines, (int, float)) and not isinstance(max_lines, bool) else 6
+                changed = True
+
+            if changed:
+                tags.append(f"matrix_rule:{rule.id}")
+
+        if self.overlay_density is not None and s == SurfaceCode.overlay:
+            d = self.overlay_density
+            tags.append("autofix:overlay_default_density")
+
+        if self.mobile_max_density is not None and device_class == "mobile" and s not in compiled.preferred:
+            d = _clamp_density(d, DensityCode.micro, self.mobile_max_density)
+
+        s = _resolve_allowed(s, compiled, s)
+        dmin, _, dmax, _ = compiled.densities[(device_class, orientation, real_estate == "xs")]
+        d = _clamp_density(d, dmin, dmax)
+
+        return s, d, tuple(values) if values is not None else None, tags
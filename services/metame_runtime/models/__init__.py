@@ -4,6 +4,7 @@ metaMe Runtime Models
 This package contains Pydantic models for metaMe Runtime Experience Aigent:
 - ContentModuleRenderProfileV0: Module rendering constraints and preferences
 - SurfacePlanV0: Runtime surface planning and placement output
+- SurfaceDecisionMatrixV0: Cartridge-level surface and density policy
 """
 
 from .content_module_render_profile import (
@@ -17,6 +18,7 @@ from .content_module_render_profile import (
     Modality,
     InteractionStyle,
     ResponsiveRule,
+    ResponsiveRuleThen,
     DensityConstraints,
     AestheticConstraints,
     ExperienceAffinity,
@@ -37,6 +39,15 @@ from .surface_plan import (
     AuditRefs,
 )
 
+from .surface_decision_matrix import (
+    SurfaceDecisionMatrixV0,
+    SurfaceDecisionRule,
+    SurfaceDecisionRuleWhen,
+    SurfaceDecisionRuleThen,
+    DefaultSurfaceByMode,
+    DensityPolicy,
+)
+
 __all__ = [
     # Content module render profile
     "ContentModuleRenderProfileV0",
@@ -49,6 +60,7 @@ __all__ = [
     "Modality",
     "InteractionStyle",
     "ResponsiveRule",
+    "ResponsiveRuleThen",
     "DensityConstraints",
     "AestheticConstraints",
     "ExperienceAffinity",
@@ -65,4 +77,11 @@ __all__ = [
     "Navigation",
     "VerificationRefs",
     "AuditRefs",
+    # Surface decision matrix
+    "SurfaceDecisionMatrixV0",
+    "SurfaceDecisionRule",
+    "SurfaceDecisionRuleWhen",
+    "SurfaceDecisionRuleThen",
+    "DefaultSurfaceByMode",
+    "DensityPolicy",
 ]
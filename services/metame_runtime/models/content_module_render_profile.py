@@ -91,9 +91,14 @@ class ResponsiveRuleActionParams(BaseModel):
     pass
 
 
+class ResponsiveRuleThen(BaseModel):
+    action: ResponsiveRuleAction
+    params: Optional[Dict[str, Any]] = None
+
+
 class ResponsiveRule(BaseModel):
     when: Optional[ResponsiveRuleCondition] = None
-    then: ResponsiveRuleAction
+    then: ResponsiveRuleThen
 
 
 class DensityConstraintsDeviceOverride(BaseModel):
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel
+
+from .content_module_render_profile import Surface, Density, DeviceClass, Orientation, RealEstate
+
+
+class SurfaceDecisionRuleWhen(BaseModel):
+    device_class: Optional[DeviceClass] = None
+    orientation: Optional[Orientation] = None
+    real_estate: Optional[RealEstate] = None
+    mode: Optional[Literal["be", "make", "play", "earn", "share"]] = None
+    surface: Optional[Surface] = None
+    density: Optional[Density] = None
+    region: Optional[Literal["primary", "secondary", "footer", "header", "sidebar", "canvas"]] = None
+    module_type: Optional[str] = None
+
+
+class SurfaceDecisionRuleThen(BaseModel):
+    action: str
+    params: Optional[Dict[str, Any]] = None
+
+
+class SurfaceDecisionRule(BaseModel):
+    id: str
+    priority: Optional[int] = None
+    when: Optional[SurfaceDecisionRuleWhen] = None
+    then: SurfaceDecisionRuleThen
+
+
+class DefaultSurfaceByMode(BaseModel):
+    be: Optional[Surface] = None
+    make: Optional[Surface] = None
+    play: Optional[Surface] = None
+    earn: Optional[Surface] = None
+    share: Optional[Surface] = None
+
+
+class DensityPolicy(BaseModel):
+    default_by_real_estate: Optional[Dict[str, Density]] = None
+    overlay_default_density: Optional[Density] = None
+    mobile_max_density_unless_preferred: Optional[Density] = None
+
+
+class SurfaceDecisionMatrixV0(BaseModel):
+    schema_version: str
+    cartridge: str
+    fractal_ladder: Optional[List[Surface]] = None
+    default_surface_by_mode: Optional[DefaultSurfaceByMode] = None
+    device_surface_bias: Optional[Dict[str, List[Surface]]] = None
+    density_policy: Optional[DensityPolicy] = None
+    surface_rules: List[SurfaceDecisionRule] = []
+    parity_expectations: Optional[Dict[str, Any]] = None
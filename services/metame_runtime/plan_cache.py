@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from .models import Density, Surface
+from .profile_compiler import CompiledProfile, OverrideValues
+
+# (module types, device class, orientation, real estate, intent mode, compiled matrix or None,
+#  whether reasoning tags are built)
+PlanKey = Tuple[Tuple[str, ...], str, str, str, str, Any, bool]
+
+
+class PlacementTemplate(NamedTuple):
+    """
+    Everything about a placement except its module_id and order.
+
+    Surfaces and densities are the model enum members (see SURFACE_VALUES).
+    """
+    surface: Surface
+    density: Density
+    region: str
+    opens: Optional[Surface]
+    open_density: Optional[Density]
+    overrides: Optional[OverrideValues]
+    reasoning_tags: Optional[Tuple[str, ...]]
+
+
+class PlanTemplateCache:
+    """
+    Bounded LRU of placement skeletons.
+
+    Placements depend only on the module profiles, the device context and
+    the intent mode, so a skeleton is built once per PlanKey and stamped
+    with request-specific ids afterwards. Each entry remembers the compiled
+    profiles it was built from; if a module type is later planned with a
+    different profile object, the entry is rebuilt, so replacing a profile
+    invalidates every skeleton that used it.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of skeletons to keep
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[PlanKey, Tuple[Tuple[CompiledProfile, ...], Tuple[PlacementTemplate, ...]]]" = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_build(
+        self,
+        key: PlanKey,
+        compiled: Sequence[CompiledProfile],
+        build: Callable[[], Tuple[PlacementTemplate, ...]],
+    ) -> Tuple[PlacementTemplate, ...]:
+        """
+        Return the skeleton for a key, building it on a miss.
+
+        Args:
+            key: Module types, device class, orientation, real estate, mode and matrix
+            compiled: Compiled profiles of the modules, in plan order
+            build: Builds the skeleton
+
+        Returns:
+            One PlacementTemplate per module
+        """
+        compiled = tuple(compiled)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if len(entry[0]) == len(compiled) and all(a is b for a, b in zip(entry[0], compiled)):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                # Same module types, different profiles: the entry is stale
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+
+        templates = build()
+        with self._lock:
+            self._entries[key] = (compiled, templates)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return templates
+
+    def invalidate(self, module_type: Optional[str] = None) -> int:
+        """
+        Drop cached skeletons.
+
+        Args:
+            module_type: Only drop skeletons that include this module type
+
+        Returns:
+            Number of skeletons dropped
+        """
+        with self._lock:
+            if module_type is None:
+                keys = list(self._entries)
+            else:
+                keys = [key for key in self._entries if module_type in key[0]]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise cache effectiveness.
+
+        Returns:
+            Hits, misses, hit rate, evictions, invalidations and size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+default_plan_cache = PlanTemplateCache()
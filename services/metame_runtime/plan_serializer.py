@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from json.encoder import encode_basestring
+from typing import Iterator, List, Optional
+
+from .models.surface_plan import (
+    AuditRefs,
+    DeviceContext,
+    Intent,
+    ModuleRef,
+    Navigation,
+    Placement,
+    PlacementOverrides,
+    Ref,
+    SurfacePlanV0,
+    VerificationRefs,
+)
+
+# Key order of each model, as model_dump_json emits it. The writers below
+# hard-code these orders; tests check them against the models.
+KEY_ORDERS = {
+    SurfacePlanV0: (
+        "schema_version", "plan_id", "session_id", "cartridge", "codex_id", "capsule_id", "thread_id",
+        "intent", "device_context", "modules", "placements", "navigation", "verification", "audit",
+    ),
+    Intent: ("user_ask", "mode", "focus"),
+    DeviceContext: ("device_class", "orientation", "interaction", "real_estate"),
+    ModuleRef: ("module_id", "module_type", "render_profile_ref", "source_refs"),
+    Ref: ("kind", "id"),
+    Placement: (
+        "module_id", "surface", "density", "region", "order", "interaction", "overrides", "reasoning_tags",
+    ),
+    Navigation: ("entry_surface", "progression"),
+    VerificationRefs: ("dis_ref", "constraint_manifest_ref", "parity_report_ref"),
+    AuditRefs: ("trace_id", "span_id", "actor", "event_hashes"),
+}
+
+# Enum fields are str enums, whose string data is their value, so
+# encode_basestring writes them without going through .value.
+_s = encode_basestring
+
+
+def _opt(value: Optional[str]) -> str:
+    return "null" if value is None else _s(value)
+
+
+def _bool(value: Optional[bool]) -> str:
+    return "null" if value is None else ("true" if value else "false")
+
+
+def _int(value: Optional[int]) -> str:
+    return "null" if value is None else str(int(value))
+
+
+def _strings(values: Optional[List[str]]) -> str:
+    if values is None:
+        return "null"
+    return "[" + ",".join(map(_s, values)) + "]"
+
+
+def _ref(ref: Ref) -> str:
+    return f'{{"kind":{_s(ref.kind)},"id":{_s(ref.id)}}}'
+
+
+def _module(m: ModuleRef) -> str:
+    refs = m.source_refs
+    source_refs = "null" if refs is None else "[" + ",".join(map(_ref, refs)) + "]"
+    ref = m.render_profile_ref
+    return (
+        f'{{"module_id":{_s(m.module_id)},"module_type":{_s(m.module_type)},'
+        f'"render_profile_ref":{{"kind":{_s(ref.kind)},"id":{_s(ref.id)}}},"source_refs":{source_refs}}}'
+    )
+
+
+def _overrides(o: PlacementOverrides, compact: bool) -> str:
+    if not compact:
+        return (
+            f'{{"max_lines":{_int(o.max_lines)},'
+            f'"collapse_sections":{_bool(o.collapse_sections)},"hide_media":{_bool(o.hide_media)}}}'
+        )
+    fields = []
+    if o.max_lines is not None:
+        fields.append(f'"max_lines":{_int(o.max_lines)}')
+    if o.collapse_sections is not None:
+        fields.append(f'"collapse_sections":{_bool(o.collapse_sections)}')
+    if o.hide_media is not None:
+        fields.append(f'"hide_media":{_bool(o.hide_media)}')
+    return "{" + ",".join(fields) + "}"
+
+
+def _placement(p: Placement, compact: bool) -> str:
+    interaction = p.interaction
+    overrides = p.overrides
+    if interaction is not None:
+        optional = f',"interaction":{{"opens":{_s(interaction.opens)},"open_density":{_s(interaction.open_density)}}}'
+    else:
+        optional = "" if compact else ',"interaction":null'
+    if overrides is not None:
+        optional += f',"overrides":{_overrides(overrides, compact)}'
+    elif not compact:
+        optional += ',"overrides":null'
+    return (
+        f'{{"module_id":{_s(p.module_id)},"surface":{_s(p.surface)},"density":{_s(p.density)},'
+        f'"region":{_s(p.region)},"order":{p.order:d}{optional},"reasoning_tags":{_strings(p.reasoning_tags)}}}'
+    )
+
+
+def _head(plan: SurfacePlanV0) -> str:
+    intent = plan.intent
+    device = plan.device_context
+    return (
+        f'{{"schema_version":{_s(plan.schema_version)},"plan_id":{_s(plan.plan_id)},'
+        f'"session_id":{_s(plan.session_id)},"cartridge":{_s(plan.cartridge)},'
+        f'"codex_id":{_opt(plan.codex_id)},"capsule_id":{_opt(plan.capsule_id)},"thread_id":{_opt(plan.thread_id)},'
+        f'"intent":{{"user_ask":{_s(intent.user_ask)},"mode":{_s(intent.mode)},"focus":{_opt(intent.focus)}}},'
+        f'"device_context":{{"device_class":{_s(device.device_class)},"orientation":{_s(device.orientation)},'
+        f'"interaction":{_s(device.interaction)},"real_estate":{_s(device.real_estate)}}},'
+        f'"modules":['
+    )
+
+
+def _tail(plan: SurfacePlanV0) -> str:
+    navigation = plan.navigation
+    verification = plan.verification
+    audit = plan.audit
+    if audit is None:
+        audit_json = "null"
+    else:
+        audit_json = (
+            f'{{"trace_id":{_s(audit.trace_id)},"span_id":{_s(audit.span_id)},"actor":{_s(audit.actor)},'
+            f'"event_hashes":{_strings(audit.event_hashes)}}}'
+        )
+    return (
+        f'],"navigation":{{"entry_surface":{_s(navigation.entry_surface)},'
+        f'"progression":{_strings(navigation.progression)}}},'
+        f'"verification":{{"dis_ref":{_ref(verification.dis_ref)},'
+        f'"constraint_manifest_ref":{_ref(verification.constraint_manifest_ref)},'
+        f'"parity_report_ref":{_ref(verification.parity_report_ref)}}},'
+        f'"audit":{audit_json}}}'
+    )
+
+
+def dumps_plan(plan: SurfacePlanV0, compact: bool = False) -> bytes:
+    """
+    Serialise a plan to JSON bytes.
+
+    Without compact the output is byte-for-byte what plan.model_dump_json()
+    produces. With compact, placements leave out interaction and overrides
+    when they are null, and overrides leave out their null fields.
+
+    Args:
+        plan: Plan to serialise
+        compact: Omit null interaction/overrides fields of placements
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    text = "".join((
+        _head(plan),
+        ",".join(map(_module, plan.modules)),
+        '],"placements":[',
+        ",".join([_placement(p, compact) for p in plan.placements]),
+        _tail(plan),
+    ))
+    return text.encode("utf-8")
+
+
+def iter_plan_json(plan: SurfacePlanV0, compact: bool = False, chunk_size: int = 64) -> Iterator[bytes]:
+    """
+    Serialise a plan as a stream of JSON byte chunks.
+
+    Joining the chunks gives exactly dumps_plan(plan, compact). Modules and
+    placements are emitted chunk_size at a time, so a response can start
+    before a large plan is fully encoded.
+
+    Args:
+        plan: Plan to serialise
+        compact: Omit null interaction/overrides fields of placements
+        chunk_size: Modules or placements per chunk
+
+    Yields:
+        UTF-8 encoded JSON fragments
+    """
+    modules = plan.modules
+    placements = plan.placements
+    yield _head(plan).encode("utf-8")
+    for start in range(0, len(modules), chunk_size):
+        prefix = "," if start else ""
+        yield (prefix + ",".join(map(_module, modules[start:start + chunk_size]))).encode("utf-8")
+    yield b'],"placements":['
+    for start in range(0, len(placements), chunk_size):
+        prefix = "," if start else ""
+        chunk = ",".join([_placement(p, compact) for p in placements[start:start + chunk_size]])
+        yield (prefix + chunk).encode("utf-8")
+    yield _tail(plan).encode("utf-8")
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from collections import Counter, deque
+from threading import Lock
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+
+class ModuleTrace(NamedTuple):
+    """
+    How one module's placement was decided while building a skeleton.
+
+    Surfaces and densities are names. rule_surface / rule_density are the
+    values after the profile's responsive rules, before the decision
+    matrix and the final clamp. profile_rules and matrix_rules count the
+    rule predicates evaluated for this decision: profile_rules is 0 when
+    the outcome came from the compiled profile's rule table.
+    """
+    module_type: str
+    context: Tuple[str, str, str, str]
+    start_surface: str
+    rule_surface: str
+    surface: str
+    start_density: str
+    rule_density: str
+    density: str
+    profile_rules: int
+    matrix_rules: int
+    matrix_events: Tuple[str, ...]
+    elapsed_ns: int
+
+
+class PlanSpan(NamedTuple):
+    """One plan, served from a cached skeleton or built afresh."""
+    context: Optional[Tuple[str, str, str, str]]
+    modules: int
+    cache_hit: bool
+    elapsed_ns: int
+
+
+class PlanTracer:
+    """
+    Collects counters about surface planning.
+
+    Install one with set_tracer(). build_surface_plan_v0 and the batch
+    planner then report every plan and every module decision they make;
+    with no tracer installed they only pay a None check. Module decisions
+    are made when a placement skeleton is built, so with the plan cache
+    they are traced on cache misses only; every plan, hit or miss, is
+    recorded as a PlanSpan and timed separately by path.
+
+    Tracers are per process: BatchPlanningPool workers do not report to
+    the parent's tracer.
+    """
+
+    def __init__(self, keep: int = 256):
+        """
+        Initialize the tracer.
+
+        Args:
+            keep: Number of most recent ModuleTrace and PlanSpan records
+                to keep
+        """
+        self.recent: Deque[ModuleTrace] = deque(maxlen=keep)
+        self.spans: Deque[PlanSpan] = deque(maxlen=keep)
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero every counter."""
+        with self._lock:
+            self.plans = 0
+            self.placements = 0
+            self.cache_hits = 0
+            self.plan_ns = 0
+            # plans, total ns, max ns; indexed by cache_hit
+            self.paths: Tuple[List[int], List[int]] = ([0, 0, 0], [0, 0, 0])
+            self.modules: Dict[str, List[int]] = {}
+            self.transitions: Counter = Counter()
+            self.matrix_events: Counter = Counter()
+            self.recent.clear()
+            self.spans.clear()
+
+    def on_plan(
+        self,
+        modules: int,
+        cache_hit: bool,
+        elapsed_ns: int,
+        context: Optional[Tuple[str, str, str, str]] = None,
+    ) -> None:
+        """
+        Record a finished plan.
+
+        Args:
+            modules: Number of modules in the plan
+            cache_hit: Whether its skeleton came from a cache
+            elapsed_ns: Time spent in build_surface_plan_v0, or for the
+                batch planner, in deciding the plan's placements
+            context: Device class, orientation, real estate and intent mode
+        """
+        with self._lock:
+            self.plans += 1
+            self.placements += modules
+            self.cache_hits += cache_hit
+            self.plan_ns += elapsed_ns
+            path = self.paths[cache_hit]
+            path[0] += 1
+            path[1] += elapsed_ns
+            path[2] = max(path[2], elapsed_ns)
+            self.spans.append(PlanSpan(context, modules, cache_hit, elapsed_ns))
+
+    def on_module(self, trace: ModuleTrace) -> None:
+        """
+        Record one module decision.
+
+        Args:
+            trace: The decision
+        """
+        with self._lock:
+            counters = self.modules.get(trace.module_type)
+            if counters is None:
+                # decisions, total ns, max ns, rule evaluations, surface changes
+                counters = self.modules[trace.module_type] = [0, 0, 0, 0, 0]
+            counters[0] += 1
+            counters[1] += trace.elapsed_ns
+            counters[2] = max(counters[2], trace.elapsed_ns)
+            counters[3] += trace.profile_rules + trace.matrix_rules
+            counters[4] += trace.start_surface != trace.surface
+            self.transitions[(trace.start_surface, trace.rule_surface, trace.surface)] += 1
+            self.matrix_events.update(trace.matrix_events)
+            self.recent.append(trace)
+
+    def slowest(self, count: int = 10) -> List[Tuple[str, float]]:
+        """
+        Module types by total decision time.
+
+        Args:
+            count: Number of module types to return
+
+        Returns:
+            (module type, total microseconds), slowest first
+        """
+        with self._lock:
+            totals = [(module_type, c[1] / 1e3) for module_type, c in self.modules.items()]
+        return sorted(totals, key=lambda item: item[1], reverse=True)[:count]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Export the counters.
+
+        Returns:
+            Plan totals, plan counts and times split by cache hit and
+            miss, per-module-type counters, surface transitions (start->
+            after rules->final) and matrix event counts
+        """
+        with self._lock:
+            return {
+                "plans": self.plans,
+                "placements": self.placements,
+                "cache_hits": self.cache_hits,
+                "plan_ms": self.plan_ns / 1e6,
+                "paths": {
+                    name: {"plans": p[0], "total_ms": p[1] / 1e6, "max_us": p[2] / 1e3}
+                    for name, p in (("miss", self.paths[0]), ("hit", self.paths[1]))
+                },
+                "modules": {
+                    module_type: {
+                        "decisions": c[0],
+                        "total_us": c[1] / 1e3,
+                        "max_us": c[2] / 1e3,
+                        "rule_evaluations": c[3],
+                        "surface_changes": c[4],
+                    }
+                    for module_type, c in self.modules.items()
+                },
+                "transitions": {"->".join(path): n for path, n in self.transitions.items()},
+                "matrix_events": dict(self.matrix_events),
+            }
+
+
+_tracer: Optional[PlanTracer] = None
+
+
+def set_tracer(tracer: Optional[PlanTracer]) -> Optional[PlanTracer]:
+    """
+    Install the process-wide tracer.
+
+    Args:
+        tracer: Tracer to install, or None to disable tracing
+
+    Returns:
+        The previously installed tracer
+    """
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def get_tracer() -> Optional[PlanTracer]:
+    """Return the installed tracer, if any."""
+    return _tracer
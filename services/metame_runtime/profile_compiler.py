@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from enum import Enum, IntEnum
+from functools import partial
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Sequence, Tuple, get_args
+
+from .models import ContentModuleRenderProfileV0
+from .models import content_module_render_profile as profile_models
+from .models.surface_plan import Intent
+
+Surface = Literal["liquid_ui", "embed", "drawer", "overlay"]
+Density = Literal["micro", "compact", "standard", "expanded", "full"]
+
+LADDER: List[Surface] = ["liquid_ui", "embed", "drawer", "overlay"]
+DENSITY_ORDER: List[Density] = ["micro", "compact", "standard", "expanded", "full"]
+
+
+class SurfaceCode(IntEnum):
+    """Surface as its position on LADDER; moving up the ladder is + 1."""
+    liquid_ui = 0
+    embed = 1
+    drawer = 2
+    overlay = 3
+
+
+class DensityCode(IntEnum):
+    """Density as its position in DENSITY_ORDER; clamping is min/max."""
+    micro = 0
+    compact = 1
+    standard = 2
+    expanded = 3
+    full = 4
+
+
+# Taken from the models so a new device class, orientation or mode is covered too
+DEVICE_CLASSES: Tuple[str, ...] = tuple(d.value for d in profile_models.DeviceClass)
+ORIENTATIONS: Tuple[str, ...] = tuple(o.value for o in profile_models.Orientation)
+MODES: Tuple[str, ...] = get_args(Intent.model_fields["mode"].annotation)
+
+# Indexed by SurfaceCode / DensityCode
+SURFACE_NAMES: Tuple[Surface, ...] = tuple(LADDER)
+DENSITY_NAMES: Tuple[Density, ...] = tuple(DENSITY_ORDER)
+# The enum members validated models hold, so trusted construction matches them
+SURFACE_VALUES: Tuple[profile_models.Surface, ...] = tuple(profile_models.Surface(s) for s in LADDER)
+DENSITY_VALUES: Tuple[profile_models.Density, ...] = tuple(profile_models.Density(d) for d in DENSITY_ORDER)
+SURFACE_BITS: Tuple[int, ...] = tuple(1 << s for s in SurfaceCode)
+REGIONS: Tuple[str, ...] = ("header", "primary", "secondary", "canvas")
+
+_LIQUID_UI, _EMBED, _DRAWER, _OVERLAY = SurfaceCode
+_TOP = _OVERLAY
+
+_MOBILE_BIAS = (_EMBED, _DRAWER, _OVERLAY, _LIQUID_UI)
+_DESKTOP_BIAS = (_EMBED, _DRAWER, _LIQUID_UI, _OVERLAY)
+
+_SURFACE_ACTIONS = {
+    "promote_to_drawer": _DRAWER,
+    "promote_to_overlay": _OVERLAY,
+    "demote_to_embed": _EMBED,
+    "demote_to_liquid_ui": _LIQUID_UI,
+}
+_DENSITY_ACTIONS = {
+    "reduce_density": DensityCode.compact,
+    "increase_density": DensityCode.expanded,
+}
+
+# (max_lines, collapse_sections, hide_media); None fields are left unset
+OverrideValues = Tuple[Optional[int], Optional[bool], Optional[bool]]
+
+
+def _value(v: Any) -> Any:
+    return v.value if isinstance(v, Enum) else v
+
+
+def _surface_code(v: Any) -> SurfaceCode:
+    return SurfaceCode[_value(v)]
+
+
+def _density_code(v: Any) -> DensityCode:
+    return DensityCode[_value(v)]
+
+
+def _clamp_density(d: int, dmin: int, dmax: int) -> int:
+    return max(min(d, dmax), dmin)
+
+
+def _mask(surfaces: Iterable[Any]) -> int:
+    mask = 0
+    for s in surfaces:
+        mask |= SURFACE_BITS[_surface_code(s)]
+    return mask
+
+
+def _choose_surface(
+    preferred: Sequence[int], usable: int, device_class: str, mode: str, bias: Optional[Sequence[int]] = None
+) -> int:
+    if bias is None:
+        bias = _MOBILE_BIAS if device_class in ("mobile", "tablet") else _DESKTOP_BIAS
+
+    base = next((s for s in preferred if usable >> s & 1), None)
+    if base is None:
+        base = next((s for s in bias if usable >> s & 1), _EMBED)
+
+    if mode == "share" and usable >> _DRAWER & 1:
+        base = _DRAWER
+
+    if mode in ("make", "play"):
+        nxt = min(base + 1, _TOP)
+        if usable >> nxt & 1:
+            base = nxt
+
+    if device_class == "mobile" and base == _OVERLAY and _OVERLAY not in preferred:
+        if usable >> _DRAWER & 1:
+            base = _DRAWER
+
+    return base
+
+
+def _ladder_opens(surface: int, allowed: int) -> Optional[int]:
+    nxt = surface + 1
+    if nxt <= _TOP and allowed >> nxt & 1:
+        return nxt
+    return None
+
+
+class _Rule:
+    __slots__ = ("device", "orientation", "surface", "density", "action", "params")
+
+    def __init__(self, rule):
+        w = rule.when
+        self.device = _value(w.device) if w is not None else None
+        self.orientation = _value(w.orientation) if w is not None else None
+        self.surface = _surface_code(w.surface) if w is not None and w.surface is not None else None
+        self.density = _density_code(w.density) if w is not None and w.density is not None else None
+        self.action = _value(rule.then.action)
+        self.params = rule.then.params or {}
+
+
+def _apply_rules(
+    rules: List[_Rule], device_class: str, orientation: str, surface: int, density: int
+) -> Tuple[int, int, Optional[OverrideValues]]:
+    s, d = surface, density
+    overrides: Optional[List[Any]] = None
+
+    for rule in rules:
+        if rule.device is not None and rule.device != device_class:
+            continue
+        if rule.orientation is not None and not (rule.orientation == orientation or rule.orientation == "any"):
+            continue
+        if rule.surface is not None and rule.surface != s:
+            continue
+        if rule.density is not None and rule.density != d:
+            continue
+
+        action = rule.action
+        if action == "truncate_text":
+            overrides = overrides or [None, None, None]
+            overrides[0] = int(rule.params.get("max_lines", 6))
+        elif action in ("collapse_sections", "swap_to_carousel"):
+            # swap_to_carousel is a UI hint; represent as collapse_sections for now
+            overrides = overrides or [None, None, None]
+            overrides[1] = True
+        elif action == "hide_media":
+            overrides = overrides or [None, None, None]
+            overrides[2] = True
+        elif action in _SURFACE_ACTIONS:
+            s = _SURFACE_ACTIONS[action]
+        elif action in _DENSITY_ACTIONS:
+            d = _DENSITY_ACTIONS[action]
+
+    return s, d, tuple(overrides) if overrides is not None else None
+
+
+def _density_bounds(
+    default: Tuple[int, int, int],
+    overrides: Sequence[Tuple[str, Optional[str], Tuple[int, int, int]]],
+    device_class: str,
+    orientation: str,
+    xs: bool,
+) -> Tuple[int, int, int, int]:
+    dmin, pref, dmax = next(
+        (
+            bounds for device, o, bounds in overrides
+            if device == device_class and (o is None or o == orientation or o == "any")
+        ),
+        default,
+    )
+    # tiny real estate nudges
+    if xs:
+        dmax = _clamp_density(dmax, DensityCode.micro, DensityCode.standard)
+        pref = _clamp_density(pref, dmin, dmax)
+    return dmin, pref, dmax, _clamp_density(pref, dmin, dmax)
+
+
+class _LazyTable(dict):
+    """Lookup table that computes and keeps each entry on first lookup."""
+
+    __slots__ = ("_fill",)
+
+    def __init__(self, fill: Callable[..., Any]):
+        super().__init__()
+        self._fill = fill
+
+    def __missing__(self, key: Tuple[Any, ...]) -> Any:
+        value = self[key] = self._fill(*key)
+        return value
+
+
+class CompiledProfile:
+    """
+    Render profile precompiled into lookup tables.
+
+    Everything the selector decides for a module depends on a handful of
+    small enums, so each decision is evaluated once per input and then
+    looked up: the starting surface per (device class, intent mode), the
+    density bounds per (device class, orientation, xs real estate), and the
+    responsive-rule outcome per (device class, orientation, surface,
+    density). The tables are filled on first lookup, so compiling a profile
+    only costs the contexts it is actually planned for. Surfaces and
+    densities are held as SurfaceCode / DensityCode integers and allowed and
+    disallowed surfaces as bitmasks over them; names are only looked up
+    again when a placement is built.
+    """
+
+    __slots__ = (
+        "profile", "digest", "module_type", "preferred", "preferred_tag", "allowed",
+        "allowed_mask", "disallowed_mask", "usable_mask",
+        "surfaces", "densities", "rules", "rule_count",
+    )
+
+    def __init__(self, profile: ContentModuleRenderProfileV0):
+        p = profile.profile
+        self.profile = profile
+        self.digest = profile_digest(profile)
+        self.module_type = profile.module_type
+        self.preferred: Tuple[SurfaceCode, ...] = tuple(_surface_code(s) for s in p.preferred_surfaces)
+        self.preferred_tag = f"preferred:{self.preferred[0].name if self.preferred else 'n/a'}"
+        self.allowed: Tuple[SurfaceCode, ...] = tuple(_surface_code(s) for s in p.allowed_surfaces)
+        self.allowed_mask = _mask(p.allowed_surfaces)
+        self.disallowed_mask = _mask(p.disallowed_surfaces or [])
+        self.usable_mask = self.allowed_mask & ~self.disallowed_mask
+
+        self.surfaces: Dict[Tuple[str, str], int] = _LazyTable(
+            partial(_choose_surface, self.preferred, self.usable_mask)
+        )
+
+        dc = p.density_constraints
+        overrides = tuple(
+            (
+                _value(o.device),
+                _value(o.orientation),
+                (_density_code(o.min), _density_code(o.preferred), _density_code(o.max)),
+            )
+            for o in dc.per_device_overrides or []
+        )
+        default = (_density_code(dc.min), _density_code(dc.preferred), _density_code(dc.max))
+        self.densities: Dict[Tuple[str, str, bool], Tuple[int, int, int, int]] = _LazyTable(
+            partial(_density_bounds, default, overrides)
+        )
+
+        rules = [_Rule(r) for r in p.responsive_rules or []]
+        self.rule_count = len(rules)
+        self.rules: Optional[Dict[Tuple[str, str, int, int], Tuple[int, int, Optional[OverrideValues]]]] = None
+        if rules:
+            self.rules = _LazyTable(partial(_apply_rules, rules))
+
+    def apply_rules(
+        self, device_class: str, orientation: str, surface: int, density: int
+    ) -> Tuple[int, int, Optional[OverrideValues]]:
+        if self.rules is None:
+            return surface, density, None
+        return self.rules[(device_class, orientation, surface, density)]
+
+
+def profile_digest(profile: ContentModuleRenderProfileV0) -> bytes:
+    """Digest of a profile's contents; equal profiles share a digest."""
+    return hashlib.blake2b(profile.model_dump_json().encode(), digest_size=16).digest()
+
+
+class ProfileCompiler:
+    """
+    Compiles render profiles and memoises the result per profile contents.
+
+    A profile object seen before is found by identity; a new object is
+    digested (see profile_digest), so validating the same profile afresh on
+    every request still reuses one CompiledProfile, and with it the plan
+    cache's skeletons. Profiles are treated as immutable once compiled;
+    call clear() after mutating one in place.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize the compiler.
+
+        Args:
+            maxsize: Maximum number of compiled profiles, and of profile
+                objects mapped to them, to keep
+        """
+        self.maxsize = maxsize
+        self._compiled: "OrderedDict[bytes, CompiledProfile]" = OrderedDict()
+        # id(profile) -> (profile, compiled); holding the profile keeps its id from being reused
+        self._objects: "OrderedDict[int, Tuple[ContentModuleRenderProfileV0, CompiledProfile]]" = OrderedDict()
+        self._lock = Lock()
+
+    def compile(self, profile: ContentModuleRenderProfileV0) -> CompiledProfile:
+        """
+        Return the compiled form of a profile, compiling it on first use.
+
+        Args:
+            profile: Validated render profile
+
+        Returns:
+            CompiledProfile
+        """
+        key = id(profile)
+        with self._lock:
+            entry = self._objects.get(key)
+            if entry is not None and entry[0] is profile:
+                self._objects.move_to_end(key)
+                return entry[1]
+
+        digest = profile_digest(profile)
+        with self._lock:
+            compiled = self._compiled.get(digest)
+            if compiled is not None:
+                self._compiled.move_to_end(digest)
+                self._remember(profile, compiled)
+                return compiled
+
+        return self.add(CompiledProfile(profile), profile)
+
+    def add(
+        self, compiled: CompiledProfile, profile: Optional[ContentModuleRenderProfileV0] = None
+    ) -> CompiledProfile:
+        """
+        Memoise an already compiled profile, e.g. one loaded from a snapshot.
+
+        Args:
+            compiled: Compiled profile
+            profile: Profile object to map to it; compiled.profile when omitted
+
+        Returns:
+            The same CompiledProfile, which replaces any memoised for the same contents
+        """
+        with self._lock:
+            self._compiled[compiled.digest] = compiled
+            self._compiled.move_to_end(compiled.digest)
+            if len(self._compiled) > self.maxsize:
+                self._compiled.popitem(last=False)
+            self._remember(profile if profile is not None else compiled.profile, compiled)
+        return compiled
+
+    def _remember(self, profile: ContentModuleRenderProfileV0, compiled: CompiledProfile) -> None:
+        self._objects[id(profile)] = (profile, compiled)
+        self._objects.move_to_end(id(profile))
+        if len(self._objects) > self.maxsize:
+            self._objects.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._compiled.clear()
+            self._objects.clear()
+
+
+_default_compiler = ProfileCompiler()
+
+
+def compile_profile(profile: ContentModuleRenderProfileV0) -> CompiledProfile:
+    """Compile a profile with the shared, memoising compiler."""
+    return _default_compiler.compile(profile)
+
+
+def register_compiled_profile(compiled: CompiledProfile) -> CompiledProfile:
+    """Memoise a compiled profile in the shared compiler."""
+    return _default_compiler.add(compiled)
+
+
+def clear_compiled_profiles() -> None:
+    """Drop every memoised compiled profile."""
+    _default_compiler.clear()
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Set, Tuple, Literal, Any
+import os
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
 
-from .models import (
-    ContentModuleRenderProfileV0,
-    SurfacePlanV0,
-)
+from pydantic import BaseModel
+
+from .models import SurfacePlanV0
 from .models.surface_plan import (
     Intent,
     DeviceContext,
@@ -15,164 +16,171 @@ from .models.surface_plan import (
     PlacementOverrides,
     VerificationRefs,
     AuditRefs,
+    Navigation,
     Ref,
+    RefKind,
+)
+from .matrix_selector import CompiledMatrix
+from .plan_cache import PlacementTemplate, PlanTemplateCache, default_plan_cache
+from .plan_tracing import ModuleTrace, PlanTracer, get_tracer
+from .profile_compiler import (
+    DENSITY_NAMES,
+    DENSITY_VALUES,
+    REGIONS,
+    SURFACE_NAMES,
+    SURFACE_VALUES,
+    CompiledProfile,
+    DensityCode,
+    SurfaceCode,
+    _clamp_density,
+    _ladder_opens,
+    _value,
+    compile_profile,
 )
 
-Surface = Literal["liquid_ui", "embed", "drawer", "overlay"]
-Density = Literal["micro", "compact", "standard", "expanded", "full"]
-
-LADDER: List[Surface] = ["liquid_ui", "embed", "drawer", "overlay"]
-DENSITY_ORDER: List[Density] = ["micro", "compact", "standard", "expanded", "full"]
-
-
-def _clamp_density(d: Density, dmin: Density, dmax: Density) -> Density:
-    di = DENSITY_ORDER.index(d)
-    mini = DENSITY_ORDER.index(dmin)
-    maxi = DENSITY_ORDER.index(dmax)
-    return DENSITY_ORDER[max(min(di, maxi), mini)]
-
-
-def _pick_density(profile: ContentModuleRenderProfileV0, device: DeviceContext) -> Tuple[Density, Density, Density]:
-    dc = profile.profile.density_constraints
-    dmin, pref, dmax = dc.min, dc.preferred, dc.max
-
-    overrides = dc.per_device_overrides or []
-    match = None
-    for o in overrides:
-        if o.device != device.device_class:
-            continue
-        if o.orientation is None or o.orientation == device.orientation or o.orientation == "any":
-            match = o
-            break
-
-    if match:
-        dmin, pref, dmax = match.min, match.preferred, match.max
+_UNSET = object()
 
-    # tiny real estate nudges
-    if device.real_estate == "xs":
-        dmax = _clamp_density(dmax, "micro", "standard")
-        pref = _clamp_density(pref, dmin, dmax)
+# Plans are built from values the selector already validated, so by default
+# the models are assembled without validation. Set METAME_VALIDATE_PLANS=1
+# (or pass validate=True) to run full Pydantic validation while debugging.
+VALIDATE_PLANS = os.environ.get("METAME_VALIDATE_PLANS", "").lower() in ("1", "true", "yes")
 
-    return dmin, pref, dmax
+# Placements carry reasoning_tags unless METAME_REASONING_TAGS=0 (or
+# reasoning_tags=False is passed); without them placements have
+# reasoning_tags=None and skeletons skip formatting the strings.
+REASONING_TAGS = os.environ.get("METAME_REASONING_TAGS", "").lower() not in ("0", "false", "no")
 
 
-def _choose_surface(profile: ContentModuleRenderProfileV0, device: DeviceContext, intent: Intent) -> Surface:
-    preferred = profile.profile.preferred_surfaces
-    allowed: Set[Surface] = set(profile.profile.allowed_surfaces)
-    disallowed: Set[Surface] = set(profile.profile.disallowed_surfaces or [])
+def _trusted(model: Type[BaseModel]) -> Callable[..., Any]:
+    """
+    Return a constructor that builds model instances without validation.
 
-    candidates = [s for s in preferred if s in allowed and s not in disallowed]
+    This is what model_construct does, minus its per-call alias and default
+    handling, which in pydantic 2 makes model_construct slower than
+    validating. Callers must pass every field, already in its final type.
+    """
+    assert not model.__pydantic_post_init__ and not model.__private_attributes__
+    new = object.__new__
+    set_attr = object.__setattr__
+
+    def construct(**values: Any) -> Any:
+        instance = new(model)
+        set_attr(instance, "__dict__", values)
+        set_attr(instance, "__pydantic_fields_set__", set(values))
+        set_attr(instance, "__pydantic_extra__", None)
+        set_attr(instance, "__pydantic_private__", None)
+        return instance
+
+    return construct
+
+
+def _coerce(model: Type[BaseModel], value: Any) -> Any:
+    """Return value as a model instance, validating it only if it is not one already."""
+    return value if isinstance(value, model) else model.model_validate(value)
+
+
+def _coerce_refs(refs: Optional[Sequence[Any]]) -> List[Ref]:
+    if not refs:
+        return []
+    if all(isinstance(r, Ref) for r in refs):
+        return refs
+    return [_coerce(Ref, r) for r in refs]
+
+
+def _all_str(values: Sequence[Any], optional: bool = False) -> bool:
+    return all(isinstance(v, str) or (optional and v is None) for v in values)
+
+
+_VALIDATED = (Ref, ModuleRef, PlacementInteraction, PlacementOverrides, Placement, Navigation, SurfacePlanV0)
+_TRUSTED = tuple(_trusted(model) for model in _VALIDATED)
+
+
+def _placement_templates(
+    compiled_profiles: Sequence[CompiledProfile],
+    device_class: str,
+    orientation: str,
+    real_estate: str,
+    mode: str,
+    matrix: Optional[CompiledMatrix] = None,
+    reasoning_tags: bool = True,
+    tracer: Optional[PlanTracer] = None,
+) -> Tuple[PlacementTemplate, ...]:
+    context = (device_class, orientation, real_estate, mode)
+    density_key = (device_class, orientation, real_estate == "xs")
+    if reasoning_tags:
+        mode_tag = f"mode:{mode}"
+        device_tag = f"device:{device_class}/{orientation}/{real_estate}"
+    tags = None
+
+    templates = []
+    for compiled in compiled_profiles:
+        if tracer is not None:
+            started = perf_counter_ns()
+        if matrix is None:
+            surface0 = compiled.surfaces[(device_class, mode)]
+        else:
+            surface0 = matrix.start_surface(compiled, device_class, mode)
+        dmin, pref, dmax, density0 = compiled.densities[density_key]
+        if tracer is not None:
+            # Rules are only evaluated the first time a key reaches the table
+            rules_key = (device_class, orientation, surface0, density0)
+            profile_rules = 0 if compiled.rules is None or rules_key in compiled.rules else compiled.rule_count
+        s, d, override_values = compiled.apply_rules(device_class, orientation, surface0, density0)
 
-    bias_up = intent.mode in ("make", "play")
-    bias_share = intent.mode == "share"
+        # re-clamp after rule changes
+        d = _clamp_density(d, dmin, dmax)
+        rule_surface, rule_density = s, d
+
+        if reasoning_tags:
+            tags = (
+                compiled.preferred_tag,
+                f"surface:{SURFACE_NAMES[surface0]}->{SURFACE_NAMES[s]}",
+                f"density:{DENSITY_NAMES[pref]}->{DENSITY_NAMES[d]}",
+                mode_tag,
+                device_tag,
+            )
+        matrix_tags = ()
+        if matrix is None:
+            opens = _ladder_opens(s, compiled.allowed_mask)
+        else:
+            s, d, override_values, matrix_tags = matrix.apply(compiled, context, s, d, override_values)
+            opens = matrix.opens(compiled, s)
+            if reasoning_tags:
+                tags += tuple(matrix_tags)
+
+        # Codes become model values here; templates feed the Pydantic models directly
+        density = DENSITY_VALUES[d]
+        open_density = None
+        if opens is not None:
+            open_density = DENSITY_VALUES[DensityCode.full] if opens == SurfaceCode.overlay else density
+        templates.append(
+            PlacementTemplate(
+                surface=SURFACE_VALUES[s],
+                density=density,
+                region=REGIONS[s],
+                opens=SURFACE_VALUES[opens] if opens is not None else None,
+                open_density=open_density,
+                overrides=override_values,
+                reasoning_tags=tags,
+            )
+        )
 
-    if device.device_class in ("mobile", "tablet"):
-        device_bias: List[Surface] = ["embed", "drawer", "overlay", "liquid_ui"]
-    else:
-        device_bias = ["embed", "drawer", "liquid_ui", "overlay"]
-
-    base: Optional[Surface] = candidates[0] if candidates else None
-    if base is None:
-        for s in device_bias:
-            if s in allowed and s not in disallowed:
-                base = s
-                break
-    if base is None:
-        base = "embed"
-
-    def can_use(s: Surface) -> bool:
-        return s in allowed and s not in disallowed
-
-    if bias_share and can_use("drawer"):
-        base = "drawer"
-
-    if bias_up:
-        idx = min(LADDER.index(base) + 1, len(LADDER) - 1)
-        nxt = LADDER[idx]
-        if can_use(nxt):
-            base = nxt
-
-    if device.device_class == "mobile" and base == "overlay" and "overlay" not in preferred:
-        if can_use("drawer"):
-            base = "drawer"
-
-    return base
-
-
-def _region_for(surface: Surface) -> Literal["primary", "secondary", "footer", "header", "sidebar", "canvas"]:
-    if surface == "overlay":
-        return "canvas"
-    if surface == "drawer":
-        return "secondary"
-    if surface == "embed":
-        return "primary"
-    return "header"
-
-
-def _ladder_opens(surface: Surface, allowed: Set[Surface]) -> Optional[Surface]:
-    idx = LADDER.index(surface)
-    nxt = LADDER[min(idx + 1, len(LADDER) - 1)]
-    if nxt != surface and nxt in allowed:
-        return nxt
-    return None
-
-
-def _apply_responsive_rules(
-    profile: ContentModuleRenderProfileV0,
-    device: DeviceContext,
-    surface: Surface,
-    density: Density,
-) -> Tuple[Surface, Density, Optional[PlacementOverrides]]:
-    s, d = surface, density
-    overrides: Optional[PlacementOverrides] = None
-
-    for rule in profile.profile.responsive_rules or []:
-        w = rule.when
-        match = True
-        if w is not None:
-            if w.device is not None and w.device != device.device_class:
-                match = False
-            if w.orientation is not None and not (w.orientation == device.orientation or w.orientation == "any"):
-                match = False
-            if w.surface is not None and w.surface != s:
-                match = False
-            if w.density is not None and w.density != d:
-                match = False
-
-        if not match:
-            continue
-
-        action = rule.then.action
-        params: Dict[str, Any] = rule.then.params or {}
-
-        if action == "truncate_text":
-            max_lines = params.get("max_lines", 6)
-            overrides = overrides or PlacementOverrides()
-            overrides.max_lines = int(max_lines)
-        elif action == "collapse_sections":
-            overrides = overrides or PlacementOverrides()
-            overrides.collapse_sections = True
-        elif action == "hide_media":
-            overrides = overrides or PlacementOverrides()
-            overrides.hide_media = True
-        elif action == "promote_to_drawer":
-            s = "drawer"
-        elif action == "promote_to_overlay":
-            s = "overlay"
-        elif action == "demote_to_embed":
-            s = "embed"
-        elif action == "demote_to_liquid_ui":
-            s = "liquid_ui"
-        elif action == "reduce_density":
-            d = "compact"
-        elif action == "increase_density":
-            d = "expanded"
-        elif action == "swap_to_carousel":
-            # UI hint; represent as collapse_sections for now
-            overrides = overrides or PlacementOverrides()
-            overrides.collapse_sections = True
-
-    return s, d, overrides
+        if tracer is not None:
+            tracer.on_module(ModuleTrace(
+                module_type=compiled.module_type,
+                context=context,
+                start_surface=SURFACE_NAMES[surface0],
+                rule_surface=SURFACE_NAMES[rule_surface],
+                surface=SURFACE_NAMES[s],
+                start_density=DENSITY_NAMES[density0],
+                rule_density=DENSITY_NAMES[rule_density],
+                density=DENSITY_NAMES[d],
+                profile_rules=profile_rules,
+                matrix_rules=len(matrix.rules) if matrix is not None else 0,
+                matrix_events=tuple(matrix_tags),
+                elapsed_ns=perf_counter_ns() - started,
+            ))
+    return tuple(templates)
 
 
 def build_surface_plan_v0(
@@ -188,6 +196,10 @@ def build_surface_plan_v0(
     codex_id: Optional[str] = None,
     capsule_id: Optional[str] = None,
     thread_id: Optional[str] = None,
+    plan_cache: Optional[PlanTemplateCache] = _UNSET,
+    validate: Optional[bool] = None,
+    matrix: Optional[CompiledMatrix] = None,
+    reasoning_tags: Optional[bool] = None,
 ) -> SurfacePlanV0:
     """
     modules: list of dicts:
@@ -197,67 +209,169 @@ def build_surface_plan_v0(
         "render_profile": ContentModuleRenderProfileV0,
         "source_refs": [Ref, ...] (optional)
       }
+
+    Each render profile is compiled once into lookup tables (see
+    profile_compiler) and reused by later plans.
+
+    Placements depend only on the profiles, the device context and the
+    intent mode, so their skeleton comes from plan_cache (the shared
+    default_plan_cache unless given; None disables caching) and only the
+    module ids, order and refs are filled in per request.
+
+    The models the selector builds itself (placements, module refs,
+    navigation, the plan) are assembled without re-validation unless
+    validate is True (default: VALIDATE_PLANS). Caller input is still
+    checked: intent, device_context, verification, audit and source_refs
+    may be model instances or plain dicts, which are validated once, and
+    ids of the wrong type fall back to full validation.
+
+    With a compiled surface decision matrix (see matrix_selector), its mode
+    defaults, rules, device bias and density policy are applied on top of
+    each profile's choice and its ladder becomes the navigation progression.
+
+    Placements carry reasoning_tags unless reasoning_tags is False
+    (default: REASONING_TAGS). For structured decision data, install a
+    PlanTracer (see plan_tracing); with none installed tracing costs a
+    None check per plan.
     """
+    tracer = get_tracer()
+    if tracer is not None:
+        started = perf_counter_ns()
+        built = False
+    if reasoning_tags is None:
+        reasoning_tags = REASONING_TAGS
+
+    intent = _coerce(Intent, intent)
+    device_context = _coerce(DeviceContext, device_context)
+    device_class = _value(device_context.device_class)
+    orientation = _value(device_context.orientation)
+    real_estate = _value(device_context.real_estate)
+    mode = intent.mode
+
+    compiled_profiles = [compile_profile(m["render_profile"]) for m in modules]
+
+    def build() -> Tuple[PlacementTemplate, ...]:
+        if tracer is not None:
+            nonlocal built
+            built = True
+        return _placement_templates(
+            compiled_profiles, device_class, orientation, real_estate, mode, matrix, reasoning_tags, tracer
+        )
+
+    cache = default_plan_cache if plan_cache is _UNSET else plan_cache
+    if cache is None:
+        templates = build()
+    else:
+        key = (
+            tuple(m["module_type"] for m in modules), device_class, orientation, real_estate, mode, matrix,
+            reasoning_tags,
+        )
+        templates = cache.get_or_build(key, compiled_profiles, build)
+
+    plan = _stamp_plan(
+        templates,
+        modules,
+        plan_id=plan_id,
+        session_id=session_id,
+        cartridge=cartridge,
+        intent=intent,
+        device_context=device_context,
+        verification=verification,
+        audit=audit,
+        codex_id=codex_id,
+        capsule_id=capsule_id,
+        thread_id=thread_id,
+        validate=VALIDATE_PLANS if validate is None else validate,
+        matrix=matrix,
+    )
+    if tracer is not None:
+        tracer.on_plan(
+            len(modules), not built, perf_counter_ns() - started, (device_class, orientation, real_estate, mode)
+        )
+    return plan
+
+
+def _stamp_plan(
+    templates: Sequence[PlacementTemplate],
+    modules: List[Dict[str, Any]],
+    *,
+    plan_id: str,
+    session_id: str,
+    cartridge: str,
+    intent: Intent,
+    device_context: DeviceContext,
+    verification: VerificationRefs,
+    audit: Optional[AuditRefs],
+    codex_id: Optional[str],
+    capsule_id: Optional[str],
+    thread_id: Optional[str],
+    validate: bool,
+    matrix: Optional[CompiledMatrix] = None,
+) -> SurfacePlanV0:
+    if not validate:
+        # Only the models built below are trusted; caller input is coerced here
+        intent = _coerce(Intent, intent)
+        device_context = _coerce(DeviceContext, device_context)
+        verification = _coerce(VerificationRefs, verification)
+        if audit is not None:
+            audit = _coerce(AuditRefs, audit)
+        if not (
+            _all_str((plan_id, session_id, cartridge))
+            and _all_str((codex_id, capsule_id, thread_id), optional=True)
+            and all(isinstance(m["module_id"], str) and isinstance(m["module_type"], str) for m in modules)
+        ):
+            # Let full validation report the bad value
+            validate = True
+
+    new_ref, new_module_ref, new_interaction, new_overrides, new_placement, new_navigation, new_plan = (
+        _VALIDATED if validate else _TRUSTED
+    )
 
     module_refs: List[ModuleRef] = []
     placements: List[Placement] = []
-    order = 0
 
-    for m in modules:
-        profile: ContentModuleRenderProfileV0 = m["render_profile"]
+    for order, (m, t) in enumerate(zip(modules, templates)):
         module_id: str = m["module_id"]
         module_type: str = m["module_type"]
-        source_refs: Optional[List[Ref]] = m.get("source_refs")
+        source_refs = m.get("source_refs")
+        if not validate:
+            source_refs = _coerce_refs(source_refs)
 
         module_refs.append(
-            ModuleRef(
+            new_module_ref(
                 module_id=module_id,
                 module_type=module_type,
-                render_profile_ref=Ref(kind="schema_ref", id=f"render_profile:{module_type}"),
+                render_profile_ref=new_ref(kind=RefKind.schema_ref, id=f"render_profile:{module_type}"),
                 source_refs=source_refs or [],
             )
         )
 
-        surface0 = _choose_surface(profile, device_context, intent)
-        dmin, pref, dmax = _pick_density(profile, device_context)
-        density0 = _clamp_density(pref, dmin, dmax)
-
-        allowed: Set[Surface] = set(profile.profile.allowed_surfaces)
-        s, d, overrides = _apply_responsive_rules(profile, device_context, surface0, density0)
-
-        # re-clamp after rule changes
-        d = _clamp_density(d, dmin, dmax)
-
-        opens = _ladder_opens(s, allowed)
-
         interaction = None
-        if opens is not None:
-            interaction = PlacementInteraction(
-                opens=opens,
-                open_density="full" if opens == "overlay" else d,
+        if t.opens is not None:
+            interaction = new_interaction(opens=t.opens, open_density=t.open_density)
+
+        overrides = None
+        if t.overrides is not None:
+            max_lines, collapse_sections, hide_media = t.overrides
+            overrides = new_overrides(
+                max_lines=max_lines, collapse_sections=collapse_sections, hide_media=hide_media
             )
 
         placements.append(
-            Placement(
+            new_placement(
                 module_id=module_id,
-                surface=s,
-                density=d,
-                region=_region_for(s),
+                surface=t.surface,
+                density=t.density,
+                region=t.region,
                 order=order,
                 interaction=interaction,
                 overrides=overrides,
-                reasoning_tags=[
-                    f"preferred:{profile.profile.preferred_surfaces[0] if profile.profile.preferred_surfaces else 'n/a'}",
-                    f"surface:{surface0}->{s}",
-                    f"density:{pref}->{d}",
-                    f"mode:{intent.mode}",
-                    f"device:{device_context.device_class}/{device_context.orientation}/{device_context.real_estate}",
-                ],
+                reasoning_tags=list(t.reasoning_tags) if t.reasoning_tags is not None else None,
             )
         )
-        order += 1
 
-    return SurfacePlanV0(
+    return new_plan(
+        schema_version="0.1.0",
         plan_id=plan_id,
         session_id=session_id,
         cartridge=cartridge,
@@ -268,7 +382,7 @@ def build_surface_plan_v0(
         device_context=device_context,
         modules=module_refs,
         placements=placements,
-        navigation={"entry_surface": "liquid_ui", "progression": LADDER},
+        navigation=new_navigation(entry_surface=SURFACE_VALUES[0], progression=list(matrix.progression if matrix is not None else SURFACE_VALUES)),
         verification=verification,
         audit=audit,
     )
@@ -0,0 +1,105 @@
+"""
+Batch surface planning benchmark: many sessions over one module set.
+
+Plans --sessions random (device context, intent mode) sessions over the
+Qriptopian module profiles, repeated to --modules modules, with a loop of
+build_surface_plan_v0 calls, with BatchSurfacePlanner (plans and columnar
+table), and with BatchPlanningPool over --workers processes.
+
+    PYTHONPATH=. python tests/benchmarks/batch_surface_planning.py --sessions 2000 --workers 2
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+from pathlib import Path
+
+from services.metame_runtime.batch_planner import BatchPlanningPool, BatchSurfacePlanner, PlanRequest
+from services.metame_runtime.models import ContentModuleRenderProfileV0
+from services.metame_runtime.models.surface_plan import DeviceContext, Intent, Ref, VerificationRefs
+from services.metame_runtime.plan_cache import PlanTemplateCache
+from services.metame_runtime.surface_selector import build_surface_plan_v0
+
+PROFILES_PATH = Path(__file__).resolve().parents[2] / "configs" / "qriptopian" / "module_render_profiles.v0.json"
+
+VERIFICATION = VerificationRefs(
+    dis_ref=Ref(kind="doc_ref", id="dis:qriptopian:v0"),
+    constraint_manifest_ref=Ref(kind="doc_ref", id="constraints:qriptopian:v0"),
+    parity_report_ref=Ref(kind="doc_ref", id="parity:pending"),
+)
+
+
+def load_modules(count):
+    raw = json.loads(PROFILES_PATH.read_text())
+    profiles = [ContentModuleRenderProfileV0.model_validate(p) for p in raw]
+    return [
+        {"module_id": f"mod_{i}", "module_type": f"{p.module_type}#{i}", "render_profile": p}
+        for i, p in enumerate(itertools.islice(itertools.cycle(profiles), count))
+    ]
+
+
+def make_requests(count, seed):
+    rng = random.Random(seed)
+    requests = []
+    for i in range(count):
+        device = DeviceContext(
+            device_class=rng.choice(["mobile", "tablet", "desktop", "large_screen"]),
+            orientation=rng.choice(["portrait", "landscape", "any"]),
+            interaction=rng.choice(["touch", "pointer"]),
+            real_estate=rng.choice(["xs", "s", "m", "l", "xl"]),
+        )
+        intent = Intent(user_ask="bench", mode=rng.choice(["be", "make", "play", "earn", "share"]))
+        requests.append(PlanRequest(plan_id=f"plan_{i}", session_id=f"sess_{i}", intent=intent, device_context=device))
+    return requests
+
+
+def timed(label, sessions, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:28s} {elapsed:8.3f} s  {sessions / elapsed:10.1f} sessions/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    modules = load_modules(args.modules)
+    requests = make_requests(args.sessions, args.seed)
+    shared = {"cartridge": "Qriptopian", "modules": modules, "verification": VERIFICATION}
+    print(f"{args.sessions} sessions x {args.modules} modules")
+
+    cache = PlanTemplateCache()
+
+    def loop():
+        return [
+            build_surface_plan_v0(
+                plan_id=r.plan_id,
+                session_id=r.session_id,
+                intent=r.intent,
+                device_context=r.device_context,
+                plan_cache=cache,
+                **shared,
+            )
+            for r in requests
+        ]
+
+    timed("build_surface_plan_v0 loop", args.sessions, loop)
+    timed("batch planner, plans", args.sessions, lambda: BatchSurfacePlanner(**shared).plan(requests))
+    timed("batch planner, table", args.sessions, lambda: BatchSurfacePlanner(**shared).table(requests))
+
+    start = time.perf_counter()
+    with BatchPlanningPool(max_workers=args.workers, **shared) as pool:
+        pool.table(requests[:args.workers])
+        print(f"{'pool startup':28s} {time.perf_counter() - start:8.3f} s")
+        timed(f"pool x{args.workers}, plans", args.sessions, lambda: pool.plan(requests))
+        timed(f"pool x{args.workers}, table", args.sessions, lambda: pool.table(requests))
+
+
+if __name__ == "__main__":
+    main()
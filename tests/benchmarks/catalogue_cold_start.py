@@ -0,0 +1,43 @@
+"""
+Catalogue cold start benchmark: milliseconds to a usable compiled catalogue.
+
+Times reading, parsing, validating and compiling the decision matrix and
+render profile catalogue from JSON against loading the same catalogue from
+its hash-keyed snapshot, as a fresh process would on start.
+
+    PYTHONPATH=. python tests/benchmarks/catalogue_cold_start.py --repeat 50
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from services.metame_runtime.catalogue import compile_catalogue
+
+
+def best_ms(fn, repeat):
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        compile_catalogue(snapshot_dir=Path(snapshot_dir))
+        compiled = best_ms(lambda: compile_catalogue(snapshot_dir=None), args.repeat)
+        loaded = best_ms(lambda: compile_catalogue(snapshot_dir=Path(snapshot_dir)), args.repeat)
+
+    print(f"parse + validate + compile {compiled:8.3f} ms")
+    print(f"snapshot load              {loaded:8.3f} ms  ({compiled / loaded:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
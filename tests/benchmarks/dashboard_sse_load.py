@@ -0,0 +1,117 @@
+"""
+Load test for the live dashboard event bus.
+
+Attaches hundreds of simulated SSE clients to a WebInterfaceManager, a share
+of which read slowly, then publishes status updates and qube logs at a fixed
+rate. CPU time and traced heap are sampled per window; both should stay flat
+because every client queue is bounded and frames are encoded once.
+
+Run from the repository root:
+
+    PYTHONPATH=. python tests/benchmarks/dashboard_sse_load.py --subscribers 500
+"""
+import argparse
+import threading
+import time
+import tracemalloc
+
+from qube_agent.utils.event_bus import DashboardEventBus
+from qube_agent.utils.web_interface import WebInterfaceManager
+
+
+def client(bus, subscription, stop, slow, counters, index):
+    frames = bus.stream(subscription)
+    for _ in frames:
+        counters[index] += 1
+        if slow:
+            time.sleep(0.05)
+        if stop.is_set():
+            break
+    frames.close()
+
+
+def run(subscribers: int, slow_ratio: float, rate: int, windows: int, window_seconds: float):
+    web_interface = WebInterfaceManager(
+        event_bus=DashboardEventBus(queue_size=64, heartbeat_interval=0.5)
+    )
+    agent_id = web_interface.create_agent_dashboard(initial_config={"name": "load-test"})
+    bus = web_interface.event_bus
+
+    stop = threading.Event()
+    counters = [0] * subscribers
+    threads = []
+    slow_every = int(1 / slow_ratio) if slow_ratio else 0
+    for i in range(subscribers):
+        subscription = bus.subscribe(agent_id=agent_id)
+        slow = bool(slow_every) and i % slow_every == 0
+        t = threading.Thread(
+            target=client, args=(bus, subscription, stop, slow, counters, i), daemon=True
+        )
+        t.start()
+        threads.append(t)
+
+    tracemalloc.start()
+    interval = 1.0 / rate
+    samples = []
+    published = 0
+    for window in range(windows):
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        while time.perf_counter() - wall_start < window_seconds:
+            web_interface.update_agent_status(
+                agent_id, objective=f"tick {published}", results={"n": published}
+            )
+            web_interface.log_qube_processing(
+                token_id=f"token_{published}", data={"status": "Processed"}
+            )
+            published += 1
+            time.sleep(interval)
+        # Keep dashboard history out of the measurement; only bus state matters
+        web_interface.store.compact(max_entries=0)
+
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        heap, _ = tracemalloc.get_traced_memory()
+        stats = bus.stats()
+        samples.append((cpu / wall * 100, heap / 1024))
+        print(
+            f"window {window + 1}: cpu {cpu / wall * 100:6.1f}%  heap {heap / 1024:8.1f} KiB  "
+            f"queued {stats['queued']:6d}  dropped {stats['dropped']:8d}  "
+            f"delivered {sum(counters):9d}"
+        )
+
+    stop.set()
+    for subscription in list(bus._subscribers):
+        subscription.close()
+    for t in threads:
+        t.join(timeout=2)
+    tracemalloc.stop()
+
+    # Compare the second half against the first, skipping the warm-up window
+    steady = samples[1:] or samples
+    half = max(len(steady) // 2, 1)
+    first_heap = max(h for _, h in steady[:half])
+    last_heap = max(h for _, h in steady[half:]) if steady[half:] else first_heap
+    first_cpu = sum(c for c, _ in steady[:half]) / half
+    last_cpu = sum(c for c, _ in steady[half:]) / max(len(steady[half:]), 1)
+    print(f"\nsubscribers: {subscribers}  events published: {bus.published}")
+    print(f"heap growth: {last_heap - first_heap:+.1f} KiB  cpu drift: {last_cpu - first_cpu:+.1f}%")
+    flat = last_heap <= first_heap * 1.25 + 64 and last_cpu <= first_cpu * 1.5 + 5
+    print("Status:", "✅ FLAT" if flat else "❌ GROWING")
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=300)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--rate", type=int, default=100, help="updates per second")
+    parser.add_argument("--windows", type=int, default=6)
+    parser.add_argument("--window-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    ok = run(args.subscribers, args.slow_ratio, args.rate, args.windows, args.window_seconds)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+HTTP load generator for the QubeAgent web app.
+
+Drives a running server with concurrent clients that cycle through the
+JSON routes, then reports requests/sec and latency percentiles per route.
+Works against both the Flask dev server and the ASGI serving mode:
+
+    python app.py                                   # Flask on :5000
+    uvicorn asgi_app:application --port 8000        # ASGI on :8000
+
+    python tests/benchmarks/http_load.py --url http://127.0.0.1:8000 --concurrency 64
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+import aiohttp
+
+ROUTES = [
+    ("GET", "/retrieve_tokeqube/{token}", None),
+    ("POST", "/share_iqube", lambda token: {"tokenQubeId": token, "iQubeType": "DataQube"}),
+    ("POST", "/connect_wallet", lambda token: {"address": "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"}),
+    ("GET", "/api/dashboard", None),
+]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+async def client(session, base_url, deadline, tokens, index, latencies, errors, routes):
+    i = index
+    while time.perf_counter() < deadline:
+        method, path, body = routes[i % len(routes)]
+        token = f"token-{i % tokens}"
+        url = base_url + path.format(token=token)
+        start = time.perf_counter()
+        try:
+            async with session.request(method, url, json=body(token) if body else None) as resp:
+                await resp.read()
+                if resp.status >= 400:
+                    errors[path] += 1
+        except aiohttp.ClientError:
+            errors[path] += 1
+        latencies[path].append((time.perf_counter() - start) * 1000)
+        i += 1
+
+
+async def run(base_url, concurrency, duration, tokens, routes):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client(session, base_url, deadline, tokens, i, latencies, errors, routes)
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(v) for v in latencies.values())
+    everything = [x for v in latencies.values() for x in v]
+    print(f"{base_url}  concurrency {concurrency}  duration {elapsed:.1f}s")
+    print(f"{'route':32s} {'reqs':>7s} {'err':>5s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for _, path, _ in routes:
+        samples = latencies[path]
+        if not samples:
+            continue
+        print(
+            f"{path:32s} {len(samples):7d} {errors[path]:5d} "
+            f"{percentile(samples, 0.50):8.2f} {percentile(samples, 0.95):8.2f} "
+            f"{percentile(samples, 0.99):8.2f} {max(samples):8.2f}"
+        )
+    print(
+        f"\nrequests/sec: {total / elapsed:,.0f}  "
+        f"p50 {percentile(everything, 0.50):.2f} ms  p99 {percentile(everything, 0.99):.2f} ms  "
+        f"errors {sum(errors.values())}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--tokens", type=int, default=16, help="distinct tokenQubeIds")
+    parser.add_argument(
+        "--skip-dashboard", action="store_true",
+        help="leave out /api/dashboard (it is served by web_dashboard.py in Flask mode)"
+    )
+    args = parser.parse_args()
+    routes = [r for r in ROUTES if not (args.skip_dashboard and r[1] == "/api/dashboard")]
+    asyncio.run(run(args.url.rstrip("/"), args.concurrency, args.duration, args.tokens, routes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Initial sync and query benchmark for the iQube log indexer.
+
+Mints and transfers N qubes on an eth-tester chain served over HTTP, with
+the node capping eth_getLogs results like a hosted provider, then runs a
+full sync, an incremental sync, and per-token history lookups answered
+from the SQLite index versus filtered eth_getLogs scans of the chain.
+
+    PYTHONPATH=. python tests/benchmarks/log_indexer_sync.py --qubes 100
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from web3 import Web3
+
+from tests.fixtures.eth_rpc_stub import EthRPCStubServer
+from wallets.log_indexer import LogIndexer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--qubes", type=int, default=100)
+    parser.add_argument("--max-logs", type=int, default=50, help="eth_getLogs result cap on the node")
+    parser.add_argument("--lookups", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with EthRPCStubServer() as chain, tempfile.TemporaryDirectory() as tmp:
+        address = chain.deploy("iQubeNFT")
+        contract = chain.contract("iQubeNFT", address)
+        minter, alice, bob = chain.web3.eth.accounts[:3]
+        for i in range(args.qubes):
+            contract.functions.mintQube(alice, f"ipfs://qube-{i}").transact({"from": minter})
+        for token_id in range(1, args.qubes + 1, 2):
+            contract.functions.transferQube(bob, token_id).transact({"from": alice})
+        chain.max_logs = args.max_logs
+
+        w3 = Web3(Web3.HTTPProvider(chain.url))
+        indexer = LogIndexer(w3, os.path.join(tmp, "logs.db"), [address], confirmations=0)
+        round_trips = chain.round_trips
+        start = time.perf_counter()
+        summary = indexer.sync()
+        elapsed = time.perf_counter() - start
+        print(
+            f"initial sync      {elapsed * 1000:9.1f} ms  {summary['blocks']:6d} blocks  {summary['logs']:6d} logs  "
+            f"{summary['queries']:4d} queries  {chain.round_trips - round_trips:4d} round trips  "
+            f"final range {indexer.range}"
+        )
+
+        contract.functions.mintQube(bob, "ipfs://late").transact({"from": minter})
+        round_trips = chain.round_trips
+        start = time.perf_counter()
+        summary = indexer.sync()
+        elapsed = time.perf_counter() - start
+        print(
+            f"incremental sync  {elapsed * 1000:9.1f} ms  {summary['blocks']:6d} blocks  {summary['logs']:6d} logs  "
+            f"{summary['queries']:4d} queries  {chain.round_trips - round_trips:4d} round trips"
+        )
+
+        token_ids = [1 + (i * 7919) % args.qubes for i in range(args.lookups)]
+        start = time.perf_counter()
+        for token_id in token_ids:
+            indexer.logs_by_token(token_id)
+        indexed = time.perf_counter() - start
+
+        round_trips = chain.round_trips
+        start = time.perf_counter()
+        for token_id in token_ids:
+            w3.eth.get_logs({
+                "fromBlock": 0, "toBlock": "latest", "address": address,
+                "topics": [None, Web3.to_hex(token_id.to_bytes(32, "big"))],
+            })
+        scanned = time.perf_counter() - start
+        print(f"token history, index    {indexed / args.lookups * 1000:8.3f} ms/lookup")
+        print(
+            f"token history, getLogs  {scanned / args.lookups * 1000:8.3f} ms/lookup  "
+            f"{chain.round_trips - round_trips} round trips"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput benchmark for QubeHandler.decrypt_many.
+
+Seeds a local IPFS stand-in with encrypted BlakQube payloads, adds a fixed
+per-request latency to mimic a remote daemon, then decrypts the whole set
+serially with decrypt() and in batches with decrypt_many() at several
+concurrency levels. The block cache is disabled so every token really
+reaches the stand-in.
+
+Run from the repository root:
+
+    PYTHONPATH=. python tests/benchmarks/qube_handler_decrypt_many.py --tokens 256 --delay 0.005
+"""
+import argparse
+import json
+import logging
+import time
+
+from qube_agent.models.iqube_security import BlakQubeSecurityManager
+from qube_integrations.qube_handler import QubeHandler
+from tests.fixtures.ipfs_stub import IPFSStubServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=256)
+    parser.add_argument("--delay", type=float, default=0.005, help="stand-in latency per request (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with IPFSStubServer(delay=args.delay) as ipfs:
+        handler = QubeHandler(ipfs_host=ipfs.host, ipfs_port=ipfs.port)
+        token_ids = []
+        for i in range(args.tokens):
+            payload = BlakQubeSecurityManager.encrypt_data({"token": i, "email": f"user{i}@example.com"})
+            handler.register_token(f"token-{i}", ipfs.put(json.dumps(payload).encode()))
+            token_ids.append(f"token-{i}")
+
+        start = time.perf_counter()
+        for token_id in token_ids:
+            handler.decrypt(token_id)
+        serial = time.perf_counter() - start
+        print(f"{'serial decrypt()':24s} {args.tokens / serial:9.1f} tokens/s")
+
+        for workers in args.concurrency:
+            start = time.perf_counter()
+            results = handler.decrypt_many(token_ids, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            errors = sum(1 for r in results if "error" in r)
+            print(
+                f"{f'decrypt_many x{workers}':24s} {args.tokens / elapsed:9.1f} tokens/s  "
+                f"speedup {serial / elapsed:5.1f}x  errors {errors}"
+            )
+
+        stats = handler.ipfs_pool.stats()
+        print(
+            f"\n{stats['requests']} IPFS requests over {stats['connections_opened']} pooled connections "
+            f"({len(ipfs.connections)} seen by the stand-in)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Latency benchmark for the /share_iqube route.
+
+Replays share requests for a small set of hot tokenQubeIds through the
+Flask test client, first with the decryption cache disabled (every request
+rebuilds and decrypts the BlakQube, as before memoisation) and then with it
+enabled. Reports p50/p99 latency for both runs.
+
+Run from the repository root:
+
+    PYTHONPATH=. python tests/benchmarks/share_iqube_load.py --requests 5000
+"""
+import argparse
+import logging
+import statistics
+import time
+
+import app as qube_app
+from qube_agent.utils.decryption import DecryptionService
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def measure(client, requests: int, tokens: int):
+    latencies = []
+    for i in range(requests):
+        payload = {"tokenQubeId": f"token-{i % tokens}", "iQubeType": "DataQube"}
+        start = time.perf_counter()
+        response = client.post("/share_iqube", json=payload)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        assert response.status_code == 200, response.get_json()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--tokens", type=int, default=16, help="distinct tokenQubeIds")
+    args = parser.parse_args()
+
+    # Context logging would dominate both runs; measure the route itself
+    logging.disable(logging.INFO)
+    client = qube_app.app.test_client()
+
+    results = {}
+    for label, maxsize in (("before (no cache)", 0), ("after (LRU cache)", 1024)):
+        qube_app.decryption_service = DecryptionService(maxsize=maxsize)
+        measure(client, min(200, args.requests), args.tokens)  # warm-up
+        latencies = measure(client, args.requests, args.tokens)
+        results[label] = latencies
+        print(
+            f"{label:18s}  p50 {percentile(latencies, 0.50):8.1f} µs  "
+            f"p99 {percentile(latencies, 0.99):8.1f} µs  "
+            f"mean {statistics.mean(latencies):8.1f} µs  "
+            f"hit rate {qube_app.decryption_service.stats()['hit_rate']:.2%}"
+        )
+
+    before, after = results.values()
+    print(f"\np50 speedup: {percentile(before, 0.5) / percentile(after, 0.5):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
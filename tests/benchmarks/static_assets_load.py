@@ -0,0 +1,115 @@
+"""
+Page-load benchmark for the Flask app's static asset pipeline.
+
+Replays first and repeat visits to / (the page, the vendored ethers.js and
+the favicon) against the previous serving code, which rendered index.html
+on every request and served /static through send_from_directory, and
+against the current app. Reports bytes on the wire and server CPU time per
+request for each visit type.
+
+    PYTHONPATH=. python tests/benchmarks/static_assets_load.py --visits 200
+"""
+import argparse
+import gzip
+import logging
+import os
+import re
+import time
+
+from flask import Flask, render_template, send_from_directory
+
+import app as qube_app
+
+ACCEPT = {"Accept-Encoding": "gzip, deflate, br"}
+
+
+def baseline_app() -> Flask:
+    root = qube_app.app.root_path
+    baseline = Flask("baseline", root_path=root, static_folder=None)
+    baseline.jinja_env.globals["asset_url"] = lambda name: f"/static/{name}"
+
+    @baseline.route("/")
+    def index():
+        return render_template("index.html")
+
+    @baseline.route("/static/<path:path>")
+    def send_static(path):
+        return send_from_directory(os.path.join(root, "static"), path)
+
+    return baseline
+
+
+class Browser:
+    """HTTP cache model: honours immutable and revalidates with ETag or Last-Modified."""
+
+    def __init__(self, client):
+        self.client = client
+        self.cache = {}
+        self.requests = 0
+        self.bytes = 0
+        self.cpu = 0.0
+
+    def get(self, url):
+        cached = self.cache.get(url)
+        if cached and "immutable" in cached.get("Cache-Control", ""):
+            return cached["body"]
+        headers = dict(ACCEPT)
+        if cached and cached.get("ETag"):
+            headers["If-None-Match"] = cached["ETag"]
+        if cached and cached.get("Last-Modified"):
+            headers["If-Modified-Since"] = cached["Last-Modified"]
+        start = time.process_time()
+        response = self.client.get(url, headers=headers)
+        self.cpu += time.process_time() - start
+        self.requests += 1
+        self.bytes += len(response.data)
+        if response.status_code == 304:
+            return cached["body"]
+        body = response.data
+        if response.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self.cache[url] = {
+            "body": body,
+            "ETag": response.headers.get("ETag"),
+            "Last-Modified": response.headers.get("Last-Modified"),
+            "Cache-Control": response.headers.get("Cache-Control", ""),
+        }
+        return body
+
+    def visit(self):
+        html = self.get("/")
+        for url in re.findall(rb'(?:src|href)="(/static/[^"]+)"', html):
+            self.get(url.decode())
+
+
+def run(label, app, visits):
+    client = app.test_client()
+    first = Browser(client)
+    first.visit()
+    print(f"{label:9s} first visit   {first.requests:3d} requests  {first.bytes / 1024:8.1f} KiB  "
+          f"{first.cpu / first.requests * 1000:7.3f} ms CPU/request")
+
+    repeat = Browser(client)
+    repeat.visit()
+    repeat.requests, repeat.bytes, repeat.cpu = 0, 0, 0.0
+    for _ in range(visits):
+        repeat.visit()
+    per_request = repeat.cpu / repeat.requests * 1000 if repeat.requests else 0.0
+    print(f"{label:9s} repeat visit  {repeat.requests / visits:5.1f} requests  "
+          f"{repeat.bytes / visits / 1024:8.1f} KiB  {per_request:7.3f} ms CPU/request  "
+          f"{repeat.cpu / visits * 1000:7.3f} ms CPU/visit")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--visits", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(f"static assets: {qube_app.static_assets.stats()}")
+    run("baseline", baseline_app(), args.visits)
+    run("pipeline", qube_app.app, args.visits)
+
+
+if __name__ == "__main__":
+    main()
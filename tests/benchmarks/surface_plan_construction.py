@@ -0,0 +1,80 @@
+"""
+SurfacePlanV0 construction benchmark: full validation vs trusted construction.
+
+Builds plans of each --sizes module count with the skeleton cache warm, so
+the time is almost all model construction, once with validate=True (every
+Placement, ModuleRef, PlacementInteraction and the plan validated by
+Pydantic) and once with the default model_construct path.
+
+    PYTHONPATH=. python tests/benchmarks/surface_plan_construction.py --sizes 5 50 500
+"""
+import argparse
+import itertools
+import json
+import time
+from pathlib import Path
+
+from services.metame_runtime.models import ContentModuleRenderProfileV0
+from services.metame_runtime.models.surface_plan import DeviceContext, Intent, Ref, VerificationRefs
+from services.metame_runtime.plan_cache import PlanTemplateCache
+from services.metame_runtime.surface_selector import build_surface_plan_v0
+
+PROFILES_PATH = Path(__file__).resolve().parents[2] / "configs" / "qriptopian" / "module_render_profiles.v0.json"
+
+VERIFICATION = VerificationRefs(
+    dis_ref=Ref(kind="doc_ref", id="dis:qriptopian:v0"),
+    constraint_manifest_ref=Ref(kind="doc_ref", id="constraints:qriptopian:v0"),
+    parity_report_ref=Ref(kind="doc_ref", id="parity:pending"),
+)
+
+DEVICE = DeviceContext(device_class="mobile", orientation="portrait", interaction="touch", real_estate="s")
+INTENT = Intent(user_ask="bench", mode="make")
+
+
+def load_modules(count):
+    raw = json.loads(PROFILES_PATH.read_text())
+    profiles = [ContentModuleRenderProfileV0.model_validate(p) for p in raw]
+    return [
+        {"module_id": f"mod_{i}", "module_type": f"{p.module_type}#{i}", "render_profile": p}
+        for i, p in enumerate(itertools.islice(itertools.cycle(profiles), count))
+    ]
+
+
+def ms_per_plan(modules, cache, validate, seconds):
+    kwargs = dict(
+        plan_id="plan_bench",
+        session_id="sess_bench",
+        cartridge="Qriptopian",
+        intent=INTENT,
+        device_context=DEVICE,
+        modules=modules,
+        verification=VERIFICATION,
+        plan_cache=cache,
+        validate=validate,
+    )
+    build_surface_plan_v0(**kwargs)
+    plans = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        build_surface_plan_v0(**kwargs)
+        plans += 1
+    return (time.perf_counter() - start) / plans * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    cache = PlanTemplateCache()
+    print(f"{'modules':>8s} {'validated':>12s} {'trusted':>12s} {'speedup':>8s}")
+    for size in args.sizes:
+        modules = load_modules(size)
+        validated = ms_per_plan(modules, cache, True, args.seconds)
+        trusted = ms_per_plan(modules, cache, False, args.seconds)
+        print(f"{size:8d} {validated:9.3f} ms {trusted:9.3f} ms {validated / trusted:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
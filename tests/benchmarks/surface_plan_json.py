@@ -0,0 +1,83 @@
+"""
+SurfacePlanV0 JSON emission benchmark: bytes and microseconds per plan.
+
+Serialises one plan of each --sizes module count with model_dump followed
+by json.dumps, with model_dump_json, and with plan_serializer (full,
+compact and streamed), reporting output size and time per plan.
+
+    PYTHONPATH=. python tests/benchmarks/surface_plan_json.py --sizes 5 50 500
+"""
+import argparse
+import itertools
+import json
+import time
+from pathlib import Path
+
+from services.metame_runtime.models import ContentModuleRenderProfileV0
+from services.metame_runtime.models.surface_plan import DeviceContext, Intent, Ref, VerificationRefs
+from services.metame_runtime.plan_serializer import dumps_plan, iter_plan_json
+from services.metame_runtime.surface_selector import build_surface_plan_v0
+
+PROFILES_PATH = Path(__file__).resolve().parents[2] / "configs" / "qriptopian" / "module_render_profiles.v0.json"
+
+VERIFICATION = VerificationRefs(
+    dis_ref=Ref(kind="doc_ref", id="dis:qriptopian:v0"),
+    constraint_manifest_ref=Ref(kind="doc_ref", id="constraints:qriptopian:v0"),
+    parity_report_ref=Ref(kind="doc_ref", id="parity:pending"),
+)
+
+
+def make_plan(count):
+    raw = json.loads(PROFILES_PATH.read_text())
+    profiles = [ContentModuleRenderProfileV0.model_validate(p) for p in raw]
+    modules = [
+        {"module_id": f"mod_{i}", "module_type": f"{p.module_type}#{i}", "render_profile": p}
+        for i, p in enumerate(itertools.islice(itertools.cycle(profiles), count))
+    ]
+    return build_surface_plan_v0(
+        plan_id="plan_bench",
+        session_id="sess_bench",
+        cartridge="Qriptopian",
+        intent=Intent(user_ask="bench", mode="make"),
+        device_context=DeviceContext(device_class="mobile", orientation="portrait", interaction="touch", real_estate="s"),
+        modules=modules,
+        verification=VERIFICATION,
+    )
+
+
+def per_plan_us(fn, seconds):
+    fn()
+    best = float("inf")
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        for _ in range(10):
+            fn()
+        best = min(best, (time.perf_counter() - start) / 10)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        plan = make_plan(size)
+        assert dumps_plan(plan) == plan.model_dump_json().encode()
+        print(f"{size} modules")
+        for label, fn in (
+            ("model_dump + json.dumps",
+             lambda: json.dumps(plan.model_dump(mode="json"), separators=(",", ":"), ensure_ascii=False).encode()),
+            ("model_dump_json", lambda: plan.model_dump_json().encode()),
+            ("dumps_plan", lambda: dumps_plan(plan)),
+            ("dumps_plan compact", lambda: dumps_plan(plan, compact=True)),
+            ("iter_plan_json", lambda: b"".join(iter_plan_json(plan))),
+        ):
+            size_bytes = len(fn())
+            print(f"  {label:24s} {size_bytes:9d} bytes  {per_plan_us(fn, args.seconds):10.1f} us/plan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Surface planning benchmark suite: plans/s, p99 latency and allocations per module count.
+
+For each --sizes module count, draws --profiles random valid render
+profiles and --contexts random device contexts and intents (seeded), then
+times build_surface_plan_v0 one plan at a time, with the plan cache
+(skeletons reused across requests), without it (every plan built from
+scratch), and with the plan cache but a freshly validated copy of every
+render profile per plan, as a caller validating profiles per request
+would pass (--fresh-copies copies are validated up front and cycled, so
+validation itself is not timed). Reports plans/s with p50 and p99 latency from the best of
+--rounds rounds, traced bytes allocated per plan and memory blocks
+retained per plan. --no-reasoning-tags and --trace measure planning
+without placement reasoning tags and with a PlanTracer installed.
+
+With --baseline, compares against a previous --save run and exits with
+status 1 if plans/s dropped, or p99 latency or allocations grew, by more
+than --tolerance. Baselines are only comparable on the same machine.
+
+    PYTHONPATH=. python tests/benchmarks/surface_plan_suite.py --save /tmp/plans.json
+    PYTHONPATH=. python tests/benchmarks/surface_plan_suite.py --baseline /tmp/plans.json
+"""
+import argparse
+import gc
+import itertools
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from services.metame_runtime.models.surface_plan import Ref, VerificationRefs
+from services.metame_runtime.plan_cache import PlanTemplateCache
+from services.metame_runtime.plan_tracing import PlanTracer, set_tracer
+from services.metame_runtime.surface_selector import build_surface_plan_v0
+from tests.fixtures.surface_plan_generators import random_context, random_modules, random_profiles
+
+VERIFICATION = VerificationRefs(
+    dis_ref=Ref(kind="doc_ref", id="dis:qriptopian:v0"),
+    constraint_manifest_ref=Ref(kind="doc_ref", id="constraints:qriptopian:v0"),
+    parity_report_ref=Ref(kind="doc_ref", id="parity:pending"),
+)
+
+# Metric name -> True if larger is better
+METRICS = {"plans_per_s": True, "p99_us": False, "bytes_per_plan": False, "blocks_per_plan": False}
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def fresh_copies(modules, copies):
+    """Module lists whose render profiles are new, equal objects."""
+    return [
+        [dict(m, render_profile=type(m["render_profile"]).model_validate(m["render_profile"].model_dump())) for m in modules]
+        for _ in range(copies)
+    ]
+
+
+def planner(module_sets, contexts, cache, reasoning_tags):
+    requests = itertools.cycle(enumerate(contexts))
+    module_sets = itertools.cycle(module_sets)
+
+    def plan():
+        i, (device, intent) = next(requests)
+        modules = next(module_sets)
+        return build_surface_plan_v0(
+            plan_id=f"plan_{i}",
+            session_id=f"sess_{i}",
+            cartridge="Qriptopian",
+            intent=intent,
+            device_context=device,
+            modules=modules,
+            verification=VERIFICATION,
+            plan_cache=cache,
+            reasoning_tags=reasoning_tags,
+        )
+
+    return plan
+
+
+def timed_round(plan, seconds):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline or len(latencies) < 100:
+        t0 = time.perf_counter()
+        plan()
+        latencies.append((time.perf_counter() - t0) * 1e6)
+    return len(latencies) / (time.perf_counter() - start), latencies
+
+
+def measure(plan, count, seconds, rounds):
+    for _ in range(count):
+        plan()
+
+    # Best of several rounds, so a burst of machine noise does not read as a regression
+    plans_per_s, latencies = max((timed_round(plan, seconds / rounds) for _ in range(rounds)), key=lambda r: r[0])
+
+    # Allocation figures come from a separate pass: tracemalloc slows every allocation down
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    retained = [plan() for _ in range(count)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks
+    del retained
+
+    return {
+        "plans_per_s": plans_per_s,
+        "p50_us": percentile(latencies, 0.50),
+        "p99_us": percentile(latencies, 0.99),
+        "bytes_per_plan": peak / count,
+        "blocks_per_plan": blocks / count,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    failures = []
+    for key, metrics in results.items():
+        for name, higher_is_better in METRICS.items():
+            before = baseline.get(key, {}).get(name)
+            if not before:
+                continue
+            change = metrics[name] / before - 1
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                failures.append(f"{key} {name}: {before:.1f} -> {metrics[name]:.1f} ({change:+.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--profiles", type=int, default=64, help="distinct random profiles")
+    parser.add_argument("--contexts", type=int, default=200, help="distinct device contexts and intents")
+    parser.add_argument("--seconds", type=float, default=2.0, help="timing budget per size and path")
+    parser.add_argument("--rounds", type=int, default=5, help="timing rounds per size and path; the best is kept")
+    parser.add_argument("--fresh-copies", type=int, default=16, help="validated profile copies for the fresh path")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, help="results of an earlier --save run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--save", type=Path, help="write results here as JSON")
+    parser.add_argument("--no-reasoning-tags", action="store_true", help="plan with reasoning_tags=False")
+    parser.add_argument("--trace", action="store_true", help="install a PlanTracer")
+    args = parser.parse_args()
+
+    if args.trace:
+        set_tracer(PlanTracer())
+
+    rng = random.Random(args.seed)
+    profiles = random_profiles(rng, args.profiles)
+    contexts = [random_context(rng) for _ in range(args.contexts)]
+
+    results = {}
+    print(f"{'path':10s} {'modules':>7s} {'plans/s':>10s} {'p50 us':>10s} {'p99 us':>10s} {'KiB/plan':>9s} {'blocks/plan':>11s}")
+    for size in args.sizes:
+        modules = random_modules(rng, profiles, size)
+        paths = (
+            ("cached", [modules], PlanTemplateCache(maxsize=args.contexts)),
+            ("uncached", [modules], None),
+            ("fresh", fresh_copies(modules, args.fresh_copies), PlanTemplateCache(maxsize=args.contexts)),
+        )
+        for label, module_sets, cache in paths:
+            metrics = measure(
+                planner(module_sets, contexts, cache, not args.no_reasoning_tags), args.contexts, args.seconds, args.rounds
+            )
+            results[f"{label}/{size}"] = metrics
+            print(
+                f"{label:10s} {size:7d} {metrics['plans_per_s']:10.1f} {metrics['p50_us']:10.1f} "
+                f"{metrics['p99_us']:10.1f} {metrics['bytes_per_plan'] / 1024:9.1f} {metrics['blocks_per_plan']:11.1f}"
+            )
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        failures = regressions(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Plans-per-second micro-benchmark for the metaMe surface selector.
+
+Plans the Qriptopian module profiles (repeated to --modules modules) for
+every device class, orientation, real estate and intent mode, and reports
+throughput for three paths: the placement decisions alone (compiled
+profiles, integer-coded surfaces and densities), full SurfacePlanV0
+construction without the skeleton cache, and full construction with it.
+
+    PYTHONPATH=. python tests/benchmarks/surface_plan_throughput.py --modules 50 --seconds 2
+"""
+import argparse
+import itertools
+import json
+import time
+from pathlib import Path
+
+from services.metame_runtime.models import ContentModuleRenderProfileV0
+from services.metame_runtime.models.surface_plan import DeviceContext, Intent, Ref, VerificationRefs
+from services.metame_runtime.plan_cache import PlanTemplateCache
+from services.metame_runtime.profile_compiler import compile_profile
+from services.metame_runtime.surface_selector import _placement_templates, build_surface_plan_v0
+
+PROFILES_PATH = Path(__file__).resolve().parents[2] / "configs" / "qriptopian" / "module_render_profiles.v0.json"
+
+VERIFICATION = VerificationRefs(
+    dis_ref=Ref(kind="doc_ref", id="dis:qriptopian:v0"),
+    constraint_manifest_ref=Ref(kind="doc_ref", id="constraints:qriptopian:v0"),
+    parity_report_ref=Ref(kind="doc_ref", id="parity:pending"),
+)
+
+CONTEXTS = list(itertools.product(
+    ("mobile", "tablet", "desktop", "large_screen"),
+    ("portrait", "landscape", "any"),
+    ("xs", "s", "m", "l", "xl"),
+    ("be", "make", "play", "earn", "share"),
+))
+
+
+def load_modules(count):
+    raw = json.loads(PROFILES_PATH.read_text())
+    profiles = [ContentModuleRenderProfileV0.model_validate(p) for p in raw]
+    return [
+        {"module_id": f"mod_{i}", "module_type": f"{p.module_type}#{i}", "render_profile": p}
+        for i, p in enumerate(itertools.islice(itertools.cycle(profiles), count))
+    ]
+
+
+def throughput(plan_one, seconds):
+    plans = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for context in CONTEXTS:
+            plan_one(context)
+        plans += len(CONTEXTS)
+    return plans / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    modules = load_modules(args.modules)
+    compiled = [compile_profile(m["render_profile"]) for m in modules]
+    cache = PlanTemplateCache(maxsize=len(CONTEXTS))
+
+    def decide(context):
+        device_class, orientation, real_estate, mode = context
+        _placement_templates(compiled, device_class, orientation, real_estate, mode)
+
+    def full(plan_cache):
+        def plan_one(context):
+            device_class, orientation, real_estate, mode = context
+            build_surface_plan_v0(
+                plan_id="plan_bench",
+                session_id="sess_bench",
+                cartridge="Qriptopian",
+                intent=Intent(user_ask="bench", mode=mode),
+                device_context=DeviceContext(
+                    device_class=device_class, orientation=orientation, interaction="touch", real_estate=real_estate,
+                ),
+                modules=modules,
+                verification=VERIFICATION,
+                plan_cache=plan_cache,
+            )
+        return plan_one
+
+    print(f"{args.modules} modules, {len(CONTEXTS)} contexts")
+    for label, plan_one in (
+        ("decisions only", decide),
+        ("full, uncached", full(None)),
+        ("full, cached", full(cache)),
+    ):
+        rate = throughput(plan_one, args.seconds)
+        print(f"{label:15s} {rate:10.1f} plans/s  {1000 / rate:8.3f} ms/plan  "
+              f"{rate * args.modules:12.0f} placements/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+N-address balance sweep benchmark for WalletManager reads.
+
+Deploys an ERC-20 and a Multicall3-compatible aggregator on an eth-tester
+chain served over HTTP, then reads token balances for N holders three ways:
+one balanceOf() call per holder, a JSON-RPC batch of eth_calls, and
+Multicall3 aggregation. A repeat sweep shows the per-block cache.
+
+    PYTHONPATH=. python tests/benchmarks/wallet_balance_sweep.py --addresses 500
+"""
+import argparse
+import json
+import logging
+import time
+
+from eth_account import Account
+from web3 import Web3
+
+from tests.fixtures.eth_rpc_stub import ARTIFACTS, EthRPCStubServer
+from wallets.reads import BatchReader
+
+
+def measure(label, chain, fn, count):
+    round_trips = chain.round_trips
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:26s} {elapsed * 1000:9.1f} ms  {count / elapsed:9.0f} balances/s  "
+        f"{chain.round_trips - round_trips:5d} round trips"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--addresses", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with EthRPCStubServer() as chain:
+        token = chain.deploy("ERC20", "Qube", "QB")
+        multicall = chain.deploy("Multicall3")
+        holders = [Account.create().address for _ in range(args.addresses)]
+        w3 = Web3(Web3.HTTPProvider(chain.url))
+        with open(ARTIFACTS) as f:
+            contract = w3.eth.contract(address=token, abi=json.load(f)["ERC20"]["abi"])
+
+        measure("balanceOf per holder", chain,
+                lambda: [contract.functions.balanceOf(h).call() for h in holders], args.addresses)
+
+        batched = BatchReader(w3, multicall_address=None)
+        batched.block_number()
+        measure("JSON-RPC batch", chain, lambda: batched.erc20_balances(token, holders), args.addresses)
+
+        aggregated = BatchReader(w3, multicall_address=multicall)
+        aggregated.block_number()
+        aggregated.has_multicall
+        measure("Multicall3", chain, lambda: aggregated.erc20_balances(token, holders), args.addresses)
+        measure("Multicall3, cached block", chain,
+                lambda: aggregated.erc20_balances(token, holders), args.addresses)
+
+
+if __name__ == "__main__":
+    main()
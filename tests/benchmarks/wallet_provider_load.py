@@ -0,0 +1,64 @@
+"""
+Connection reuse benchmark for the wallet JSON-RPC provider.
+
+Issues eth_getBalance calls against an eth-tester chain served over HTTP
+from short-lived threads (one per call, as under a threaded web server),
+with the stock HTTPProvider and with PooledHTTPProvider, and reports
+calls/sec, TCP connections opened and latency percentiles.
+
+    PYTHONPATH=. python tests/benchmarks/wallet_provider_load.py --calls 400 --concurrency 8
+"""
+import argparse
+import logging
+import threading
+import time
+
+from web3 import Web3
+
+from tests.fixtures.eth_rpc_stub import EthRPCStubServer
+from wallets.provider import LatencyHistogram, PooledHTTPProvider
+
+
+def run(label, chain, provider, calls, concurrency):
+    w3 = Web3(provider)
+    account = chain.web3.eth.accounts[0]
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+
+    def call():
+        start = time.perf_counter()
+        w3.eth.get_balance(account)
+        with lock:
+            histogram.observe((time.perf_counter() - start) * 1000)
+
+    before = len(chain.connections)
+    start = time.perf_counter()
+    for _ in range(calls // concurrency):
+        threads = [threading.Thread(target=call) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:22s} {histogram.count / elapsed:8.0f} calls/s  "
+        f"{len(chain.connections) - before:5d} connections  "
+        f"p50 <={histogram.percentile(0.5):5.0f} ms  p95 <={histogram.percentile(0.95):5.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with EthRPCStubServer() as chain:
+        run("HTTPProvider", chain, Web3.HTTPProvider(chain.url), args.calls, args.concurrency)
+        run("PooledHTTPProvider", chain, PooledHTTPProvider(chain.url, pool_size=args.concurrency),
+            args.calls, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Signing throughput benchmark for WalletManager signers.
+
+Signs N unsigned transfers inline on one thread, then through SigningPool
+with an increasing number of worker processes. Pool start-up is excluded;
+each pool is warmed with one batch before it is timed.
+
+    PYTHONPATH=. python tests/benchmarks/wallet_signing_throughput.py --transactions 1000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+from eth_account import Account
+from eth_keys.backends import get_backend
+
+from wallets.signing import LocalSigner, SigningPool
+
+RECIPIENT = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+
+
+def measure(label, signer, transactions):
+    start = time.perf_counter()
+    signer.sign_many(transactions)
+    elapsed = time.perf_counter() - start
+    print(f"{label:18s} {elapsed * 1000:9.1f} ms  {len(transactions) / elapsed:9.0f} signatures/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    key = Account.create().key
+    transactions = [
+        {'to': RECIPIENT, 'value': 10 ** 12, 'gas': 21000, 'gasPrice': 10 ** 9, 'nonce': i, 'chainId': 1}
+        for i in range(args.transactions)
+    ]
+    print(f"{os.cpu_count()} CPUs, eth_keys backend {type(get_backend()).__name__}")
+    measure("inline", LocalSigner(Account.from_key(key)), transactions)
+    for workers in sorted(set(args.workers)):
+        with SigningPool(key, max_workers=workers) as pool:
+            pool.sign_many(transactions[:workers * 8])
+            measure(f"pool, {workers} workers", pool, transactions)
+
+
+if __name__ == "__main__":
+    main()
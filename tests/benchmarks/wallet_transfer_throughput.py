@@ -0,0 +1,66 @@
+"""
+Transfer throughput benchmark for WalletManager.
+
+Runs against an eth-tester dev chain served over HTTP and compares
+individual transfer_assets() calls (serial and from a thread pool) with a
+single transfer_many() batch, reporting transfers/sec and the JSON-RPC
+round trips each approach needed.
+
+    PYTHONPATH=. python tests/benchmarks/wallet_transfer_throughput.py --transfers 200
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_account import Account
+
+from tests.fixtures.eth_rpc_stub import EthRPCStubServer
+from wallets.wallet_manager import WalletManager
+
+RECIPIENT = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+
+
+def measure(label, chain, fn, transfers):
+    round_trips = chain.round_trips
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:28s} {transfers / elapsed:9.1f} transfers/s  "
+        f"{chain.round_trips - round_trips:5d} round trips"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transfers", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with EthRPCStubServer() as chain:
+        def wallet():
+            account = Account.create()
+            chain.fund(account.address, ether=1000)
+            return WalletManager(chain.url, account=account)
+
+        serial = wallet()
+        measure("transfer_assets serial", chain,
+                lambda: [serial.transfer_assets(RECIPIENT, 0.001) for _ in range(args.transfers)],
+                args.transfers)
+
+        threaded = wallet()
+        def threaded_run():
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                list(pool.map(lambda _: threaded.transfer_assets(RECIPIENT, 0.001), range(args.transfers)))
+        measure(f"transfer_assets x{args.workers} threads", chain, threaded_run, args.transfers)
+
+        batched = wallet()
+        measure("transfer_many", chain,
+                lambda: batched.transfer_many([{"to": RECIPIENT, "amount": 0.001}] * args.transfers),
+                args.transfers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Concurrency stress test for WebInterfaceManager.
+
+Writer threads append status updates and qube logs while reader threads
+snapshot dashboards as fast as they can. Every snapshot is checked for a
+gap-free, in-order history, and final counts are checked against the
+number of writes. Reports write and read throughput.
+
+Run from the repository root:
+
+    PYTHONPATH=. python tests/benchmarks/web_interface_stress.py --writers 8 --readers 16
+"""
+import argparse
+import threading
+import time
+
+from qube_agent.utils.web_interface import WebInterfaceManager
+
+
+def run(agents: int, writers: int, readers: int, writes: int):
+    web_interface = WebInterfaceManager()
+    agent_ids = [web_interface.create_agent_dashboard() for _ in range(agents)]
+    done = threading.Event()
+    errors = []
+    read_counts = [0] * readers
+
+    def writer(index):
+        agent_id = agent_ids[index % agents]
+        for i in range(writes):
+            web_interface.update_agent_status(
+                agent_id, objective=f"writer {index}", results={"writer": index, "seq": i}
+            )
+            if i % 10 == 0:
+                web_interface.log_qube_processing(token_id=f"token_{index}_{i}", data={})
+
+    def reader(index):
+        agent_id = agent_ids[index % agents]
+        while not done.is_set():
+            dashboard = web_interface.get_agent_dashboard(agent_id)
+            last_seq = {}
+            for entry in dashboard["status_history"]:
+                w, seq = entry["results"]["writer"], entry["results"]["seq"]
+                if seq != last_seq.get(w, -1) + 1:
+                    errors.append(f"gap in writer {w} history: {last_seq.get(w)} -> {seq}")
+                last_seq[w] = seq
+            read_counts[index] += 1
+
+    writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    reader_threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+
+    start = time.perf_counter()
+    for t in reader_threads + writer_threads:
+        t.start()
+    for t in writer_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for t in reader_threads:
+        t.join()
+
+    expected_status = writes * writers
+    actual_status = sum(
+        len(web_interface.get_agent_dashboard(a)["status_history"]) for a in agent_ids
+    )
+    expected_logs = agents * writers * len(range(0, writes, 10))
+    actual_logs = sum(
+        len(web_interface.get_agent_dashboard(a)["qube_logs"]) for a in agent_ids
+    )
+    if actual_status != expected_status:
+        errors.append(f"status count {actual_status} != {expected_status}")
+    if actual_logs != expected_logs:
+        errors.append(f"qube log count {actual_logs} != {expected_logs}")
+
+    print(f"agents {agents}  writers {writers}  readers {readers}")
+    print(f"writes/sec: {expected_status / elapsed:,.0f}")
+    print(f"snapshots/sec: {sum(read_counts) / elapsed:,.0f}")
+    print("Status:", "✅ CONSISTENT" if not errors else f"❌ {len(errors)} errors, first: {errors[0]}")
+    return not errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=2000, help="status updates per writer")
+    args = parser.parse_args()
+    raise SystemExit(0 if run(args.agents, args.writers, args.readers, args.writes) else 1)
+
+
+if __name__ == "__main__":
+    main()
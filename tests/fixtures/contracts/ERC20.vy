@@ -0,0 +1,60 @@
+# pragma version ^0.4.0
+# Minimal ERC-20 used as a read target in tests and benchmarks
+
+event Transfer:
+    sender: indexed(address)
+    receiver: indexed(address)
+    value: uint256
+
+event Approval:
+    owner: indexed(address)
+    spender: indexed(address)
+    value: uint256
+
+name: public(String[32])
+symbol: public(String[8])
+decimals: public(uint8)
+totalSupply: public(uint256)
+balanceOf: public(HashMap[address, uint256])
+allowance: public(HashMap[address, HashMap[address, uint256]])
+minter: address
+
+
+@deploy
+def __init__(_name: String[32], _symbol: String[8]):
+    self.name = _name
+    self.symbol = _symbol
+    self.decimals = 18
+    self.minter = msg.sender
+
+
+@external
+def mint(_to: address, _value: uint256):
+    assert msg.sender == self.minter
+    self.totalSupply += _value
+    self.balanceOf[_to] += _value
+    log Transfer(sender=empty(address), receiver=_to, value=_value)
+
+
+@external
+def transfer(_to: address, _value: uint256) -> bool:
+    self.balanceOf[msg.sender] -= _value
+    self.balanceOf[_to] += _value
+    log Transfer(sender=msg.sender, receiver=_to, value=_value)
+    return True
+
+
+@external
+def transferFrom(_from: address, _to: address, _value: uint256) -> bool:
+    self.allowance[_from][msg.sender] -= _value
+    self.balanceOf[_from] -= _value
+    self.balanceOf[_to] += _value
+    log Transfer(sender=_from, receiver=_to, value=_value)
+    return True
+
+
+@external
+def approve(_spender: address, _value: uint256) -> bool:
+    self.allowance[msg.sender][_spender] = _value
+    log Approval(owner=msg.sender, spender=_spender, value=_value)
+    return True
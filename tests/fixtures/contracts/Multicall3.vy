@@ -0,0 +1,33 @@
+# pragma version ^0.4.0
+# Subset of Multicall3 (aggregate3 and getBlockNumber) with the same ABI,
+# for chains that do not have the canonical deployment
+
+MAX_CALLS: constant(uint256) = 256
+MAX_DATA: constant(uint256) = 256
+
+struct Call3:
+    target: address
+    allowFailure: bool
+    callData: Bytes[MAX_DATA]
+
+struct Result:
+    success: bool
+    returnData: Bytes[MAX_DATA]
+
+
+@external
+def aggregate3(calls: DynArray[Call3, MAX_CALLS]) -> DynArray[Result, MAX_CALLS]:
+    results: DynArray[Result, MAX_CALLS] = []
+    for c: Call3 in calls:
+        success: bool = False
+        response: Bytes[MAX_DATA] = b""
+        success, response = raw_call(c.target, c.callData, max_outsize=MAX_DATA, revert_on_failure=False)
+        assert success or c.allowFailure, "Multicall3: call failed"
+        results.append(Result(success=success, returnData=response))
+    return results
+
+
+@view
+@external
+def getBlockNumber() -> uint256:
+    return block.number
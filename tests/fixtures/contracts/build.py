@@ -0,0 +1,31 @@
+"""
+Compile the test contracts into artifacts.json.
+
+Tests only read the artifacts, so vyper is needed just to rebuild them:
+
+    pip install vyper==0.4.3
+    python tests/fixtures/contracts/build.py
+"""
+import json
+import os
+
+from vyper import compile_code
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    artifacts = {}
+    for filename in sorted(os.listdir(HERE)):
+        if not filename.endswith(".vy"):
+            continue
+        with open(os.path.join(HERE, filename)) as f:
+            out = compile_code(f.read(), output_formats=["abi", "bytecode"])
+        artifacts[filename[:-3]] = {"abi": out["abi"], "bytecode": out["bytecode"]}
+    with open(os.path.join(HERE, "artifacts.json"), "w") as f:
+        json.dump(artifacts, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# pragma version ^0.4.0
+# Event-compatible stand-in for contracts/iQubeNFT.sol, used by log indexer tests
+
+event Transfer:
+    sender: indexed(address)
+    receiver: indexed(address)
+    tokenId: indexed(uint256)
+
+event QubeAnchored:
+    tokenId: indexed(uint256)
+    to: indexed(address)
+    minter: indexed(address)
+    uri: String[256]
+
+event QubeTransferred:
+    tokenId: indexed(uint256)
+    sender: indexed(address)
+    receiver: indexed(address)
+
+ownerOf: public(HashMap[uint256, address])
+tokenURI: public(HashMap[uint256, String[256]])
+minterOf: public(HashMap[uint256, address])
+tokenCount: public(uint256)
+
+
+@external
+def mintQube(_to: address, _uri: String[256]) -> uint256:
+    assert _to != empty(address)
+    assert len(_uri) > 0
+    self.tokenCount += 1
+    token_id: uint256 = self.tokenCount
+    self.ownerOf[token_id] = _to
+    self.tokenURI[token_id] = _uri
+    self.minterOf[token_id] = msg.sender
+    log Transfer(sender=empty(address), receiver=_to, tokenId=token_id)
+    log QubeAnchored(tokenId=token_id, to=_to, minter=msg.sender, uri=_uri)
+    return token_id
+
+
+@external
+def transferQube(_to: address, _token_id: uint256):
+    assert self.ownerOf[_token_id] == msg.sender
+    assert _to != empty(address)
+    self.ownerOf[_token_id] = _to
+    log Transfer(sender=msg.sender, receiver=_to, tokenId=_token_id)
+    log QubeTransferred(tokenId=_token_id, sender=msg.sender, receiver=_to)
@@ -0,0 +1,157 @@
+"""
+Local JSON-RPC endpoint backed by eth-tester.
+
+Serves an in-memory dev chain over HTTP, including JSON-RPC batches, and
+counts HTTP round trips and RPC methods so tests can assert how chatty a
+client was. fail_next injects 503s for retry tests, and max_logs rejects
+eth_getLogs queries with more results, like hosted nodes do.
+
+    with EthRPCStubServer() as chain:
+        w3 = Web3(Web3.HTTPProvider(chain.url))
+"""
+import json
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from eth_tester import EthereumTester
+from web3 import EthereumTesterProvider, Web3
+
+ARTIFACTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contracts", "artifacts.json")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_StubHTTPServer"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        payload = json.loads(body)
+        stub.connections.add(self.client_address)
+        with stub.lock:
+            fail = stub.fail_next > 0
+            stub.fail_next -= fail
+        if fail:
+            stub.failed += 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with stub.lock:
+            stub.round_trips += 1
+            if isinstance(payload, list):
+                stub.batches += 1
+                response = [stub.handle(request) for request in payload]
+            else:
+                response = stub.handle(payload)
+        data = Web3.to_json(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    stub: "EthRPCStubServer"
+
+
+class EthRPCStubServer:
+    """
+    In-process JSON-RPC server on a random local port.
+    """
+
+    def __init__(self):
+        self.tester = EthereumTester()
+        self.provider = EthereumTesterProvider(self.tester)
+        self.web3 = Web3(self.provider)
+        self.methods: Counter = Counter()
+        self.round_trips = 0
+        self.batches = 0
+        self.connections = set()
+        # Answer this many upcoming requests with 503, to exercise retries
+        self.fail_next = 0
+        self.failed = 0
+        # Reject eth_getLogs queries returning more logs than this
+        self.max_logs: Optional[int] = None
+        # eth-tester is not thread-safe, so requests are served one at a time
+        self.lock = threading.Lock()
+        self._server: Optional[_StubHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method, params = request["method"], request.get("params", [])
+        self.methods[method] += 1
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            # Through web3's middleware, which turns wire-format params into
+            # what eth-tester expects and fills in its request defaults
+            result = self.web3.manager.request_blocking(method, params)
+            if method == "eth_getLogs" and self.max_logs is not None and len(result) > self.max_logs:
+                raise ValueError(f"query returned more than {self.max_logs} results")
+            response["result"] = result
+        except Exception as e:
+            response["error"] = {"code": -32000, "message": str(e)}
+        return response
+
+    def fund(self, address: str, ether: float = 100) -> None:
+        """Send ether from a prefunded eth-tester account."""
+        self.web3.eth.send_transaction({
+            "from": self.web3.eth.accounts[0],
+            "to": address,
+            "value": Web3.to_wei(ether, "ether"),
+        })
+
+    def deploy(self, name: str, *args) -> str:
+        """
+        Deploy a contract from tests/fixtures/contracts/artifacts.json.
+
+        Returns:
+            The contract address
+        """
+        with open(ARTIFACTS) as f:
+            artifact = json.load(f)[name]
+        contract = self.web3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+        tx_hash = contract.constructor(*args).transact({"from": self.web3.eth.accounts[0]})
+        return self.web3.eth.get_transaction_receipt(tx_hash)["contractAddress"]
+
+    def mine(self, blocks: int = 1) -> None:
+        """Mine empty blocks."""
+        self.tester.mine_blocks(blocks)
+
+    def contract(self, name: str, address: str):
+        """Bind a deployed fixture contract, for transacting from the prefunded accounts."""
+        with open(ARTIFACTS) as f:
+            abi = json.load(f)[name]["abi"]
+        return self.web3.eth.contract(address=address, abi=abi)
+
+    def start(self) -> "EthRPCStubServer":
+        self._server = _StubHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.stub = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "EthRPCStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,193 @@
+"""
+Local stand-in for the IPFS daemon HTTP API.
+
+Implements just enough of /api/v0 for ipfshttpclient to connect, add and
+fetch content, keeps blocks in memory and counts requests per endpoint so
+tests can assert what reached the "network".
+
+    with IPFSStubServer() as ipfs:
+        cid = ipfs.put(b"payload")
+        handler = QubeHandler(ipfs_host=ipfs.host, ipfs_port=ipfs.port)
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def b58encode(data: bytes) -> str:
+    n = int.from_bytes(data, "big")
+    out = ""
+    while n:
+        n, rem = divmod(n, 58)
+        out = B58_ALPHABET[rem] + out
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + out
+
+
+def content_cid(content: bytes) -> str:
+    """CIDv0-style identifier: base58 sha2-256 multihash of the raw bytes."""
+    return b58encode(b"\x12\x20" + hashlib.sha256(content).digest())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_StubHTTPServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # keep-alive client stalls on delayed ACKs between them
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _multipart_files(self, body: bytes):
+        boundary = self.headers.get_param("boundary")
+        if not boundary:
+            return
+        delimiter = b"--" + boundary.encode()
+        for part in body.split(delimiter)[1:]:
+            if part.startswith(b"--"):
+                return
+            headers, _, data = part.partition(b"\r\n\r\n")
+            if b"filename=" in headers:
+                yield data[:-2] if data.endswith(b"\r\n") else data
+
+    def do_POST(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        endpoint = url.path.rsplit("/", 1)[-1]
+        args = parse_qs(url.query).get("arg", [])
+        body = self._read_body()
+        stub.requests[endpoint] += 1
+        stub.connections.add(self.client_address)
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        if endpoint == "version":
+            return self._send_json(200, {"Version": "0.7.0", "Commit": "", "Repo": "10"})
+        if endpoint == "cat":
+            content = stub.blocks.get(args[0]) if args else None
+            if content is None:
+                return self._send_json(500, {"Message": "not found", "Code": 0, "Type": "error"})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        if endpoint == "add":
+            query = parse_qs(url.query)
+            added = []
+            for content in self._multipart_files(body):
+                cid = stub.put(content)
+                if query.get("pin", ["true"])[0] != "false":
+                    stub.pinned.add(cid)
+                added.append({"Name": cid, "Hash": cid, "Size": str(len(content))})
+            stub.bytes_added += sum(int(a["Size"]) for a in added)
+            body = b"".join(json.dumps(a).encode() + b"\n" for a in added)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        handler = stub.extra_endpoints.get(endpoint)
+        if handler is not None:
+            status, payload = handler(self, args, body)
+            return self._send_json(status, payload)
+        self._send_json(404, {"Message": f"unknown endpoint {endpoint}", "Code": 0, "Type": "error"})
+
+    do_GET = do_POST
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when a pool opens many connections at once
+    request_queue_size = 128
+    stub: "IPFSStubServer"
+
+
+class IPFSStubServer:
+    """
+    In-process IPFS API stand-in on a random local port.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        """
+        Args:
+            delay: Seconds to sleep on every request, to mimic a remote daemon
+        """
+        self.delay = delay
+        self.blocks: Dict[str, bytes] = {}
+        self.pinned = set()
+        self.bytes_added = 0
+        self.requests: Counter = Counter()
+        self.connections = set()
+        self.extra_endpoints = {}
+        self._server: Optional[_StubHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def put(self, content: bytes) -> str:
+        """
+        Store content directly, bypassing the HTTP API.
+
+        Returns:
+            The content's CID
+        """
+        cid = content_cid(content)
+        self.blocks[cid] = content
+        return cid
+
+    def start(self) -> "IPFSStubServer":
+        self._server = _StubHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "IPFSStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,129 @@
+"""
+Random but schema-valid inputs for surface planning tests and benchmarks.
+
+Everything is drawn from a caller-supplied random.Random, so a seed
+reproduces the same profiles, modules and contexts.
+"""
+import random
+from typing import Any, Dict, List, Tuple
+
+from services.metame_runtime.models import ContentModuleRenderProfileV0
+from services.metame_runtime.models.content_module_render_profile import (
+    Density,
+    DeviceClass,
+    InteractionStyle,
+    InteractionType,
+    Modality,
+    Orientation,
+    RealEstate,
+    ResponsiveRuleAction,
+    Surface,
+)
+from services.metame_runtime.models.surface_plan import DeviceContext, Intent
+
+SURFACES = [s.value for s in Surface]
+DENSITIES = [d.value for d in Density]
+MODES = ["be", "make", "play", "earn", "share"]
+
+
+def _densities(rng: random.Random) -> Tuple[str, str, str]:
+    lo, pref, hi = sorted(rng.randrange(len(DENSITIES)) for _ in range(3))
+    return DENSITIES[lo], DENSITIES[pref], DENSITIES[hi]
+
+
+def _maybe(rng: random.Random, values: List[str], p: float = 0.3):
+    return rng.choice(values) if rng.random() < p else None
+
+
+def random_rule(rng: random.Random) -> Dict[str, Any]:
+    when = {
+        key: value
+        for key, value in (
+            ("device", _maybe(rng, [d.value for d in DeviceClass])),
+            ("orientation", _maybe(rng, [o.value for o in Orientation])),
+            ("surface", _maybe(rng, SURFACES)),
+            ("density", _maybe(rng, DENSITIES, 0.15)),
+        )
+        if value is not None
+    }
+    action = rng.choice([a.value for a in ResponsiveRuleAction])
+    rule: Dict[str, Any] = {"then": {"action": action}}
+    if action == "truncate_text" and rng.random() < 0.7:
+        rule["then"]["params"] = {"max_lines": rng.randint(1, 12)}
+    if when or rng.random() < 0.5:
+        rule["when"] = when
+    return rule
+
+
+def random_profile(rng: random.Random, module_type: str) -> ContentModuleRenderProfileV0:
+    """
+    Draw a valid render profile.
+
+    Args:
+        rng: Random source
+        module_type: Module type of the profile
+
+    Returns:
+        ContentModuleRenderProfileV0
+    """
+    allowed = rng.sample(SURFACES, rng.randint(1, len(SURFACES)))
+    preferred = rng.sample(allowed, rng.randint(0, min(2, len(allowed))))
+    lo, pref, hi = _densities(rng)
+    profile: Dict[str, Any] = {
+        "primary_modality": rng.choice([m.value for m in Modality]),
+        "interaction_style": rng.choice([i.value for i in InteractionStyle]),
+        "preferred_surfaces": preferred,
+        "allowed_surfaces": allowed,
+        "density_constraints": {"min": lo, "preferred": pref, "max": hi},
+    }
+    if rng.random() < 0.3:
+        profile["disallowed_surfaces"] = rng.sample(SURFACES, rng.randint(1, 2))
+    if rng.random() < 0.4:
+        overrides = []
+        for _ in range(rng.randint(1, 3)):
+            lo, pref, hi = _densities(rng)
+            override = {"device": rng.choice([d.value for d in DeviceClass]), "min": lo, "preferred": pref, "max": hi}
+            if rng.random() < 0.5:
+                override["orientation"] = rng.choice([o.value for o in Orientation])
+            overrides.append(override)
+        profile["density_constraints"]["per_device_overrides"] = overrides
+    if rng.random() < 0.7:
+        profile["responsive_rules"] = [random_rule(rng) for _ in range(rng.randint(1, 6))]
+    return ContentModuleRenderProfileV0.model_validate({
+        "schema_version": "0.1.0", "module_type": module_type, "display_name": module_type, "profile": profile,
+    })
+
+
+def random_profiles(rng: random.Random, count: int) -> List[ContentModuleRenderProfileV0]:
+    """Draw count profiles with distinct module types."""
+    return [random_profile(rng, f"Random.Module{i}") for i in range(count)]
+
+
+def random_modules(rng: random.Random, profiles: List[ContentModuleRenderProfileV0], count: int) -> List[Dict[str, Any]]:
+    """
+    Draw a plan's modules from a profile set.
+
+    Args:
+        rng: Random source
+        profiles: Profiles to draw from, with replacement
+        count: Number of modules
+
+    Returns:
+        Modules as accepted by build_surface_plan_v0
+    """
+    modules = []
+    for i in range(count):
+        profile = rng.choice(profiles)
+        modules.append({"module_id": f"mod_{i}", "module_type": profile.module_type, "render_profile": profile})
+    return modules
+
+
+def random_context(rng: random.Random) -> Tuple[DeviceContext, Intent]:
+    """Draw a device context and an intent."""
+    device = DeviceContext(
+        device_class=rng.choice([d.value for d in DeviceClass]),
+        orientation=rng.choice([o.value for o in Orientation]),
+        interaction=rng.choice([i.value for i in InteractionType]),
+        real_estate=rng.choice([r.value for r in RealEstate]),
+    )
+    return device, Intent(user_ask="generated", mode=rng.choice(MODES))
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+
+import app as qube_app
+import asgi_app
+import web_dashboard
+
+
+def raw_call(method, path, body=b"", headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+    asyncio.run(asgi_app.application(scope, receive, send))
+    start, body_message = messages
+    return start["status"], dict(start["headers"]), body_message["body"]
+
+
+def session_cookie(address="0xabc"):
+    status, headers, _ = call("POST", "/connect_wallet", {"address": address})
+    return headers[b"set-cookie"].split(b";")[0]
+
+
+def call(method, path, body=None, headers=()):
+    messages = []
+    payload = json.dumps(body).encode() if body is not None else b""
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+    asyncio.run(asgi_app.application(scope, receive, send))
+    start, body_message = messages
+    response_headers = dict(start["headers"])
+    content = body_message["body"]
+    return start["status"], response_headers, json.loads(content) if content else None
+
+
+class TestASGIApp:
+    def test_share_iqube_matches_flask_payload(self):
+        status, _, data = call("POST", "/share_iqube", {"tokenQubeId": "42", "iQubeType": "DataQube"})
+
+        assert status == 200
+        assert data["status"] == "success"
+        assert data["decryptedData"]["email"] == "this@example.com"
+
+    def test_retrieve_tokeqube_uses_path_parameter(self):
+        status, _, data = call("GET", "/retrieve_tokeqube/42")
+
+        assert status == 200
+        assert data["metaQube"]["iQubeIdentifier"] == "iQube-42"
+
+    def test_connect_wallet_sets_flask_compatible_session(self):
+        status, headers, data = call(
+            "POST", "/connect_wallet", {"address": "0xabc"},
+            headers=[(b"origin", b"http://localhost:3000")]
+        )
+        cookie = headers[b"set-cookie"].decode().split(";")[0].split("=", 1)[1]
+
+        assert status == 200
+        assert headers[b"access-control-allow-origin"] == b"http://localhost:3000"
+        assert asgi_app.application.session_serializer.loads(cookie) == {"wallet_address": "0xabc"}
+
+    def test_unknown_route_and_wrong_method(self):
+        assert call("GET", "/missing")[0] == 404
+        assert call("GET", "/share_iqube")[0] == 405
+
+    def test_index_page_is_cached_and_revalidated(self):
+        status, headers, body = raw_call("GET", "/")
+
+        assert status == 200
+        assert headers[b"content-type"].startswith(b"text/html")
+        assert b"QubeAgent Interaction" in body
+        revalidated = raw_call("GET", "/", headers=[(b"if-none-match", headers[b"etag"])])
+        assert revalidated[0] == 304
+
+    def test_static_assets_are_served(self):
+        url = qube_app.static_assets.url("js/ethers.min.js")
+
+        status, headers, body = raw_call("GET", url)
+        unhashed = raw_call("GET", "/static/favicon.ico")
+
+        assert status == 200
+        assert headers[b"cache-control"] == b"public, max-age=31536000, immutable"
+        assert body
+        assert unhashed[0] == 200
+        assert raw_call("GET", "/static/../app.py")[0] == 404
+        assert raw_call("GET", "/static/missing.js")[0] == 404
+
+    def test_invalidate_iqube_needs_the_session(self):
+        qube_app.decryption_service.clear()
+        call("POST", "/share_iqube", {"tokenQubeId": "42"})
+
+        assert call("POST", "/invalidate_iqube", {"tokenQubeId": "42"})[0] == 401
+        status, _, data = call(
+            "POST", "/invalidate_iqube", {"tokenQubeId": "42"}, headers=[(b"cookie", session_cookie())]
+        )
+        assert status == 200
+        assert data == {"status": "success", "invalidated": 1}
+
+    def test_dashboard_stream_is_an_async_sse_stream(self):
+        bus = web_dashboard.web_interface.event_bus
+        messages = []
+
+        async def run():
+            leave = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            received = [False]
+
+            async def receive():
+                if not received[0]:
+                    received[0] = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await leave.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                messages.append(message)
+                body = message.get("body", b"")
+                if body.startswith(b"retry:"):
+                    # Published from another thread, as the agent would
+                    threading.Thread(target=web_dashboard.web_interface.update_agent_status, kwargs={
+                        "agent_id": web_dashboard.AGENT_ID, "objective": "live", "results": {},
+                    }).start()
+                elif b"event: status" in body:
+                    loop.call_soon(leave.set)
+
+            scope = {"type": "http", "method": "GET", "path": "/api/dashboard/stream", "headers": []}
+            await asyncio.wait_for(asgi_app.application(scope, receive, send), 5)
+
+        asyncio.run(run())
+
+        start = messages[0]
+        assert start["status"] == 200
+        assert dict(start["headers"])[b"content-type"] == b"text/event-stream"
+        assert messages[1]["body"].startswith(b"retry:")
+        assert b'"objective": "live"' in messages[2]["body"]
+        assert all(m.get("more_body") for m in messages[1:])
+        assert bus.subscriber_count() == 0
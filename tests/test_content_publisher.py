@@ -0,0 +1,121 @@
+import os
+import stat
+
+import pytest
+
+from qube_agent.models.iqube import ContentQube
+from qube_integrations.content_publisher import ContentPublisher
+from qube_integrations.ipfs_pool import close_pools, get_pool
+from tests.fixtures.ipfs_stub import IPFSStubServer
+
+PAYLOAD = os.urandom(10 * 1024 + 123)
+
+
+@pytest.fixture
+def ipfs():
+    with IPFSStubServer() as server:
+        yield server
+    close_pools()
+
+
+@pytest.fixture
+def publisher(ipfs, tmp_path):
+    return ContentPublisher(
+        ipfs_host=ipfs.host, ipfs_port=ipfs.port, chunk_size=1024, state_dir=str(tmp_path / "state")
+    )
+
+
+class TestContentPublisher:
+    def test_file_is_chunked_pinned_and_recorded(self, ipfs, publisher, tmp_path):
+        path = tmp_path / "video.bin"
+        path.write_bytes(PAYLOAD)
+        qube = ContentQube(content_type="video/mp4")
+        seen = []
+
+        result = publisher.publish(qube, str(path), progress=lambda done, total: seen.append((done, total)))
+
+        assert result.chunks == 11
+        assert qube.meta.content_cid == result.cid
+        assert qube.meta.content_size == len(PAYLOAD)
+        assert result.cid in ipfs.pinned
+        assert max(len(b) for cid, b in ipfs.blocks.items() if cid != result.cid) == 1024
+        assert seen[-1] == (len(PAYLOAD), len(PAYLOAD))
+        assert [d for d, _ in seen] == sorted(d for d, _ in seen)
+        assert b"".join(publisher.iter_content(result.cid)) == PAYLOAD
+
+    def test_encrypted_chunks_need_the_blakqube_key(self, ipfs, publisher):
+        qube = ContentQube(content=b"secret " * 500)
+
+        result = publisher.publish(qube, encrypt=True)
+
+        key = qube.blak.get_entry("content_key")
+        assert result.encrypted and key
+        assert not any(b"secret" in block for block in ipfs.blocks.values())
+        assert b"".join(publisher.iter_content(result.cid, key)) == qube.content
+        with pytest.raises(ValueError):
+            list(publisher.iter_content(result.cid))
+
+    def test_interrupted_upload_resumes_from_checkpoint(self, ipfs, publisher, monkeypatch):
+        pool = get_pool(ipfs.host, ipfs.port)
+        original = pool.add_bytes
+        calls = []
+
+        def flaky_add(data):
+            calls.append(len(data))
+            if len(calls) == 4:
+                raise ConnectionError("daemon went away")
+            return original(data)
+
+        monkeypatch.setattr(pool, "add_bytes", flaky_add)
+        qube = ContentQube()
+        with pytest.raises(ConnectionError):
+            publisher.publish(qube, PAYLOAD, encrypt=True)
+        assert os.listdir(publisher.state_dir)
+
+        result = publisher.publish(qube, PAYLOAD, encrypt=True)
+
+        assert result.resumed_chunks == 3
+        # 3 chunks, 1 failure, 8 remaining chunks and the manifest
+        assert len(calls) == 13
+        assert not os.listdir(publisher.state_dir)
+        key = qube.blak.get_entry("content_key")
+        assert b"".join(publisher.iter_content(result.cid, key)) == PAYLOAD
+
+    def test_checkpoints_need_a_private_state_dir(self, ipfs, tmp_path):
+        shared = tmp_path / "shared"
+        shared.mkdir()
+        shared.chmod(0o777)
+        publisher = ContentPublisher(ipfs_host=ipfs.host, ipfs_port=ipfs.port, chunk_size=1024, state_dir=str(shared))
+        created = ContentPublisher(
+            ipfs_host=ipfs.host, ipfs_port=ipfs.port, chunk_size=1024, state_dir=str(tmp_path / "new")
+        )
+
+        assert not publisher.checkpoints
+        publisher._save_state("upload", {"chunk_size": 1024, "chunks": []})
+        assert not os.listdir(shared)
+        assert created.checkpoints
+        assert stat.S_IMODE(os.stat(created.state_dir).st_mode) == 0o700
+
+    @pytest.mark.parametrize("encrypt, payload", [(False, PAYLOAD), (True, PAYLOAD[::-1])])
+    def test_reused_upload_id_for_another_upload_starts_over(self, ipfs, publisher, monkeypatch, encrypt, payload):
+        pool = get_pool(ipfs.host, ipfs.port)
+        original = pool.add_bytes
+        calls = []
+
+        def flaky_add(data):
+            calls.append(len(data))
+            if len(calls) == 4:
+                raise ConnectionError("daemon went away")
+            return original(data)
+
+        monkeypatch.setattr(pool, "add_bytes", flaky_add)
+        with pytest.raises(ConnectionError):
+            publisher.publish(ContentQube(), PAYLOAD, encrypt=True, upload_id="shared-id")
+
+        qube = ContentQube()
+        result = publisher.publish(qube, payload, encrypt=encrypt, upload_id="shared-id")
+
+        assert result.resumed_chunks == 0
+        assert result.encrypted is encrypt
+        key = qube.blak.get_entry("content_key") if encrypt else None
+        assert b"".join(publisher.iter_content(result.cid, key)) == payload
@@ -0,0 +1,138 @@
+import base64
+
+import app as qube_app
+from qube_agent.utils.decryption import DecryptionService, blakqube_version
+
+
+def _enc(value: str) -> str:
+    return f"ENC[AES256-GCM,data:{base64.b64encode(value.encode()).decode()}]"
+
+
+BLAKQUBE = {
+    "firstName": _enc("Ada"),
+    "email": _enc("ada@example.com"),
+    "plain": "not encrypted",
+    "broken": "ENC[AES256-GCM,data:%%%]",
+}
+
+
+class TestDecryptionService:
+    def test_decrypt_fields_skips_plain_and_invalid_values(self):
+        service = DecryptionService()
+
+        assert service.decrypt_fields(BLAKQUBE) == {
+            "firstName": "Ada",
+            "email": "ada@example.com",
+        }
+
+    def test_only_aes256_gcm_envelopes_are_decrypted(self):
+        payload = base64.b64encode(b"Ada").decode()
+        service = DecryptionService()
+
+        assert service.decrypt_fields({
+            "gcm": f"ENC[AES256-GCM,data:{payload}]",
+            "other_scheme": f"ENC[ROT13,data:{payload}]",
+            "no_scheme": f"ENC[,data:{payload}]",
+        }) == {"gcm": "Ada"}
+
+    def test_repeat_requests_hit_cache_without_loading(self):
+        service = DecryptionService()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return BLAKQUBE
+
+        first = service.get_or_decrypt("token-1", "1", loader)
+        first["firstName"] = "mutated"
+        second = service.get_or_decrypt("token-1", "1", loader)
+
+        assert len(loads) == 1
+        assert second["firstName"] == "Ada"
+        assert service.stats()["hits"] == 1
+
+    def test_new_version_is_decrypted_separately(self):
+        service = DecryptionService()
+        updated = dict(BLAKQUBE, firstName=_enc("Grace"))
+
+        assert service.decrypt("token-1", BLAKQUBE)["firstName"] == "Ada"
+        assert service.decrypt("token-1", updated)["firstName"] == "Grace"
+        assert blakqube_version(BLAKQUBE) != blakqube_version(updated)
+
+    def test_invalidate_drops_all_versions_of_a_token(self):
+        service = DecryptionService()
+        for version in ("1", "2"):
+            service.get_or_decrypt("token-1", version, lambda: BLAKQUBE)
+        service.get_or_decrypt("token-2", "1", lambda: BLAKQUBE)
+
+        assert service.invalidate("token-1", "2") == 1
+        assert service.invalidate("token-1") == 1
+        assert service.stats()["size"] == 1
+
+    def test_cache_is_bounded(self):
+        service = DecryptionService(maxsize=2)
+        for i in range(5):
+            service.get_or_decrypt(f"token-{i}", "1", lambda: BLAKQUBE)
+
+        assert service.stats()["size"] == 2
+
+
+class TestDecryptionRoutes:
+    def setup_method(self):
+        qube_app.decryption_service.clear()
+        self.client = qube_app.app.test_client()
+
+    def test_share_ignores_client_supplied_version(self):
+        first = self.client.post("/share_iqube", json={"tokenQubeId": "42", "version": "a"})
+        second = self.client.post("/share_iqube", json={"tokenQubeId": "42", "version": "b"})
+
+        assert first.get_json()["decryptedData"] == second.get_json()["decryptedData"]
+        version = qube_app.decryption_service.current_version("42")
+        assert qube_app.decryption_service.invalidate("42", version) == 1
+        assert qube_app.decryption_service.stats()["size"] == 0
+
+    def test_cache_hit_does_not_load_the_blakqube(self, monkeypatch):
+        loads = []
+        original = qube_app.get_mock_tokeqube_data
+
+        def loader(tokeqube_id):
+            loads.append(tokeqube_id)
+            return original(tokeqube_id)
+
+        monkeypatch.setattr(qube_app, "get_mock_tokeqube_data", loader)
+        first = self.client.post("/share_iqube", json={"tokenQubeId": "42"})
+        second = self.client.post("/share_iqube", json={"tokenQubeId": "42"})
+
+        assert loads == ["42"]
+        assert first.get_json()["decryptedData"] == second.get_json()["decryptedData"]
+        assert qube_app.decryption_service.stats()["hits"] == 1
+
+    def test_invalidate_requires_a_connected_wallet(self):
+        self.client.post("/share_iqube", json={"tokenQubeId": "42"})
+
+        response = self.client.post("/invalidate_iqube", json={"tokenQubeId": "42"})
+
+        assert response.status_code == 401
+        assert qube_app.decryption_service.stats()["size"] == 1
+
+    def test_invalidate_drops_every_cached_version(self):
+        self.client.post("/connect_wallet", json={"address": "0xabc"})
+        self.client.post("/share_iqube", json={"tokenQubeId": "42"})
+        qube_app.decryption_service.get_or_decrypt("42", "stale", lambda: BLAKQUBE)
+
+        response = self.client.post("/invalidate_iqube", json={"tokenQubeId": "42", "version": "stale"})
+
+        assert response.get_json() == {"status": "success", "invalidated": 2}
+
+    def test_invalidate_bumps_the_server_side_version(self, monkeypatch):
+        self.client.post("/connect_wallet", json={"address": "0xabc"})
+        self.client.post("/share_iqube", json={"tokenQubeId": "42"})
+        before = qube_app.decryption_service.current_version("42")
+
+        self.client.post("/invalidate_iqube", json={"tokenQubeId": "42"})
+        updated = dict(BLAKQUBE, firstName=_enc("Grace"))
+        monkeypatch.setattr(qube_app, "get_mock_tokeqube_data", lambda tokeqube_id: {"blakQube": updated})
+        response = self.client.post("/share_iqube", json={"tokenQubeId": "42"})
+
+        assert qube_app.decryption_service.current_version("42") != before
+        assert response.get_json()["decryptedData"]["firstName"] == "Grace"
@@ -0,0 +1,102 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from qube_agent.models.iqube_security import BlakQubeSecurityManager
+from qube_integrations import ipfs_pool
+from qube_integrations.ipfs_pool import IPFSConnectionPool, close_pools, get_pool
+from qube_integrations.qube_handler import QubeHandler
+from tests.fixtures.ipfs_stub import IPFSStubServer
+
+
+@pytest.fixture
+def ipfs():
+    with IPFSStubServer() as server:
+        yield server
+    close_pools()
+
+
+class TestIPFSConnectionPool:
+    def test_handler_construction_does_not_connect(self, ipfs):
+        handlers = [QubeHandler(ipfs_host=ipfs.host, ipfs_port=ipfs.port) for _ in range(5)]
+
+        assert sum(ipfs.requests.values()) == 0
+        assert all(h.ipfs_pool is handlers[0].ipfs_pool for h in handlers)
+
+    def test_burst_reuses_warm_connections(self, ipfs):
+        cid = ipfs.put(json.dumps(BlakQubeSecurityManager.encrypt_data({"n": 1})).encode())
+        handler = QubeHandler(ipfs_host=ipfs.host, ipfs_port=ipfs.port)
+        handler.register_token("token-1", cid)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(handler.decrypt, ["token-1"] * 40))
+
+        stats = handler.ipfs_pool.stats()
+        assert all(r["data"] == {"n": 1} for r in results)
+        assert stats["connects"] == 1
+        assert stats["requests"] == 40
+        assert 1 <= stats["connections_opened"] <= 4
+        # One extra connection for the version check made by connect()
+        assert len(ipfs.connections) <= 5
+
+    def test_failed_connect_backs_off(self):
+        pool = IPFSConnectionPool("127.0.0.1", 1, backoff_base=60)
+
+        with pytest.raises(ConnectionError):
+            pool.cat("QmAnything")
+        with pytest.raises(ConnectionError, match="retrying"):
+            pool.cat("QmAnything")
+
+        assert pool.stats()["connect_failures"] == 1
+        assert pool.health()["healthy"] is False
+
+    def test_reconnects_after_connection_loss(self, ipfs):
+        pool = get_pool(ipfs.host, ipfs.port)
+        assert pool.health()["healthy"] is True
+        first = pool.client()
+        # Simulate the daemon dropping every keep-alive socket
+        session = first._client._session
+        for prefix in list(session.adapters):
+            session.mount(prefix, _RefusingAdapter())
+
+        assert pool.health()["version"] == "0.7.0"
+        assert pool.client() is not first
+        assert pool.stats()["connects"] == 2
+
+    @pytest.mark.parametrize("break_internals", ["adapter", "session"])
+    def test_falls_back_to_the_default_pool(self, ipfs, monkeypatch, break_internals):
+        if break_internals == "adapter":
+            monkeypatch.setattr(ipfs_pool, "HTTPAdapter", None)
+        else:
+            connect = ipfs_pool.ipfshttpclient.connect
+            # A client release that renamed its private HTTP client
+            monkeypatch.setattr(
+                ipfs_pool.ipfshttpclient, "connect", lambda *args, **kwargs: _RenamedInternals(connect(*args, **kwargs))
+            )
+        cid = ipfs.put(b"payload")
+        pool = IPFSConnectionPool(ipfs.host, ipfs.port)
+
+        assert pool.cat(cid) == b"payload"
+        assert pool.stats()["connections_opened"] is None
+        assert pool.stats()["requests"] == 1
+        pool.close()
+
+
+class _RenamedInternals:
+    def __init__(self, client):
+        self._renamed_client = client
+
+    def __getattr__(self, name):
+        if name == "_client":
+            raise AttributeError(name)
+        return getattr(self._renamed_client, name)
+
+
+class _RefusingAdapter:
+    def send(self, *args, **kwargs):
+        import requests
+        raise requests.ConnectionError("connection reset")
+
+    def close(self):
+        pass
@@ -0,0 +1,240 @@
+import pytest
+import requests
+from eth_abi import encode
+from web3 import Web3
+
+from tests.fixtures.eth_rpc_stub import EthRPCStubServer
+from wallets import log_indexer
+from wallets.log_indexer import LogIndexer, RPCError, decode_log
+
+
+@pytest.fixture
+def chain():
+    with EthRPCStubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def nft(chain):
+    address = chain.deploy("iQubeNFT")
+    return address, chain.contract("iQubeNFT", address)
+
+
+def make_indexer(chain, tmp_path, addresses, **kwargs):
+    kwargs.setdefault("confirmations", 0)
+    return LogIndexer(Web3(Web3.HTTPProvider(chain.url)), str(tmp_path / "logs.db"), addresses, **kwargs)
+
+
+def capability_granted(address, block_number, token_id, to):
+    """A raw CapabilityGranted log, as TokenQubeACL would emit it."""
+    return {
+        "address": address,
+        "blockNumber": block_number,
+        "blockHash": "0x" + "ab" * 32,
+        "transactionHash": "0x" + "cd" * 32,
+        "logIndex": 0,
+        "topics": [
+            Web3.keccak(text="CapabilityGranted(uint256,address,bytes32,uint64,bytes32)"),
+            encode(["uint256"], [token_id]),
+            encode(["address"], [to]),
+        ],
+        "data": encode(["bytes32", "uint64", "bytes32"], [b"\x01" * 32, 3600, b"\x02" * 32]),
+    }
+
+
+class FailingDeletes:
+    """Connection proxy whose DELETE FROM blocks statements fail."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, sql, *args):
+        if sql.startswith("DELETE FROM blocks"):
+            raise RuntimeError("disk I/O error")
+        return self.db.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+class TestLogIndexer:
+    def test_indexes_and_decodes_qube_activity(self, chain, nft, tmp_path):
+        address, contract = nft
+        minter, alice, bob = chain.web3.eth.accounts[:3]
+        contract.functions.mintQube(alice, "ipfs://meta-1").transact({"from": minter})
+        contract.functions.mintQube(bob, "ipfs://meta-2").transact({"from": minter})
+        contract.functions.transferQube(bob, 1).transact({"from": alice})
+        indexer = make_indexer(chain, tmp_path, [address])
+
+        summary = indexer.sync()
+
+        assert summary["logs"] == 6
+        history = indexer.logs_by_token(1)
+        assert [r["event"] for r in history] == ["Transfer", "QubeAnchored", "Transfer", "QubeTransferred"]
+        assert history[1]["args"] == {"tokenId": 1, "to": alice, "minter": minter, "uri": "ipfs://meta-1"}
+        assert indexer.owner_of(1) == bob
+        assert indexer.owner_of(2) == bob
+        assert indexer.owner_of(3) is None
+        assert [r["token_id"] for r in indexer.logs_by_account(alice, event="QubeTransferred")] == [1]
+        assert len(indexer.logs_by_address(address, event="QubeAnchored")) == 2
+
+    def test_decodes_erc20_transfers(self, chain, tmp_path):
+        token = chain.deploy("ERC20", "Qube", "QB")
+        holder = chain.web3.eth.accounts[1]
+        chain.contract("ERC20", token).functions.mint(holder, 5).transact({"from": chain.web3.eth.accounts[0]})
+        indexer = make_indexer(chain, tmp_path, [token])
+        indexer.sync()
+
+        (row,) = indexer.logs_by_account(holder)
+
+        assert row["event"] == "Transfer" and row["token_id"] is None
+        assert row["args"]["value"] == 5
+        assert decode_log({"topics": row["topics"], "data": row["data"]}) == ("Transfer", row["args"])
+
+    def test_waits_for_confirmations(self, chain, nft, tmp_path):
+        address, contract = nft
+        indexer = make_indexer(chain, tmp_path, [address], confirmations=3)
+        contract.functions.mintQube(chain.web3.eth.accounts[1], "ipfs://m").transact({"from": chain.web3.eth.accounts[0]})
+
+        indexer.sync()
+        assert indexer.changes_since(0) == []
+
+        chain.mine(3)
+        indexer.sync()
+        assert len(indexer.changes_since(0)) == 2
+        assert indexer.checkpoint == chain.web3.eth.block_number - 3
+
+    def test_range_shrinks_when_the_node_rejects_a_query(self, chain, nft, tmp_path):
+        address, contract = nft
+        for i in range(10):
+            contract.functions.mintQube(chain.web3.eth.accounts[1], f"ipfs://{i}").transact(
+                {"from": chain.web3.eth.accounts[0]}
+            )
+        chain.max_logs = 4
+        indexer = make_indexer(chain, tmp_path, [address], initial_range=1000)
+
+        summary = indexer.sync()
+
+        assert summary["logs"] == 20
+        assert indexer.range < 1000
+        assert [r["token_id"] for r in indexer.logs_by_address(address, event="QubeAnchored")] == list(range(1, 11))
+
+    def test_resumes_from_checkpoint(self, chain, nft, tmp_path):
+        address, contract = nft
+        sender = {"from": chain.web3.eth.accounts[0]}
+        contract.functions.mintQube(chain.web3.eth.accounts[1], "ipfs://a").transact(sender)
+        make_indexer(chain, tmp_path, [address]).sync()
+        checkpoint = chain.web3.eth.block_number
+        contract.functions.mintQube(chain.web3.eth.accounts[1], "ipfs://b").transact(sender)
+
+        reopened = make_indexer(chain, tmp_path, [address])
+        summary = reopened.sync()
+
+        assert summary["blocks"] == 1
+        assert [r["token_id"] for r in reopened.changes_since(checkpoint)] == [2, 2]
+        assert len(reopened.changes_since(0)) == 4
+
+    def test_reorg_past_confirmation_depth_is_rolled_back(self, chain, nft, tmp_path):
+        address, contract = nft
+        minter, alice, bob = chain.web3.eth.accounts[:3]
+        indexer = make_indexer(chain, tmp_path, [address], confirmations=1)
+        fork_point = chain.tester.take_snapshot()
+        contract.functions.mintQube(alice, "ipfs://orphaned").transact({"from": minter})
+        chain.mine(2)
+        indexer.sync()
+        assert indexer.owner_of(1) == alice
+
+        chain.tester.revert_to_snapshot(fork_point)
+        contract.functions.mintQube(bob, "ipfs://canonical").transact({"from": minter})
+        chain.mine(3)
+        summary = indexer.sync()
+
+        assert summary["reorgs"] == 1
+        assert indexer.owner_of(1) == bob
+        assert [r["args"].get("uri") for r in indexer.logs_by_token(1)] == [None, "ipfs://canonical"]
+
+    def test_owner_of_ignores_grants_and_other_contracts(self, chain, nft, tmp_path):
+        address, contract = nft
+        minter, alice, bob, carol = chain.web3.eth.accounts[:4]
+        other = chain.deploy("iQubeNFT")
+        contract.functions.mintQube(alice, "ipfs://a").transact({"from": minter})
+        chain.contract("iQubeNFT", other).functions.mintQube(carol, "ipfs://c").transact({"from": minter})
+        indexer = make_indexer(chain, tmp_path, [address, other])
+        indexer.sync()
+        head = chain.web3.eth.block_number
+        indexer._store([capability_granted(address, head + 1, 1, bob)], head + 1, "0x" + "ab" * 32)
+
+        assert indexer.logs_by_token(1, address)[-1]["to"] == bob
+        assert indexer.owner_of(1, address) == alice
+        assert indexer.owner_of(1, other) == carol
+        with pytest.raises(ValueError):
+            indexer.owner_of(1)
+
+    def test_failed_reorg_rewind_rolls_back(self, chain, nft, tmp_path):
+        address, contract = nft
+        minter, alice, bob = chain.web3.eth.accounts[:3]
+        indexer = make_indexer(chain, tmp_path, [address], confirmations=1)
+        fork_point = chain.tester.take_snapshot()
+        contract.functions.mintQube(alice, "ipfs://orphaned").transact({"from": minter})
+        chain.mine(2)
+        indexer.sync()
+        checkpoint = indexer.checkpoint
+        chain.tester.revert_to_snapshot(fork_point)
+        contract.functions.mintQube(bob, "ipfs://canonical").transact({"from": minter})
+        chain.mine(3)
+
+        db, indexer._db = indexer._db, FailingDeletes(indexer._db)
+        with pytest.raises(RuntimeError):
+            indexer.sync()
+        indexer._db = db
+
+        assert not db.in_transaction
+        assert indexer.checkpoint == checkpoint
+        assert indexer.owner_of(1) == alice
+        assert indexer.sync()["reorgs"] == 1
+        assert indexer.owner_of(1) == bob
+
+    def test_rate_limited_queries_back_off_and_retry(self, chain, nft, tmp_path, monkeypatch):
+        address, contract = nft
+        contract.functions.mintQube(chain.web3.eth.accounts[1], "ipfs://a").transact({"from": chain.web3.eth.accounts[0]})
+        indexer = make_indexer(chain, tmp_path, [address], initial_range=1000)
+        delays = []
+        monkeypatch.setattr(log_indexer.time, "sleep", delays.append)
+        fetch = indexer._fetch
+        failures = iter([RPCError("Your app has exceeded its compute units per second capacity", 429)] * 2)
+
+        def throttled(start, stop):
+            error = next(failures, None)
+            if error:
+                raise error
+            return fetch(start, stop)
+
+        monkeypatch.setattr(indexer, "_fetch", throttled)
+        summary = indexer.sync()
+
+        assert summary["logs"] == 2 and len(delays) == 2
+        assert indexer.range == 1000
+
+    def test_rate_limits_give_up_after_the_retry_budget(self, chain, nft, tmp_path, monkeypatch):
+        indexer = make_indexer(chain, tmp_path, [nft[0]], rate_limit_retries=2)
+        monkeypatch.setattr(log_indexer.time, "sleep", lambda delay: None)
+
+        def throttled(start, stop):
+            raise RPCError("project ID request rate exceeded", -32005)
+
+        monkeypatch.setattr(indexer, "_fetch", throttled)
+        with pytest.raises(RPCError):
+            indexer.sync()
+
+    def test_error_classification(self):
+        response = requests.Response()
+        response.status_code = 429
+        assert LogIndexer._is_rate_limit(requests.HTTPError("429", response=response))
+        assert LogIndexer._is_rate_limit(RPCError("slow down", -32029))
+        assert not LogIndexer._is_rate_limit(RPCError("query returned more than 10000 results", -32005))
+
+        assert LogIndexer._is_range_error(RPCError("query returned more than 10000 results", -32005))
+        assert LogIndexer._is_range_error(RPCError("Log response size exceeded. You can make eth_getLogs requests..."))
+        assert LogIndexer._is_range_error(requests.Timeout())
+        for message in ("gas limit reached", "index out of range", "project ID request rate exceeded", "execution reverted"):
+            assert not LogIndexer._is_range_error(RPCError(message)), message
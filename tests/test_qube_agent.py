@@ -1,10 +1,14 @@
 import pytest
 import uuid
 import os
+import json
 from unittest.mock import Mock, patch
 from typing import Any, List
 
 from agents.qube_agent import QubeSmartAgent
+from agents import qube_agent
+from qube_agent.models.iqube_security import BlakQubeSecurityManager
+from tests.fixtures.ipfs_stub import IPFSStubServer
 from wallets.wallet_manager import WalletManager
 from qube_integrations.qube_handler import QubeHandler
 from qube_agent.utils.web_interface import WebInterfaceManager
@@ -213,6 +217,58 @@ class TestQubeSmartAgent:
         # Verify web interface logging
         web_interface.log_qube_processing.assert_called_once_with(token_id)
 
+@pytest.fixture
+def ipfs():
+    with IPFSStubServer() as server:
+        yield server
+
+@pytest.fixture
+def batch_agent(ipfs):
+    qube_handler = QubeHandler(ipfs_host=ipfs.host, ipfs_port=ipfs.port)
+    for i in range(2):
+        payload = json.dumps(BlakQubeSecurityManager.encrypt_data({"n": i})).encode()
+        qube_handler.register_token(f"token-{i}", ipfs.put(payload))
+    qube_handler.register_token("missing", "QmMissingBlock")
+    web_interface = WebInterfaceManager()
+    agent_id = web_interface.create_agent_dashboard()
+    with patch('agents.qube_agent.ChatOpenAI', MockChatModel):
+        agent = qube_agent.ConcreteQubeAgent(
+            wallet_manager=Mock(spec=WalletManager),
+            qube_handler=qube_handler,
+            web_interface=web_interface
+        )
+    return agent, agent_id
+
+class TestProcessQubes:
+    def test_batch_logs_successes_and_failures_distinctly(self, batch_agent):
+        agent, agent_id = batch_agent
+
+        results = agent.process_qubes(["token-0", "missing", "token-1"])
+
+        assert [r.get("data") for r in results] == [{"n": 0}, None, {"n": 1}]
+        logs = agent.web_interface.store.snapshot(agent_id)["qube_logs"]
+        assert [(log["token_id"], log["status"]) for log in logs] == [
+            ("token-0", "processed"), ("missing", "failed"), ("token-1", "processed")
+        ]
+        assert logs[0]["data"]["data"] == {"n": 0}
+        assert logs[1]["data"] is None and logs[1]["error"] == results[1]["error"]
+
+    def test_single_token_goes_through_decrypt_many(self, batch_agent, monkeypatch):
+        agent, agent_id = batch_agent
+        calls = []
+        decrypt_many = agent.qube_handler.decrypt_many
+        monkeypatch.setattr(
+            agent.qube_handler, "decrypt_many", lambda ids, **kwargs: calls.append(ids) or decrypt_many(ids, **kwargs)
+        )
+
+        assert agent.process_qube("token-1")["data"] == {"n": 1}
+        with pytest.raises(RuntimeError, match="missing"):
+            agent.process_qube("missing")
+
+        assert calls == [["token-1"], ["missing"]]
+        logs = agent.web_interface.store.snapshot(agent_id)["qube_logs"]
+        assert [log["status"] for log in logs] == ["processed", "failed"]
+
 def test_suite():
     """
     Placeholder for additional test suite configurations
@@ -0,0 +1,177 @@
+import json
+import mmap
+import os
+
+import pytest
+
+from qube_agent.models.iqube_security import BlakQubeSecurityManager
+from qube_integrations.block_cache import BlockCache
+from qube_integrations.qube_handler import QubeHandler
+from tests.fixtures.ipfs_stub import IPFSStubServer, content_cid
+
+BLOCK = content_cid(b"hello block")
+
+
+@pytest.fixture
+def ipfs():
+    with IPFSStubServer() as server:
+        yield server
+
+
+def _encrypted_payload(data):
+    return json.dumps(BlakQubeSecurityManager.encrypt_data(data)).encode()
+
+
+class TestBlockCache:
+    def test_round_trip_through_memory_map(self, tmp_path):
+        cache = BlockCache(str(tmp_path))
+        cache.put(BLOCK, b"hello block")
+
+        view = cache.get(BLOCK)
+
+        assert isinstance(view, memoryview)
+        assert view.readonly
+        assert bytes(view) == b"hello block"
+
+    def test_corrupt_block_is_discarded(self, tmp_path):
+        cache = BlockCache(str(tmp_path))
+        cache.put(BLOCK, b"hello block")
+        path = cache._path(BLOCK)
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"X")
+
+        assert cache.get(BLOCK) is None
+        assert BLOCK not in cache
+        assert not os.path.exists(path)
+        assert cache.stats()["corrupt"] == 1
+
+    def test_lru_eviction_respects_size_bound(self, tmp_path):
+        cache = BlockCache(str(tmp_path), max_bytes=30)
+        a, b, c, d = (content_cid(name) for name in (b"a", b"b", b"c", b"d"))
+        for name in (a, b, c):
+            cache.put(name, b"x" * 10)
+        cache.get(a)
+        cache.put(d, b"x" * 10)
+
+        assert a in cache
+        assert b not in cache
+        assert cache.total_bytes == 30
+
+    def test_index_survives_restart(self, tmp_path):
+        BlockCache(str(tmp_path)).put(BLOCK, b"persisted")
+
+        assert BlockCache(str(tmp_path)).get_bytes(BLOCK) == b"persisted"
+
+    @pytest.mark.parametrize("cid", [
+        "../../etc/passwd",
+        "Qm" + "1" * 43 + "/",
+        "QmShort",
+        "Qm0OIl" + "a" * 40,
+        "bafy/../" + "a" * 50,
+        "BAFYBEI" + "A" * 52,
+        "",
+    ])
+    def test_rejects_keys_that_are_not_cids(self, tmp_path, cid):
+        cache = BlockCache(str(tmp_path))
+
+        with pytest.raises(ValueError):
+            cache.put(cid, b"payload")
+        assert cache.get(cid) is None
+        assert os.listdir(tmp_path) == []
+
+    def test_accepts_cidv0_and_base32_cidv1(self, tmp_path):
+        cache = BlockCache(str(tmp_path))
+        cidv1 = "bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi"
+        cache.put(BLOCK, b"v0")
+        cache.put(cidv1, b"v1")
+
+        reopened = BlockCache(str(tmp_path))
+        assert reopened.get_bytes(BLOCK) == b"v0"
+        assert reopened.get_bytes(cidv1) == b"v1"
+
+
+class TestQubeHandlerCaching:
+    def test_hot_token_is_fetched_from_ipfs_once(self, ipfs, tmp_path):
+        cid = ipfs.put(_encrypted_payload({"firstName": "Ada"}))
+        handler = QubeHandler(
+            ipfs_host=ipfs.host, ipfs_port=ipfs.port, block_cache=BlockCache(str(tmp_path))
+        )
+        handler.register_token("token-1", cid)
+
+        results = [handler.decrypt("token-1") for _ in range(5)]
+
+        assert all(r["data"] == {"firstName": "Ada"} for r in results)
+        assert ipfs.requests["cat"] == 1
+
+    def test_cached_blocks_serve_decrypts_without_ipfs(self, ipfs, tmp_path):
+        cid = ipfs.put(_encrypted_payload({"firstName": "Ada"}))
+        warm = QubeHandler(
+            ipfs_host=ipfs.host, ipfs_port=ipfs.port, block_cache=BlockCache(str(tmp_path))
+        )
+        warm.fetch(cid)
+        ipfs.stop()
+
+        offline = QubeHandler(
+            ipfs_host="127.0.0.1", ipfs_port=1, block_cache=BlockCache(str(tmp_path)),
+            cid_resolver={"token-1": cid}.get
+        )
+
+        assert offline.ipfs_client is None
+        assert offline.decrypt("token-1")["data"] == {"firstName": "Ada"}
+
+    def test_cache_hits_are_served_from_the_memory_map(self, ipfs, tmp_path):
+        content = _encrypted_payload({"firstName": "Ada"})
+        cid = ipfs.put(content)
+        handler = QubeHandler(
+            ipfs_host=ipfs.host, ipfs_port=ipfs.port, block_cache=BlockCache(str(tmp_path))
+        )
+
+        missed = handler.fetch(cid)
+        hit = handler.fetch(cid)
+
+        assert missed == hit == content
+        assert isinstance(hit.obj, mmap.mmap)
+        assert hit.readonly
+
+    def test_uncacheable_cids_bypass_the_cache(self, ipfs, tmp_path):
+        content = _encrypted_payload({"firstName": "Ada"})
+        ipfs.blocks["zb2rhe5P4gXftAwvA4eXQ5HJwsER2owDyS9sKaQRRVQPn93bA"] = content
+        handler = QubeHandler(
+            ipfs_host=ipfs.host, ipfs_port=ipfs.port, block_cache=BlockCache(str(tmp_path))
+        )
+
+        assert handler.fetch("zb2rhe5P4gXftAwvA4eXQ5HJwsER2owDyS9sKaQRRVQPn93bA") == content
+        assert handler.block_cache.stats()["blocks"] == 0
+
+    def test_unknown_token_keeps_placeholder(self, ipfs):
+        handler = QubeHandler(ipfs_host=ipfs.host, ipfs_port=ipfs.port)
+
+        assert handler.decrypt("unknown")["data"] == "Placeholder decrypted content"
+        assert ipfs.requests["cat"] == 0
+
+
+class TestDecryptMany:
+    def test_results_keep_order_and_report_per_item_errors(self, ipfs):
+        handler = QubeHandler(ipfs_host=ipfs.host, ipfs_port=ipfs.port)
+        for i in range(3):
+            handler.register_token(f"token-{i}", ipfs.put(_encrypted_payload({"n": i})))
+        handler.register_token("missing", "QmMissingBlock")
+
+        results = handler.decrypt_many(["token-2", "missing", "token-0", "token-2", "token-1"])
+
+        assert [r["token_id"] for r in results] == ["token-2", "missing", "token-0", "token-2", "token-1"]
+        assert [r.get("data") for r in results] == [{"n": 2}, None, {"n": 0}, {"n": 2}, {"n": 1}]
+        assert "error" in results[1]
+        assert results[0] is not results[3]
+
+    def test_duplicate_tokens_and_shared_cids_fetch_once(self, ipfs):
+        cid = ipfs.put(_encrypted_payload({"shared": True}))
+        handler = QubeHandler(ipfs_host=ipfs.host, ipfs_port=ipfs.port)
+        handler.register_token("a", cid)
+        handler.register_token("b", cid)
+
+        results = handler.decrypt_many(["a", "b", "a", "b"], max_workers=4)
+
+        assert all(r["data"] == {"shared": True} for r in results)
+        assert ipfs.requests["cat"] == 1
@@ -0,0 +1,106 @@
+import gzip
+
+import pytest
+
+import app as qube_app
+from qube_agent.utils.static_assets import IMMUTABLE, PageCache, StaticAssets, asset_response
+
+SCRIPT = b"console.log('qube');\n" * 200
+
+
+@pytest.fixture
+def assets(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_bytes(SCRIPT)
+    (tmp_path / "favicon.ico").write_bytes(b"\0" * 2000)
+    return StaticAssets(str(tmp_path))
+
+
+@pytest.fixture
+def client():
+    qube_app.app.config['TESTING'] = True
+    return qube_app.app.test_client()
+
+
+class TestStaticAssets:
+    def test_urls_are_content_hashed(self, assets, tmp_path):
+        url = assets.url("js/app.js")
+        asset, hashed = assets.lookup(url[len("/static/"):])
+
+        assert url.startswith("/static/js/app.") and url.endswith(".js")
+        assert hashed and asset.body == SCRIPT
+        assert assets.lookup("js/app.js") == (asset, False)
+        assert assets.url("missing.css") == "/static/missing.css"
+
+        (tmp_path / "js" / "app.js").write_bytes(SCRIPT + b"//changed")
+        assets.reload()
+        assert assets.url("js/app.js") != url
+
+    def test_only_compressible_types_get_variants(self, assets):
+        script, _ = assets.lookup("js/app.js")
+        icon, _ = assets.lookup("favicon.ico")
+
+        assert gzip.decompress(script.encoded["gzip"]) == SCRIPT
+        assert icon.encoded == {}
+
+    def test_precompressed_files_are_used(self, tmp_path):
+        (tmp_path / "app.js").write_bytes(SCRIPT)
+        (tmp_path / "app.js.gz").write_bytes(b"prebuilt")
+
+        assets = StaticAssets(str(tmp_path))
+
+        assert assets.lookup("app.js")[0].encoded["gzip"] == b"prebuilt"
+        assert assets.lookup("app.js.gz") == (None, False)
+
+    def test_conditional_and_encoded_responses(self, assets):
+        asset, _ = assets.lookup("js/app.js")
+
+        status, headers, body = asset_response(asset, IMMUTABLE, "gzip;q=1.0, identity;q=0.5")
+        assert status == 200
+        assert headers["Content-Encoding"] == "gzip"
+        assert headers["Vary"] == "Accept-Encoding"
+        assert headers["Content-Length"] == str(len(body)) and len(body) < len(SCRIPT)
+
+        status, plain_headers, body = asset_response(asset, IMMUTABLE, "gzip;q=0")
+        assert "Content-Encoding" not in plain_headers and body == SCRIPT
+
+        status, _, body = asset_response(asset, IMMUTABLE, "gzip", if_none_match=f'W/{headers["ETag"]}')
+        assert status == 304 and body == b""
+
+    def test_page_cache_renders_once(self):
+        renders = []
+        cache = PageCache()
+
+        def render():
+            renders.append(1)
+            return "<html>" + "x" * 2000 + "</html>"
+
+        first = cache.get_or_render("index.html", render)
+        assert cache.get_or_render("index.html", render) is first
+        assert len(renders) == 1
+
+
+class TestAppStaticRoutes:
+    def test_index_links_hashed_assets_and_revalidates(self, client):
+        response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        html = gzip.decompress(response.data).decode()
+        assert qube_app.static_assets.url('js/ethers.min.js') in html
+
+        again = client.get('/', headers={'If-None-Match': response.headers['ETag']})
+        assert again.status_code == 304
+
+    def test_hashed_asset_is_immutable(self, client):
+        url = qube_app.static_assets.url('js/ethers.min.js')
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+        plain = client.get('/static/js/ethers.min.js')
+
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == IMMUTABLE
+        assert int(response.headers['Content-Length']) < int(plain.headers['Content-Length'])
+        assert plain.headers['Cache-Control'] == 'no-cache'
+        assert client.get('/static/no-such-file.js').status_code == 404
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from services.metame_runtime.batch_planner import BatchSurfacePlanner, PlanRequest
+from services.metame_runtime.catalogue import compile_catalogue
+from services.metame_runtime.models.content_module_render_profile import Density
+from services.metame_runtime.models.surface_plan import Ref, VerificationRefs
+from services.metame_runtime.plan_cache import PlanTemplateCache
+from services.metame_runtime.plan_serializer import dumps_plan
+from services.metame_runtime.profile_compiler import clear_compiled_profiles
+from services.metame_runtime.surface_selector import build_surface_plan_v0
+from tests.fixtures.surface_plan_generators import random_context, random_modules, random_profiles
+
+VERIFICATION = VerificationRefs(
+    dis_ref=Ref(kind="doc_ref", id="dis:qriptopian:v0"),
+    constraint_manifest_ref=Ref(kind="doc_ref", id="constraints:qriptopian:v0"),
+    parity_report_ref=Ref(kind="doc_ref", id="parity:pending"),
+)
+
+DENSITY_ORDER = {d.value: i for i, d in enumerate(Density)}
+
+SEEDS = range(40)
+
+
+def scenario(seed):
+    rng = random.Random(seed)
+    profiles = random_profiles(rng, rng.randint(1, 12))
+    modules = random_modules(rng, profiles, rng.randint(1, 30))
+    contexts = [random_context(rng) for _ in range(8)]
+    return modules, contexts
+
+
+def build(modules, device, intent, **kwargs):
+    return build_surface_plan_v0(
+        plan_id="plan_1",
+        session_id="sess_1",
+        cartridge="Qriptopian",
+        intent=intent,
+        device_context=device,
+        modules=modules,
+        verification=VERIFICATION,
+        **kwargs,
+    )
+
+
+def density_bounds(profile, device):
+    """Density bounds for a device, derived from the profile model rather than the compiler."""
+    constraints = profile.profile.density_constraints
+    bounds = constraints
+    for override in constraints.per_device_overrides or []:
+        if override.device == device.device_class and override.orientation in (None, device.orientation, "any"):
+            bounds = override
+            break
+    lo, hi = DENSITY_ORDER[bounds.min.value], DENSITY_ORDER[bounds.max.value]
+    if device.real_estate == "xs":
+        hi = min(hi, DENSITY_ORDER["standard"])
+    # A minimum above the (nudged) maximum wins
+    return lo, max(lo, hi)
+
+
+class TestDeterminism:
+    @pytest.mark.parametrize("seed", SEEDS)
+    def test_same_inputs_give_identical_bytes_on_every_path(self, seed):
+        modules, contexts = scenario(seed)
+        for device, intent in contexts:
+            expected = dumps_plan(build(modules, device, intent, plan_cache=None))
+            assert dumps_plan(build(modules, device, intent)) == expected
+            assert dumps_plan(build(modules, device, intent)) == expected
+            assert dumps_plan(build(modules, device, intent, plan_cache=PlanTemplateCache(maxsize=1))) == expected
+            assert dumps_plan(build(modules, device, intent, validate=True)) == expected
+
+    @pytest.mark.parametrize("seed", SEEDS[:10])
+    def test_fresh_compilers_and_batches_agree(self, seed):
+        modules, contexts = scenario(seed)
+        expected = [dumps_plan(build(modules, device, intent, plan_cache=None)) for device, intent in contexts]
+
+        clear_compiled_profiles()
+        assert [dumps_plan(build(modules, d, i, plan_cache=None)) for d, i in reversed(contexts)] == expected[::-1]
+
+        planner = BatchSurfacePlanner(cartridge="Qriptopian", modules=modules, verification=VERIFICATION)
+        requests = [
+            PlanRequest(plan_id="plan_1", session_id="sess_1", intent=intent, device_context=device)
+            for device, intent in contexts
+        ]
+        assert [dumps_plan(p) for p in planner.plan(requests)] == expected
+
+
+class TestInvariants:
+    @pytest.mark.parametrize("seed", SEEDS)
+    def test_density_stays_within_profile_bounds(self, seed):
+        modules, contexts = scenario(seed)
+        matrix = compile_catalogue(snapshot_dir=None).matrix
+        for device, intent in contexts:
+            for kwargs in ({}, {"matrix": matrix}):
+                plan = build(modules, device, intent, **kwargs)
+                for module, placement in zip(modules, plan.placements):
+                    lo, hi = density_bounds(module["render_profile"], device)
+                    assert lo <= DENSITY_ORDER[placement.density.value] <= hi, (module["module_type"], placement)
+
+    @pytest.mark.parametrize("seed", SEEDS)
+    def test_one_placement_per_module_in_order(self, seed):
+        modules, contexts = scenario(seed)
+        for device, intent in contexts:
+            plan = build(modules, device, intent)
+            assert [p.module_id for p in plan.placements] == [m["module_id"] for m in modules]
+            assert [p.order for p in plan.placements] == list(range(len(modules)))
+            for placement in plan.placements:
+                if placement.interaction is not None:
+                    assert placement.interaction.opens.value != placement.surface.value
@@ -0,0 +1,706 @@
+import json
+import os
+import pickle
+import time
+import warnings
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from services.metame_runtime import surface_selector
+from services.metame_runtime.models import ContentModuleRenderProfileV0, SurfacePlanV0
+from services.metame_runtime.models.surface_plan import AuditRefs, DeviceContext, Intent, Ref, VerificationRefs
+from services.metame_runtime.batch_planner import (
+    TABLE_COLUMNS,
+    BatchPlanningPool,
+    BatchSurfacePlanner,
+    PlanRequest,
+)
+from services.metame_runtime.catalogue import (
+    DEFAULT_MATRIX_PATH,
+    DEFAULT_PROFILES_PATH,
+    ProfileCatalogue,
+    clear_catalogues,
+    compile_catalogue,
+    load_catalogue,
+)
+from services.metame_runtime.matrix_selector import CompiledMatrix
+from services.metame_runtime.models import SurfaceDecisionMatrixV0
+from services.metame_runtime.plan_cache import PlanTemplateCache
+from services.metame_runtime.plan_serializer import KEY_ORDERS, dumps_plan, iter_plan_json
+from services.metame_runtime.plan_tracing import PlanTracer, get_tracer, set_tracer
+from services.metame_runtime.profile_compiler import (
+    DEVICE_CLASSES,
+    MODES,
+    ORIENTATIONS,
+    SURFACE_BITS,
+    CompiledProfile,
+    DensityCode,
+    ProfileCompiler,
+    SurfaceCode,
+    _clamp_density,
+    _ladder_opens,
+    clear_compiled_profiles,
+    compile_profile,
+)
+from services.metame_runtime.surface_selector import build_surface_plan_v0
+
+PROFILES_PATH = Path(__file__).resolve().parents[1] / "configs" / "qriptopian" / "module_render_profiles.v0.json"
+
+VERIFICATION = VerificationRefs(
+    dis_ref=Ref(kind="doc_ref", id="dis:qriptopian:v0"),
+    constraint_manifest_ref=Ref(kind="doc_ref", id="constraints:qriptopian:v0"),
+    parity_report_ref=Ref(kind="doc_ref", id="parity:pending"),
+)
+
+
+@pytest.fixture(scope="module")
+def profiles():
+    raw = json.loads(PROFILES_PATH.read_text())
+    return {p["module_type"]: ContentModuleRenderProfileV0.model_validate(p) for p in raw}
+
+
+def make_profile(**profile):
+    base = {
+        "primary_modality": "text",
+        "interaction_style": "read",
+        "preferred_surfaces": ["embed"],
+        "allowed_surfaces": ["embed", "drawer", "overlay"],
+        "density_constraints": {"min": "compact", "preferred": "standard", "max": "expanded"},
+    }
+    base.update(profile)
+    return ContentModuleRenderProfileV0.model_validate({
+        "schema_version": "0.1.0", "module_type": "Test.Module", "display_name": "Test", "profile": base,
+    })
+
+
+def plan(profiles, device, mode="be", plan_id="plan_1", session_id="sess_1", **kwargs):
+    modules = [
+        {"module_id": f"{session_id}_mod_{i}", "module_type": module_type, "render_profile": profile}
+        for i, (module_type, profile) in enumerate(profiles.items())
+    ]
+    return build_surface_plan_v0(
+        plan_id=plan_id,
+        session_id=session_id,
+        cartridge="Qriptopian",
+        intent=Intent(user_ask="test", mode=mode),
+        device_context=device,
+        modules=modules,
+        verification=VERIFICATION,
+        **kwargs,
+    )
+
+
+MOBILE = DeviceContext(device_class="mobile", orientation="portrait", interaction="touch", real_estate="s")
+DESKTOP = DeviceContext(device_class="desktop", orientation="any", interaction="pointer", real_estate="l")
+
+
+class TestSurfacePlan:
+    def test_golden_path_profiles_plan(self, profiles):
+        result = plan(profiles, MOBILE, mode="make")
+
+        assert result.schema_version == "0.1.0"
+        assert len(result.placements) == len(profiles)
+        tags = result.placements[0].reasoning_tags
+        assert tags[-1] == "device:mobile/portrait/s"
+        assert all("." not in tag.split(":", 1)[1] for tag in tags)
+
+    def test_responsive_rules_chain_on_the_running_surface(self, profiles):
+        # mobile + embed promotes to drawer, then drawer + standard collapses
+        profile = make_profile(
+            responsive_rules=[
+                {"when": {"device": "mobile", "surface": "embed"}, "then": {"action": "promote_to_drawer"}},
+                {"when": {"surface": "drawer", "density": "standard"}, "then": {"action": "collapse_sections"}},
+                {"when": {"surface": "drawer"}, "then": {"action": "truncate_text", "params": {"max_lines": 3}}},
+            ]
+        )
+
+        (mobile,) = plan({"Test.Module": profile}, MOBILE).placements
+        (desktop,) = plan({"Test.Module": profile}, DESKTOP).placements
+
+        assert (mobile.surface, mobile.region) == ("drawer", "secondary")
+        assert mobile.overrides.collapse_sections and mobile.overrides.max_lines == 3
+        assert mobile.interaction.opens == "overlay" and mobile.interaction.open_density == "full"
+        assert desktop.surface == "embed" and desktop.overrides is None
+
+    def test_trusted_construction_matches_validated_plans(self, profiles):
+        trusted = plan(profiles, MOBILE, mode="make", plan_cache=None, validate=False)
+        validated = plan(profiles, MOBILE, mode="make", plan_cache=None, validate=True)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert trusted.model_dump_json() == validated.model_dump_json()
+        assert trusted == validated
+        assert trusted.model_fields_set == validated.model_fields_set
+        assert SurfacePlanV0.model_validate(trusted.model_dump()) == validated
+
+    def test_validate_flag_surfaces_bad_input(self, profiles, monkeypatch):
+        bad_refs = [{"kind": "doc_ref"}]
+        modules = [{"module_id": "m", "module_type": "Test.Module", "render_profile": make_profile(),
+                    "source_refs": bad_refs}]
+        kwargs = dict(plan_id="p", session_id="s", cartridge="Qriptopian", intent=Intent(user_ask="t", mode="be"),
+                      device_context=MOBILE, modules=modules, verification=VERIFICATION)
+
+        with pytest.raises(ValidationError):
+            build_surface_plan_v0(**kwargs)
+        with pytest.raises(ValidationError):
+            build_surface_plan_v0(validate=True, **kwargs)
+        monkeypatch.setattr(surface_selector, "VALIDATE_PLANS", True)
+        with pytest.raises(ValidationError):
+            build_surface_plan_v0(**kwargs)
+        with pytest.raises(ValidationError):
+            build_surface_plan_v0(**{**kwargs, "modules": [{**modules[0], "source_refs": []}], "plan_id": 7})
+
+    def test_trusted_path_coerces_caller_dicts(self):
+        modules = [{"module_id": "m", "module_type": "Test.Module", "render_profile": make_profile(),
+                    "source_refs": [{"kind": "uri_ref", "id": "ipfs://1"}]}]
+        audit = {"trace_id": "t", "span_id": "s", "actor": "a", "event_hashes": ["0x01"]}
+        kwargs = dict(plan_id="p", session_id="s", cartridge="Qriptopian", modules=modules, plan_cache=None)
+
+        from_dicts = build_surface_plan_v0(
+            intent={"user_ask": "t", "mode": "be"}, device_context=MOBILE.model_dump(),
+            verification=VERIFICATION.model_dump(), audit=audit, **kwargs,
+        )
+        validated = build_surface_plan_v0(
+            intent=Intent(user_ask="t", mode="be"), device_context=MOBILE, verification=VERIFICATION,
+            audit=AuditRefs(**audit), validate=True, **kwargs,
+        )
+
+        assert from_dicts == validated
+        assert isinstance(from_dicts.verification, VerificationRefs)
+        assert isinstance(from_dicts.modules[0].source_refs[0], Ref)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert dumps_plan(from_dicts) == validated.model_dump_json().encode()
+
+    def test_density_overrides_and_xs_nudge(self):
+        profile = make_profile(
+            density_constraints={
+                "min": "compact", "preferred": "expanded", "max": "full",
+                "per_device_overrides": [
+                    {"device": "mobile", "orientation": "landscape", "min": "micro", "preferred": "micro", "max": "compact"},
+                ],
+            }
+        )
+        landscape = MOBILE.model_copy(update={"orientation": "landscape"})
+        xs = MOBILE.model_copy(update={"real_estate": "xs"})
+
+        assert plan({"m": profile}, MOBILE).placements[0].density == "expanded"
+        assert plan({"m": profile}, landscape).placements[0].density == "micro"
+        assert plan({"m": profile}, xs).placements[0].density == "standard"
+
+
+class TestProfileCompiler:
+    def test_context_axes_follow_the_models(self):
+        assert DEVICE_CLASSES == ("mobile", "tablet", "desktop", "large_screen")
+        assert ORIENTATIONS == ("portrait", "landscape", "any")
+        assert MODES == ("be", "make", "play", "earn", "share")
+        for mode in MODES:
+            Intent(user_ask="t", mode=mode)
+
+    def test_masks_and_tables(self):
+        compiled = compile_profile(make_profile(disallowed_surfaces=["overlay"]))
+
+        embed, drawer, overlay = SurfaceCode.embed, SurfaceCode.drawer, SurfaceCode.overlay
+        assert compiled.allowed_mask == SURFACE_BITS[embed] | SURFACE_BITS[drawer] | SURFACE_BITS[overlay]
+        assert compiled.usable_mask == SURFACE_BITS[embed] | SURFACE_BITS[drawer]
+        assert compiled.surfaces[("desktop", "be")] == embed
+        assert compiled.surfaces[("desktop", "share")] == drawer
+        # make promotes one step; overlay is disallowed, drawer is not
+        assert compiled.surfaces[("mobile", "make")] == drawer
+        assert compiled.densities[("tablet", "portrait", False)] == (
+            DensityCode.compact, DensityCode.standard, DensityCode.expanded, DensityCode.standard,
+        )
+        assert compiled.rules is None
+
+    def test_ladder_and_clamp_are_arithmetic_on_codes(self):
+        everything = sum(SURFACE_BITS)
+
+        assert [_ladder_opens(s, everything) for s in SurfaceCode] == [1, 2, 3, None]
+        assert _ladder_opens(SurfaceCode.embed, everything & ~SURFACE_BITS[SurfaceCode.drawer]) is None
+        assert _clamp_density(DensityCode.full, DensityCode.micro, DensityCode.standard) == DensityCode.standard
+        assert _clamp_density(DensityCode.micro, DensityCode.compact, DensityCode.full) == DensityCode.compact
+
+    def test_compiled_profiles_are_memoised_per_contents(self):
+        compiler = ProfileCompiler(maxsize=2)
+        first, fresh = make_profile(), make_profile()
+        other, third = make_profile(preferred_surfaces=["drawer"]), make_profile(preferred_surfaces=["overlay"])
+
+        compiled = compiler.compile(first)
+        assert compiler.compile(first) is compiled
+        # A freshly validated copy of the same profile reuses the compiled form
+        assert compiler.compile(fresh) is compiled
+        assert compiler.compile(other) is not compiled
+
+        compiler.compile(third)
+        assert compiler.compile(make_profile()) is not compiled
+
+    def test_tables_are_filled_on_lookup(self):
+        compiled = CompiledProfile(make_profile(responsive_rules=[{"then": {"action": "hide_media"}}]))
+
+        assert len(compiled.surfaces) == len(compiled.densities) == len(compiled.rules) == 0
+        assert compiled.apply_rules("mobile", "portrait", SurfaceCode.embed, DensityCode.standard)[2] == (
+            None, None, True,
+        )
+        assert len(compiled.rules) == 1
+
+        restored = pickle.loads(pickle.dumps(compiled))
+        assert restored.rules == compiled.rules
+        assert restored.surfaces[("desktop", "share")] == SurfaceCode.drawer
+
+    def test_freshly_validated_profiles_hit_the_plan_cache(self):
+        cache = PlanTemplateCache()
+
+        plan({"m": make_profile()}, MOBILE, plan_cache=cache)
+        plan({"m": make_profile()}, MOBILE, plan_cache=cache)
+
+        assert cache.stats()["hits"] == 1
+
+
+class TestPlanTemplateCache:
+    def test_requests_reuse_the_skeleton_and_stamp_their_ids(self, profiles):
+        cache = PlanTemplateCache()
+
+        first = plan(profiles, MOBILE, plan_cache=cache)
+        second = plan(profiles, MOBILE, plan_id="plan_2", session_id="sess_2", plan_cache=cache)
+        uncached = plan(profiles, MOBILE, plan_id="plan_2", session_id="sess_2", plan_cache=None)
+
+        assert cache.stats()["hits"] == 1 and cache.stats()["hit_rate"] == 0.5
+        assert (second.plan_id, second.session_id) == ("plan_2", "sess_2")
+        assert second.placements[0].module_id == "sess_2_mod_0"
+        assert second.model_dump() == uncached.model_dump()
+        assert [p.surface for p in first.placements] == [p.surface for p in second.placements]
+        # Stamped placements are independent objects
+        second.placements[0].reasoning_tags.append("edited")
+        assert "edited" not in plan(profiles, MOBILE, plan_cache=cache).placements[0].reasoning_tags
+
+    def test_context_and_mode_are_part_of_the_key(self, profiles):
+        cache = PlanTemplateCache()
+
+        plan(profiles, MOBILE, plan_cache=cache)
+        plan(profiles, MOBILE, mode="share", plan_cache=cache)
+        plan(profiles, DESKTOP, plan_cache=cache)
+
+        assert cache.stats()["misses"] == 3
+
+    def test_replaced_profile_invalidates_its_skeletons(self):
+        cache = PlanTemplateCache()
+        old = make_profile(preferred_surfaces=["embed"])
+        new = make_profile(preferred_surfaces=["drawer"])
+
+        assert plan({"Test.Module": old}, DESKTOP, plan_cache=cache).placements[0].surface == "embed"
+        assert plan({"Test.Module": new}, DESKTOP, plan_cache=cache).placements[0].surface == "drawer"
+        assert cache.stats()["invalidations"] == 1
+
+    def test_lru_eviction_and_explicit_invalidation(self, profiles):
+        cache = PlanTemplateCache(maxsize=2)
+        for mode in ("be", "make", "play"):
+            plan(profiles, MOBILE, mode=mode, plan_cache=cache)
+
+        assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+        assert cache.invalidate("metaMe.ShareGate") == 2
+        assert cache.invalidate("metaMe.ShareGate") == 0
+
+
+def batch(profiles):
+    modules = [
+        {"module_id": f"mod_{i}", "module_type": module_type, "render_profile": profile}
+        for i, (module_type, profile) in enumerate(profiles.items())
+    ]
+    return {"cartridge": "Qriptopian", "modules": modules, "verification": VERIFICATION}
+
+
+def requests_for(count):
+    devices = [MOBILE, DESKTOP]
+    modes = ["be", "make", "share"]
+    return [
+        PlanRequest(
+            plan_id=f"plan_{i}",
+            session_id=f"sess_{i}",
+            intent=Intent(user_ask="test", mode=modes[i % len(modes)]),
+            device_context=devices[i % len(devices)],
+        )
+        for i in range(count)
+    ]
+
+
+class TestBatchSurfacePlanner:
+    def test_batch_plans_match_single_plans(self, profiles):
+        planner = BatchSurfacePlanner(**batch(profiles))
+        requests = requests_for(12)
+
+        plans = planner.plan(requests)
+
+        assert len(plans) == 12 and len(planner._skeletons) == 6
+        for request, result in zip(requests, plans):
+            single = build_surface_plan_v0(
+                plan_id=request.plan_id,
+                session_id=request.session_id,
+                intent=request.intent,
+                device_context=request.device_context,
+                plan_cache=None,
+                **batch(profiles),
+            )
+            assert result.model_dump() == single.model_dump()
+
+    def test_table_has_one_row_per_placement(self, profiles):
+        planner = BatchSurfacePlanner(**batch(profiles))
+        requests = requests_for(4)
+
+        table = planner.table(requests)
+        plans = planner.plan(requests)
+
+        rows = len(requests) * len(profiles)
+        assert set(table) == set(TABLE_COLUMNS)
+        assert all(len(column) == rows for column in table.values())
+        placements = [p for result in plans for p in result.placements]
+        assert table["surface"] == [p.surface for p in placements]
+        assert table["density"] == [p.density for p in placements]
+        assert table["opens"] == [p.interaction.opens if p.interaction else None for p in placements]
+        assert table["plan_id"][len(profiles)] == "plan_1"
+
+    def test_pool_matches_inline_planner(self, profiles):
+        requests = requests_for(6)
+        inline = BatchSurfacePlanner(**batch(profiles))
+
+        with BatchPlanningPool(max_workers=2, chunk_size=2, **batch(profiles)) as pool:
+            plans = pool.plan(requests)
+            table = pool.table(requests)
+
+        assert [p.model_dump() for p in plans] == [p.model_dump() for p in inline.plan(requests)]
+        assert table == inline.table(requests)
+
+
+class TestPlanSerializer:
+    def test_output_matches_model_dump_json(self, profiles):
+        modules = [
+            {"module_id": "m_0", "module_type": "Test.Module", "render_profile": make_profile(),
+             "source_refs": [Ref(kind="uri_ref", id="ipfs://q\u00fcbe \"1\"")]},
+        ]
+        full = build_surface_plan_v0(
+            plan_id="plan_1", session_id="sess_1", cartridge="Qriptopian", codex_id="codex_1",
+            intent=Intent(user_ask="caf\u00e9\n\u2028", mode="make", focus="reading"),
+            device_context=MOBILE, modules=modules, verification=VERIFICATION,
+            audit=AuditRefs(trace_id="t", span_id="s", actor="a", event_hashes=["0x01"]),
+        )
+
+        for result in (full, plan(profiles, MOBILE), plan(profiles, DESKTOP, validate=True)):
+            assert dumps_plan(result) == result.model_dump_json().encode()
+            assert b"".join(iter_plan_json(result, chunk_size=3)) == dumps_plan(result)
+
+    def test_key_orders_follow_the_models(self):
+        for model, keys in KEY_ORDERS.items():
+            assert keys == tuple(model.model_fields)
+
+    def test_compact_omits_null_interaction_and_overrides(self, profiles):
+        result = plan(profiles, MOBILE)
+
+        full = json.loads(dumps_plan(result))
+        compact = json.loads(dumps_plan(result, compact=True))
+
+        for a, b in zip(full["placements"], compact["placements"]):
+            expected = {key: value for key, value in a.items() if value is not None}
+            if expected.get("overrides"):
+                expected["overrides"] = {k: v for k, v in expected["overrides"].items() if v is not None}
+            assert b == expected
+        assert {k: v for k, v in compact.items() if k != "placements"} == {
+            k: v for k, v in full.items() if k != "placements"
+        }
+
+
+def make_matrix(**matrix):
+    base = {"schema_version": "0.1.0", "cartridge": "Qriptopian"}
+    base.update(matrix)
+    return CompiledMatrix(SurfaceDecisionMatrixV0.model_validate(base))
+
+
+class TestDecisionMatrix:
+    def test_qriptopian_matrix_rules(self, profiles):
+        catalogue = compile_catalogue(snapshot_dir=None)
+
+        shared = plan(profiles, DESKTOP, mode="share", matrix=catalogue.matrix)
+        for p in shared.placements:
+            if "drawer" in profiles[next(m.module_type for m in shared.modules if m.module_id == p.module_id)].profile.allowed_surfaces:
+                assert p.surface == "drawer"
+
+        played = plan(profiles, MOBILE, mode="play", matrix=catalogue.matrix)
+        assert any("matrix_rule:play_promote_one_step" in p.reasoning_tags for p in played.placements)
+        for p in played.placements:
+            if p.surface == "overlay":
+                assert "autofix:overlay_default_density" in p.reasoning_tags
+        assert played.navigation.progression == ["liquid_ui", "embed", "drawer", "overlay"]
+
+    def test_priority_order_and_override_actions(self):
+        profile = make_profile()
+        matrix = make_matrix(surface_rules=[
+            {"id": "late", "priority": 1, "when": {"mode": "make"}, "then": {"action": "force_density", "params": {"density": "compact"}}},
+            {"id": "early", "priority": 5, "when": {"mode": "make"}, "then": {"action": "force_density", "params": {"density": "full"}}},
+            {"id": "media", "when": {"device_class": "mobile"}, "then": {"action": "hide_media"}},
+            {"id": "lines", "when": {"region": "secondary"}, "then": {"action": "truncate_text", "params": {"max_lines": 3}}},
+            {"id": "desktop_only", "when": {"device_class": "desktop"}, "then": {"action": "collapse_sections"}},
+        ])
+        modules = [{"module_id": "m_0", "module_type": "Test.Module", "render_profile": profile}]
+
+        result = build_surface_plan_v0(
+            plan_id="plan_1", session_id="sess_1", cartridge="Qriptopian", intent=Intent(user_ask="t", mode="make"),
+            device_context=MOBILE, modules=modules, verification=VERIFICATION, matrix=matrix,
+        )
+
+        placement = result.placements[0]
+        assert placement.density == "compact"
+        assert placement.overrides.model_dump() == {"max_lines": 3, "collapse_sections": None, "hide_media": True}
+        assert [t for t in placement.reasoning_tags if t.startswith("matrix_rule:")] == [
+            "matrix_rule:media", "matrix_rule:lines", "matrix_rule:early", "matrix_rule:late",
+        ]
+
+    def test_device_bias_orders_the_fallback(self):
+        profile = make_profile(preferred_surfaces=["liquid_ui"], allowed_surfaces=["embed", "drawer", "overlay"])
+        modules = [{"module_id": "m_0", "module_type": "Test.Module", "render_profile": profile}]
+
+        def surface(matrix):
+            result = build_surface_plan_v0(
+                plan_id="plan_1", session_id="sess_1", cartridge="Qriptopian", intent=Intent(user_ask="t", mode="be"),
+                device_context=DESKTOP, modules=modules, verification=VERIFICATION, matrix=matrix,
+            )
+            return result.placements[0].surface
+
+        assert surface(make_matrix(device_surface_bias={"desktop": ["overlay", "drawer"]})) == "overlay"
+        assert surface(make_matrix(device_surface_bias={"desktop": ["drawer", "overlay"]})) == "drawer"
+        with pytest.raises(ValueError):
+            make_matrix(device_surface_bias={"watch": ["embed"]})
+
+
+class TestCatalogue:
+    def test_snapshot_roundtrip(self, tmp_path, profiles):
+        built = compile_catalogue(snapshot_dir=tmp_path)
+        (snapshot,) = tmp_path.glob("catalogue-*.pickle")
+        assert built.digest in snapshot.name
+
+        loaded = compile_catalogue(snapshot_dir=tmp_path)
+        assert loaded is not built
+        assert loaded.digest == built.digest
+        assert set(loaded.profiles) == set(profiles)
+        modules = [{"module_id": f"m_{i}", "module_type": t} for i, t in enumerate(profiles)]
+        kwargs = dict(
+            plan_id="plan_1", session_id="sess_1", intent=Intent(user_ask="t", mode="play"),
+            device_context=MOBILE, modules=modules, verification=VERIFICATION,
+        )
+        assert loaded.plan(**kwargs) == built.plan(**kwargs)
+
+        snapshot.write_bytes(b"not a pickle")
+        assert compile_catalogue(snapshot_dir=tmp_path).digest == built.digest
+        assert snapshot.read_bytes() != b"not a pickle"
+
+    def test_digest_follows_file_contents(self, tmp_path):
+        matrix = tmp_path / "matrix.json"
+        matrix.write_bytes(DEFAULT_MATRIX_PATH.read_bytes())
+        first = compile_catalogue(matrix, DEFAULT_PROFILES_PATH, snapshot_dir=tmp_path)
+
+        raw = json.loads(matrix.read_text())
+        raw["surface_rules"] = []
+        matrix.write_text(json.dumps(raw))
+        second = compile_catalogue(matrix, DEFAULT_PROFILES_PATH, snapshot_dir=tmp_path)
+
+        assert first.digest != second.digest
+        assert second.matrix.rules == ()
+        assert len(list(tmp_path.glob("catalogue-*.pickle"))) == 2
+
+    def test_snapshots_need_a_private_directory_and_file(self, tmp_path, monkeypatch):
+        built = compile_catalogue(snapshot_dir=tmp_path)
+        (snapshot,) = tmp_path.glob("catalogue-*.pickle")
+        loads = []
+        real_load = pickle.load
+        monkeypatch.setattr(pickle, "load", lambda f: loads.append(f) or real_load(f))
+
+        os.chmod(snapshot, 0o666)
+        assert compile_catalogue(snapshot_dir=tmp_path).digest == built.digest
+        os.chmod(snapshot, 0o600)
+        os.chmod(tmp_path, 0o777)
+        try:
+            assert compile_catalogue(snapshot_dir=tmp_path).digest == built.digest
+        finally:
+            os.chmod(tmp_path, 0o700)
+        assert loads == []
+
+        link_dir = tmp_path / "linked"
+        link_dir.mkdir(mode=0o700)
+        (link_dir / snapshot.name).symlink_to(snapshot)
+        compile_catalogue(snapshot_dir=link_dir)
+        assert loads == []
+
+        compile_catalogue(snapshot_dir=tmp_path)
+        assert len(loads) == 1
+
+    def test_profile_catalogue_reads_each_file_once(self, config_files, monkeypatch):
+        reads = []
+        read_bytes = Path.read_bytes
+        monkeypatch.setattr(Path, "read_bytes", lambda self: reads.append(self.name) or read_bytes(self))
+
+        ProfileCatalogue(*config_files, snapshot_dir=None)
+
+        assert sorted(name for name in reads if name.endswith(".json")) == ["matrix.json", "profiles.json"]
+
+    def test_loaded_once_per_process(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("METAME_SNAPSHOT_DIR", str(tmp_path))
+        clear_catalogues()
+        try:
+            first = load_catalogue()
+            assert load_catalogue(DEFAULT_MATRIX_PATH, DEFAULT_PROFILES_PATH) is first
+            assert compile_profile(first.render_profile("KNYT.BadgePortal")) is first.profiles["KNYT.BadgePortal"]
+        finally:
+            clear_catalogues()
+
+
+@pytest.fixture
+def config_files(tmp_path):
+    matrix = tmp_path / "matrix.json"
+    profiles = tmp_path / "profiles.json"
+    matrix.write_bytes(DEFAULT_MATRIX_PATH.read_bytes())
+    profiles.write_bytes(DEFAULT_PROFILES_PATH.read_bytes())
+    return matrix, profiles
+
+
+def rewrite(path, edit):
+    raw = json.loads(path.read_text())
+    edit(raw)
+    path.write_text(json.dumps(raw))
+    # Make sure the edit is visible even on coarse mtime clocks
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+class TestProfileCatalogue:
+    def test_reload_recompiles_only_changed_profiles(self, config_files):
+        matrix_path, profiles_path = config_files
+        catalogue = ProfileCatalogue(matrix_path, profiles_path, snapshot_dir=None)
+        before = catalogue.current
+        assert catalogue.check() is False
+
+        def edit(raw):
+            density = raw[0]["profile"]["density_constraints"]
+            density["preferred"] = density["max"] if density["preferred"] == density["min"] else density["min"]
+
+        rewrite(profiles_path, edit)
+        assert catalogue.check() is True
+
+        after = catalogue.current
+        changed = json.loads(profiles_path.read_text())[0]["module_type"]
+        assert after is not before and after.digest != before.digest
+        assert after.matrix is before.matrix
+        assert after.profiles[changed] is not before.profiles[changed]
+        assert all(after.profiles[t] is before.profiles[t] for t in before.profiles if t != changed)
+        # A plan that took the old catalogue keeps seeing it
+        assert before.render_profile(changed).profile.density_constraints.preferred != (
+            after.render_profile(changed).profile.density_constraints.preferred
+        )
+        assert catalogue.check() is False
+
+    def test_matrix_edits_and_bad_files(self, config_files):
+        matrix_path, profiles_path = config_files
+        catalogue = ProfileCatalogue(matrix_path, profiles_path, snapshot_dir=None)
+        before = catalogue.current
+
+        rewrite(matrix_path, lambda raw: None)
+        assert catalogue.check() is True
+        assert catalogue.current.matrix is before.matrix
+
+        rewrite(matrix_path, lambda raw: raw.update(surface_rules=[]))
+        assert catalogue.check() is True
+        assert catalogue.current.matrix.rules == ()
+        assert catalogue.current.profiles == before.profiles
+
+        good = catalogue.current
+        rewrite(profiles_path, lambda raw: raw[0]["profile"].update(preferred_surfaces=["hologram"]))
+        assert catalogue.check() is False
+        assert catalogue.current is good
+        assert catalogue.stats()["failed_reloads"] == 1
+
+    def test_watcher_thread_swaps_the_catalogue(self, config_files):
+        matrix_path, profiles_path = config_files
+        catalogue = ProfileCatalogue(matrix_path, profiles_path, snapshot_dir=None)
+        catalogue.start(interval=0.01)
+        try:
+            rewrite(matrix_path, lambda raw: raw.update(surface_rules=[]))
+            deadline = time.monotonic() + 5
+            while catalogue.reloads == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert catalogue.current.matrix.rules == ()
+            assert catalogue.stats()["watching"] is True
+        finally:
+            catalogue.stop()
+        assert catalogue.stats()["watching"] is False
+
+
+class TestReasoningTagsAndTracing:
+    def test_tags_can_be_turned_off(self, profiles):
+        cache = PlanTemplateCache()
+        tagged = plan(profiles, MOBILE, plan_cache=cache)
+        untagged = plan(profiles, MOBILE, plan_cache=cache, reasoning_tags=False)
+
+        assert all(p.reasoning_tags is None for p in untagged.placements)
+        assert [p.model_copy(update={"reasoning_tags": None}) for p in tagged.placements] == untagged.placements
+        assert cache.stats()["size"] == 2
+        assert plan(profiles, MOBILE, plan_cache=cache).placements == tagged.placements
+
+        planner = BatchSurfacePlanner(**batch(profiles), reasoning_tags=False)
+        (planned,) = planner.plan(requests_for(1))
+        assert all(p.reasoning_tags is None for p in planned.placements)
+
+    def test_tracer_counts_plans_and_module_decisions(self, profiles):
+        assert get_tracer() is None
+        clear_compiled_profiles()
+        tracer = PlanTracer(keep=4)
+        previous = set_tracer(tracer)
+        try:
+            cache = PlanTemplateCache()
+            matrix = compile_catalogue(snapshot_dir=None).matrix
+            plan(profiles, MOBILE, mode="play", plan_cache=cache, matrix=matrix)
+            plan(profiles, MOBILE, mode="play", plan_cache=cache, matrix=matrix, plan_id="plan_2")
+        finally:
+            set_tracer(previous)
+        plan(profiles, MOBILE, plan_cache=None)
+
+        stats = tracer.stats()
+        assert (stats["plans"], stats["cache_hits"], stats["placements"]) == (2, 1, 2 * len(profiles))
+        assert stats["paths"]["hit"]["plans"] == stats["paths"]["miss"]["plans"] == 1
+        assert [span.cache_hit for span in tracer.spans] == [False, True]
+        assert tracer.spans[1].context == ("mobile", "portrait", "s", "play")
+        assert set(stats["modules"]) == set(profiles)
+        for module_type, counters in stats["modules"].items():
+            assert counters["decisions"] == 1
+            assert counters["rule_evaluations"] == compile_profile(profiles[module_type]).rule_count + len(matrix.rules)
+        assert sum(stats["transitions"].values()) == len(profiles)
+        assert stats["matrix_events"]["matrix_rule:play_promote_one_step"] >= 1
+        assert len(tracer.recent) == 4
+        assert [module_type for module_type, _ in tracer.slowest(len(profiles))] != []
+
+        tracer.reset()
+        assert tracer.stats()["plans"] == 0 and not tracer.recent and not tracer.spans
+
+    def test_tracer_counts_only_rules_evaluated(self, profiles):
+        clear_compiled_profiles()
+        tracer = PlanTracer()
+        previous = set_tracer(tracer)
+        try:
+            plan(profiles, MOBILE, plan_cache=None)
+            plan(profiles, MOBILE, plan_cache=None)
+        finally:
+            set_tracer(previous)
+        first, second = list(tracer.recent)[:len(profiles)], list(tracer.recent)[len(profiles):]
+        assert sum(trace.profile_rules for trace in first) == sum(
+            compile_profile(profiles[trace.module_type]).rule_count for trace in first
+        )
+        assert all(trace.profile_rules == 0 for trace in second)
+
+    def test_tracer_records_batch_skeleton_hits(self, profiles):
+        tracer = PlanTracer()
+        previous = set_tracer(tracer)
+        try:
+            BatchSurfacePlanner(**batch(profiles)).plan(requests_for(3))
+        finally:
+            set_tracer(previous)
+        stats = tracer.stats()
+        assert stats["plans"] == 3
+        assert stats["paths"]["miss"]["plans"] + stats["paths"]["hit"]["plans"] == 3
+        assert stats["paths"]["miss"]["plans"] == len({span.context for span in tracer.spans})
@@ -0,0 +1,292 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+import requests
+from eth_account import Account
+from web3 import EthereumTesterProvider, Web3
+
+from tests.fixtures.eth_rpc_stub import EthRPCStubServer
+from wallets.reads import BatchReader
+from wallets.signing import LocalSigner, SigningPool, SigningPoolBroken
+from wallets.transactions import NonceManager
+from wallets.wallet_manager import WalletManager
+
+RECIPIENT = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+
+
+@pytest.fixture
+def chain():
+    with EthRPCStubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def wallet(chain):
+    account = Account.create()
+    chain.fund(account.address)
+    return WalletManager(chain.url, account=account)
+
+
+class TestNonceManager:
+    def test_released_nonces_fill_gaps_first(self):
+        nonces = NonceManager(lambda: 7)
+
+        assert nonces.reserve(3) == [7, 8, 9]
+        nonces.release([8])
+        assert nonces.reserve(2) == [8, 10]
+
+    def test_releasing_the_tail_rolls_back(self):
+        nonces = NonceManager(lambda: 0)
+        nonces.reserve(3)
+
+        nonces.release([2, 1])
+
+        assert nonces.next_nonce == 1
+
+    def test_resync_drops_nonces_the_chain_has_used(self):
+        count = [0]
+        nonces = NonceManager(lambda: count[0])
+        nonces.reserve(4)
+        nonces.release([1])
+        count[0] = 6
+
+        assert nonces.resync() == 6
+        assert nonces.reserve() == [6]
+
+    def test_resync_rolls_back_nonces_the_chain_never_saw(self):
+        nonces = NonceManager(lambda: 2)
+        nonces.reserve(5)
+        nonces.release([4])
+
+        assert nonces.resync() == 2
+        assert nonces.reserve(2) == [2, 3]
+
+    def test_failed_resync_asks_the_chain_on_next_reserve(self):
+        count = [3]
+
+        def fetch():
+            if count[0] is None:
+                raise ConnectionError("node unreachable")
+            return count[0]
+
+        nonces = NonceManager(fetch)
+        nonces.reserve(2)
+        count[0] = None
+        with pytest.raises(ConnectionError):
+            nonces.resync()
+        count[0] = 4
+
+        assert nonces.reserve() == [4]
+
+
+class TestWalletManager:
+    def test_concurrent_transfers_get_unique_nonces(self, chain, wallet):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            hashes = list(pool.map(lambda _: wallet.transfer_assets(RECIPIENT, 0.01), range(16)))
+
+        assert len(set(hashes)) == 16
+        assert chain.web3.eth.get_transaction_count(wallet.account.address) == 16
+        assert chain.methods["eth_getTransactionCount"] == 1
+        assert chain.methods["eth_gasPrice"] == 1
+
+    def test_transfer_many_is_one_round_trip(self, chain, wallet):
+        wallet.transfer_assets(RECIPIENT, 0.01)
+        round_trips = chain.round_trips
+
+        results = wallet.transfer_many([{'to': RECIPIENT, 'amount': 0.001}] * 25)
+
+        assert [r['nonce'] for r in results] == list(range(1, 26))
+        assert all('tx_hash' in r for r in results)
+        assert chain.round_trips == round_trips + 1
+        assert chain.web3.eth.get_transaction_count(wallet.account.address) == 26
+
+    def test_rejected_transfers_release_their_nonces(self, chain, wallet):
+        results = wallet.transfer_many([
+            {'to': RECIPIENT, 'amount': 0.001},
+            {'to': RECIPIENT, 'amount': 10 ** 6},  # more than the balance
+            {'to': RECIPIENT, 'amount': 0.001},
+        ])
+
+        assert 'tx_hash' in results[0]
+        assert 'error' in results[1] and 'error' in results[2]
+        # The gap at nonce 1 is filled by the next transfer
+        wallet.transfer_assets(RECIPIENT, 0.001)
+        assert chain.web3.eth.get_transaction_count(wallet.account.address) == 2
+
+    def test_lost_batch_keeps_nonces_and_resyncs(self, chain, wallet):
+        wallet.transfer_assets(RECIPIENT, 0.001)
+        chain.fail_next = 1
+
+        results = wallet.transfer_many([{'to': RECIPIENT, 'amount': 0.001}] * 3)
+
+        assert all('error' in r and 'tx_hash' in r for r in results)
+        # Nothing reached the node, so the resync hands the same nonces out again
+        assert wallet.nonces.next_nonce == 1
+        again = wallet.transfer_many([{'to': RECIPIENT, 'amount': 0.001}] * 3)
+        assert [r['nonce'] for r in again] == [1, 2, 3]
+        assert all('error' not in r for r in again)
+
+    def test_lost_response_does_not_reuse_accepted_nonces(self, chain, wallet, monkeypatch):
+        provider = wallet.web3.provider
+        send_batch = provider.make_batch_request
+
+        def lost_response(batch):
+            send_batch(batch)
+            raise requests.ConnectionError("connection reset by peer")
+
+        monkeypatch.setattr(provider, "make_batch_request", lost_response)
+        results = wallet.transfer_many([{'to': RECIPIENT, 'amount': 0.001}] * 3)
+        monkeypatch.undo()
+
+        assert all('error' in r for r in results)
+        assert wallet.nonces.next_nonce == 3
+        assert [r['tx_hash'] for r in results] == [
+            chain.web3.eth.get_transaction_by_block(chain.web3.eth.block_number - 2 + i, 0)['hash'].to_0x_hex()
+            for i in range(3)
+        ]
+        assert wallet.transfer_many([{'to': RECIPIENT, 'amount': 0.001}])[0]['nonce'] == 3
+        assert chain.web3.eth.get_transaction_count(wallet.account.address) == 4
+
+    def test_sequential_fallback_without_batch_support(self):
+        w3 = Web3(EthereumTesterProvider())
+        account = Account.create()
+        w3.eth.send_transaction({'from': w3.eth.accounts[0], 'to': account.address, 'value': 10 ** 20})
+        wallet = WalletManager(web3=w3, account=account)
+
+        results = wallet.transfer_many([{'to': RECIPIENT, 'amount': 0.001}] * 5)
+
+        assert not wallet.sender.supports_batching
+        assert all('tx_hash' in r for r in results)
+        assert w3.eth.get_transaction_count(account.address) == 5
+
+
+@pytest.fixture
+def token(chain):
+    address = chain.deploy("ERC20", "Qube", "QB")
+    contract = chain.contract("ERC20", address)
+    minter = chain.web3.eth.accounts[0]
+    for i, holder in enumerate(chain.web3.eth.accounts[:5]):
+        contract.functions.mint(holder, 10 ** 18 * (i + 1)).transact({'from': minter})
+    contract.functions.approve(chain.web3.eth.accounts[1], 77).transact({'from': minter})
+    return address
+
+
+class TestBatchReader:
+    def test_multicall_sweep_is_one_call(self, chain, token):
+        reader = BatchReader(Web3(Web3.HTTPProvider(chain.url)), multicall_address=chain.deploy("Multicall3"))
+        holders = chain.web3.eth.accounts[:10]
+        reader.block_number()
+        reader.has_multicall
+        round_trips = chain.round_trips
+
+        balances = reader.erc20_balances(token, holders)
+
+        assert [balances[h] for h in holders] == [10 ** 18 * (i + 1) for i in range(5)] + [0] * 5
+        assert chain.round_trips == round_trips + 1
+        assert chain.methods["eth_call"] == 1
+        owner, spender = holders[0], holders[1]
+        assert reader.erc20_allowances(token, [(owner, spender)]) == {(owner, spender): 77}
+
+    def test_without_multicall_falls_back_to_batched_eth_calls(self, chain, token):
+        reader = BatchReader(Web3(Web3.HTTPProvider(chain.url)), multicall_address=None)
+        holders = chain.web3.eth.accounts[:10]
+
+        balances = reader.erc20_balances(token, holders)
+
+        assert balances[holders[4]] == 5 * 10 ** 18
+        assert chain.methods["eth_call"] == 10
+        # eth_blockNumber, then one batch
+        assert reader.stats()["round_trips"] == 2
+
+    def test_results_are_cached_per_block(self, chain):
+        reader = BatchReader(Web3(Web3.HTTPProvider(chain.url)), block_ttl=0)
+        holders = chain.web3.eth.accounts[:3]
+
+        first = reader.eth_balances(holders)
+        reader.eth_balances(holders)
+        assert chain.methods["eth_getBalance"] == 3
+
+        chain.fund(holders[2], ether=1)
+        after = reader.eth_balances(holders)
+        assert chain.methods["eth_getBalance"] == 6
+        assert after[holders[2]] == first[holders[2]] + 10 ** 18
+
+    def test_wallet_reads_without_batch_support(self, token, chain):
+        wallet = WalletManager(web3=chain.web3, account=Account.create())
+
+        assert not wallet.reader.has_multicall
+        assert wallet.get_token_balances(token, chain.web3.eth.accounts[:2]) == {
+            chain.web3.eth.accounts[0]: 10 ** 18,
+            chain.web3.eth.accounts[1]: 2 * 10 ** 18,
+        }
+        assert wallet.get_balances() == {wallet.account.address: 0}
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    return Account.create().key
+
+
+@pytest.fixture(scope="module")
+def signing_pool(signing_key):
+    with SigningPool(signing_key, max_workers=2, max_batch=4) as pool:
+        yield pool
+
+
+class TestSigningPool:
+    def test_signatures_match_inline_signing(self, signing_key, signing_pool):
+        transactions = [
+            {'to': RECIPIENT, 'value': i, 'gas': 21000, 'gasPrice': 10 ** 9, 'nonce': i, 'chainId': 1}
+            for i in range(10)
+        ]
+
+        signed = signing_pool.sign_many(transactions)
+
+        local = LocalSigner(Account.from_key(signing_key))
+        assert signing_pool.address == local.address
+        assert signed == local.sign_many(transactions)
+        assert signing_pool.sign(transactions[3]) == signed[3]
+        assert signing_pool.sign_many([]) == []
+
+    def test_pool_restarts_after_a_worker_dies(self, signing_key):
+        transaction = {'to': RECIPIENT, 'value': 1, 'gas': 21000, 'gasPrice': 10 ** 9, 'nonce': 0, 'chainId': 1}
+        expected = LocalSigner(Account.from_key(signing_key)).sign(transaction)
+
+        with SigningPool(signing_key, max_workers=1) as pool:
+            with pytest.raises(BrokenProcessPool):
+                pool._executor.submit(os._exit, 1).result()
+
+            assert pool.sign_many([transaction]) == [expected]
+            assert pool.sign(transaction) == expected
+
+    def test_pool_that_keeps_breaking_raises(self, signing_key, monkeypatch):
+        class Broken:
+            def submit(self, *args):
+                raise BrokenProcessPool("worker died")
+
+            map = submit
+
+            def shutdown(self, **kwargs):
+                pass
+
+        with SigningPool(signing_key, max_workers=1) as pool:
+            real = pool._executor
+            pool._executor = Broken()
+            monkeypatch.setattr(pool, "_start", Broken)
+
+            with pytest.raises(SigningPoolBroken):
+                pool.sign_many([{'to': RECIPIENT, 'value': 1}])
+            pool._executor = real
+
+    def test_wallet_transfers_through_the_pool(self, chain, signing_pool):
+        chain.fund(signing_pool.address)
+        wallet = WalletManager(chain.url, signer=signing_pool)
+
+        results = wallet.transfer_many([{'to': RECIPIENT, 'amount': 0.001}] * 9)
+        wallet.transfer_assets(RECIPIENT, 0.001)
+
+        assert wallet.account is None
+        assert all('tx_hash' in r for r in results)
+        assert chain.web3.eth.get_transaction_count(signing_pool.address) == 10
@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+import requests
+from web3 import Web3
+
+from tests.fixtures.eth_rpc_stub import EthRPCStubServer
+from wallets.provider import LatencyHistogram, PooledHTTPProvider
+from wallets.reads import BatchReader
+from wallets.wallet_manager import WalletManager
+
+
+@pytest.fixture
+def chain():
+    with EthRPCStubServer() as server:
+        yield server
+
+
+class TestPooledHTTPProvider:
+    def test_short_lived_threads_reuse_connections(self, chain):
+        account = chain.web3.eth.accounts[0]
+
+        def opened_by(provider):
+            w3 = Web3(provider)
+            before = len(chain.connections)
+            # A fresh thread per call, as under a threaded web server
+            for _ in range(10):
+                threads = [threading.Thread(target=w3.eth.get_balance, args=(account,)) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            return len(chain.connections) - before
+
+        provider = PooledHTTPProvider(chain.url, pool_size=4)
+
+        assert opened_by(provider) <= 4
+        assert provider.latency_stats()["eth_getBalance"]["count"] == 40
+
+    def test_idempotent_methods_retry_with_backoff(self, chain):
+        provider = PooledHTTPProvider(chain.url, retries=3, backoff_base=0.01)
+        chain.fail_next = 2
+
+        assert Web3(provider).eth.block_number >= 0
+        assert chain.failed == 2
+        assert provider.stats()["retries"] == 2
+
+    def test_transaction_submission_is_not_retried(self, chain):
+        provider = PooledHTTPProvider(chain.url, retries=3, backoff_base=0.01)
+        chain.fail_next = 1
+
+        with pytest.raises(requests.HTTPError):
+            Web3(provider).eth.send_raw_transaction(b"\x01")
+        assert provider.stats()["retries"] == 0
+
+    def test_batches_are_timed_and_retried(self, chain):
+        provider = PooledHTTPProvider(chain.url, backoff_base=0.01)
+        chain.fail_next = 1
+
+        balances = BatchReader(Web3(provider)).eth_balances(chain.web3.eth.accounts[:3])
+
+        assert len(balances) == 3
+        # eth_blockNumber and the balances, each as one batch
+        assert provider.latency_stats()["batch"]["count"] == 2
+        assert provider.stats()["retries"] == 1
+
+    def test_public_batch_api_goes_through_the_pool(self, chain):
+        provider = PooledHTTPProvider(chain.url)
+        w3 = Web3(provider)
+        accounts = chain.web3.eth.accounts[:3]
+
+        with w3.batch_requests() as batch:
+            for account in accounts:
+                batch.add(w3.eth.get_balance(account))
+            balances = batch.execute()
+
+        assert balances == [chain.web3.eth.get_balance(a) for a in accounts]
+        assert provider.latency_stats()["batch"]["count"] == 1
+
+    def test_batch_responses_follow_request_order(self, chain, monkeypatch):
+        provider = PooledHTTPProvider(chain.url)
+        decode = provider.decode_rpc_response
+        monkeypatch.setattr(provider, "decode_rpc_response", lambda raw: list(reversed(decode(raw))))
+
+        responses = provider.make_batch_request([("eth_chainId", []), ("eth_blockNumber", [])])
+
+        assert [r["id"] for r in responses] == sorted(r["id"] for r in responses)
+
+    def test_round_trips_are_counted_exactly_across_threads(self, chain):
+        reader = BatchReader(Web3(PooledHTTPProvider(chain.url)), multicall_address=None, block_ttl=0)
+
+        threads = [threading.Thread(target=lambda: [reader.block_number() for _ in range(25)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert reader.stats()["round_trips"] == 200
+
+    def test_wallet_manager_uses_pooled_provider(self, chain):
+        wallet = WalletManager(chain.url, provider_options={"pool_size": 8, "read_timeout": 5})
+
+        assert isinstance(wallet.web3.provider, PooledHTTPProvider)
+        assert wallet.web3.provider.timeout == (5.0, 5)
+
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in [0.5] * 90 + [40] * 9 + [3000]:
+        histogram.observe(ms)
+
+    assert histogram.percentile(0.5) == 1
+    assert histogram.percentile(0.95) == 50
+    assert histogram.snapshot()["max_ms"] == 3000
@@ -0,0 +1,359 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from qube_agent.utils.dashboard_store import (
+    InMemoryDashboardStore,
+    RetentionJob,
+    SQLiteDashboardStore,
+)
+from qube_agent.utils.event_bus import DashboardEventBus
+from qube_agent.utils.web_interface import WebInterfaceManager
+
+
+def _decode(frame: bytes):
+    lines = frame.decode("utf-8").strip().split("\n")
+    fields = dict(line.split(": ", 1) for line in lines)
+    return fields["event"], json.loads(fields["data"])
+
+
+@pytest.fixture
+def web_interface():
+    return WebInterfaceManager(event_bus=DashboardEventBus(queue_size=4))
+
+
+class TestDashboardEventBus:
+    def test_status_updates_are_pushed(self, web_interface):
+        agent_id = web_interface.create_agent_dashboard(initial_config={"name": "demo"})
+        subscription = web_interface.event_bus.subscribe(agent_id=agent_id)
+
+        web_interface.update_agent_status(agent_id, objective="sync", results={"ok": True})
+        web_interface.log_qube_processing(token_id="token_1", data={"status": "Processed"})
+
+        status = subscription.get(timeout=1)
+        qube_log = subscription.get(timeout=1)
+
+        assert status.event_type == "status"
+        assert status.payload["objective"] == "sync"
+        assert qube_log.event_type == "qube_log"
+        assert qube_log.payload["token_id"] == "token_1"
+
+    def test_subscription_filters_by_agent(self, web_interface):
+        first = web_interface.create_agent_dashboard()
+        second = web_interface.create_agent_dashboard()
+        subscription = web_interface.event_bus.subscribe(agent_id=first)
+
+        web_interface.update_agent_status(second, objective="other", results={})
+        web_interface.update_agent_status(first, objective="mine", results={})
+
+        assert subscription.get(timeout=1).payload["objective"] == "mine"
+        assert subscription.get(timeout=0.01) is None
+
+    def test_slow_subscriber_is_bounded_and_resyncs(self, web_interface):
+        agent_id = web_interface.create_agent_dashboard()
+        subscription = web_interface.event_bus.subscribe(agent_id=agent_id)
+
+        for i in range(10):
+            web_interface.update_agent_status(agent_id, objective=f"step {i}", results={})
+
+        assert subscription.pending() == 4
+        assert subscription.dropped == 6
+
+        resync = subscription.get(timeout=1)
+        assert resync.event_type == "resync"
+        # Queued events predate the refetch the client does on resync
+        assert resync.payload == {"dropped": 10}
+        assert subscription.pending() == 0
+        assert subscription.get(timeout=0.01) is None
+
+        web_interface.update_agent_status(agent_id, objective="after resync", results={})
+        assert subscription.get(timeout=1).payload["objective"] == "after resync"
+
+    def test_published_count_is_exact_under_concurrency(self):
+        bus = DashboardEventBus()
+
+        def publisher():
+            for i in range(2000):
+                bus.publish("status", {"seq": i})
+
+        threads = [threading.Thread(target=publisher) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert bus.stats()["published"] == 16000
+
+    def test_stream_yields_sse_frames_and_unsubscribes(self, web_interface):
+        agent_id = web_interface.create_agent_dashboard()
+        bus = web_interface.event_bus
+        subscription = bus.subscribe(agent_id=agent_id)
+        frames = bus.stream(subscription)
+
+        assert next(frames).startswith(b"retry:")
+
+        web_interface.update_agent_status(agent_id, objective="live", results={})
+        event_type, data = _decode(next(frames))
+
+        assert event_type == "status"
+        assert data["objective"] == "live"
+
+        frames.close()
+        assert bus.subscriber_count() == 0
+
+
+class TestConcurrentDashboards:
+    def test_readers_see_consistent_snapshots_under_concurrent_writes(self):
+        web_interface = WebInterfaceManager()
+        agent_ids = [web_interface.create_agent_dashboard() for _ in range(4)]
+        writes_per_agent = 500
+        errors = []
+        done = threading.Event()
+
+        def writer(agent_id):
+            for i in range(writes_per_agent):
+                web_interface.update_agent_status(agent_id, objective="step", results={"seq": i})
+
+        def logger():
+            for i in range(writes_per_agent):
+                web_interface.log_qube_processing(token_id=f"token_{i}", data={})
+
+        def creator():
+            for _ in range(50):
+                web_interface.create_agent_dashboard()
+
+        def reader(agent_id):
+            while not done.is_set():
+                try:
+                    dashboard = web_interface.get_agent_dashboard(agent_id)
+                    seqs = [entry["results"]["seq"] for entry in dashboard["status_history"]]
+                    if seqs != list(range(len(seqs))):
+                        errors.append(f"out of order history for {agent_id}")
+                except Exception as e:
+                    errors.append(repr(e))
+
+        writers = [threading.Thread(target=writer, args=(a,)) for a in agent_ids]
+        writers += [threading.Thread(target=logger), threading.Thread(target=creator)]
+        readers = [threading.Thread(target=reader, args=(a,)) for a in agent_ids for _ in range(2)]
+        for t in readers + writers:
+            t.start()
+        for t in writers:
+            t.join()
+        done.set()
+        for t in readers:
+            t.join()
+
+        assert errors == []
+        for agent_id in agent_ids:
+            dashboard = web_interface.get_agent_dashboard(agent_id)
+            assert len(dashboard["status_history"]) == writes_per_agent
+            assert len(dashboard["qube_logs"]) == writes_per_agent
+
+    def test_qube_log_stream_order_matches_history(self):
+        bus = DashboardEventBus(queue_size=10000)
+        web_interface = WebInterfaceManager(event_bus=bus)
+        agent_ids = [web_interface.create_agent_dashboard() for _ in range(3)]
+        subscription = bus.subscribe(agent_id=agent_ids[0])
+
+        def logger(worker):
+            for i in range(200):
+                web_interface.log_qube_processing(token_id=f"token_{worker}_{i}", data={})
+
+        threads = [threading.Thread(target=logger, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        streamed = []
+        while subscription.pending():
+            event = subscription.get(timeout=0)
+            if event.event_type == "qube_log":
+                streamed.append(event.payload["token_id"])
+        for agent_id in agent_ids:
+            history = [log["token_id"] for log in web_interface.get_agent_dashboard(agent_id)["qube_logs"]]
+            assert history == streamed
+        assert bus.stats()["published"] == len(agent_ids) + 800
+
+    def test_agent_locks_are_replaced_not_mutated(self):
+        web_interface = WebInterfaceManager()
+        before = web_interface._agent_locks
+        agent_id = web_interface.create_agent_dashboard()
+
+        assert before == {}
+        assert web_interface._agent_lock(agent_id) is web_interface._agent_locks[agent_id]
+
+    def test_get_agent_dashboard_does_not_mutate_state(self):
+        web_interface = WebInterfaceManager()
+        agent_id = web_interface.create_agent_dashboard()
+
+        snapshot = web_interface.get_agent_dashboard(agent_id)
+        snapshot["status_history"].append({"objective": "injected"})
+
+        assert "context_analysis" not in web_interface.store.dashboards[agent_id]
+        assert web_interface.get_agent_dashboard(agent_id)["status_history"] == []
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "dashboards.db")
+
+
+class FailingInserts:
+    """Writer connection proxy whose next executemany fails."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.fail = True
+
+    def executemany(self, *args):
+        if self.fail:
+            self.fail = False
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.conn.executemany(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class TestDashboardStores:
+    def test_sqlite_dashboards_survive_restart(self, sqlite_path):
+        store = SQLiteDashboardStore(sqlite_path, flush_interval=None)
+        web_interface = WebInterfaceManager(store=store)
+        agent_id = web_interface.create_agent_dashboard(initial_config={"name": "demo"})
+        web_interface.update_agent_status(
+            agent_id, objective="persist", results={"ok": True}, iqube_context={"semantic_insights": []}
+        )
+        web_interface.log_qube_processing(token_id="token_1", data={"status": "Processed"})
+        store.close()
+
+        reopened = WebInterfaceManager(store=SQLiteDashboardStore(sqlite_path, flush_interval=None))
+        dashboard = reopened.get_agent_dashboard(agent_id)
+
+        assert dashboard["config"] == {"name": "demo"}
+        assert [e["objective"] for e in dashboard["status_history"]] == ["persist"]
+        assert [e["token_id"] for e in dashboard["qube_logs"]] == ["token_1"]
+        assert dashboard["context_analysis"]["total_layers"] == 1
+        reopened.store.close()
+
+    def test_sqlite_workers_share_dashboards(self, sqlite_path):
+        first = WebInterfaceManager(store=SQLiteDashboardStore(sqlite_path, flush_interval=None))
+        second = WebInterfaceManager(store=SQLiteDashboardStore(sqlite_path, flush_interval=None))
+
+        agent_id = first.create_agent_dashboard()
+        second.update_agent_status(agent_id, objective="from second", results={})
+        second.store.flush()
+
+        history = first.get_agent_dashboard(agent_id)["status_history"]
+        assert [e["objective"] for e in history] == ["from second"]
+        first.store.close()
+        second.store.close()
+
+    def test_sqlite_appends_are_batched(self, sqlite_path):
+        store = SQLiteDashboardStore(sqlite_path, batch_size=3, flush_interval=None)
+        observer = SQLiteDashboardStore(sqlite_path, flush_interval=None)
+        store.create_dashboard("agent", {})
+
+        store.append("agent", "qube_logs", [{"n": 1}, {"n": 2}])
+        assert observer.snapshot("agent")["qube_logs"] == []
+
+        store.append("agent", "qube_logs", [{"n": 3}])
+        assert len(observer.snapshot("agent")["qube_logs"]) == 3
+        store.close()
+        observer.close()
+
+    @pytest.mark.parametrize("store_factory", [
+        lambda path: InMemoryDashboardStore(),
+        lambda path: SQLiteDashboardStore(path, flush_interval=None),
+    ], ids=["memory", "sqlite"])
+    def test_retention_keeps_newest_entries(self, sqlite_path, store_factory):
+        store = store_factory(sqlite_path)
+        for agent_id in ("a", "b"):
+            store.create_dashboard(agent_id, {})
+            store.append(agent_id, "status_history", [{"n": i} for i in range(5)])
+
+        removed = RetentionJob(store, max_entries=2).run_once()
+
+        assert removed == 6
+        assert store.snapshot("a")["status_history"] == [{"n": 3}, {"n": 4}]
+        assert store.compact(max_age_seconds=0) == 4
+        assert store.snapshot("b")["status_history"] == []
+        store.close()
+
+    def test_sqlite_readers_are_pooled_across_threads(self, sqlite_path):
+        store = SQLiteDashboardStore(sqlite_path, flush_interval=None, max_idle_readers=2)
+        store.create_dashboard("agent", {})
+
+        for _ in range(50):
+            thread = threading.Thread(target=store.snapshot, args=("agent",))
+            thread.start()
+            thread.join()
+
+        assert len(store._idle_readers) == 1
+        store.close()
+        assert store._idle_readers == []
+
+    def test_memory_snapshot_entries_are_copies(self):
+        store = InMemoryDashboardStore()
+        store.create_dashboard("agent", {"nested": {"a": 1}})
+        store.append("agent", "qube_logs", [{"data": {"n": 1}}])
+
+        snapshot = store.snapshot("agent")
+        snapshot["qube_logs"][0]["data"]["n"] = 2
+        snapshot["config"]["nested"]["a"] = 2
+
+        assert store.snapshot("agent")["qube_logs"] == [{"data": {"n": 1}}]
+        assert store.snapshot("agent")["config"] == {"nested": {"a": 1}}
+
+    def test_sqlite_history_since_uses_timestamps(self, sqlite_path, monkeypatch):
+        import qube_agent.utils.dashboard_store as dashboard_store
+
+        store = SQLiteDashboardStore(sqlite_path, flush_interval=None)
+        store.create_dashboard("agent", {})
+        monkeypatch.setattr(dashboard_store.time, "time", lambda: 1000.0)
+        store.append("agent", "status_history", [{"n": 1}])
+        monkeypatch.setattr(dashboard_store.time, "time", lambda: 2000.0)
+        store.append("agent", "status_history", [{"n": 2}])
+        store.append("agent", "qube_logs", [{"n": 3}])
+
+        assert store.history_since("agent", "status_history", 1500.0) == [{"n": 2}]
+        assert store.history_since("agent", "status_history", 0) == [{"n": 1}, {"n": 2}]
+        store.close()
+
+    def test_sqlite_failed_flush_keeps_buffered_rows(self, sqlite_path):
+        store = SQLiteDashboardStore(sqlite_path, flush_interval=None)
+        store.create_dashboard("agent", {})
+        store.append("agent", "qube_logs", [{"n": 1}])
+        store._writer = FailingInserts(store._writer)
+
+        with pytest.raises(sqlite3.OperationalError):
+            store.flush()
+        store.append("agent", "qube_logs", [{"n": 2}])
+        assert store.snapshot("agent")["qube_logs"] == [{"n": 1}, {"n": 2}]
+
+        store.flush()
+        observer = SQLiteDashboardStore(sqlite_path, flush_interval=None)
+        assert observer.snapshot("agent")["qube_logs"] == [{"n": 1}, {"n": 2}]
+        store.close()
+        observer.close()
+
+    def test_sqlite_reads_do_not_wait_for_writers(self, sqlite_path):
+        store = SQLiteDashboardStore(sqlite_path, flush_interval=None)
+        store.create_dashboard("agent", {})
+        store.append("agent", "qube_logs", [{"n": 1}])
+        store.flush()
+        store.append("agent", "qube_logs", [{"n": 2}])
+        results = []
+
+        with store._write_lock:
+            reader = threading.Thread(target=lambda: results.append(
+                (store.snapshot("agent")["qube_logs"], store.history_since("agent", "qube_logs", 0))
+            ))
+            reader.start()
+            reader.join(timeout=5)
+            assert not reader.is_alive()
+
+        assert results == [([{"n": 1}, {"n": 2}], [{"n": 1}, {"n": 2}])]
+        store.close()
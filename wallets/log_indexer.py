@@ -0,0 +1,547 @@
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import requests
+from eth_abi import decode
+from web3 import Web3
+
+from wallets.reads import _to_bytes, _to_int
+
+
+class EventSpec(NamedTuple):
+    name: str
+    signature: str
+    params: Tuple[str, ...]
+    indexed: Tuple[bool, ...]
+
+
+# Events emitted by the contracts in contracts/. ERC-20 and ERC-721 Transfer
+# share a topic and differ only in whether the third argument is indexed.
+EVENT_SPECS = (
+    EventSpec("Transfer", "Transfer(address,address,uint256)", ("from", "to", "value"), (True, True, False)),
+    EventSpec("Transfer", "Transfer(address,address,uint256)", ("from", "to", "tokenId"), (True, True, True)),
+    EventSpec("Approval", "Approval(address,address,uint256)", ("owner", "spender", "value"), (True, True, False)),
+    EventSpec("QubeAnchored", "QubeAnchored(uint256,address,address,string)",
+              ("tokenId", "to", "minter", "uri"), (True, True, True, False)),
+    EventSpec("QubeTransferred", "QubeTransferred(uint256,address,address)",
+              ("tokenId", "from", "to"), (True, True, True)),
+    EventSpec("CapabilityGranted", "CapabilityGranted(uint256,address,bytes32,uint64,bytes32)",
+              ("tokenId", "to", "scopeHash", "ttl", "nonce"), (True, True, False, False, False)),
+    EventSpec("OwnerTransferred", "OwnerTransferred(uint256,address,address)",
+              ("tokenId", "from", "to"), (True, True, True)),
+    EventSpec("TokensMinted", "TokensMinted(address,uint256,string,string)",
+              ("to", "amount", "sourceChain", "sourceTxHash"), (True, False, False, False)),
+    EventSpec("TokensBurned", "TokensBurned(address,uint256,string,string)",
+              ("from", "amount", "targetChain", "targetAddress"), (True, False, False, False)),
+    EventSpec("TokensMinted", "TokensMinted(address,uint256,string)", ("to", "amount", "reason"), (True, False, False)),
+    EventSpec("TokensBurned", "TokensBurned(address,uint256,string)", ("from", "amount", "reason"), (True, False, False)),
+)
+
+# Substrings of node errors that mean "ask for a smaller block range". Providers
+# reuse codes such as -32005 for rate limits too, so the messages decide.
+RANGE_ERRORS = (
+    "query returned more than",  # geth, Erigon, Infura
+    "query timeout exceeded",  # geth
+    "log response size exceeded",  # Alchemy
+    "block range is too large",  # Alchemy, Polygon
+    "block range is too wide",  # Ankr
+    "exceed maximum block range",  # bor, BSC
+    "eth_getlogs is limited to",  # QuickNode
+)
+
+# Substrings of node errors that mean "slow down and ask again"
+RATE_LIMIT_ERRORS = (
+    "rate limit",
+    "too many requests",
+    "request rate exceeded",  # Infura
+    "compute units per second",  # Alchemy
+)
+
+# JSON-RPC error codes some providers use for rate limiting
+RATE_LIMIT_CODES = (429, -32029)
+
+
+class RPCError(ValueError):
+    """
+    JSON-RPC error response.
+    """
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+# Events whose "to" is the token's new holder
+OWNERSHIP_EVENTS = ("Transfer", "QubeTransferred", "OwnerTransferred")
+
+
+def _spec_key(spec: EventSpec) -> Tuple[str, int]:
+    return Web3.keccak(text=spec.signature).to_0x_hex(), 1 + sum(spec.indexed)
+
+
+EVENTS: Dict[Tuple[str, int], EventSpec] = {_spec_key(spec): spec for spec in EVENT_SPECS}
+
+
+def decode_log(log: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    Decode a raw log emitted by one of the known events.
+
+    Args:
+        log: Log as returned by eth_getLogs
+
+    Returns:
+        Event name and decoded arguments, or (None, {}) for unknown events
+    """
+    topics = [_hex(t) for t in log["topics"]]
+    spec = EVENTS.get((topics[0], len(topics))) if topics else None
+    if spec is None:
+        return None, {}
+
+    types = spec.signature[spec.signature.index("(") + 1:-1].split(",")
+    data_types = [t for t, indexed in zip(types, spec.indexed) if not indexed]
+    data_values = iter(decode(data_types, _to_bytes(log["data"])) if data_types else ())
+    topic_values = iter(topics[1:])
+    args = {}
+    for name, kind, indexed in zip(spec.params, types, spec.indexed):
+        value = decode([kind], _to_bytes(next(topic_values)))[0] if indexed else next(data_values)
+        if kind == "address":
+            value = Web3.to_checksum_address(value)
+        args[name] = "0x" + value.hex() if isinstance(value, bytes) else value
+    return spec.name, args
+
+
+def _hex(value: Any) -> str:
+    return value if isinstance(value, str) else Web3.to_hex(value)
+
+
+class LogIndexer:
+    """
+    Incremental eth_getLogs indexer backed by SQLite.
+
+    Each sync walks from the checkpoint to `confirmations` blocks behind the
+    head in block ranges. The range grows while responses stay small and
+    shrinks when the node rejects a query as too large or times out; rate
+    limited queries are retried after a jittered exponential backoff. Every
+    range is written, together with the new checkpoint and the hash of its
+    last block, in one transaction, so an interrupted sync resumes where it
+    stopped. Blocks within the confirmation depth are never indexed; if a
+    deeper reorg replaces indexed blocks, the next sync finds the hash
+    mismatch, drops the orphaned logs and indexes the new branch.
+
+    Known iQube, ACL and QCT events are decoded, and their token id and
+    from/to addresses are indexed columns; other logs are stored raw.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS logs (
+            block_number INTEGER NOT NULL,
+            log_index INTEGER NOT NULL,
+            block_hash TEXT NOT NULL,
+            tx_hash TEXT NOT NULL,
+            address TEXT NOT NULL,
+            topic0 TEXT,
+            event TEXT,
+            token_id TEXT,
+            from_address TEXT,
+            to_address TEXT,
+            args TEXT NOT NULL,
+            topics TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (block_number, log_index)
+        );
+        CREATE INDEX IF NOT EXISTS idx_logs_address_block ON logs (address, block_number);
+        CREATE INDEX IF NOT EXISTS idx_logs_token ON logs (token_id, block_number);
+        CREATE INDEX IF NOT EXISTS idx_logs_from ON logs (from_address, block_number);
+        CREATE INDEX IF NOT EXISTS idx_logs_to ON logs (to_address, block_number);
+        CREATE TABLE IF NOT EXISTS blocks (
+            block_number INTEGER PRIMARY KEY,
+            block_hash TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS state (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        path: str,
+        addresses: Sequence[str],
+        topics: Optional[List[Any]] = None,
+        start_block: int = 0,
+        confirmations: int = 12,
+        initial_range: int = 2000,
+        min_range: int = 1,
+        max_range: int = 100000,
+        target_logs: int = 2000,
+        reorg_window: int = 128,
+        rate_limit_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0
+    ):
+        """
+        Open (or create) an index.
+
+        Args:
+            web3: Connected Web3 instance
+            path: SQLite database file
+            addresses: Contract addresses to follow
+            topics: eth_getLogs topic filter, None for every event
+            start_block: First block to index when there is no checkpoint
+            confirmations: Blocks behind the head that are left unindexed
+            initial_range: Blocks per eth_getLogs query to start with
+            min_range: Smallest range before a rejected query is an error
+            max_range: Largest range to grow to
+            target_logs: Logs per query above which the range shrinks
+            reorg_window: Recent indexed block hashes kept for reorg checks
+            rate_limit_retries: Consecutive rate limited queries before giving up
+            backoff_base: Upper bound of the first rate limit delay, in seconds
+            backoff_max: Cap on any rate limit delay, in seconds
+        """
+        self.web3 = web3
+        self.path = path
+        self.addresses = [Web3.to_checksum_address(a) for a in addresses]
+        self.topics = topics
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.range = initial_range
+        self.min_range = min_range
+        self.max_range = max_range
+        self.target_logs = target_logs
+        self.reorg_window = reorg_window
+        self.rate_limit_retries = rate_limit_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.logger = logging.getLogger(__name__)
+        self.round_trips = 0
+        self.reorgs = 0
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+
+    @property
+    def checkpoint(self) -> int:
+        """Last indexed block, or start_block - 1 before the first sync."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM state WHERE key = 'checkpoint'").fetchone()
+        return row[0] if row else self.start_block - 1
+
+    def sync(self, to_block: Optional[int] = None) -> Dict[str, int]:
+        """
+        Index confirmed blocks past the checkpoint.
+
+        Args:
+            to_block: Stop here instead of at head - confirmations
+
+        Returns:
+            Blocks scanned, logs indexed, eth_getLogs queries and reorgs handled
+        """
+        summary = {"blocks": 0, "logs": 0, "queries": 0, "reorgs": 0}
+        if self._check_reorg():
+            summary["reorgs"] = 1
+
+        safe = _to_int(self._rpc([("eth_blockNumber", [])])[0]) - self.confirmations
+        end = safe if to_block is None else min(to_block, safe)
+        start = self.checkpoint + 1
+        throttled = 0
+        while start <= end:
+            stop = min(start + self.range - 1, end)
+            try:
+                logs, block = self._fetch(start, stop)
+            except Exception as e:
+                if self._is_rate_limit(e) and throttled < self.rate_limit_retries:
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** throttled))
+                    throttled += 1
+                    self.logger.warning(f"eth_getLogs {start}-{stop} rate limited, retrying in {delay:.2f}s: {e}")
+                    time.sleep(delay)
+                    continue
+                if not self._is_range_error(e) or self.range <= self.min_range:
+                    raise
+                self.range = max(self.min_range, min(self.range, stop - start + 1) // 2)
+                self.logger.info(f"eth_getLogs {start}-{stop} rejected, range now {self.range}: {e}")
+                continue
+
+            throttled = 0
+            self._store(logs, stop, _hex(block["hash"]))
+            summary["blocks"] += stop - start + 1
+            summary["logs"] += len(logs)
+            summary["queries"] += 1
+            if len(logs) > self.target_logs:
+                self.range = max(self.min_range, self.range // 2)
+            elif len(logs) < self.target_logs // 2 and stop - start + 1 == self.range:
+                self.range = min(self.max_range, self.range * 2)
+            start = stop + 1
+
+        if summary["blocks"]:
+            self.logger.info(f"Indexed {summary['logs']} logs from {summary['blocks']} blocks up to {end}")
+        return summary
+
+    def logs_by_address(
+        self,
+        address: str,
+        from_block: int = 0,
+        to_block: Optional[int] = None,
+        event: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Logs emitted by one contract, oldest first.
+
+        Args:
+            address: Contract address
+            from_block: First block to include
+            to_block: Last block to include, defaults to the checkpoint
+            event: Only this decoded event name
+            limit: Maximum rows
+
+        Returns:
+            Log rows
+        """
+        query = "SELECT * FROM logs WHERE address = ? AND block_number BETWEEN ? AND ?"
+        params: List[Any] = [Web3.to_checksum_address(address), from_block, self.checkpoint if to_block is None else to_block]
+        return self._select(query, params, event, limit)
+
+    def logs_by_token(
+        self, token_id: int, address: Optional[str] = None, event: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        History of one token id, oldest first.
+
+        Args:
+            token_id: Token id
+            address: Only logs from this contract
+            event: Only this decoded event name
+
+        Returns:
+            Log rows
+        """
+        query = "SELECT * FROM logs WHERE token_id = ?"
+        params: List[Any] = [str(token_id)]
+        if address:
+            query += " AND address = ?"
+            params.append(Web3.to_checksum_address(address))
+        return self._select(query, params, event)
+
+    def logs_by_account(self, account: str, from_block: int = 0, event: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Logs where an account is the sender or the receiver, oldest first.
+
+        Args:
+            account: Account address
+            from_block: First block to include
+            event: Only this decoded event name
+
+        Returns:
+            Log rows
+        """
+        account = Web3.to_checksum_address(account)
+        query = "SELECT * FROM logs WHERE (from_address = ? OR to_address = ?) AND block_number >= ?"
+        return self._select(query, [account, account, from_block], event)
+
+    def changes_since(self, block: int, event: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Everything indexed after a block, oldest first.
+
+        Args:
+            block: Exclusive lower bound
+            event: Only this decoded event name
+
+        Returns:
+            Log rows
+        """
+        return self._select("SELECT * FROM logs WHERE block_number > ?", [block], event)
+
+    def owner_of(self, token_id: int, address: Optional[str] = None) -> Optional[str]:
+        """
+        Current holder of a token according to its last indexed transfer.
+
+        Only Transfer, QubeTransferred and OwnerTransferred events count;
+        grants and other events that name a recipient do not.
+
+        Args:
+            token_id: Token id
+            address: NFT contract, defaults to the followed contract when
+                there is only one
+
+        Returns:
+            Holder address, or None if the token was never transferred
+        """
+        if address is None:
+            if len(self.addresses) != 1:
+                raise ValueError("owner_of needs the NFT contract address when several contracts are followed")
+            address = self.addresses[0]
+        query = (
+            "SELECT to_address FROM logs WHERE token_id = ? AND address = ?"
+            f" AND event IN ({', '.join('?' * len(OWNERSHIP_EVENTS))}) AND to_address IS NOT NULL"
+            " ORDER BY block_number DESC, log_index DESC LIMIT 1"
+        )
+        with self._lock:
+            row = self._db.execute(
+                query, [str(token_id), Web3.to_checksum_address(address), *OWNERSHIP_EVENTS]
+            ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _fetch(self, start: int, stop: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        log_filter: Dict[str, Any] = {"fromBlock": hex(start), "toBlock": hex(stop), "address": self.addresses}
+        if self.topics is not None:
+            log_filter["topics"] = self.topics
+        # The checkpoint block's hash rides along in the same round trip
+        logs, block = self._rpc([("eth_getLogs", [log_filter]), ("eth_getBlockByNumber", [hex(stop), False])])
+        return logs, block
+
+    def _store(self, logs: List[Dict[str, Any]], block_number: int, block_hash: str) -> None:
+        rows = []
+        hashes = {block_number: block_hash}
+        for log in logs:
+            if log.get("removed"):
+                continue
+            event, args = decode_log(log)
+            number = _to_int(log["blockNumber"])
+            hashes[number] = _hex(log["blockHash"])
+            token_id = args.get("tokenId")
+            rows.append((
+                number,
+                _to_int(log["logIndex"]),
+                hashes[number],
+                _hex(log["transactionHash"]),
+                Web3.to_checksum_address(log["address"]),
+                _hex(log["topics"][0]) if log["topics"] else None,
+                event,
+                None if token_id is None else str(token_id),
+                args.get("from"),
+                args.get("to"),
+                json.dumps(args, default=str),
+                json.dumps([_hex(t) for t in log["topics"]]),
+                _hex(log["data"]),
+            ))
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO logs VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+                self._db.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?)", hashes.items())
+                self._db.execute(
+                    "DELETE FROM blocks WHERE block_number NOT IN"
+                    " (SELECT block_number FROM blocks ORDER BY block_number DESC LIMIT ?)",
+                    (self.reorg_window,),
+                )
+                self._db.execute("INSERT OR REPLACE INTO state VALUES (?, ?)", ("checkpoint", block_number))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _check_reorg(self) -> bool:
+        checkpoint = self.checkpoint
+        with self._lock:
+            known = self._db.execute(
+                "SELECT block_number, block_hash FROM blocks WHERE block_number <= ? ORDER BY block_number DESC LIMIT ?",
+                (checkpoint, self.reorg_window),
+            ).fetchall()
+        if not known or self._block_hash(known[0][0]) == known[0][1]:
+            return False
+
+        # Walk back to the newest stored block that is still canonical
+        blocks = self._rpc([("eth_getBlockByNumber", [hex(number), False]) for number, _ in known])
+        ancestor = self.start_block - 1
+        for (number, stored), block in zip(known, blocks):
+            if block and _hex(block["hash"]) == stored:
+                ancestor = number
+                break
+
+        self.logger.warning(f"Reorg below block {checkpoint}; rewinding index to block {ancestor}")
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("DELETE FROM logs WHERE block_number > ?", (ancestor,))
+                self._db.execute("DELETE FROM blocks WHERE block_number > ?", (ancestor,))
+                self._db.execute("INSERT OR REPLACE INTO state VALUES (?, ?)", ("checkpoint", ancestor))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        self.reorgs += 1
+        return True
+
+    def _block_hash(self, number: int) -> Optional[str]:
+        block = self._rpc([("eth_getBlockByNumber", [hex(number), False])])[0]
+        return _hex(block["hash"]) if block else None
+
+    def _select(self, query: str, params: List[Any], event: Optional[str], limit: Optional[int] = None):
+        if event:
+            query += " AND event = ?"
+            params.append(event)
+        query += " ORDER BY block_number, log_index"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._rows(query, params)
+
+    def _rows(self, query: str, params: List[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [
+            {
+                "block_number": row["block_number"],
+                "log_index": row["log_index"],
+                "block_hash": row["block_hash"],
+                "tx_hash": row["tx_hash"],
+                "address": row["address"],
+                "event": row["event"],
+                "token_id": None if row["token_id"] is None else int(row["token_id"]),
+                "from": row["from_address"],
+                "to": row["to_address"],
+                "args": json.loads(row["args"]),
+                "topics": json.loads(row["topics"]),
+                "data": row["data"],
+            }
+            for row in rows
+        ]
+
+    def _rpc(self, batch: List[Tuple[str, List]]) -> List[Any]:
+        provider = self.web3.provider
+        with self._lock:
+            self.round_trips += 1
+        if callable(getattr(provider, "make_batch_request", None)):
+            responses = provider.make_batch_request(batch)
+            results = []
+            for response in responses:
+                if "error" in response:
+                    error = response["error"]
+                    if isinstance(error, dict):
+                        raise RPCError(str(error.get("message", error)), error.get("code"))
+                    raise RPCError(str(error))
+                results.append(response["result"])
+            return results
+        return [self.web3.manager.request_blocking(method, params) for method, params in batch]
+
+    @staticmethod
+    def _is_range_error(error: Exception) -> bool:
+        if isinstance(error, requests.Timeout):
+            return True
+        message = str(error).lower()
+        return any(marker in message for marker in RANGE_ERRORS)
+
+    @staticmethod
+    def _is_rate_limit(error: Exception) -> bool:
+        if isinstance(error, requests.HTTPError):
+            return getattr(error.response, "status_code", None) == 429
+        if isinstance(error, RPCError) and error.code in RATE_LIMIT_CODES:
+            return True
+        message = str(error).lower()
+        return any(marker in message for marker in RATE_LIMIT_ERRORS)
+
@@ -0,0 +1,210 @@
+import bisect
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider
+from web3.providers.rpc.utils import REQUEST_RETRY_ALLOWLIST, check_if_retry_on_failure
+
+# Status codes worth retrying: rate limiting and gateway/upstream failures
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# web3's allowlist includes eth_sendRawTransaction; a resend after a lost
+# response comes back as "already known", so submissions are not retried here
+DEFAULT_RETRY_METHODS = [m for m in REQUEST_RETRY_ALLOWLIST if m != "eth_sendRawTransaction"]
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+    """
+
+    BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a percentile as the upper bound of the bucket it falls in.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Latency in milliseconds
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return float(self.BUCKETS_MS[i]) if i < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+            "buckets": dict(zip([str(b) for b in self.BUCKETS_MS] + ["inf"], self.counts)),
+        }
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    HTTPProvider tuned for concurrent wallet traffic.
+
+    The stock provider keeps one requests session per thread, so a thread
+    pool opens (and TLS-handshakes) a connection per worker. This provider
+    shares one keep-alive session sized for the expected concurrency, uses
+    separate connect and read timeouts, retries idempotent methods with
+    full-jitter exponential backoff, and records a latency histogram per
+    JSON-RPC method. Batches sent with w3.batch_requests() go through the
+    same session; make_batch_request itself returns raw responses with
+    per-item errors, for callers that must not fail the whole batch.
+    """
+
+    def __init__(
+        self,
+        endpoint_uri: Optional[str] = None,
+        pool_size: int = 32,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        retries: int = 3,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        retry_methods: Sequence[str] = DEFAULT_RETRY_METHODS,
+        **kwargs: Any
+    ):
+        """
+        Initialize the provider.
+
+        Args:
+            endpoint_uri: JSON-RPC endpoint URL
+            pool_size: Keep-alive connections shared by all threads
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait for a response
+            retries: Retries after the first attempt for retryable methods
+            backoff_base: Upper bound of the first retry delay, in seconds
+            backoff_max: Cap on any retry delay, in seconds
+            retry_methods: Methods (or namespaces) safe to retry
+            **kwargs: Passed to HTTPProvider
+        """
+        # Retries are handled here, with jitter, instead of by web3
+        super().__init__(endpoint_uri, exception_retry_configuration=None, **kwargs)
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_methods = list(retry_methods)
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self._headers = self.get_request_headers()
+        self._stats_lock = threading.Lock()
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.retry_count = 0
+        self.failure_count = 0
+        self.logger = logging.getLogger(__name__)
+
+    def _post(self, label: str, request_data: bytes, retryable: bool) -> bytes:
+        attempts = self.retries + 1 if retryable else 1
+        start = time.perf_counter()
+        try:
+            for attempt in range(attempts):
+                try:
+                    response = self.session.post(
+                        self.endpoint_uri, data=request_data, headers=self._headers, timeout=self.timeout
+                    )
+                    if response.status_code in RETRY_STATUSES and attempt < attempts - 1:
+                        raise requests.HTTPError(f"{response.status_code} from {self.endpoint_uri}", response=response)
+                    response.raise_for_status()
+                    return response.content
+                except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                    status = getattr(e.response, "status_code", None) if isinstance(e, requests.HTTPError) else None
+                    if attempt == attempts - 1 or (status is not None and status not in RETRY_STATUSES):
+                        with self._stats_lock:
+                            self.failure_count += 1
+                        raise
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                    self.logger.warning(f"Retrying {label} in {delay:.2f}s after: {e}")
+                    with self._stats_lock:
+                        self.retry_count += 1
+                    time.sleep(delay)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                self.latency.setdefault(label, LatencyHistogram()).observe(elapsed_ms)
+
+    def _make_request(self, method, request_data: bytes) -> bytes:
+        return self._post(method, request_data, check_if_retry_on_failure(method, self.retry_methods))
+
+    def make_batch_request(self, batch_requests: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        retryable = all(check_if_retry_on_failure(method, self.retry_methods) for method, _ in batch_requests)
+        raw_response = self._post("batch", request_data, retryable)
+        responses = self.decode_rpc_response(raw_response)
+        if isinstance(responses, dict):
+            # Some nodes answer a rejected batch with a single error object
+            return [responses] * len(batch_requests)
+        # JSON-RPC does not promise response order; ids follow request order
+        if all(response.get("id") is not None for response in responses):
+            return sorted(responses, key=lambda response: response["id"])
+        return list(responses)
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Latency histogram per JSON-RPC method, plus "batch" for batch requests.
+
+        Returns:
+            Snapshot per method
+        """
+        with self._stats_lock:
+            return {method: histogram.snapshot() for method, histogram in self.latency.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise connection reuse and retries.
+
+        Returns:
+            Requests made, TCP connections opened for them, retries and failures
+        """
+        opened = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+        with self._stats_lock:
+            return {
+                "requests": sum(h.count for h in self.latency.values()),
+                "connections_opened": opened,
+                "retries": self.retry_count,
+                "failures": self.failure_count,
+                "pool_size": self.pool_size,
+            }
+
+    def close(self) -> None:
+        """Close the shared session and its keep-alive connections."""
+        self.session.close()
@@ -0,0 +1,252 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from qube_agent.utils.cache import SimpleCache
+
+# Canonical Multicall3 deployment, at the same address on most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+_AGGREGATE3 = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+_BALANCE_OF = Web3.keccak(text="balanceOf(address)")[:4]
+_ALLOWANCE = Web3.keccak(text="allowance(address,address)")[:4]
+
+
+class BatchReader:
+    """
+    Batched chain reads for balances and allowances.
+
+    All reads in one call are pinned to a single block number. ETH balances
+    go out as one JSON-RPC batch. ERC-20 balanceOf/allowance calls are
+    aggregated through Multicall3 when the chain has it, and otherwise sent
+    as a batch of eth_calls. Results are cached per block for a short TTL,
+    so repeated sweeps inside the same block cost nothing.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        multicall_address: Optional[str] = MULTICALL3_ADDRESS,
+        batch_size: int = 100,
+        multicall_size: int = 256,
+        cache_ttl: float = 2.0,
+        block_ttl: float = 1.0,
+        cache_size: int = 10000
+    ):
+        """
+        Initialize the reader.
+
+        Args:
+            web3: Connected Web3 instance
+            multicall_address: Multicall3 contract address, or None to never aggregate
+            batch_size: Requests per JSON-RPC batch
+            multicall_size: Calls per aggregate3 invocation
+            cache_ttl: Seconds a cached result stays valid
+            block_ttl: Seconds the latest block number is reused before refetching
+            cache_size: Maximum cached results
+        """
+        self.web3 = web3
+        self.multicall_address = Web3.to_checksum_address(multicall_address) if multicall_address else None
+        self.batch_size = batch_size
+        self.multicall_size = multicall_size
+        self.cache_ttl = cache_ttl
+        self.block_ttl = block_ttl
+        self.logger = logging.getLogger(__name__)
+        self._cache = SimpleCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self._block = None
+        self._block_at = 0.0
+        self._has_multicall = None
+        self.round_trips = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def block_number(self) -> int:
+        """
+        Return the latest block number, reusing it for block_ttl seconds.
+
+        Returns:
+            Block number
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._block is not None and now - self._block_at < self.block_ttl:
+                return self._block
+        block = _to_int(self._rpc([("eth_blockNumber", [])])[0])
+        with self._lock:
+            self._block, self._block_at = block, now
+        return block
+
+    @property
+    def has_multicall(self) -> bool:
+        if self._has_multicall is None:
+            if self.multicall_address is None:
+                self._has_multicall = False
+            else:
+                code = self._rpc([("eth_getCode", [self.multicall_address, "latest"])])[0]
+                self._has_multicall = bool(_to_bytes(code))
+        return self._has_multicall
+
+    def eth_balances(self, addresses: Sequence[str], block: Optional[int] = None) -> Dict[str, int]:
+        """
+        Read ETH balances.
+
+        Args:
+            addresses: Account addresses
+            block: Block number to read at. Defaults to the latest block
+
+        Returns:
+            Balance in wei per address
+        """
+        block = self.block_number() if block is None else block
+        return self._cached_reads(
+            [("eth", None, address) for address in addresses], block, self._fetch_eth_balances
+        )
+
+    def erc20_balances(self, token: str, addresses: Sequence[str], block: Optional[int] = None) -> Dict[str, int]:
+        """
+        Read ERC-20 balances for many holders.
+
+        Args:
+            token: Token contract address
+            addresses: Holder addresses
+            block: Block number to read at. Defaults to the latest block
+
+        Returns:
+            Token balance per address
+        """
+        block = self.block_number() if block is None else block
+        token = Web3.to_checksum_address(token)
+        return self._cached_reads(
+            [("balanceOf", token, address) for address in addresses], block, self._fetch_token_calls
+        )
+
+    def erc20_allowances(
+        self, token: str, pairs: Sequence[Tuple[str, str]], block: Optional[int] = None
+    ) -> Dict[Tuple[str, str], int]:
+        """
+        Read ERC-20 allowances for many owner/spender pairs.
+
+        Args:
+            token: Token contract address
+            pairs: (owner, spender) address pairs
+            block: Block number to read at. Defaults to the latest block
+
+        Returns:
+            Allowance per (owner, spender) pair
+        """
+        block = self.block_number() if block is None else block
+        token = Web3.to_checksum_address(token)
+        return self._cached_reads(
+            [("allowance", token, tuple(pair)) for pair in pairs], block, self._fetch_token_calls
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise reader activity.
+
+        Returns:
+            Round trips made, cache hits and misses, and whether Multicall3 is used
+        """
+        return {
+            "round_trips": self.round_trips,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cached": len(self._cache),
+            "multicall": self._has_multicall,
+        }
+
+    def _cached_reads(self, reads: List[Tuple], block: int, fetch) -> Dict[Any, int]:
+        now = time.monotonic()
+        results: Dict[Tuple, int] = {}
+        missing = {}
+        with self._lock:
+            for read in reads:
+                entry = self._cache.get((block,) + read)
+                if entry is not None and now - entry[1] < self.cache_ttl:
+                    results[read] = entry[0]
+                    self.cache_hits += 1
+                else:
+                    missing[read] = None
+            self.cache_misses += len(missing)
+
+        if missing:
+            missing = list(missing)
+            fetched = fetch(missing, block)
+            with self._lock:
+                for read, value in zip(missing, fetched):
+                    self._cache[(block,) + read] = (value, now)
+                    results[read] = value
+        return {read[2]: results[read] for read in reads}
+
+    def _fetch_eth_balances(self, reads: List[Tuple], block: int) -> List[int]:
+        block_tag = hex(block)
+        responses = self._rpc([("eth_getBalance", [read[2], block_tag]) for read in reads])
+        return [_to_int(r) for r in responses]
+
+    def _fetch_token_calls(self, reads: List[Tuple], block: int) -> List[int]:
+        calls = []
+        for kind, token, target in reads:
+            if kind == "balanceOf":
+                data = _BALANCE_OF + encode(["address"], [target])
+            else:
+                data = _ALLOWANCE + encode(["address", "address"], list(target))
+            calls.append((token, data))
+
+        block_tag = hex(block)
+        if not self.has_multicall:
+            responses = self._rpc([
+                ("eth_call", [{"to": token, "data": Web3.to_hex(data)}, block_tag]) for token, data in calls
+            ])
+            return [decode(["uint256"], _to_bytes(r))[0] for r in responses]
+
+        requests = []
+        for start in range(0, len(calls), self.multicall_size):
+            chunk = calls[start:start + self.multicall_size]
+            data = _AGGREGATE3 + encode(["(address,bool,bytes)[]"], [[(t, True, d) for t, d in chunk]])
+            requests.append(("eth_call", [{"to": self.multicall_address, "data": Web3.to_hex(data)}, block_tag]))
+
+        values = []
+        for response in self._rpc(requests):
+            for success, data in decode(["(bool,bytes)[]"], _to_bytes(response))[0]:
+                if not success or len(data) < 32:
+                    raise ValueError("Multicall3 sub-call failed; is the target an ERC-20 contract?")
+                values.append(decode(["uint256"], data)[0])
+        return values
+
+    def _rpc(self, requests: List[Tuple[str, List]]) -> List[Any]:
+        provider = self.web3.provider
+        results = []
+        if callable(getattr(provider, "make_batch_request", None)):
+            for start in range(0, len(requests), self.batch_size):
+                responses = provider.make_batch_request(requests[start:start + self.batch_size])
+                with self._lock:
+                    self.round_trips += 1
+                results.extend(self._unwrap(r) for r in responses)
+            return results
+        # Without batch support, go through web3's middleware so providers
+        # like eth-tester get their request defaults filled in
+        for method, params in requests:
+            results.append(self.web3.manager.request_blocking(method, params))
+            with self._lock:
+                self.round_trips += 1
+        return results
+
+    @staticmethod
+    def _unwrap(response: Dict[str, Any]) -> Any:
+        if "error" in response:
+            error = response["error"]
+            raise ValueError(error.get("message", error) if isinstance(error, dict) else error)
+        return response["result"]
+
+
+def _to_int(value: Any) -> int:
+    return value if isinstance(value, int) else int(value, 16)
+
+
+def _to_bytes(value: Any) -> bytes:
+    return Web3.to_bytes(hexstr=value) if isinstance(value, str) else bytes(value)
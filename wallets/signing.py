@@ -0,0 +1,174 @@
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from eth_account import Account
+
+# Set in each worker process by _init_worker
+_worker_account = None
+
+
+def _init_worker(private_key) -> None:
+    global _worker_account
+    _worker_account = Account.from_key(private_key)
+
+
+def _worker_address() -> str:
+    return _worker_account.address
+
+
+def _sign_batch(transactions: List[Dict[str, Any]]) -> List[bytes]:
+    return [bytes(_worker_account.sign_transaction(tx).raw_transaction) for tx in transactions]
+
+
+class SigningPoolBroken(RuntimeError):
+    """Raised when signing workers keep dying, even after a restart."""
+
+
+class LocalSigner:
+    """
+    Signs inline on the calling thread with a local account.
+    """
+
+    def __init__(self, account):
+        """
+        Initialize the signer.
+
+        Args:
+            account: eth_account LocalAccount
+        """
+        self.account = account
+        self.address = account.address
+
+    def sign(self, transaction: Dict[str, Any]) -> bytes:
+        return bytes(self.account.sign_transaction(transaction).raw_transaction)
+
+    def sign_many(self, transactions: Sequence[Dict[str, Any]]) -> List[bytes]:
+        return [self.sign(tx) for tx in transactions]
+
+    def close(self) -> None:
+        pass
+
+
+class SigningPool:
+    """
+    Signs transactions in a pool of worker processes.
+
+    ECDSA signing holds the GIL, so signing a large payout batch inline
+    serialises on one core. The pool spreads batches over worker processes
+    instead. Callers exchange unsigned transaction dicts for raw signed
+    transactions, and the calling process never builds an account from the
+    key or signs with it. It does keep the key for as long as the pool is
+    open, as the start-up argument of the workers, so it can restart them:
+    when a worker dies the pool is rebuilt once and the call retried.
+    Workers are spawned rather than forked, so they do not inherit the
+    caller's memory or threads.
+    """
+
+    def __init__(
+        self,
+        private_key,
+        max_workers: Optional[int] = None,
+        max_batch: int = 256,
+        mp_context: str = "spawn"
+    ):
+        """
+        Start the worker processes.
+
+        Args:
+            private_key: Key of the signing account, as hex or bytes
+            max_workers: Worker processes. Defaults to the number of CPUs
+            max_batch: Most transactions sent to one worker per task
+            mp_context: multiprocessing start method
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.logger = logging.getLogger(__name__)
+        self._private_key = private_key
+        self._mp_context = multiprocessing.get_context(mp_context)
+        self._lock = threading.Lock()
+        self._executor = self._start()
+        self.address = self._executor.submit(_worker_address).result()
+
+    def _start(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._mp_context,
+            initializer=_init_worker,
+            initargs=(self._private_key,),
+        )
+
+    def _call(self, work: Callable[[ProcessPoolExecutor], Any]) -> Any:
+        """Run work on the executor, restarting the workers once if one died."""
+        executor = self._executor
+        try:
+            return work(executor)
+        except BrokenProcessPool as e:
+            self.logger.warning(f"Signing worker died ({e}); restarting the pool")
+        with self._lock:
+            # Another caller may have restarted it already
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._start()
+            executor = self._executor
+        try:
+            return work(executor)
+        except BrokenProcessPool as e:
+            raise SigningPoolBroken(f"Signing workers died again after a restart: {e}") from e
+
+    def sign(self, transaction: Dict[str, Any]) -> bytes:
+        """
+        Sign one transaction in a worker.
+
+        Args:
+            transaction: Unsigned transaction dict, including nonce and chainId
+
+        Returns:
+            Raw signed transaction
+
+        Raises:
+            SigningPoolBroken: If workers die again after a restart
+        """
+        return self._call(lambda executor: executor.submit(_sign_batch, [transaction]).result()[0])
+
+    def sign_many(self, transactions: Sequence[Dict[str, Any]]) -> List[bytes]:
+        """
+        Sign a batch, split evenly across the workers.
+
+        Args:
+            transactions: Unsigned transaction dicts
+
+        Returns:
+            Raw signed transactions, in input order
+
+        Raises:
+            SigningPoolBroken: If workers die again after a restart
+        """
+        if not transactions:
+            return []
+        size = min(self.max_batch, math.ceil(len(transactions) / self.max_workers))
+        chunks = [list(transactions[i:i + size]) for i in range(0, len(transactions), size)]
+
+        def sign_chunks(executor: ProcessPoolExecutor) -> List[bytes]:
+            signed = []
+            for chunk in executor.map(_sign_batch, chunks):
+                signed.extend(chunk)
+            return signed
+
+        return self._call(sign_chunks)
+
+    def close(self) -> None:
+        """Stop the worker processes and drop this process's reference to the key."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._private_key = None
+
+    def __enter__(self) -> "SigningPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
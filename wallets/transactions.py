@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Union
+
+import requests
+from web3 import Web3
+
+
+class SubmissionUnknown(Exception):
+    """
+    A transaction was sent but the node's answer was lost in transport.
+
+    The node may or may not have accepted it, so its nonce must not be
+    handed out again until the chain has been asked.
+    """
+
+
+class NonceManager:
+    """
+    Hands out account nonces locally.
+
+    The chain is asked for the pending transaction count once, on first use;
+    after that nonces are reserved from a local counter so concurrent
+    transfers never read the same value. Nonces whose transactions were not
+    accepted are released and handed out again before new ones, which closes
+    the gap they would otherwise leave. resync() realigns with the chain when
+    the node reports a nonce error or a submission's outcome is unknown.
+    """
+
+    def __init__(self, fetch_count: Callable[[], int]):
+        """
+        Initialize the nonce manager.
+
+        Args:
+            fetch_count: Returns the account's pending transaction count from the chain
+        """
+        self._fetch_count = fetch_count
+        self._lock = threading.Lock()
+        self._next = None
+        self._released = set()
+        self.logger = logging.getLogger(__name__)
+
+    def reserve(self, count: int = 1) -> List[int]:
+        """
+        Reserve nonces, reusing released ones first.
+
+        Args:
+            count: Number of nonces to reserve
+
+        Returns:
+            Reserved nonces in ascending order
+        """
+        with self._lock:
+            if self._next is None:
+                self._next = self._fetch_count()
+            reused = sorted(self._released)[:count]
+            self._released.difference_update(reused)
+            fresh = list(range(self._next, self._next + count - len(reused)))
+            self._next += len(fresh)
+            return reused + fresh
+
+    def release(self, nonces: Iterable[int]) -> None:
+        """
+        Return nonces whose transactions were never accepted.
+
+        Args:
+            nonces: Nonces to hand out again
+        """
+        with self._lock:
+            self._released.update(nonces)
+            # Released nonces at the top of the range just roll the counter back
+            while self._next is not None and self._next - 1 in self._released:
+                self._next -= 1
+                self._released.discard(self._next)
+
+    def resync(self) -> int:
+        """
+        Realign with the chain's pending transaction count.
+
+        The local counter follows the chain in either direction: forward
+        past nonces used elsewhere, back over nonces whose transactions
+        never reached the node. If the chain cannot be asked, the local view
+        is dropped and the next reserve() asks again.
+
+        Returns:
+            The next nonce that will be handed out
+        """
+        with self._lock:
+            try:
+                count = self._fetch_count()
+            except Exception:
+                self._next = None
+                self._released.clear()
+                raise
+            # Nothing below the count is free, and nothing at or above it is issued
+            self._next = count
+            self._released.clear()
+            self.logger.info(f"Nonce manager resynced at {self._next}")
+            return self._next
+
+    @property
+    def next_nonce(self) -> int:
+        with self._lock:
+            return self._next if self._next is not None else self._fetch_count()
+
+
+class GasPriceCache:
+    """
+    Samples the gas price at most once per refresh interval.
+    """
+
+    def __init__(self, fetch: Callable[[], int], refresh_interval: float = 15.0):
+        """
+        Initialize the gas price cache.
+
+        Args:
+            fetch: Returns the current gas price from the chain
+            refresh_interval: Seconds a sample stays valid
+        """
+        self._fetch = fetch
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._price = None
+        self._sampled_at = 0.0
+        self.samples = 0
+
+    def get(self) -> int:
+        """
+        Return the cached gas price, refreshing it if stale.
+
+        Returns:
+            Gas price in wei
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._price is None or now - self._sampled_at >= self.refresh_interval:
+                self._price = self._fetch()
+                self._sampled_at = now
+                self.samples += 1
+            return self._price
+
+    def invalidate(self) -> None:
+        """Force the next get() to sample the chain."""
+        with self._lock:
+            self._price = None
+
+
+class PipelinedSender:
+    """
+    Submits signed transactions without waiting on each other.
+
+    Over HTTP, transactions are sent as JSON-RPC batches, so a batch costs one
+    round trip however many transactions it holds. Providers without batch
+    support get the raw transactions back to back. Either way only submission
+    is awaited, never inclusion.
+    """
+
+    def __init__(self, web3: Web3, batch_size: int = 100):
+        """
+        Initialize the sender.
+
+        Args:
+            web3: Connected Web3 instance
+            batch_size: Transactions per JSON-RPC batch
+        """
+        self.web3 = web3
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def supports_batching(self) -> bool:
+        return callable(getattr(self.web3.provider, "make_batch_request", None))
+
+    def send(self, raw_transactions: List[bytes]) -> List[Union[str, Exception]]:
+        """
+        Submit signed transactions in order.
+
+        Without batching, submission stops at the first rejection, since the
+        transactions after it would only wait on the missing nonce.
+
+        Args:
+            raw_transactions: Signed transactions, in nonce order
+
+        Returns:
+            One entry per transaction: its hash, or the exception it was
+            rejected (or skipped) with. Transactions lost to a transport
+            failure get a SubmissionUnknown.
+        """
+        if self.supports_batching:
+            results: List[Union[str, Exception]] = []
+            for start in range(0, len(raw_transactions), self.batch_size):
+                results.extend(self._send_batch(raw_transactions[start:start + self.batch_size]))
+            return results
+
+        results = []
+        for i, raw in enumerate(raw_transactions):
+            try:
+                results.append(self.web3.eth.send_raw_transaction(raw).to_0x_hex())
+            except Exception as e:
+                results.append(_unknown(e) if is_transport_error(e) else e)
+                skipped = RuntimeError(f"Not sent: transaction {i} of the batch was rejected")
+                results.extend(skipped for _ in raw_transactions[i + 1:])
+                break
+        return results
+
+    def _send_batch(self, raw_transactions: List[bytes]) -> List[Union[str, Exception]]:
+        requests = [("eth_sendRawTransaction", [Web3.to_hex(raw)]) for raw in raw_transactions]
+        try:
+            responses = self.web3.provider.make_batch_request(requests)
+        except Exception as e:
+            # The batch may have reached the node before the failure
+            return [_unknown(e)] * len(raw_transactions)
+        results: List[Union[str, Exception]] = []
+        for response in responses:
+            if "error" in response:
+                error = response["error"]
+                message = error.get("message", error) if isinstance(error, dict) else error
+                results.append(ValueError(message))
+            else:
+                results.append(response["result"])
+        return results
+
+
+def _unknown(error: Exception) -> SubmissionUnknown:
+    unknown = SubmissionUnknown(f"Submission outcome unknown: {error}")
+    unknown.__cause__ = error
+    return unknown
+
+
+def is_nonce_error(error: Any) -> bool:
+    """Whether a node error means our nonce view is out of date."""
+    return "nonce" in str(error).lower()
+
+
+def is_transport_error(error: Any) -> bool:
+    """Whether an error left a submission's outcome unknown rather than rejected."""
+    return isinstance(error, (SubmissionUnknown, requests.RequestException, OSError))
@@ -1,28 +1,201 @@
 from web3 import Web3
 import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from wallets.provider import PooledHTTPProvider
+from wallets.reads import BatchReader
+from wallets.signing import LocalSigner, SigningPool
+from wallets.transactions import (
+    GasPriceCache, NonceManager, PipelinedSender, SubmissionUnknown, is_nonce_error, is_transport_error
+)
 
 class WalletManager:
-    def __init__(self, provider_url):
-        self.web3 = Web3(Web3.HTTPProvider(provider_url))
-        self.account = self.web3.eth.account.create()
+    def __init__(
+        self,
+        provider_url=None,
+        web3: Optional[Web3] = None,
+        account=None,
+        gas_price_refresh: float = 15.0,
+        batch_size: int = 100,
+        reader: Optional[BatchReader] = None,
+        provider_options: Optional[Dict[str, Any]] = None,
+        signer: Optional[SigningPool] = None
+    ):
+        """
+        Initialize the wallet manager.
+
+        Args:
+            provider_url: JSON-RPC endpoint URL
+            web3 (Optional[Web3]): Preconfigured Web3 instance, used instead of provider_url
+            account: Local account to sign with. Defaults to a freshly created one,
+                unless a signer is given
+            gas_price_refresh (float): Seconds a sampled gas price is reused
+            batch_size (int): Transactions per JSON-RPC batch in transfer_many
+            reader (Optional[BatchReader]): Batched read layer. Defaults to one using
+                the canonical Multicall3 address when the chain has it
+            provider_options (Optional[Dict[str, Any]]): PooledHTTPProvider settings such as
+                pool_size, connect_timeout, read_timeout and retries
+            signer (Optional[SigningPool]): Out-of-process signer holding the key, used
+                instead of signing with account on the calling thread
+        """
+        self.web3 = web3 or Web3(PooledHTTPProvider(provider_url, **(provider_options or {})))
+        self.account = account if account or signer else self.web3.eth.account.create()
+        self.signer = signer or LocalSigner(self.account)
+        self.address = self.signer.address
         self.logger = logging.getLogger(__name__)
-    
+        self.nonces = NonceManager(
+            lambda: self.web3.eth.get_transaction_count(self.address, 'pending')
+        )
+        self.gas_prices = GasPriceCache(lambda: self.web3.eth.gas_price, gas_price_refresh)
+        self.sender = PipelinedSender(self.web3, batch_size=batch_size)
+        self.reader = reader or BatchReader(self.web3, batch_size=batch_size)
+        # Nonces must reach the node in order, so reserve-sign-send is serialised
+        self._send_lock = threading.Lock()
+        self._chain_id = None
+
+    @property
+    def chain_id(self) -> int:
+        if self._chain_id is None:
+            self._chain_id = self.web3.eth.chain_id
+        return self._chain_id
+
+    def _build_transaction(self, to_address, amount, nonce: int, gas_price: int) -> Dict[str, Any]:
+        return {
+            'to': to_address,
+            'value': self.web3.to_wei(amount, 'ether'),
+            'gas': 2000000,
+            'gasPrice': gas_price,
+            'nonce': nonce,
+            'chainId': self.chain_id
+        }
+
+    def _recover_nonce(self, error) -> None:
+        if is_nonce_error(error) or is_transport_error(error):
+            try:
+                self.nonces.resync()
+            except Exception as e:
+                self.logger.warning(f"Nonce resync failed, will retry on next send: {e}")
+
+    def get_balances(self, addresses: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """
+        Read ETH balances in one batch.
+
+        Args:
+            addresses (Optional[Sequence[str]]): Accounts to read. Defaults to this wallet
+
+        Returns:
+            Dict[str, int]: Balance in wei per address
+        """
+        return self.reader.eth_balances(addresses or [self.address])
+
+    def get_token_balances(self, token: str, addresses: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """
+        Read ERC-20 balances for many holders in one aggregated call.
+
+        Args:
+            token (str): Token contract address
+            addresses (Optional[Sequence[str]]): Holders to read. Defaults to this wallet
+
+        Returns:
+            Dict[str, int]: Token balance per address
+        """
+        return self.reader.erc20_balances(token, addresses or [self.address])
+
+    def get_allowances(self, token: str, pairs: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """
+        Read ERC-20 allowances in one aggregated call.
+
+        Args:
+            token (str): Token contract address
+            pairs (Sequence[Tuple[str, str]]): (owner, spender) pairs
+
+        Returns:
+            Dict[Tuple[str, str], int]: Allowance per pair
+        """
+        return self.reader.erc20_allowances(token, pairs)
+
     def transfer_assets(self, to_address, amount, token_type='ETH'):
         try:
             # Secure asset transfer implementation
-            transaction = {
-                'to': to_address,
-                'value': self.web3.to_wei(amount, 'ether'),
-                'gas': 2000000,
-                'gasPrice': self.web3.eth.gas_price,
-                'nonce': self.web3.eth.get_transaction_count(self.account.address)
-            }
-            
-            signed_txn = self.web3.eth.account.sign_transaction(transaction, self.account.privatekey)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            
-            self.logger.info(f"Transfer of {amount} {token_type} to {to_address}. Tx Hash: {tx_hash.hex()}")
+            with self._send_lock:
+                nonce = self.nonces.reserve()[0]
+                try:
+                    transaction = self._build_transaction(to_address, amount, nonce, self.gas_prices.get())
+                    tx_hash = self.web3.eth.send_raw_transaction(self.signer.sign(transaction))
+                except Exception as e:
+                    # After a transport failure the node may hold the transaction
+                    if not is_transport_error(e):
+                        self.nonces.release([nonce])
+                    self._recover_nonce(e)
+                    raise
+
+            self.logger.info(f"Transfer of {amount} {token_type} to {to_address}. Tx Hash: {tx_hash.to_0x_hex()}")
             return tx_hash
         except Exception as e:
             self.logger.error(f"Asset transfer failed: {e}")
             raise
+
+    def transfer_many(self, transfers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Sign a batch of transfers offline and submit them in one pipeline.
+
+        With a SigningPool signer the batch is signed across its worker
+        processes.
+
+        Nonces for the whole batch are reserved at once and the gas price is
+        sampled once, so the batch costs no per-transfer RPC calls besides
+        submission. Transfers the node rejects free their nonces for reuse.
+        Transfers lost to a transport failure may still have reached the node,
+        so their nonces are kept and the nonce manager resyncs with the chain.
+
+        Args:
+            transfers (List[Dict[str, Any]]): Items of {'to': address, 'amount': ether},
+                with an optional 'token_type'
+
+        Returns:
+            List[Dict[str, Any]]: One result per transfer, in input order, with its
+                'nonce' and 'tx_hash', or an 'error' if it was not accepted. A transfer
+                whose outcome is unknown has both, the hash being the one to poll for
+        """
+        if not transfers:
+            return []
+
+        with self._send_lock:
+            nonces = self.nonces.reserve(len(transfers))
+            gas_price = self.gas_prices.get()
+            try:
+                raw_transactions = self.signer.sign_many([
+                    self._build_transaction(transfer['to'], transfer['amount'], nonce, gas_price)
+                    for transfer, nonce in zip(transfers, nonces)
+                ])
+            except Exception:
+                self.nonces.release(nonces)
+                raise
+
+            outcomes = self.sender.send(raw_transactions)
+
+            failures = [o for o in outcomes if isinstance(o, Exception)]
+            rejected = [
+                nonce for nonce, outcome in zip(nonces, outcomes)
+                if isinstance(outcome, Exception) and not isinstance(outcome, SubmissionUnknown)
+            ]
+            if rejected:
+                self.nonces.release(rejected)
+            recover = next((o for o in failures if is_transport_error(o) or is_nonce_error(o)), None)
+            if recover is not None:
+                self._recover_nonce(recover)
+
+        results = []
+        for transfer, nonce, raw, outcome in zip(transfers, nonces, raw_transactions, outcomes):
+            result = {'to': transfer['to'], 'amount': transfer['amount'], 'nonce': nonce}
+            if isinstance(outcome, Exception):
+                result['error'] = str(outcome)
+                if isinstance(outcome, SubmissionUnknown):
+                    result['tx_hash'] = Web3.keccak(raw).to_0x_hex()
+            else:
+                result['tx_hash'] = outcome
+            results.append(result)
+
+        self.logger.info(f"Submitted {len(transfers) - len(failures)} of {len(transfers)} transfers")
+        return results
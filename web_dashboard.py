@@ -1,6 +1,8 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, Response, stream_with_context
 from qube_agent.utils.web_interface import WebInterfaceManager
+from qube_agent.utils.dashboard_store import SQLiteDashboardStore, RetentionJob
 import logging
+import os
 import threading
 import webbrowser
 import time
@@ -9,11 +11,23 @@ import time
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+# Share dashboards across workers and restarts when a database is configured
+DASHBOARD_DB = os.environ.get('DASHBOARD_DB')
+dashboard_store = SQLiteDashboardStore(DASHBOARD_DB) if DASHBOARD_DB else None
+
 # Global web interface manager
-web_interface = WebInterfaceManager(debug=True)
+web_interface = WebInterfaceManager(debug=True, store=dashboard_store)
+
+if dashboard_store is not None:
+    RetentionJob(
+        dashboard_store,
+        max_age_seconds=float(os.environ.get('DASHBOARD_RETENTION_SECONDS', 7 * 24 * 3600)),
+        max_entries=int(os.environ.get('DASHBOARD_MAX_ENTRIES', 10000))
+    ).start()
 
 # Create an initial agent dashboard
 AGENT_ID = web_interface.create_agent_dashboard(
+    agent_id=os.environ.get('DASHBOARD_AGENT_ID'),
     initial_config={
         "name": "QubeAgent Demo",
         "version": "0.2.1"
@@ -38,6 +52,19 @@ def get_dashboard():
         'qube_logs': dashboard.get('qube_logs', [])
     })
 
+@app.route('/api/dashboard/stream')
+def stream_dashboard():
+    """Server-sent events stream of live dashboard updates"""
+    subscription = web_interface.event_bus.subscribe(agent_id=AGENT_ID)
+    return Response(
+        stream_with_context(web_interface.event_bus.stream(subscription)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 def simulate_agent_activity():
     """Simulate ongoing agent activity"""
     while True:
@@ -107,47 +134,66 @@ def write_dashboard_template():
         </div>
 
         <script>
+            function renderConfig(config) {
+                document.getElementById('config').innerHTML = 
+                    Object.entries(config)
+                        .map(([key, value]) => `<p><strong>${key}:</strong> ${value}</p>`)
+                        .join('');
+            }
+
+            function renderStatus(entry) {
+                return `
+                    <div class="log-entry">
+                        <p><strong>Objective:</strong> ${entry.objective}</p>
+                        <p><strong>Results:</strong> ${JSON.stringify(entry.results)}</p>
+                        <p><small>${entry.timestamp}</small></p>
+                    </div>
+                `;
+            }
+
+            function renderQubeLog(log) {
+                return `
+                    <div class="log-entry">
+                        <p><strong>Token ID:</strong> ${log.token_id}</p>
+                        <p><strong>Data:</strong> ${JSON.stringify(log.data)}</p>
+                        <p><small>${log.timestamp}</small></p>
+                    </div>
+                `;
+            }
+
             function updateDashboard() {
                 fetch('/api/dashboard')
                     .then(response => response.json())
                     .then(data => {
-                        // Update Configuration
-                        document.getElementById('config').innerHTML = 
-                            Object.entries(data.config)
-                                .map(([key, value]) => `<p><strong>${key}:</strong> ${value}</p>`)
-                                .join('');
-
-                        // Update Status History
+                        renderConfig(data.config);
                         document.getElementById('status-history').innerHTML = 
-                            data.status_history
-                                .map(entry => `
-                                    <div class="log-entry">
-                                        <p><strong>Objective:</strong> ${entry.objective}</p>
-                                        <p><strong>Results:</strong> ${JSON.stringify(entry.results)}</p>
-                                        <p><small>${entry.timestamp}</small></p>
-                                    </div>
-                                `)
-                                .join('');
-
-                        // Update Qube Logs
+                            data.status_history.map(renderStatus).join('');
                         document.getElementById('qube-logs').innerHTML = 
-                            data.qube_logs
-                                .map(log => `
-                                    <div class="log-entry">
-                                        <p><strong>Token ID:</strong> ${log.token_id}</p>
-                                        <p><strong>Data:</strong> ${JSON.stringify(log.data)}</p>
-                                        <p><small>${log.timestamp}</small></p>
-                                    </div>
-                                `)
-                                .join('');
+                            data.qube_logs.map(renderQubeLog).join('');
                     });
             }
 
             // Initial update
             updateDashboard();
-            
-            // Update every 10 seconds
-            setInterval(updateDashboard, 10000);
+
+            if (window.EventSource) {
+                // Push updates as they happen
+                const stream = new EventSource('/api/dashboard/stream');
+                stream.addEventListener('config', e => renderConfig(JSON.parse(e.data)));
+                stream.addEventListener('status', e => {
+                    document.getElementById('status-history')
+                        .insertAdjacentHTML('beforeend', renderStatus(JSON.parse(e.data)));
+                });
+                stream.addEventListener('qube_log', e => {
+                    document.getElementById('qube-logs')
+                        .insertAdjacentHTML('beforeend', renderQubeLog(JSON.parse(e.data)));
+                });
+                // Events were dropped while we lagged; refetch the full state
+                stream.addEventListener('resync', updateDashboard);
+            } else {
+                // Fall back to polling every 10 seconds
+                setInterval(updateDashboard, 10000);
+            }
         </script>
     </body>
     </html>